@@ -0,0 +1,43 @@
+"""add embedding cache table
+
+Revision ID: a3f1c2d4e5b6
+Revises: 87c52ec39f84
+Create Date: 2026-10-16 12:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "a3f1c2d4e5b6"
+down_revision = "87c52ec39f84"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "embedding_cache",
+        sa.Column("cache_key", sa.String(), nullable=False),
+        sa.Column("embedding", sa.LargeBinary(), nullable=False),
+        sa.Column(
+            "last_accessed_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("cache_key"),
+    )
+    op.create_index(
+        "ix_embedding_cache_last_accessed_at",
+        "embedding_cache",
+        ["last_accessed_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_embedding_cache_last_accessed_at", table_name="embedding_cache")
+    op.drop_table("embedding_cache")
@@ -23,6 +23,7 @@ from tenacity import wait_random_exponential
 
 from ee.onyx.db.connector_credential_pair import get_all_auto_sync_cc_pairs
 from ee.onyx.db.document import upsert_document_external_perms
+from ee.onyx.db.document import upsert_document_external_perms_batch
 from ee.onyx.external_permissions.sync_params import get_source_perm_sync_config
 from onyx.access.models import DocExternalAccess
 from onyx.background.celery.apps.app_base import task_logger
@@ -32,6 +33,7 @@ from onyx.background.celery.celery_redis import celery_get_queued_task_ids
 from onyx.background.celery.celery_redis import celery_get_unacked_task_ids
 from onyx.background.celery.tasks.beat_schedule import CLOUD_BEAT_MULTIPLIER_DEFAULT
 from onyx.configs.app_configs import JOB_TIMEOUT
+from onyx.configs.app_configs import PERMISSION_SYNC_UPDATE_BATCH_SIZE
 from onyx.configs.constants import CELERY_GENERIC_BEAT_LOCK_TIMEOUT
 from onyx.configs.constants import CELERY_PERMISSIONS_SYNC_LOCK_TIMEOUT
 from onyx.configs.constants import CELERY_TASK_WAIT_FOR_FENCE_TIMEOUT
@@ -75,8 +77,10 @@ from onyx.redis.redis_connector_doc_perm_sync import RedisConnectorPermissionSyn
 from onyx.redis.redis_pool import get_redis_client
 from onyx.redis.redis_pool import get_redis_replica_client
 from onyx.redis.redis_pool import redis_lock_dump
+from onyx.redis.redis_utils import get_active_fences
 from onyx.server.runtime.onyx_runtime import OnyxRuntime
 from onyx.server.utils import make_short_id
+from onyx.utils.batching import batch_generator
 from onyx.utils.logger import doc_permission_sync_ctx
 from onyx.utils.logger import format_error_for_logging
 from onyx.utils.logger import LoggerContextVars
@@ -240,14 +244,7 @@ def check_for_doc_permissions_sync(self: Task, *, tenant_id: str) -> bool | None
         # use a lookup table to find active fences. We still have to verify the fence
         # exists since it is an optimization and not the source of truth.
         lock_beat.reacquire()
-        keys = cast(set[Any], r_replica.smembers(OnyxRedisConstants.ACTIVE_FENCES))
-        for key in keys:
-            key_bytes = cast(bytes, key)
-
-            if not r.exists(key_bytes):
-                r.srem(OnyxRedisConstants.ACTIVE_FENCES, key_bytes)
-                continue
-
+        for key_bytes in get_active_fences(r, r_replica):
             key_str = key_bytes.decode("utf-8")
             if key_str.startswith(RedisConnectorPermissionSync.FENCE_PREFIX):
                 with get_session_with_current_tenant() as db_session:
@@ -571,10 +568,12 @@ def connector_permission_sync_generator_task(
 
             tasks_generated = 0
             docs_with_errors = 0
-            for doc_external_access in document_external_accesses:
+            for permissions_batch in batch_generator(
+                document_external_accesses, PERMISSION_SYNC_UPDATE_BATCH_SIZE
+            ):
                 result = redis_connector.permissions.update_db(
                     lock=lock,
-                    new_permissions=[doc_external_access],
+                    new_permissions=permissions_batch,
                     source_string=source_type,
                     connector_id=cc_pair.connector.id,
                     credential_id=cc_pair.credential.id,
@@ -695,6 +694,68 @@ def document_update_permissions(
     return True
 
 
+# NOTE(rkuo): this should probably move to the db layer
+@retry(
+    retry=retry_if_exception(is_retryable_sqlalchemy_error),
+    wait=wait_random_exponential(
+        multiplier=1, max=DOCUMENT_PERMISSIONS_UPDATE_MAX_WAIT
+    ),
+    stop=stop_after_delay(DOCUMENT_PERMISSIONS_UPDATE_STOP_AFTER),
+)
+def document_update_permissions_batch(
+    tenant_id: str,
+    permissions_batch: list[DocExternalAccess],
+    source_type_str: str,
+    connector_id: int,
+    credential_id: int,
+) -> bool:
+    """Same as document_update_permissions for many documents, in a single session
+    and transaction. Documents whose permissions didn't change are not written."""
+    start = time.monotonic()
+
+    # the last permissions win if the source yielded a document more than once
+    doc_id_to_external_access = {
+        permissions.doc_id: permissions.external_access
+        for permissions in permissions_batch
+    }
+    emails = {
+        email
+        for external_access in doc_id_to_external_access.values()
+        for email in external_access.external_user_emails
+    }
+
+    with get_session_with_tenant(tenant_id=tenant_id) as db_session:
+        # Add the users to the DB if they don't exist
+        batch_add_ext_perm_user_if_not_exists(
+            db_session=db_session,
+            emails=list(emails),
+            continue_on_error=True,
+        )
+        created_doc_ids = upsert_document_external_perms_batch(
+            db_session=db_session,
+            doc_id_to_external_access=doc_id_to_external_access,
+            source_type=DocumentSource(source_type_str),
+        )
+        if created_doc_ids:
+            # If new documents were created, we associate them with the cc_pair
+            upsert_document_by_connector_credential_pair(
+                db_session=db_session,
+                connector_id=connector_id,
+                credential_id=credential_id,
+                document_ids=created_doc_ids,
+            )
+
+    elapsed = time.monotonic() - start
+    task_logger.info(
+        f"connector_id={connector_id} "
+        f"docs={len(doc_id_to_external_access)} "
+        f"created={len(created_doc_ids)} "
+        f"action=update_permissions_batch "
+        f"elapsed={elapsed:.2f}"
+    )
+    return True
+
+
 def validate_permission_sync_fences(
     tenant_id: str,
     r: Redis,
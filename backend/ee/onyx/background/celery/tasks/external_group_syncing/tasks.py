@@ -27,6 +27,7 @@ from ee.onyx.external_permissions.sync_params import (
     get_all_cc_pair_agnostic_group_sync_sources,
 )
 from ee.onyx.external_permissions.sync_params import get_source_perm_sync_config
+from onyx.access.acl_cache import invalidate_user_acl_cache
 from onyx.background.celery.apps.app_base import task_logger
 from onyx.background.celery.celery_redis import celery_find_task
 from onyx.background.celery.celery_redis import celery_get_unacked_task_ids
@@ -567,6 +568,9 @@ def _perform_external_group_sync(
         )
         remove_stale_external_groups(db_session, cc_pair_id)
 
+        # group memberships changed, cached user ACLs are outdated
+        invalidate_user_acl_cache(tenant_id)
+
         # Calculate total unique users processed
         total_users_processed = len(seen_users)
 
@@ -2,6 +2,8 @@ from datetime import datetime
 from datetime import timezone
 
 from sqlalchemy import select
+from sqlalchemy import update
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
 
 from onyx.access.models import ExternalAccess
@@ -101,3 +103,95 @@ def upsert_document_external_perms(
         db_session.commit()
 
     return False
+
+
+def upsert_document_external_perms_batch(
+    db_session: Session,
+    doc_id_to_external_access: dict[str, ExternalAccess],
+    source_type: DocumentSource,
+) -> list[str]:
+    """
+    Batched version of upsert_document_external_perms. Reads the current permissions
+    of all documents in one query and only writes the documents whose permissions
+    actually changed, so only those get a new `last_modified` and are synced to the
+    document index again. Returns the ids of the documents that were created.
+    NOTE: this is Postgres specific and will replace any existing external access.
+    """
+    if not doc_id_to_external_access:
+        return []
+
+    existing_documents = {
+        row.id: row
+        for row in db_session.execute(
+            select(
+                DbDocument.id,
+                DbDocument.external_user_emails,
+                DbDocument.external_user_group_ids,
+                DbDocument.is_public,
+            ).where(DbDocument.id.in_(list(doc_id_to_external_access.keys())))
+        )
+    }
+
+    now = datetime.now(timezone.utc)
+    new_documents: list[dict] = []
+    changed_documents: list[dict] = []
+    # sorted to take the row locks in a consistent order across concurrent syncs
+    for doc_id in sorted(doc_id_to_external_access):
+        external_access = doc_id_to_external_access[doc_id]
+        prefixed_external_groups: set[str] = {
+            build_ext_group_name_for_onyx(
+                ext_group_name=group_id,
+                source=source_type,
+            )
+            for group_id in external_access.external_user_group_ids
+        }
+
+        existing_document = existing_documents.get(doc_id)
+        if existing_document is None:
+            # still store the external access so that it is already there if the
+            # document is indexed later
+            new_documents.append(
+                {
+                    "id": doc_id,
+                    "semantic_id": "",
+                    "external_user_emails": list(external_access.external_user_emails),
+                    "external_user_group_ids": list(prefixed_external_groups),
+                    "is_public": external_access.is_public,
+                }
+            )
+        elif (
+            external_access.external_user_emails
+            != set(existing_document.external_user_emails or [])
+            or prefixed_external_groups
+            != set(existing_document.external_user_group_ids or [])
+            or external_access.is_public != existing_document.is_public
+        ):
+            changed_documents.append(
+                {
+                    "id": doc_id,
+                    "external_user_emails": list(external_access.external_user_emails),
+                    "external_user_group_ids": list(prefixed_external_groups),
+                    "is_public": external_access.is_public,
+                    "last_modified": now,
+                }
+            )
+
+    created_doc_ids: list[str] = []
+    if new_documents:
+        # the document may have been created concurrently (e.g. by indexing), in that
+        # case it keeps the permissions it was created with until the next sync
+        created_doc_ids = list(
+            db_session.scalars(
+                insert(DbDocument)
+                .values(new_documents)
+                .on_conflict_do_nothing(index_elements=["id"])
+                .returning(DbDocument.id)
+            )
+        )
+
+    if changed_documents:
+        # bulk UPDATE by primary key
+        db_session.execute(update(DbDocument), changed_documents)
+
+    db_session.commit()
+    return created_doc_ids
@@ -0,0 +1,186 @@
+import asyncio
+import time
+from collections import deque
+from collections.abc import Callable
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import Any
+from typing import Generic
+from typing import TypeVar
+
+from onyx.utils.logger import setup_logger
+
+logger = setup_logger()
+
+InputT = TypeVar("InputT")
+OutputT = TypeVar("OutputT")
+
+# Rough average for English text with the usual subword tokenizers, it only needs to
+# be good enough to keep batches of long passages from blowing up memory
+_CHARS_PER_TOKEN = 4
+
+
+def estimate_num_tokens(text: str, max_tokens: int | None = None) -> int:
+    num_tokens = len(text) // _CHARS_PER_TOKEN + 1
+    return min(num_tokens, max_tokens) if max_tokens else num_tokens
+
+
+@dataclass
+class _PendingRequest(Generic[InputT, OutputT]):
+    inputs: list[InputT]
+    num_tokens: int
+    enqueued_at: float
+    future: "asyncio.Future[list[OutputT]]"
+
+
+class MicroBatcher(Generic[InputT, OutputT]):
+    """Coalesces concurrent requests against the same model into a single forward
+    pass. Requests are queued, and a single worker per batcher waits up to
+    `max_wait_seconds` (measured from the oldest queued request) for more work to
+    arrive, then runs everything that fits into the size / token budget as one
+    batch in the thread pool and scatters the outputs back to the callers.
+
+    A request is never split, a single request that is larger than the budget is
+    run as a batch of its own. Since there is only one worker, the model is never
+    called concurrently by the same batcher."""
+
+    def __init__(
+        self,
+        name: str,
+        process_batch: Callable[[list[InputT]], Sequence[OutputT]],
+        max_wait_seconds: float,
+        max_batch_size: int,
+        max_batch_tokens: int,
+    ) -> None:
+        self.name = name
+        self._process_batch = process_batch
+        self._max_wait_seconds = max_wait_seconds
+        self._max_batch_size = max_batch_size
+        self._max_batch_tokens = max_batch_tokens
+
+        self._pending: deque[_PendingRequest[InputT, OutputT]] = deque()
+        self._worker: asyncio.Task[None] | None = None
+
+    async def submit(self, inputs: list[InputT], num_tokens: int) -> list[OutputT]:
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[list[OutputT]] = loop.create_future()
+        self._pending.append(
+            _PendingRequest(
+                inputs=inputs,
+                num_tokens=num_tokens,
+                enqueued_at=time.monotonic(),
+                future=future,
+            )
+        )
+
+        if (
+            self._worker is None
+            or self._worker.done()
+            or self._worker.get_loop() is not loop
+        ):
+            self._worker = loop.create_task(self._run())
+
+        return await future
+
+    def _is_full(self) -> bool:
+        num_inputs = 0
+        num_tokens = 0
+        for request in self._pending:
+            num_inputs += len(request.inputs)
+            num_tokens += request.num_tokens
+            if (
+                num_inputs >= self._max_batch_size
+                or num_tokens >= self._max_batch_tokens
+            ):
+                return True
+        return False
+
+    def _take_batch(
+        self, loop: asyncio.AbstractEventLoop
+    ) -> list[_PendingRequest[InputT, OutputT]]:
+        batch: list[_PendingRequest[InputT, OutputT]] = []
+        num_inputs = 0
+        num_tokens = 0
+        while self._pending:
+            request = self._pending[0]
+            # callers that gave up (or belong to an event loop that is gone) are dropped
+            if request.future.done() or request.future.get_loop() is not loop:
+                self._pending.popleft()
+                continue
+
+            if batch and (
+                num_inputs + len(request.inputs) > self._max_batch_size
+                or num_tokens + request.num_tokens > self._max_batch_tokens
+            ):
+                break
+
+            batch.append(self._pending.popleft())
+            num_inputs += len(request.inputs)
+            num_tokens += request.num_tokens
+        return batch
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while self._pending:
+            if self._max_wait_seconds > 0 and not self._is_full():
+                wait_until = self._pending[0].enqueued_at + self._max_wait_seconds
+                remaining = wait_until - time.monotonic()
+                if remaining > 0:
+                    await asyncio.sleep(remaining)
+
+            batch = self._take_batch(loop)
+            if not batch:
+                continue
+
+            inputs = [item for request in batch for item in request.inputs]
+            logger.debug(
+                f"Running batch for {self.name}: requests={len(batch)} inputs={len(inputs)}"
+            )
+            try:
+                outputs = await loop.run_in_executor(None, self._process_batch, inputs)
+                if len(outputs) != len(inputs):
+                    raise RuntimeError(
+                        f"Expected {len(inputs)} outputs from {self.name}, got {len(outputs)}"
+                    )
+            except Exception as e:
+                for request in batch:
+                    if not request.future.done():
+                        request.future.set_exception(e)
+                continue
+
+            offset = 0
+            for request in batch:
+                num_inputs = len(request.inputs)
+                if not request.future.done():
+                    request.future.set_result(
+                        list(outputs[offset : offset + num_inputs])
+                    )
+                offset += num_inputs
+
+
+_BATCHERS: dict[tuple[Any, ...], tuple[Any, MicroBatcher]] = {}
+
+
+def get_batcher(
+    key: tuple[Any, ...],
+    model: Any,
+    process_batch: Callable[[list[InputT]], Sequence[OutputT]],
+    max_wait_seconds: float,
+    max_batch_size: int,
+    max_batch_tokens: int,
+) -> MicroBatcher[InputT, OutputT]:
+    """Returns the batcher for `key`, creating a new one if there is none yet or
+    if the underlying model object was replaced (e.g. reloaded)."""
+    existing = _BATCHERS.get(key)
+    if existing is not None and existing[0] is model:
+        return existing[1]
+
+    batcher: MicroBatcher[InputT, OutputT] = MicroBatcher(
+        name=str(key),
+        process_batch=process_batch,
+        max_wait_seconds=max_wait_seconds,
+        max_batch_size=max_batch_size,
+        max_batch_tokens=max_batch_tokens,
+    )
+    _BATCHERS[key] = (model, batcher)
+    return batcher
@@ -1,22 +1,32 @@
-import asyncio
 import time
 from typing import Any
 from typing import Optional
 from typing import TYPE_CHECKING
 
+import numpy as np
 from fastapi import APIRouter
 from fastapi import HTTPException
 from fastapi import Request
+from fastapi import Response
 
+from model_server.batching import estimate_num_tokens
+from model_server.batching import get_batcher
+from model_server.batching import MicroBatcher
 from model_server.utils import simple_log_function_time
 from onyx.utils.logger import setup_logger
 from shared_configs.configs import INDEXING_ONLY
+from shared_configs.configs import MODEL_SERVER_BATCH_WAIT_MS
+from shared_configs.configs import MODEL_SERVER_MAX_BATCH_SIZE
+from shared_configs.configs import MODEL_SERVER_MAX_BATCH_TOKENS
 from shared_configs.enums import EmbedTextType
 from shared_configs.model_server_models import Embedding
 from shared_configs.model_server_models import EmbedRequest
 from shared_configs.model_server_models import EmbedResponse
+from shared_configs.model_server_models import encode_embeddings
+from shared_configs.model_server_models import get_embeddings_media_type
 from shared_configs.model_server_models import RerankRequest
 from shared_configs.model_server_models import RerankResponse
+from shared_configs.model_server_models import select_embeddings_dtype
 
 if TYPE_CHECKING:
     from sentence_transformers import CrossEncoder, SentenceTransformer
@@ -107,7 +117,9 @@ ENCODING_RETRY_DELAY = 0.1
 def _concurrent_embedding(
     texts: list[str], model: "SentenceTransformer", normalize_embeddings: bool
 ) -> Any:
-    """Synchronous wrapper for concurrent_embedding to use with run_in_executor."""
+    """Synchronous wrapper for concurrent_embedding to use with run_in_executor.
+    Requests for the same model are serialized by the batcher, the retry is kept
+    for requests that use different normalization settings on the same model."""
     for _ in range(ENCODING_RETRIES):
         try:
             return model.encode(texts, normalize_embeddings=normalize_embeddings)
@@ -121,7 +133,6 @@ def _concurrent_embedding(
     return model.encode(texts, normalize_embeddings=normalize_embeddings)
 
 
-@simple_log_function_time()
 async def embed_text(
     texts: list[str],
     model_name: str | None,
@@ -130,6 +141,28 @@ async def embed_text(
     prefix: str | None,
     gpu_type: str = "UNKNOWN",
 ) -> list[Embedding]:
+    embeddings = await embed_text_array(
+        texts=texts,
+        model_name=model_name,
+        max_context_length=max_context_length,
+        normalize_embeddings=normalize_embeddings,
+        prefix=prefix,
+        gpu_type=gpu_type,
+    )
+    return embeddings.tolist()
+
+
+@simple_log_function_time()
+async def embed_text_array(
+    texts: list[str],
+    model_name: str | None,
+    max_context_length: int,
+    normalize_embeddings: bool,
+    prefix: str | None,
+    gpu_type: str = "UNKNOWN",
+) -> np.ndarray:
+    """Same as `embed_text`, but returns the embeddings as a 2D array so that they can
+    be sent back without converting every value to a Python float."""
     if not all(texts):
         logger.error("Empty strings provided for embedding")
         raise ValueError("Empty strings are not allowed for embedding.")
@@ -157,17 +190,25 @@ async def embed_text(
         local_model = get_embedding_model(
             model_name=model_name, max_context_length=max_context_length
         )
-        # Run CPU-bound embedding in a thread pool
-        embeddings_vectors = await asyncio.get_event_loop().run_in_executor(
-            None,
-            lambda: _concurrent_embedding(
-                prefixed_texts, local_model, normalize_embeddings
+        # Run CPU-bound embedding in a thread pool, batched together with any other
+        # concurrent requests for the same model
+        batcher: MicroBatcher[str, Any] = get_batcher(
+            key=("embed", model_name, normalize_embeddings),
+            model=local_model,
+            process_batch=lambda batch_texts: _concurrent_embedding(
+                batch_texts, local_model, normalize_embeddings
+            ),
+            max_wait_seconds=MODEL_SERVER_BATCH_WAIT_MS / 1000,
+            max_batch_size=MODEL_SERVER_MAX_BATCH_SIZE,
+            max_batch_tokens=MODEL_SERVER_MAX_BATCH_TOKENS,
+        )
+        embeddings_vectors = await batcher.submit(
+            prefixed_texts,
+            num_tokens=sum(
+                estimate_num_tokens(text, max_context_length) for text in prefixed_texts
             ),
         )
-        embeddings = [
-            embedding if isinstance(embedding, list) else embedding.tolist()
-            for embedding in embeddings_vectors
-        ]
+        embeddings = np.asarray(embeddings_vectors)
 
         elapsed = time.monotonic() - start
         logger.info(
@@ -192,24 +233,52 @@ async def embed_text(
 @simple_log_function_time()
 async def local_rerank(query: str, docs: list[str], model_name: str) -> list[float]:
     cross_encoder = get_local_reranking_model(model_name)
-    # Run CPU-bound reranking in a thread pool
-    return await asyncio.get_event_loop().run_in_executor(
-        None,
-        lambda: cross_encoder.predict([(query, doc) for doc in docs]).tolist(),  # type: ignore
+    # Run CPU-bound reranking in a thread pool, batched together with any other
+    # concurrent requests
+    batcher = get_batcher(
+        key=("rerank", model_name),
+        model=cross_encoder,
+        process_batch=lambda pairs: cross_encoder.predict(pairs).tolist(),  # type: ignore
+        max_wait_seconds=MODEL_SERVER_BATCH_WAIT_MS / 1000,
+        max_batch_size=MODEL_SERVER_MAX_BATCH_SIZE,
+        max_batch_tokens=MODEL_SERVER_MAX_BATCH_TOKENS,
+    )
+    pairs = [(query, doc) for doc in docs]
+    return await batcher.submit(
+        pairs,
+        num_tokens=sum(estimate_num_tokens(query + doc) for query, doc in pairs),
     )
 
 
-@router.post("/bi-encoder-embed")
+@router.post("/bi-encoder-embed", response_model=EmbedResponse)
 async def route_bi_encoder_embed(
     request: Request,
     embed_request: EmbedRequest,
-) -> EmbedResponse:
-    return await process_embed_request(embed_request, request.app.state.gpu_type)
+) -> EmbedResponse | Response:
+    # clients that accept it get a raw little-endian buffer instead of JSON floats
+    dtype = select_embeddings_dtype(request.headers.get("accept"))
+    if dtype is None:
+        return await process_embed_request(embed_request, request.app.state.gpu_type)
+
+    embeddings = await _process_embed_request_array(
+        embed_request, request.app.state.gpu_type
+    )
+    return Response(
+        content=encode_embeddings(embeddings, dtype),
+        media_type=get_embeddings_media_type(dtype),
+    )
 
 
 async def process_embed_request(
     embed_request: EmbedRequest, gpu_type: str = "UNKNOWN"
 ) -> EmbedResponse:
+    embeddings = await _process_embed_request_array(embed_request, gpu_type)
+    return EmbedResponse(embeddings=embeddings.tolist())
+
+
+async def _process_embed_request_array(
+    embed_request: EmbedRequest, gpu_type: str = "UNKNOWN"
+) -> np.ndarray:
     from litellm.exceptions import RateLimitError
 
     # Only local models should use this endpoint - API providers should make direct API calls
@@ -233,7 +302,7 @@ async def process_embed_request(
         else:
             prefix = None
 
-        embeddings = await embed_text(
+        return await embed_text_array(
             texts=embed_request.texts,
             model_name=embed_request.model_name,
             max_context_length=embed_request.max_context_length,
@@ -241,7 +310,6 @@ async def process_embed_request(
             prefix=prefix,
             gpu_type=gpu_type,
         )
-        return EmbedResponse(embeddings=embeddings)
     except RateLimitError as e:
         raise HTTPException(
             status_code=429,
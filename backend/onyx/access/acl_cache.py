@@ -0,0 +1,123 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import cast
+
+from sqlalchemy.orm import Session
+
+from onyx.access.access import get_acl_for_user
+from onyx.configs.app_configs import DISABLE_USER_ACL_CACHE
+from onyx.configs.app_configs import USER_ACL_CACHE_LOCAL_MAX_ENTRIES
+from onyx.configs.app_configs import USER_ACL_CACHE_TTL_SECONDS
+from onyx.db.models import User
+from onyx.redis.redis_pool import get_redis_client
+from onyx.utils.logger import setup_logger
+from shared_configs.contextvars import get_current_tenant_id
+
+logger = setup_logger()
+
+USER_ACL_REDIS_PREFIX = "user_acl"
+# bumped on every invalidation, cached ACLs of older generations are never read again
+USER_ACL_GENERATION_KEY = f"{USER_ACL_REDIS_PREFIX}_generation"
+
+
+class _LocalUserAclCache:
+    """Bounded LRU of user ACLs with a per entry expiry. Each entry remembers the
+    generation it was computed in so that it is dropped once the cache is invalidated
+    from any process."""
+
+    def __init__(self, max_entries: int, ttl_seconds: int) -> None:
+        self._max_entries = max_entries
+        self._ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, tuple[float, int, frozenset[str]]] = (
+            OrderedDict()
+        )
+
+    def get(self, key: str, generation: int) -> frozenset[str] | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, entry_generation, acl = entry
+            if entry_generation != generation or expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return acl
+
+    def put(self, key: str, generation: int, acl: frozenset[str]) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self._ttl_seconds, generation, acl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_local_cache = _LocalUserAclCache(
+    max_entries=USER_ACL_CACHE_LOCAL_MAX_ENTRIES,
+    ttl_seconds=USER_ACL_CACHE_TTL_SECONDS,
+)
+
+
+def _redis_key(generation: int, user: User) -> str:
+    return f"{USER_ACL_REDIS_PREFIX}:{generation}:{user.id}"
+
+
+def get_cached_acl_for_user(user: User | None, db_session: Session) -> set[str]:
+    """Same as get_acl_for_user, but served from an in-process LRU or Redis when
+    possible. A local hit costs a single Redis read of the current generation.
+    If Redis is unavailable the ACL is always computed from the db."""
+    if DISABLE_USER_ACL_CACHE or user is None:
+        # the anonymous ACL doesn't need any queries
+        return get_acl_for_user(user, db_session)
+
+    try:
+        redis_client = get_redis_client()
+        generation = int(
+            cast(bytes | None, redis_client.get(USER_ACL_GENERATION_KEY)) or 0
+        )
+    except Exception:
+        logger.exception("Failed to read the user ACL cache generation from Redis")
+        return get_acl_for_user(user, db_session)
+
+    # the redis client is tenant prefixed already, the local cache is not
+    local_key = f"{get_current_tenant_id()}:{user.id}"
+    cached_acl = _local_cache.get(local_key, generation)
+    if cached_acl is not None:
+        return set(cached_acl)
+
+    redis_key = _redis_key(generation, user)
+    try:
+        raw = redis_client.get(redis_key)
+        if raw is not None:
+            acl = frozenset(json.loads(cast(bytes, raw)))
+            _local_cache.put(local_key, generation, acl)
+            return set(acl)
+    except Exception:
+        logger.exception("Failed to read the user ACL from Redis")
+
+    acl = frozenset(get_acl_for_user(user, db_session))
+    _local_cache.put(local_key, generation, acl)
+    try:
+        redis_client.set(
+            redis_key, json.dumps(sorted(acl)), ex=USER_ACL_CACHE_TTL_SECONDS
+        )
+    except Exception:
+        logger.exception("Failed to write the user ACL to Redis")
+
+    return set(acl)
+
+
+def invalidate_user_acl_cache(tenant_id: str | None = None) -> None:
+    """Invalidates the cached ACLs of all users of the tenant in every process.
+    Called whenever user group or external group memberships change."""
+    try:
+        get_redis_client(tenant_id=tenant_id).incr(USER_ACL_GENERATION_KEY)
+    except Exception:
+        logger.exception("Failed to invalidate the user ACL cache")
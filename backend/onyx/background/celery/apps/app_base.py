@@ -26,6 +26,9 @@ from onyx.background.celery.celery_utils import celery_is_worker_primary
 from onyx.background.celery.celery_utils import make_probe_path
 from onyx.background.celery.tasks.vespa.document_sync import DOCUMENT_SYNC_PREFIX
 from onyx.background.celery.tasks.vespa.document_sync import DOCUMENT_SYNC_TASKSET_KEY
+from onyx.configs.app_configs import DOCUMENT_INDEX_TYPE
+from onyx.configs.app_configs import LOCAL_DOCUMENT_INDEX_DIR
+from onyx.configs.constants import DocumentIndexType
 from onyx.configs.constants import ONYX_CLOUD_CELERY_TASK_PREFIX
 from onyx.configs.constants import OnyxRedisLocks
 from onyx.db.engine.sql_engine import get_sqlalchemy_engine
@@ -511,9 +514,35 @@ def reset_tenant_id(
     CURRENT_TENANT_ID_CONTEXTVAR.set(POSTGRES_DEFAULT_SCHEMA)
 
 
+def _local_document_index_ready() -> bool:
+    """The local index lives in this process, it only needs its directory to be
+    writable."""
+    try:
+        os.makedirs(LOCAL_DOCUMENT_INDEX_DIR, exist_ok=True)
+    except OSError:
+        logger.exception(
+            f"Local document index: failed to create {LOCAL_DOCUMENT_INDEX_DIR}"
+        )
+        return False
+    return os.access(LOCAL_DOCUMENT_INDEX_DIR, os.W_OK)
+
+
 def wait_for_vespa_or_shutdown(sender: Any, **kwargs: Any) -> None:
     """Waits for Vespa to become ready subject to a timeout.
-    Raises WorkerShutdown if the timeout is reached."""
+    Raises WorkerShutdown if the timeout is reached.
+
+    With the local document index there is no Vespa to wait for, the index directory
+    is checked instead."""
+
+    if DOCUMENT_INDEX_TYPE == DocumentIndexType.LOCAL.value:
+        if not _local_document_index_ready():
+            msg = (
+                "Local document index: "
+                f"{LOCAL_DOCUMENT_INDEX_DIR} is not writable. Exiting..."
+            )
+            logger.error(msg)
+            raise WorkerShutdown(msg)
+        return
 
     if not wait_for_vespa_with_timeout():
         msg = "Vespa: Readiness probe did not succeed within the timeout. Exiting..."
@@ -16,6 +16,7 @@ from sqlalchemy.orm import Session
 from onyx.background.celery.apps.app_base import task_logger
 from onyx.background.celery.celery_redis import celery_get_queue_length
 from onyx.background.celery.celery_redis import celery_get_queued_task_ids
+from onyx.configs.app_configs import DOCUMENT_CLEANUP_BATCH_SIZE
 from onyx.configs.app_configs import JOB_TIMEOUT
 from onyx.configs.constants import CELERY_GENERIC_BEAT_LOCK_TIMEOUT
 from onyx.configs.constants import OnyxCeleryQueues
@@ -58,6 +59,7 @@ from onyx.redis.redis_connector_delete import RedisConnectorDelete
 from onyx.redis.redis_connector_delete import RedisConnectorDeletePayload
 from onyx.redis.redis_pool import get_redis_client
 from onyx.redis.redis_pool import get_redis_replica_client
+from onyx.redis.redis_utils import get_active_fences
 from onyx.utils.variable_functionality import (
     fetch_versioned_implementation_with_fallback,
 )
@@ -208,14 +210,7 @@ def check_for_connector_deletion_task(self: Task, *, tenant_id: str) -> bool | N
                     redis_connector.stop.set_fence(False)
 
         lock_beat.reacquire()
-        keys = cast(set[Any], r_replica.smembers(OnyxRedisConstants.ACTIVE_FENCES))
-        for key in keys:
-            key_bytes = cast(bytes, key)
-
-            if not r.exists(key_bytes):
-                r.srem(OnyxRedisConstants.ACTIVE_FENCES, key_bytes)
-                continue
-
+        for key_bytes in get_active_fences(r, r_replica):
             key_str = key_bytes.decode("utf-8")
             if key_str.startswith(RedisConnectorDelete.FENCE_PREFIX):
                 monitor_connector_deletion_taskset(tenant_id, key_bytes, r)
@@ -325,7 +320,7 @@ def try_generate_document_cc_pair_cleanup_tasks(
             f"RedisConnectorDeletion.generate_tasks starting. cc_pair={cc_pair_id}"
         )
         tasks_generated = redis_connector.delete.generate_tasks(
-            app, db_session, lock_beat
+            app, db_session, lock_beat, batch_size=DOCUMENT_CLEANUP_BATCH_SIZE
         )
         if tasks_generated is None:
             raise ValueError("RedisConnectorDeletion.generate_tasks returned None")
@@ -0,0 +1,81 @@
+import os
+import sqlite3
+import tempfile
+from collections.abc import Generator
+from collections.abc import Iterable
+from collections.abc import Iterator
+from types import TracebackType
+
+# number of rows pulled from SQLite per fetch when iterating over the store
+_FETCH_SIZE = 1000
+
+
+class SortedIdStore:
+    """
+    A set of string IDs that lives in a temporary SQLite file instead of in memory.
+
+    The IDs are the primary key of a WITHOUT ROWID table, so SQLite keeps them
+    deduplicated and sorted on disk and iterating over the store yields them in
+    ascending order while only holding a single fetch in memory. Pruning uses this to
+    diff the IDs in the source against the IDs in the index for cc pairs with
+    millions of documents.
+    """
+
+    def __init__(self, directory: str | None = None) -> None:
+        fd, self._path = tempfile.mkstemp(
+            prefix="onyx_ids_", suffix=".sqlite", dir=directory
+        )
+        os.close(fd)
+
+        self._conn = sqlite3.connect(self._path)
+        # the file is thrown away when we are done, so durability doesn't matter
+        self._conn.execute("PRAGMA journal_mode = OFF")
+        self._conn.execute("PRAGMA synchronous = OFF")
+        self._conn.execute("CREATE TABLE ids (id TEXT PRIMARY KEY) WITHOUT ROWID")
+
+    def add(self, ids: Iterable[str]) -> None:
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO ids (id) VALUES (?)", ((id,) for id in ids)
+        )
+        self._conn.commit()
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM ids").fetchone()[0]
+
+    def __iter__(self) -> Iterator[str]:
+        cursor = self._conn.execute("SELECT id FROM ids ORDER BY id")
+        while rows := cursor.fetchmany(_FETCH_SIZE):
+            for row in rows:
+                yield row[0]
+
+    def close(self) -> None:
+        self._conn.close()
+        if os.path.exists(self._path):
+            os.remove(self._path)
+
+    def __enter__(self) -> "SortedIdStore":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
+
+
+def sorted_difference(
+    left: Iterable[str], right: Iterable[str]
+) -> Generator[str, None, None]:
+    """
+    Yields the items of `left` that are not in `right` with a single merge pass.
+    Both inputs must be sorted in ascending order and free of duplicates.
+    """
+    right_iter = iter(right)
+    right_item = next(right_iter, None)
+    for left_item in left:
+        while right_item is not None and right_item < left_item:
+            right_item = next(right_iter, None)
+        if right_item != left_item:
+            yield left_item
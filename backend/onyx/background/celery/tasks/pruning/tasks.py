@@ -20,10 +20,15 @@ from onyx.background.celery.celery_redis import celery_find_task
 from onyx.background.celery.celery_redis import celery_get_queue_length
 from onyx.background.celery.celery_redis import celery_get_queued_task_ids
 from onyx.background.celery.celery_redis import celery_get_unacked_task_ids
-from onyx.background.celery.celery_utils import extract_ids_from_runnable_connector
+from onyx.background.celery.celery_utils import (
+    extract_id_batches_from_runnable_connector,
+)
 from onyx.background.celery.tasks.beat_schedule import CLOUD_BEAT_MULTIPLIER_DEFAULT
 from onyx.background.celery.tasks.docprocessing.utils import IndexingCallbackBase
+from onyx.background.celery.tasks.pruning.sorted_id_store import sorted_difference
+from onyx.background.celery.tasks.pruning.sorted_id_store import SortedIdStore
 from onyx.configs.app_configs import ALLOW_SIMULTANEOUS_PRUNING
+from onyx.configs.app_configs import DOCUMENT_CLEANUP_BATCH_SIZE
 from onyx.configs.app_configs import JOB_TIMEOUT
 from onyx.configs.constants import CELERY_GENERIC_BEAT_LOCK_TIMEOUT
 from onyx.configs.constants import CELERY_PRUNING_LOCK_TIMEOUT
@@ -41,7 +46,7 @@ from onyx.db.connector import mark_ccpair_as_pruned
 from onyx.db.connector_credential_pair import get_connector_credential_pair
 from onyx.db.connector_credential_pair import get_connector_credential_pair_from_id
 from onyx.db.connector_credential_pair import get_connector_credential_pairs
-from onyx.db.document import get_documents_for_connector_credential_pair
+from onyx.db.document import stream_document_ids_for_connector_credential_pair
 from onyx.db.engine.sql_engine import get_session_with_current_tenant
 from onyx.db.enums import ConnectorCredentialPairStatus
 from onyx.db.enums import SyncStatus
@@ -55,8 +60,10 @@ from onyx.redis.redis_connector_prune import RedisConnectorPrune
 from onyx.redis.redis_connector_prune import RedisConnectorPrunePayload
 from onyx.redis.redis_pool import get_redis_client
 from onyx.redis.redis_pool import get_redis_replica_client
+from onyx.redis.redis_utils import get_active_fences
 from onyx.server.runtime.onyx_runtime import OnyxRuntime
 from onyx.server.utils import make_short_id
+from onyx.utils.batching import batch_generator
 from onyx.utils.logger import format_error_for_logging
 from onyx.utils.logger import LoggerContextVars
 from onyx.utils.logger import pruning_ctx
@@ -65,6 +72,9 @@ from shared_configs.configs import MULTI_TENANT
 
 logger = setup_logger()
 
+# how many document ids are fetched from Postgres and pruned per batch
+PRUNING_ID_BATCH_SIZE = 1000
+
 
 def _get_pruning_block_expiration() -> int:
     """
@@ -228,14 +238,7 @@ def check_for_pruning(self: Task, *, tenant_id: str) -> bool | None:
         # use a lookup table to find active fences. We still have to verify the fence
         # exists since it is an optimization and not the source of truth.
         lock_beat.reacquire()
-        keys = cast(set[Any], r_replica.smembers(OnyxRedisConstants.ACTIVE_FENCES))
-        for key in keys:
-            key_bytes = cast(bytes, key)
-
-            if not r.exists(key_bytes):
-                r.srem(OnyxRedisConstants.ACTIVE_FENCES, key_bytes)
-                continue
-
+        for key_bytes in get_active_fences(r, r_replica):
             key_str = key_bytes.decode("utf-8")
             if key_str.startswith(RedisConnectorPrune.FENCE_PREFIX):
                 with get_session_with_current_tenant() as db_session:
@@ -525,39 +528,57 @@ def connector_pruning_generator_task(
                 r,
             )
 
-            # a list of docs in the source
-            all_connector_doc_ids: set[str] = extract_ids_from_runnable_connector(
-                runnable_connector, callback
-            )
+            # the ids on both sides are spilled to disk and diffed in sorted order so
+            # that memory use doesn't grow with the size of the cc pair
+            with (
+                SortedIdStore() as connector_doc_ids,
+                SortedIdStore() as indexed_doc_ids,
+            ):
+                # docs in the source
+                for doc_batch_ids in extract_id_batches_from_runnable_connector(
+                    runnable_connector, callback
+                ):
+                    connector_doc_ids.add(doc_batch_ids)
+
+                # docs in our local index
+                indexed_doc_ids.add(
+                    stream_document_ids_for_connector_credential_pair(
+                        db_session=db_session,
+                        connector_id=connector_id,
+                        credential_id=credential_id,
+                        yield_per=PRUNING_ID_BATCH_SIZE,
+                    )
+                )
 
-            # a list of docs in our local index
-            all_indexed_document_ids = {
-                doc.id
-                for doc in get_documents_for_connector_credential_pair(
-                    db_session=db_session,
-                    connector_id=connector_id,
-                    credential_id=credential_id,
+                task_logger.info(
+                    "Pruning set collected: "
+                    f"cc_pair={cc_pair_id} "
+                    f"connector_source={cc_pair.connector.source} "
+                    f"docs_in_source={len(connector_doc_ids)} "
+                    f"docs_indexed={len(indexed_doc_ids)}"
                 )
-            }
 
-            # generate list of docs to remove (no longer in the source)
-            doc_ids_to_remove = list(all_indexed_document_ids - all_connector_doc_ids)
+                task_logger.info(
+                    f"RedisConnector.prune.generate_tasks starting. cc_pair={cc_pair_id}"
+                )
 
-            task_logger.info(
-                "Pruning set collected: "
-                f"cc_pair={cc_pair_id} "
-                f"connector_source={cc_pair.connector.source} "
-                f"docs_to_remove={len(doc_ids_to_remove)}"
-            )
+                # docs to remove (no longer in the source)
+                tasks_generated = 0
+                for doc_ids_to_remove in batch_generator(
+                    sorted_difference(indexed_doc_ids, connector_doc_ids),
+                    PRUNING_ID_BATCH_SIZE,
+                ):
+                    batch_tasks_generated = redis_connector.prune.generate_tasks(
+                        set(doc_ids_to_remove),
+                        self.app,
+                        db_session,
+                        None,
+                        batch_size=DOCUMENT_CLEANUP_BATCH_SIZE,
+                    )
+                    if batch_tasks_generated is None:
+                        return None
 
-            task_logger.info(
-                f"RedisConnector.prune.generate_tasks starting. cc_pair={cc_pair_id}"
-            )
-            tasks_generated = redis_connector.prune.generate_tasks(
-                set(doc_ids_to_remove), self.app, db_session, None
-            )
-            if tasks_generated is None:
-                return None
+                    tasks_generated += batch_tasks_generated
 
             task_logger.info(
                 "RedisConnector.prune.generate_tasks finished. "
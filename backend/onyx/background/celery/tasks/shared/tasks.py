@@ -1,5 +1,6 @@
 import time
 from enum import Enum
+from functools import partial
 from http import HTTPStatus
 
 import httpx
@@ -10,26 +11,36 @@ from redis import Redis
 from tenacity import RetryError
 
 from onyx.access.access import get_access_for_document
+from onyx.access.access import get_access_for_documents
 from onyx.background.celery.apps.app_base import task_logger
 from onyx.background.celery.tasks.shared.RetryDocumentIndex import RetryDocumentIndex
 from onyx.configs.constants import ONYX_CELERY_BEAT_HEARTBEAT_KEY
 from onyx.configs.constants import OnyxCeleryTask
 from onyx.db.document import delete_document_by_connector_credential_pair__no_commit
+from onyx.db.document import delete_documents_by_connector_credential_pair__no_commit
 from onyx.db.document import delete_documents_complete__no_commit
 from onyx.db.document import fetch_chunk_count_for_document
 from onyx.db.document import get_document
 from onyx.db.document import get_document_connector_count
+from onyx.db.document import get_document_connector_counts
+from onyx.db.document import get_documents_by_ids
 from onyx.db.document import mark_document_as_modified
 from onyx.db.document import mark_document_as_synced
+from onyx.db.document import mark_documents_as_modified
+from onyx.db.document import mark_documents_as_synced
 from onyx.db.document_set import fetch_document_sets_for_document
+from onyx.db.document_set import fetch_document_sets_for_documents
 from onyx.db.engine.sql_engine import get_session_with_current_tenant
 from onyx.db.relationships import delete_document_references_from_kg
 from onyx.db.search_settings import get_active_search_settings
 from onyx.document_index.factory import get_default_document_index
+from onyx.document_index.interfaces import MinimalDocumentIndexingInfo
+from onyx.document_index.interfaces import UpdateRequest
 from onyx.document_index.interfaces import VespaDocumentFields
 from onyx.httpx.httpx_pool import HttpxPool
 from onyx.redis.redis_pool import get_redis_client
 from onyx.server.documents.models import ConnectorCredentialPairIdentifier
+from onyx.utils.threadpool_concurrency import run_functions_tuples_in_parallel
 
 DOCUMENT_BY_CC_PAIR_CLEANUP_MAX_RETRIES = 3
 
@@ -38,6 +49,15 @@ DOCUMENT_BY_CC_PAIR_CLEANUP_MAX_RETRIES = 3
 LIGHT_SOFT_TIME_LIMIT = 105
 LIGHT_TIME_LIMIT = LIGHT_SOFT_TIME_LIMIT + 15
 
+# a batch touches many documents, give it more headroom than a single doc cleanup
+DOCUMENT_BY_CC_PAIR_CLEANUP_BATCH_SOFT_TIME_LIMIT = 300
+DOCUMENT_BY_CC_PAIR_CLEANUP_BATCH_TIME_LIMIT = (
+    DOCUMENT_BY_CC_PAIR_CLEANUP_BATCH_SOFT_TIME_LIMIT + 15
+)
+
+# how many documents of a batch are deleted from the document index concurrently
+DOCUMENT_BY_CC_PAIR_CLEANUP_BATCH_DELETE_CONCURRENCY = 8
+
 
 class OnyxCeleryTaskCompletionStatus(str, Enum):
     """The different statuses the watchdog can finish with.
@@ -268,6 +288,237 @@ def document_by_cc_pair_cleanup_task(
     return True
 
 
+@shared_task(
+    name=OnyxCeleryTask.DOCUMENT_BY_CC_PAIR_CLEANUP_BATCH_TASK,
+    soft_time_limit=DOCUMENT_BY_CC_PAIR_CLEANUP_BATCH_SOFT_TIME_LIMIT,
+    time_limit=DOCUMENT_BY_CC_PAIR_CLEANUP_BATCH_TIME_LIMIT,
+    max_retries=DOCUMENT_BY_CC_PAIR_CLEANUP_MAX_RETRIES,
+    bind=True,
+)
+def document_by_cc_pair_cleanup_batch_task(
+    self: Task,
+    document_ids: list[str],
+    connector_id: int,
+    credential_id: int,
+    tenant_id: str,
+) -> bool:
+    """Batched version of document_by_cc_pair_cleanup_task. Connector counts, access
+    and document sets are loaded for the whole batch with a few queries, documents
+    are deleted from the document index concurrently, the remaining documents are
+    updated with a single update call and the db changes are committed once."""
+    start = time.monotonic()
+
+    completion_status = OnyxCeleryTaskCompletionStatus.UNDEFINED
+    num_docs = len(document_ids)
+    cc_pair_identifier = ConnectorCredentialPairIdentifier(
+        connector_id=connector_id,
+        credential_id=credential_id,
+    )
+
+    try:
+        with get_session_with_current_tenant() as db_session:
+            active_search_settings = get_active_search_settings(db_session)
+            doc_index = get_default_document_index(
+                active_search_settings.primary,
+                active_search_settings.secondary,
+                httpx_client=HttpxPool.get("vespa"),
+            )
+
+            retry_index = RetryDocumentIndex(doc_index)
+
+            doc_id_to_count = {
+                doc_id: count
+                for doc_id, count in get_document_connector_counts(
+                    db_session, document_ids
+                )
+            }
+            # count == 1 means this is the only remaining cc_pair reference to the doc
+            doc_ids_to_delete = [
+                doc_id for doc_id in document_ids if doc_id_to_count.get(doc_id) == 1
+            ]
+            # count > 1 means the document still has cc_pair references
+            doc_ids_to_update = [
+                doc_id for doc_id in document_ids if doc_id_to_count.get(doc_id, 0) > 1
+            ]
+
+            id_to_doc = {
+                doc.id: doc
+                for doc in get_documents_by_ids(
+                    db_session, doc_ids_to_delete + doc_ids_to_update
+                )
+            }
+            doc_ids_to_update = [
+                doc_id for doc_id in doc_ids_to_update if doc_id in id_to_doc
+            ]
+
+            chunks_deleted = run_functions_tuples_in_parallel(
+                [
+                    (
+                        partial(
+                            retry_index.delete_single,
+                            doc_id,
+                            tenant_id=tenant_id,
+                            chunk_count=(
+                                id_to_doc[doc_id].chunk_count
+                                if doc_id in id_to_doc
+                                else None
+                            ),
+                        ),
+                        (),
+                    )
+                    for doc_id in doc_ids_to_delete
+                ],
+                max_workers=DOCUMENT_BY_CC_PAIR_CLEANUP_BATCH_DELETE_CONCURRENCY,
+            )
+
+            if doc_ids_to_update:
+                # the below functions do not include cc_pairs being deleted.
+                # i.e. they will correctly omit access for the current cc_pair
+                doc_id_to_access = get_access_for_documents(
+                    document_ids=doc_ids_to_update, db_session=db_session
+                )
+                doc_id_to_doc_sets: dict[str, list[str]] = {
+                    doc_id: doc_set_names
+                    for doc_id, doc_set_names in fetch_document_sets_for_documents(
+                        doc_ids_to_update, db_session
+                    )
+                }
+
+                update_requests: list[UpdateRequest] = []
+                for doc_id in doc_ids_to_update:
+                    doc = id_to_doc[doc_id]
+                    fields = VespaDocumentFields(
+                        document_sets=set(doc_id_to_doc_sets.get(doc_id, [])),
+                        access=doc_id_to_access[doc_id],
+                        boost=doc.boost,
+                        hidden=doc.hidden,
+                    )
+
+                    if doc.chunk_count is None:
+                        # legacy documents need their chunk range probed in Vespa,
+                        # which the per document path already handles
+                        retry_index.update_single(
+                            doc_id,
+                            tenant_id=tenant_id,
+                            chunk_count=None,
+                            fields=fields,
+                            user_fields=None,
+                        )
+                        continue
+
+                    update_requests.append(
+                        UpdateRequest(
+                            minimal_document_indexing_info=[
+                                MinimalDocumentIndexingInfo(
+                                    doc_id=doc_id, chunk_start_index=doc.chunk_count
+                                )
+                            ],
+                            access=fields.access,
+                            document_sets=fields.document_sets,
+                            boost=fields.boost,
+                            hidden=fields.hidden,
+                        )
+                    )
+
+                # update Vespa. OK if docs don't exist. Raises exception otherwise.
+                if update_requests:
+                    retry_index.update(update_requests, tenant_id=tenant_id)
+
+            # the document index is up to date, apply all db changes in one commit
+            if doc_ids_to_delete:
+                delete_documents_complete__no_commit(
+                    db_session=db_session,
+                    document_ids=doc_ids_to_delete,
+                )
+
+            if doc_ids_to_update:
+                # there are still other cc_pair references to the docs, so only the
+                # relationship to this cc_pair is removed
+                delete_documents_by_connector_credential_pair__no_commit(
+                    db_session=db_session,
+                    document_ids=doc_ids_to_update,
+                    connector_credential_pair_identifier=cc_pair_identifier,
+                )
+
+            # commits the deletions above as well
+            mark_documents_as_synced(doc_ids_to_update, db_session)
+            db_session.commit()
+
+            completion_status = OnyxCeleryTaskCompletionStatus.SUCCEEDED
+
+            elapsed = time.monotonic() - start
+            task_logger.info(
+                f"docs={num_docs} "
+                f"deleted={len(doc_ids_to_delete)} "
+                f"updated={len(doc_ids_to_update)} "
+                f"chunks_deleted={sum(chunks_deleted)} "
+                f"elapsed={elapsed:.2f}"
+            )
+    except SoftTimeLimitExceeded:
+        task_logger.info(f"SoftTimeLimitExceeded exception. docs={num_docs}")
+        completion_status = OnyxCeleryTaskCompletionStatus.SOFT_TIME_LIMIT
+    except Exception as ex:
+        e: Exception | None = None
+        if isinstance(ex, RetryError):
+            task_logger.warning(
+                f"Tenacity retry failed: num_attempts={ex.last_attempt.attempt_number}"
+            )
+
+            # only set the inner exception if it is of type Exception
+            e_temp = ex.last_attempt.exception()
+            if isinstance(e_temp, Exception):
+                e = e_temp
+        else:
+            e = ex
+
+        if isinstance(e, httpx.HTTPStatusError):
+            if e.response.status_code == HTTPStatus.BAD_REQUEST:
+                task_logger.exception(
+                    f"Non-retryable HTTPStatusError: "
+                    f"docs={num_docs} "
+                    f"status={e.response.status_code}"
+                )
+            completion_status = OnyxCeleryTaskCompletionStatus.NON_RETRYABLE_EXCEPTION
+        elif self.max_retries is not None and self.request.retries >= self.max_retries:
+            task_logger.exception(
+                f"document_by_cc_pair_cleanup_batch_task exceptioned: docs={num_docs}"
+            )
+
+            # This is the last attempt! mark the documents as dirty in the db so that
+            # they eventually get fixed out of band via stale document reconciliation
+            task_logger.warning(
+                f"Max celery task retries reached. Marking docs as dirty for reconciliation: "
+                f"docs={num_docs}"
+            )
+            with get_session_with_current_tenant() as db_session:
+                # delete the cc pair relationships now and let reconciliation clean
+                # them up in vespa
+                delete_documents_by_connector_credential_pair__no_commit(
+                    db_session=db_session,
+                    document_ids=document_ids,
+                    connector_credential_pair_identifier=cc_pair_identifier,
+                )
+                mark_documents_as_modified(document_ids, db_session)
+            completion_status = OnyxCeleryTaskCompletionStatus.NON_RETRYABLE_EXCEPTION
+        else:
+            task_logger.exception(
+                f"document_by_cc_pair_cleanup_batch_task exceptioned: docs={num_docs}"
+            )
+
+            completion_status = OnyxCeleryTaskCompletionStatus.RETRYABLE_EXCEPTION
+
+            # Exponential backoff from 2^4 to 2^6 ... i.e. 16, 32, 64
+            countdown = 2 ** (self.request.retries + 4)
+            self.retry(exc=e, countdown=countdown)  # this will raise a celery exception
+    finally:
+        task_logger.info(
+            f"document_by_cc_pair_cleanup_batch_task completed: "
+            f"status={completion_status.value} docs={num_docs}"
+        )
+
+    return completion_status == OnyxCeleryTaskCompletionStatus.SUCCEEDED
+
+
 @shared_task(name=OnyxCeleryTask.CELERY_BEAT_HEARTBEAT, ignore_result=True, bind=True)
 def celery_beat_heartbeat(self: Task, *, tenant_id: str) -> None:
     """When this task runs, it writes a key to Redis with a TTL.
@@ -1,7 +1,6 @@
 import time
 from collections.abc import Callable
 from http import HTTPStatus
-from typing import Any
 from typing import cast
 
 import httpx
@@ -15,6 +14,7 @@ from sqlalchemy.orm import Session
 from tenacity import RetryError
 
 from onyx.access.access import get_access_for_document
+from onyx.access.access import get_access_for_documents
 from onyx.background.celery.apps.app_base import task_logger
 from onyx.background.celery.tasks.shared.RetryDocumentIndex import RetryDocumentIndex
 from onyx.background.celery.tasks.shared.tasks import LIGHT_SOFT_TIME_LIMIT
@@ -28,16 +28,19 @@ from onyx.background.celery.tasks.vespa.document_sync import (
     try_generate_stale_document_sync_tasks,
 )
 from onyx.configs.app_configs import JOB_TIMEOUT
+from onyx.configs.app_configs import VESPA_SYNC_BATCH_SIZE
 from onyx.configs.app_configs import VESPA_SYNC_MAX_TASKS
 from onyx.configs.constants import CELERY_VESPA_SYNC_BEAT_LOCK_TIMEOUT
 from onyx.configs.constants import OnyxCeleryTask
-from onyx.configs.constants import OnyxRedisConstants
 from onyx.configs.constants import OnyxRedisLocks
 from onyx.db.document import get_document
+from onyx.db.document import get_documents_by_ids
 from onyx.db.document import mark_document_as_synced
+from onyx.db.document import mark_documents_as_synced
 from onyx.db.document_set import delete_document_set
 from onyx.db.document_set import fetch_document_sets
 from onyx.db.document_set import fetch_document_sets_for_document
+from onyx.db.document_set import fetch_document_sets_for_documents
 from onyx.db.document_set import get_document_set_by_id
 from onyx.db.document_set import mark_document_set_as_synced
 from onyx.db.engine.sql_engine import get_session_with_current_tenant
@@ -50,6 +53,8 @@ from onyx.db.sync_record import cleanup_sync_records
 from onyx.db.sync_record import insert_sync_record
 from onyx.db.sync_record import update_sync_record_status
 from onyx.document_index.factory import get_default_document_index
+from onyx.document_index.interfaces import MinimalDocumentIndexingInfo
+from onyx.document_index.interfaces import UpdateRequest
 from onyx.document_index.interfaces import VespaDocumentFields
 from onyx.httpx.httpx_pool import HttpxPool
 from onyx.redis.redis_document_set import RedisDocumentSet
@@ -57,6 +62,7 @@ from onyx.redis.redis_pool import get_redis_client
 from onyx.redis.redis_pool import get_redis_replica_client
 from onyx.redis.redis_pool import redis_lock_dump
 from onyx.redis.redis_usergroup import RedisUserGroup
+from onyx.redis.redis_utils import get_active_fences
 from onyx.utils.logger import setup_logger
 from onyx.utils.variable_functionality import fetch_versioned_implementation
 from onyx.utils.variable_functionality import (
@@ -67,6 +73,10 @@ from onyx.utils.variable_functionality import noop_fallback
 
 logger = setup_logger()
 
+# a batch touches many documents, give it more headroom than a single doc sync
+VESPA_METADATA_SYNC_BATCH_SOFT_TIME_LIMIT = 300
+VESPA_METADATA_SYNC_BATCH_TIME_LIMIT = VESPA_METADATA_SYNC_BATCH_SOFT_TIME_LIMIT + 15
+
 
 # celery auto associates tasks created inside another task,
 # which bloats the result metadata considerably. trail=False prevents this.
@@ -158,14 +168,7 @@ def check_for_vespa_sync_task(self: Task, *, tenant_id: str) -> bool | None:
 
         # 3/3: FINALIZE
         lock_beat.reacquire()
-        keys = cast(set[Any], r_replica.smembers(OnyxRedisConstants.ACTIVE_FENCES))
-        for key in keys:
-            key_bytes = cast(bytes, key)
-
-            if not r.exists(key_bytes):
-                r.srem(OnyxRedisConstants.ACTIVE_FENCES, key_bytes)
-                continue
-
+        for key_bytes in get_active_fences(r, r_replica):
             key_str = key_bytes.decode("utf-8")
             # NOTE: removing the "Redis*" classes, prefer to just have functions to
             # do these things going forward. In short, things should generally be like the doc
@@ -251,7 +254,13 @@ def try_generate_document_set_sync_tasks(
 
     # Add all documents that need to be updated into the queue
     result = rds.generate_tasks(
-        VESPA_SYNC_MAX_TASKS, celery_app, db_session, r, lock_beat, tenant_id
+        VESPA_SYNC_MAX_TASKS,
+        celery_app,
+        db_session,
+        r,
+        lock_beat,
+        tenant_id,
+        batch_size=VESPA_SYNC_BATCH_SIZE,
     )
     if result is None:
         return None
@@ -327,7 +336,13 @@ def try_generate_user_group_sync_tasks(
         f"RedisUserGroup.generate_tasks starting. usergroup_id={usergroup.id}"
     )
     result = rug.generate_tasks(
-        VESPA_SYNC_MAX_TASKS, celery_app, db_session, r, lock_beat, tenant_id
+        VESPA_SYNC_MAX_TASKS,
+        celery_app,
+        db_session,
+        r,
+        lock_beat,
+        tenant_id,
+        batch_size=VESPA_SYNC_BATCH_SIZE,
     )
     if result is None:
         return None
@@ -574,3 +589,156 @@ def vespa_metadata_sync_task(self: Task, document_id: str, *, tenant_id: str) ->
         )
 
     return completion_status == OnyxCeleryTaskCompletionStatus.SUCCEEDED
+
+
+@shared_task(
+    name=OnyxCeleryTask.VESPA_METADATA_SYNC_BATCH_TASK,
+    bind=True,
+    soft_time_limit=VESPA_METADATA_SYNC_BATCH_SOFT_TIME_LIMIT,
+    time_limit=VESPA_METADATA_SYNC_BATCH_TIME_LIMIT,
+    max_retries=3,
+)
+def vespa_metadata_sync_batch_task(
+    self: Task, document_ids: list[str], *, tenant_id: str
+) -> bool:
+    """Batched version of vespa_metadata_sync_task. Document sets and access are
+    loaded for the whole batch with a couple of queries and all documents with a
+    known chunk count are pushed to Vespa with a single update call."""
+    start = time.monotonic()
+
+    completion_status = OnyxCeleryTaskCompletionStatus.UNDEFINED
+    num_docs = len(document_ids)
+
+    try:
+        with get_session_with_current_tenant() as db_session:
+            active_search_settings = get_active_search_settings(db_session)
+            doc_index = get_default_document_index(
+                search_settings=active_search_settings.primary,
+                secondary_search_settings=active_search_settings.secondary,
+                httpx_client=HttpxPool.get("vespa"),
+            )
+
+            retry_index = RetryDocumentIndex(doc_index)
+
+            docs = get_documents_by_ids(db_session, document_ids)
+            if not docs:
+                elapsed = time.monotonic() - start
+                task_logger.info(
+                    f"docs={num_docs} action=no_operation elapsed={elapsed:.2f}"
+                )
+                completion_status = OnyxCeleryTaskCompletionStatus.SKIPPED
+                return False
+
+            found_doc_ids = [doc.id for doc in docs]
+            doc_id_to_doc_sets: dict[str, list[str]] = {
+                doc_id: doc_set_names
+                for doc_id, doc_set_names in fetch_document_sets_for_documents(
+                    found_doc_ids, db_session
+                )
+            }
+            doc_id_to_access = get_access_for_documents(
+                document_ids=found_doc_ids, db_session=db_session
+            )
+
+            update_requests: list[UpdateRequest] = []
+            for doc in docs:
+                fields = VespaDocumentFields(
+                    document_sets=set(doc_id_to_doc_sets.get(doc.id, [])),
+                    access=doc_id_to_access[doc.id],
+                    boost=doc.boost,
+                    hidden=doc.hidden,
+                )
+
+                if doc.chunk_count is None:
+                    # legacy documents need their chunk range probed in Vespa,
+                    # which the per document path already handles
+                    retry_index.update_single(
+                        doc.id,
+                        tenant_id=tenant_id,
+                        chunk_count=None,
+                        fields=fields,
+                        user_fields=None,
+                    )
+                    continue
+
+                update_requests.append(
+                    UpdateRequest(
+                        minimal_document_indexing_info=[
+                            MinimalDocumentIndexingInfo(
+                                doc_id=doc.id, chunk_start_index=doc.chunk_count
+                            )
+                        ],
+                        access=fields.access,
+                        document_sets=fields.document_sets,
+                        boost=fields.boost,
+                        hidden=fields.hidden,
+                    )
+                )
+
+            # update Vespa. OK if docs don't exist. Raises exception otherwise.
+            if update_requests:
+                retry_index.update(update_requests, tenant_id=tenant_id)
+
+            # update db last. Worst case = we crash right before this and
+            # the sync might repeat again later
+            mark_documents_as_synced(found_doc_ids, db_session)
+
+            elapsed = time.monotonic() - start
+            task_logger.info(
+                f"docs={num_docs} "
+                f"found={len(found_doc_ids)} "
+                f"action=sync "
+                f"elapsed={elapsed:.2f}"
+            )
+            completion_status = OnyxCeleryTaskCompletionStatus.SUCCEEDED
+    except SoftTimeLimitExceeded:
+        task_logger.info(f"SoftTimeLimitExceeded exception. docs={num_docs}")
+        completion_status = OnyxCeleryTaskCompletionStatus.SOFT_TIME_LIMIT
+    except Exception as ex:
+        e: Exception | None = None
+        if isinstance(ex, RetryError):
+            task_logger.warning(
+                f"Tenacity retry failed: num_attempts={ex.last_attempt.attempt_number}"
+            )
+
+            # only set the inner exception if it is of type Exception
+            e_temp = ex.last_attempt.exception()
+            if isinstance(e_temp, Exception):
+                e = e_temp
+        else:
+            e = ex
+
+        if (
+            isinstance(e, httpx.HTTPStatusError)
+            and e.response.status_code == HTTPStatus.BAD_REQUEST
+        ):
+            task_logger.exception(
+                f"Non-retryable HTTPStatusError: "
+                f"docs={num_docs} "
+                f"status={e.response.status_code}"
+            )
+            completion_status = OnyxCeleryTaskCompletionStatus.NON_RETRYABLE_EXCEPTION
+        else:
+            task_logger.exception(
+                f"vespa_metadata_sync_batch_task exceptioned: docs={num_docs}"
+            )
+
+            completion_status = OnyxCeleryTaskCompletionStatus.RETRYABLE_EXCEPTION
+            if (
+                self.max_retries is not None
+                and self.request.retries >= self.max_retries
+            ):
+                completion_status = (
+                    OnyxCeleryTaskCompletionStatus.NON_RETRYABLE_EXCEPTION
+                )
+
+            # Exponential backoff from 2^4 to 2^6 ... i.e. 16, 32, 64
+            countdown = 2 ** (self.request.retries + 4)
+            self.retry(exc=e, countdown=countdown)  # this will raise a celery exception
+    finally:
+        task_logger.info(
+            f"vespa_metadata_sync_batch_task completed: "
+            f"status={completion_status.value} docs={num_docs}"
+        )
+
+    return completion_status == OnyxCeleryTaskCompletionStatus.SUCCEEDED
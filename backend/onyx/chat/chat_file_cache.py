@@ -0,0 +1,104 @@
+import threading
+from collections import OrderedDict
+from uuid import UUID
+
+from onyx.configs.app_configs import CHAT_FILE_TEXT_CACHE_MAX_CHARS
+from onyx.file_store.file_store import get_default_file_store
+from onyx.file_store.models import FileDescriptor
+from onyx.file_store.utils import user_file_id_to_plaintext_file_name
+from onyx.utils.logger import setup_logger
+from shared_configs.contextvars import get_current_tenant_id
+
+logger = setup_logger()
+
+
+class _ChatFileTextCache:
+    """LRU of the extracted text of chat files, keyed by tenant id and file id. Files
+    in the file store are never modified under the same id, so entries never go stale. Least
+    recently used texts are evicted once the cached texts exceed `max_chars`
+    characters in total. Files without text are cached as None."""
+
+    def __init__(self, max_chars: int) -> None:
+        self._max_chars = max_chars
+        self._lock = threading.Lock()
+        self._texts: OrderedDict[tuple[str, str], str | None] = OrderedDict()
+        self._cached_chars = 0
+
+    def get(self, cache_key: tuple[str, str]) -> tuple[bool, str | None]:
+        with self._lock:
+            if cache_key not in self._texts:
+                return False, None
+            self._texts.move_to_end(cache_key)
+            return True, self._texts[cache_key]
+
+    def put(self, cache_key: tuple[str, str], text: str | None) -> None:
+        size = len(text) if text else 1
+        if size > self._max_chars:
+            return
+        with self._lock:
+            if cache_key in self._texts:
+                return
+            self._texts[cache_key] = text
+            self._cached_chars += size
+            while self._cached_chars > self._max_chars:
+                _, evicted_text = self._texts.popitem(last=False)
+                self._cached_chars -= len(evicted_text) if evicted_text else 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._texts.clear()
+            self._cached_chars = 0
+
+
+_text_cache = _ChatFileTextCache(max_chars=CHAT_FILE_TEXT_CACHE_MAX_CHARS)
+
+
+def _read_user_file_plaintext(user_file_id_str: str) -> str | None:
+    """User files have the text extracted during processing stored next to them, which
+    is usually much smaller than the original file (e.g. for PDFs)."""
+    try:
+        plaintext_file_name = user_file_id_to_plaintext_file_name(
+            UUID(user_file_id_str)
+        )
+        return (
+            get_default_file_store()
+            .read_file(plaintext_file_name, mode="b")
+            .read()
+            .decode("utf-8")
+        )
+    except Exception:
+        logger.debug(f"No plaintext stored for user file {user_file_id_str}")
+        return None
+
+
+def _read_original_file_text(file_id: str) -> str | None:
+    content = get_default_file_store().read_file(file_id, mode="b").read()
+    try:
+        return content.decode("utf-8")
+    except UnicodeDecodeError:
+        logger.warning(f"Failed to decode text content for file {file_id}")
+        return None
+
+
+def get_chat_file_text(file_descriptor: FileDescriptor) -> str | None:
+    """Returns the text of a text chat file, served from the in-process cache when it
+    was read before. Only the text is kept, the original file is not held in memory."""
+    file_id = file_descriptor["id"]
+    # the file store is tenant scoped, so file ids are only unique within a tenant
+    cache_key = (get_current_tenant_id(), file_id)
+    found, text = _text_cache.get(cache_key)
+    if found:
+        return text
+
+    user_file_id_str = file_descriptor.get("user_file_id")
+    if user_file_id_str:
+        text = _read_user_file_plaintext(user_file_id_str)
+        if text is not None:
+            _text_cache.put(cache_key, text)
+            return text
+        # the user file may still be processing, so the fallback is not cached
+        return _read_original_file_text(file_id)
+
+    text = _read_original_file_text(file_id)
+    _text_cache.put(cache_key, text)
+    return text
@@ -15,6 +15,7 @@ from onyx.background.celery.tasks.kg_processing.kg_indexing import (
 from onyx.background.celery.tasks.kg_processing.kg_indexing import (
     try_creating_kg_source_reset_task,
 )
+from onyx.chat.chat_file_cache import get_chat_file_text
 from onyx.chat.models import ChatLoadedFile
 from onyx.chat.models import ChatMessageSimple
 from onyx.chat.models import PersonaOverrideConfig
@@ -36,9 +37,9 @@ from onyx.db.models import Persona
 from onyx.db.models import SearchDoc as DbSearchDoc
 from onyx.db.models import Tool
 from onyx.db.models import User
-from onyx.db.models import UserFile
 from onyx.db.search_settings import get_current_search_settings
-from onyx.file_store.file_store import get_default_file_store
+from onyx.db.user_file import fetch_user_file_token_counts
+from onyx.db.user_file import set_missing_user_file_token_counts
 from onyx.file_store.models import ChatFileType
 from onyx.file_store.models import FileDescriptor
 from onyx.kg.models import KGException
@@ -47,6 +48,7 @@ from onyx.kg.setup.kg_default_entity_definitions import (
 )
 from onyx.llm.override_models import LLMOverride
 from onyx.natural_language_processing.utils import BaseTokenizer
+from onyx.natural_language_processing.utils import TokenCountCache
 from onyx.prompts.chat_prompts import ADDITIONAL_CONTEXT_PROMPT
 from onyx.prompts.chat_prompts import TOOL_CALL_RESPONSE_CROSS_MESSAGE
 from onyx.server.query_and_chat.models import CreateChatMessageRequest
@@ -56,7 +58,6 @@ from onyx.tools.tool_implementations.custom.custom_tool import (
 )
 from onyx.utils.logger import setup_logger
 from onyx.utils.threadpool_concurrency import run_functions_tuples_in_parallel
-from onyx.utils.timing import log_function_time
 
 logger = setup_logger()
 
@@ -468,43 +469,17 @@ def process_kg_commands(
         raise KGException("KG setup done")
 
 
-@log_function_time(print_only=True)
-def load_chat_file(
-    file_descriptor: FileDescriptor, db_session: Session
-) -> ChatLoadedFile:
-    file_io = get_default_file_store().read_file(file_descriptor["id"], mode="b")
-    content = file_io.read()
-
-    # Extract text content if it's a text file type (not an image)
-    content_text = None
+def load_chat_file(file_descriptor: FileDescriptor, token_count: int) -> ChatLoadedFile:
+    # Only the text of text files is needed. Images are only read from the file store
+    # once they are actually sent to the LLM (see ChatLoadedFile.load_content)
     file_type = file_descriptor["type"]
-    if file_type.is_text_file():
-        try:
-            content_text = content.decode("utf-8")
-        except UnicodeDecodeError:
-            logger.warning(
-                f"Failed to decode text content for file {file_descriptor['id']}"
-            )
-
-    # Get token count from UserFile if available
-    token_count = 0
-    user_file_id_str = file_descriptor.get("user_file_id")
-    if user_file_id_str:
-        try:
-            user_file_id = UUID(user_file_id_str)
-            user_file = (
-                db_session.query(UserFile).filter(UserFile.id == user_file_id).first()
-            )
-            if user_file and user_file.token_count:
-                token_count = user_file.token_count
-        except (ValueError, TypeError) as e:
-            logger.warning(
-                f"Failed to get token count for file {file_descriptor['id']}: {e}"
-            )
+    content_text = (
+        get_chat_file_text(file_descriptor) if file_type.is_text_file() else None
+    )
 
     return ChatLoadedFile(
         file_id=file_descriptor["id"],
-        content=content,
+        content=b"",
         file_type=file_type,
         filename=file_descriptor.get("name"),
         content_text=content_text,
@@ -512,25 +487,101 @@ def load_chat_file(
     )
 
 
+def _get_user_file_id(file_descriptor: FileDescriptor) -> UUID | None:
+    user_file_id_str = file_descriptor.get("user_file_id")
+    if not user_file_id_str:
+        return None
+    try:
+        return UUID(user_file_id_str)
+    except (ValueError, TypeError):
+        logger.warning(
+            f"Invalid user file id {user_file_id_str} for file {file_descriptor['id']}"
+        )
+        return None
+
+
+def _fill_missing_file_token_counts(
+    file_descriptors: list[FileDescriptor],
+    files: list[ChatLoadedFile],
+    token_counter: TokenCountCache,
+    db_session: Session,
+) -> None:
+    """Counts the tokens of text files that have no stored token count in one batch
+    and stores the counts on their user files so later turns don't count them again."""
+    missing = [
+        (file_descriptor, file)
+        for file_descriptor, file in zip(file_descriptors, files)
+        if file.content_text and not file.token_count
+    ]
+    if not missing:
+        return
+
+    token_counts = token_counter.count_batch(
+        [file.content_text or "" for _, file in missing]
+    )
+
+    user_file_id_to_token_count: dict[UUID, int] = {}
+    for (file_descriptor, file), token_count in zip(missing, token_counts):
+        file.token_count = token_count
+        user_file_id = _get_user_file_id(file_descriptor)
+        if user_file_id:
+            user_file_id_to_token_count[user_file_id] = token_count
+
+    try:
+        set_missing_user_file_token_counts(user_file_id_to_token_count, db_session)
+    except Exception:
+        db_session.rollback()
+        logger.exception("Failed to store token counts for user files")
+
+
 def load_all_chat_files(
     chat_messages: list[ChatMessage],
     db_session: Session,
+    token_counter: TokenCountCache | None = None,
 ) -> list[ChatLoadedFile]:
+    """Loads the files of the chat history without their raw content: text files come
+    with their extracted text, images are read lazily once they are sent to the LLM.
+    If a token counter is given, text files without a stored token count are counted
+    with it."""
     # TODO There is likely a more efficient/standard way to load the files here.
     file_descriptors_for_history: list[FileDescriptor] = []
     for chat_message in chat_messages:
         if chat_message.files:
             file_descriptors_for_history.extend(chat_message.files)
 
+    user_file_ids = [_get_user_file_id(file) for file in file_descriptors_for_history]
+    # token counts of all user files in a single query
+    user_file_token_counts = fetch_user_file_token_counts(
+        [user_file_id for user_file_id in user_file_ids if user_file_id], db_session
+    )
+
     files = cast(
         list[ChatLoadedFile],
         run_functions_tuples_in_parallel(
             [
-                (load_chat_file, (file, db_session))
-                for file in file_descriptors_for_history
+                (
+                    load_chat_file,
+                    (
+                        file,
+                        (
+                            user_file_token_counts.get(user_file_id, 0)
+                            if user_file_id
+                            else 0
+                        ),
+                    ),
+                )
+                for file, user_file_id in zip(
+                    file_descriptors_for_history, user_file_ids
+                )
             ]
         ),
     )
+
+    if token_counter is not None:
+        _fill_missing_file_token_counts(
+            file_descriptors_for_history, files, token_counter, db_session
+        )
+
     return files
 
 
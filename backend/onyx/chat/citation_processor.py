@@ -32,6 +32,39 @@ def in_code_block(llm_text: str) -> bool:
     return count % 2 != 0
 
 
+class CodeFenceTracker:
+    """
+    Incremental version of `in_code_block` for streamed text.
+
+    Only the new text is scanned on each update. Matches the `str.count` semantics
+    used by `in_code_block`: a maximal run of n backticks contains n // 3 fences,
+    so the only state carried across tokens is the length of the trailing run.
+    """
+
+    def __init__(self) -> None:
+        self.closed_fences = 0  # fences in backtick runs that have ended
+        self.trailing_backticks = 0  # length of the run at the end of the text
+
+    def feed(self, text: str) -> None:
+        without_leading = text.lstrip("`")
+        if not without_leading:
+            self.trailing_backticks += len(text)
+            return
+
+        # the leading backticks complete the run carried over from earlier text
+        num_leading = len(text) - len(without_leading)
+        self.closed_fences += (self.trailing_backticks + num_leading) // 3
+
+        body = without_leading.rstrip("`")
+        self.closed_fences += body.count(TRIPLE_BACKTICK)
+        self.trailing_backticks = len(without_leading) - len(body)
+
+    @property
+    def in_code_block(self) -> bool:
+        count = self.closed_fences + self.trailing_backticks // 3
+        return count % 2 != 0
+
+
 # ============================================================================
 # Main Citation Processor with Dynamic Mapping
 # ============================================================================
@@ -92,7 +125,10 @@ class DynamicCitationProcessor:
         self.citation_to_doc: dict[int, SearchDoc] = {}
 
         # Token processing state
-        self.llm_out = ""  # entire output so far
+        # entire output so far, kept as pieces to avoid copying it on every token
+        self._llm_out_parts: list[str] = []
+        self._llm_out_len = 0
+        self._code_fences = CodeFenceTracker()
         self.curr_segment = ""  # tokens held for citation processing
         self.hold = ""  # tokens held for stop token processing
         self.stop_stream = stop_stream
@@ -119,6 +155,29 @@ class DynamicCitationProcessor:
             r"([\[【［]{2}\d+[\]】］]{2})|([\[【［]\d+(?:, ?\d+)*[\]】］])"
         )
 
+    @property
+    def llm_out(self) -> str:
+        """The entire (unprocessed) output so far."""
+        if len(self._llm_out_parts) > 1:
+            self._llm_out_parts = ["".join(self._llm_out_parts)]
+        return self._llm_out_parts[0] if self._llm_out_parts else ""
+
+    def _append_llm_out(self, token: str) -> None:
+        if token:
+            self._llm_out_parts.append(token)
+            self._llm_out_len += len(token)
+            self._code_fences.feed(token)
+
+    def _llm_out_char_at(self, index: int) -> str:
+        # only ever called for positions right before the held segment, so walking
+        # back from the end touches a handful of pieces
+        offset = self._llm_out_len
+        for part in reversed(self._llm_out_parts):
+            offset -= len(part)
+            if index >= offset:
+                return part[index - offset]
+        raise IndexError(index)
+
     def update_citation_mapping(self, citation_mapping: dict[int, SearchDoc]) -> None:
         """
         Update the citation number to SearchDoc mapping.
@@ -189,7 +248,9 @@ class DynamicCitationProcessor:
                 self.hold = ""
 
         self.curr_segment += token
-        self.llm_out += token
+        self._append_llm_out(token)
+        # evaluated once per token, the output only changes above
+        is_in_code_block = self._code_fences.in_code_block
 
         # Handle code blocks without language tags
         # If we see ``` followed by \n, add "plaintext" language specifier
@@ -200,7 +261,7 @@ class DynamicCitationProcessor:
                 parts = self.curr_segment.split("```")
                 if len(parts) > 1 and len(parts[1]) > 0:
                     piece_that_comes_after = parts[1][0]
-                    if piece_that_comes_after == "\n" and in_code_block(self.llm_out):
+                    if piece_that_comes_after == "\n" and is_in_code_block:
                         self.curr_segment = self.curr_segment.replace(
                             "```", "```plaintext"
                         )
@@ -212,7 +273,7 @@ class DynamicCitationProcessor:
         )
 
         result = ""
-        if citation_matches and not in_code_block(self.llm_out):
+        if citation_matches and not is_in_code_block:
             match_idx = 0
             for match in citation_matches:
                 match_span = match.span()
@@ -233,11 +294,11 @@ class DynamicCitationProcessor:
                         has_leading_space = True
                     else:
                         # Citation at start of segment - check if previous output has space
-                        segment_start_idx = len(self.llm_out) - len(self.curr_segment)
+                        segment_start_idx = self._llm_out_len - len(self.curr_segment)
                         if segment_start_idx > 0:
-                            has_leading_space = self.llm_out[
+                            has_leading_space = self._llm_out_char_at(
                                 segment_start_idx - 1
-                            ].isspace()
+                            ).isspace()
                         else:
                             has_leading_space = False
 
@@ -235,7 +235,9 @@ def translate_history_to_llm_format(
                 for img_file in msg.image_files:
                     if img_file.file_type == ChatFileType.IMAGE:
                         try:
-                            image_type = get_image_type_from_bytes(img_file.content)
+                            image_type = get_image_type_from_bytes(
+                                img_file.load_content()
+                            )
                             base64_data = img_file.to_base64()
                             image_url = f"data:{image_type};base64,{base64_data}"
 
@@ -13,6 +13,7 @@ from onyx.context.search.enums import QueryFlow
 from onyx.context.search.enums import RecencyBiasSetting
 from onyx.context.search.enums import SearchType
 from onyx.context.search.models import SearchDoc
+from onyx.file_store.file_store import get_default_file_store
 from onyx.file_store.models import FileDescriptor
 from onyx.file_store.models import InMemoryChatFile
 from onyx.server.query_and_chat.streaming_models import CitationInfo
@@ -200,9 +201,24 @@ class ChatBasicResponse(BaseModel):
 
 
 class ChatLoadedFile(InMemoryChatFile):
+    """A file of the chat history. Text files only keep their extracted text (the
+    content is empty), images of the history are only read from the file store once
+    they are sent to the LLM, see `load_content`."""
+
     content_text: str | None
     token_count: int
 
+    def load_content(self) -> bytes:
+        if not self.content:
+            self.content = (
+                get_default_file_store().read_file(self.file_id, mode="b").read()
+            )
+        return self.content
+
+    def to_base64(self) -> str:
+        self.load_content()
+        return super().to_base64()
+
 
 class ChatMessageSimple(BaseModel):
     message: str
@@ -440,7 +440,7 @@ def stream_chat_message_objects(
 
         # TODO Once summarization is done, we don't need to load all the files from the beginning anymore.
         # load all files needed for this chat chain in memory
-        files = load_all_chat_files(chat_history, db_session)
+        files = load_all_chat_files(chat_history, db_session, token_counter)
 
         # TODO Need to think of some way to support selected docs from the sidebar
 
@@ -205,6 +205,16 @@ VESPA_DEPLOYMENT_ZIP = (
 VESPA_CLOUD_CERT_PATH = os.environ.get("VESPA_CLOUD_CERT_PATH")
 VESPA_CLOUD_KEY_PATH = os.environ.get("VESPA_CLOUD_KEY_PATH")
 
+# Only used if DOCUMENT_INDEX_TYPE is "local", the in-process index for single node deployments
+LOCAL_DOCUMENT_INDEX_DIR = (
+    os.environ.get("LOCAL_DOCUMENT_INDEX_DIR") or "/app/onyx/local_index"
+)
+# "float32" or "int8", int8 uses 4x less disk/page cache at a small cost in recall.
+# Only applied when the index is first created.
+LOCAL_DOCUMENT_INDEX_VECTOR_DTYPE = (
+    os.environ.get("LOCAL_DOCUMENT_INDEX_VECTOR_DTYPE") or "float32"
+)
+
 # Number of documents in a batch during indexing (further batching done by chunks before passing to bi-encoder)
 INDEX_BATCH_SIZE = int(os.environ.get("INDEX_BATCH_SIZE") or 16)
 
@@ -268,6 +278,19 @@ REDIS_REPLICA_HOST = os.environ.get("REDIS_REPLICA_HOST") or REDIS_HOST
 
 REDIS_AUTH_KEY_PREFIX = "fastapi_users_token:"
 
+# Values of the key value store are cached in each process in front of Redis. Writes
+# invalidate the cached values of all processes over Redis pub/sub, the TTL bounds
+# staleness should an invalidation message be missed
+DISABLE_KV_STORE_LOCAL_CACHE = (
+    os.environ.get("DISABLE_KV_STORE_LOCAL_CACHE", "").lower() == "true"
+)
+KV_STORE_LOCAL_CACHE_TTL_SECONDS = float(
+    os.environ.get("KV_STORE_LOCAL_CACHE_TTL_SECONDS") or 60
+)
+KV_STORE_LOCAL_CACHE_MAX_ENTRIES = int(
+    os.environ.get("KV_STORE_LOCAL_CACHE_MAX_ENTRIES") or 10_000
+)
+
 # Rate limiting for auth endpoints
 RATE_LIMIT_WINDOW_SECONDS: int | None = None
 _rate_limit_window_seconds_str = os.environ.get("RATE_LIMIT_WINDOW_SECONDS")
@@ -404,6 +427,20 @@ CELERY_WORKER_USER_FILE_PROCESSING_CONCURRENCY = int(
 # The maximum number of tasks that can be queued up to sync to Vespa in a single pass
 VESPA_SYNC_MAX_TASKS = 8192
 
+# The number of documents handled by a single batched vespa metadata sync task
+# (used for document set and user group syncs)
+VESPA_SYNC_BATCH_SIZE = int(os.environ.get("VESPA_SYNC_BATCH_SIZE") or 256)
+
+# The number of documents handled by a single batched document cleanup task
+# (used for connector deletion and pruning)
+DOCUMENT_CLEANUP_BATCH_SIZE = int(os.environ.get("DOCUMENT_CLEANUP_BATCH_SIZE") or 64)
+
+# The number of documents whose external permissions are written to postgres in a
+# single transaction during a doc permission sync
+PERMISSION_SYNC_UPDATE_BATCH_SIZE = int(
+    os.environ.get("PERMISSION_SYNC_UPDATE_BATCH_SIZE") or 256
+)
+
 DB_YIELD_PER_DEFAULT = 64
 
 #####
@@ -637,6 +674,19 @@ ENABLE_CONTEXTUAL_RAG = os.environ.get("ENABLE_CONTEXTUAL_RAG", "").lower() == "
 
 DEFAULT_CONTEXTUAL_RAG_LLM_NAME = "gpt-4o-mini"
 DEFAULT_CONTEXTUAL_RAG_LLM_PROVIDER = "DevEnvPresetOpenAI"
+# Maximum number of contextual RAG LLM calls in flight at once within a process,
+# across all documents and indexing batches
+CONTEXTUAL_RAG_MAX_CONCURRENCY = int(
+    os.environ.get("CONTEXTUAL_RAG_MAX_CONCURRENCY") or 8
+)
+# Document summaries and chunk contexts are cached in Redis by content hash so that
+# re-indexing unchanged documents does not call the LLM again
+DISABLE_CONTEXTUAL_RAG_CACHE = (
+    os.environ.get("DISABLE_CONTEXTUAL_RAG_CACHE", "").lower() == "true"
+)
+CONTEXTUAL_RAG_CACHE_TTL_SECONDS = int(
+    os.environ.get("CONTEXTUAL_RAG_CACHE_TTL_SECONDS") or 30 * 24 * 60 * 60
+)
 # Finer grained chunking for more detail retention
 # Slightly larger since the sentence aware split is a max cutoff so most minichunks will be under MINI_CHUNK_SIZE
 # tokens. But we need it to be at least as big as 1/4th chunk size to avoid having a tiny mini-chunk at the end
@@ -668,6 +718,60 @@ INDEXING_EMBEDDING_MODEL_NUM_THREADS = int(
     os.environ.get("INDEXING_EMBEDDING_MODEL_NUM_THREADS") or 8
 )
 
+# Splits each indexing batch into sub-batches of documents and runs chunking, embedding and
+# vector DB writes as overlapping stages instead of one after the other.
+ENABLE_PIPELINED_INDEXING = (
+    os.environ.get("ENABLE_PIPELINED_INDEXING", "").lower() == "true"
+)
+# Number of documents per sub-batch when pipelined indexing is enabled
+PIPELINED_INDEXING_SUB_BATCH_SIZE = int(
+    os.environ.get("PIPELINED_INDEXING_SUB_BATCH_SIZE") or 4
+)
+# Max number of sub-batches buffered between two stages, bounds memory usage
+PIPELINED_INDEXING_QUEUE_SIZE = int(
+    os.environ.get("PIPELINED_INDEXING_QUEUE_SIZE") or 2
+)
+
+# Content-addressed cache for passage embeddings so that unchanged text is not re-embedded
+# on every reindex. One of "" (disabled), "sqlite" (local disk) or "postgres".
+EMBEDDING_CACHE_TYPE = (os.environ.get("EMBEDDING_CACHE_TYPE") or "").lower()
+# Path of the sqlite database file when EMBEDDING_CACHE_TYPE is "sqlite"
+EMBEDDING_CACHE_SQLITE_PATH = (
+    os.environ.get("EMBEDDING_CACHE_SQLITE_PATH") or "/tmp/onyx_embedding_cache.sqlite3"
+)
+# Least recently used entries are evicted once the cache grows beyond this many embeddings
+EMBEDDING_CACHE_MAX_ENTRIES = int(
+    os.environ.get("EMBEDDING_CACHE_MAX_ENTRIES") or 1_000_000
+)
+
+# Query embeddings are cached in Redis (shared across processes) and in a small in-process
+# LRU so that repeated searches do not go back to the embedding model.
+DISABLE_QUERY_EMBEDDING_CACHE = (
+    os.environ.get("DISABLE_QUERY_EMBEDDING_CACHE", "").lower() == "true"
+)
+QUERY_EMBEDDING_CACHE_TTL_SECONDS = int(
+    os.environ.get("QUERY_EMBEDDING_CACHE_TTL_SECONDS") or 60 * 60 * 24
+)
+QUERY_EMBEDDING_CACHE_LOCAL_MAX_ENTRIES = int(
+    os.environ.get("QUERY_EMBEDDING_CACHE_LOCAL_MAX_ENTRIES") or 1024
+)
+
+# User ACLs used for search filters are cached in Redis (shared across processes) and
+# in-process. User group and external group changes invalidate the cache, the TTL bounds
+# how stale any other change (e.g. to the user's email) can get.
+DISABLE_USER_ACL_CACHE = os.environ.get("DISABLE_USER_ACL_CACHE", "").lower() == "true"
+USER_ACL_CACHE_TTL_SECONDS = int(os.environ.get("USER_ACL_CACHE_TTL_SECONDS") or 300)
+USER_ACL_CACHE_LOCAL_MAX_ENTRIES = int(
+    os.environ.get("USER_ACL_CACHE_LOCAL_MAX_ENTRIES") or 4096
+)
+
+# The extracted text of files attached to chat messages is cached in-process so that it
+# isn't read from the file store again on every turn of a chat session. Total size of
+# the cached texts in characters.
+CHAT_FILE_TEXT_CACHE_MAX_CHARS = int(
+    os.environ.get("CHAT_FILE_TEXT_CACHE_MAX_CHARS") or 20_000_000
+)
+
 # During an indexing attempt, specifies the number of batches which are allowed to
 # exception without aborting the attempt.
 INDEXING_EXCEPTION_LIMIT = int(os.environ.get("INDEXING_EXCEPTION_LIMIT") or 0)
@@ -770,6 +874,9 @@ CUSTOM_ANSWER_VALIDITY_CONDITIONS = json.loads(
 )
 
 VESPA_REQUEST_TIMEOUT = int(os.environ.get("VESPA_REQUEST_TIMEOUT") or "15")
+# Max number of concurrent Visit API requests of a single id based retrieval, these share
+# a process wide HTTP/2 client with at most this many connections
+VESPA_VISIT_MAX_CONCURRENCY = int(os.environ.get("VESPA_VISIT_MAX_CONCURRENCY") or 8)
 
 SYSTEM_RECURSION_LIMIT = int(os.environ.get("SYSTEM_RECURSION_LIMIT") or "1000")
 
@@ -926,6 +1033,24 @@ IMAGE_SUMMARIZATION_USER_PROMPT = os.environ.get(
     DEFAULT_IMAGE_SUMMARIZATION_USER_PROMPT,
 )
 
+# Max number of images summarized concurrently during indexing
+IMAGE_SUMMARIZATION_MAX_WORKERS = int(
+    os.environ.get("IMAGE_SUMMARIZATION_MAX_WORKERS") or 4
+)
+# Max number of image summarization requests started per minute per LLM provider, in
+# each indexing process. 0 means unlimited
+IMAGE_SUMMARIZATION_MAX_REQUESTS_PER_MINUTE = int(
+    os.environ.get("IMAGE_SUMMARIZATION_MAX_REQUESTS_PER_MINUTE") or 0
+)
+# Image summaries are cached in Redis by a hash of the image content and the model /
+# prompts, so an image that is embedded in many documents is only summarized once
+DISABLE_IMAGE_SUMMARY_CACHE = (
+    os.environ.get("DISABLE_IMAGE_SUMMARY_CACHE", "").lower() == "true"
+)
+IMAGE_SUMMARY_CACHE_TTL_SECONDS = int(
+    os.environ.get("IMAGE_SUMMARY_CACHE_TTL_SECONDS") or 60 * 60 * 24 * 30
+)
+
 IMAGE_ANALYSIS_SYSTEM_PROMPT = os.environ.get(
     "IMAGE_ANALYSIS_SYSTEM_PROMPT",
     DEFAULT_IMAGE_ANALYSIS_SYSTEM_PROMPT,
@@ -247,6 +247,7 @@ class BlobType(str, Enum):
 class DocumentIndexType(str, Enum):
     COMBINED = "combined"  # Vespa
     SPLIT = "split"  # Typesense + Qdrant
+    LOCAL = "local"  # In-process, numpy vectors + SQLite FTS5 BM25
 
 
 class AuthType(str, Enum):
@@ -531,7 +532,9 @@ class OnyxCeleryTask:
 
     CONNECTOR_PRUNING_GENERATOR_TASK = "connector_pruning_generator_task"
     DOCUMENT_BY_CC_PAIR_CLEANUP_TASK = "document_by_cc_pair_cleanup_task"
+    DOCUMENT_BY_CC_PAIR_CLEANUP_BATCH_TASK = "document_by_cc_pair_cleanup_batch_task"
     VESPA_METADATA_SYNC_TASK = "vespa_metadata_sync_task"
+    VESPA_METADATA_SYNC_BATCH_TASK = "vespa_metadata_sync_batch_task"
     USER_FILE_DOCID_MIGRATION = "user_file_docid_migration"
 
     # chat retention
@@ -135,6 +135,13 @@ KG_CLUSTERING_THRESHOLD: float = float(
     os.environ.get("KG_CLUSTERING_THRESHOLD", "0.96")
 )
 
+# Cluster staged entities in batches against an in-memory trigram index of the existing
+# entities (loaded once per entity type), instead of one similarity query per entity
+KG_CLUSTERING_BATCH_MODE: bool = (
+    os.environ.get("KG_CLUSTERING_BATCH_MODE", "").lower() == "true"
+)
+KG_CLUSTERING_BATCH_SIZE: int = int(os.environ.get("KG_CLUSTERING_BATCH_SIZE", "1000"))
+
 KG_MAX_SEARCH_DOCUMENTS: int = int(os.environ.get("KG_MAX_SEARCH_DOCUMENTS", "15"))
 
 KG_MAX_DECOMPOSITION_SEGMENTS: int = int(
@@ -37,6 +37,7 @@ from onyx.connectors.salesforce.utils import MODIFIED_FIELD
 from onyx.connectors.salesforce.utils import NAME_FIELD
 from onyx.connectors.salesforce.utils import USER_OBJECT_TYPE
 from onyx.indexing.indexing_heartbeat import IndexingHeartbeatInterface
+from onyx.utils.batching import batch_generator
 from onyx.utils.logger import setup_logger
 from shared_configs.configs import MULTI_TENANT
 
@@ -469,55 +470,59 @@ class SalesforceConnector(LoadConnector, PollConnector, SlimConnectorWithPermSyn
             total_types = len(object_type_to_csv_paths)
             logger.info(f"Starting to process {total_types} object types")
 
-            for i, (object_type, csv_paths) in enumerate(
-                object_type_to_csv_paths.items(), 1
-            ):
-                logger.info(f"Processing object type {object_type} ({i}/{total_types})")
-                # If path is None, it means it failed to fetch the csv
-                if csv_paths is None:
-                    continue
-
-                # Go through each csv path and use it to update the db
-                for csv_path in csv_paths:
-                    num_records = 0
-                    with open(csv_path, "r", newline="", encoding="utf-8") as f:
-                        reader = csv.DictReader(f)
-                        for row in reader:
-                            num_records += 1
-
-                    logger.debug(
-                        f"Processing CSV: object_type={object_type} "
-                        f"csv={csv_path} "
-                        f"len={Path(csv_path).stat().st_size} "
-                        f"records={num_records}"
+            # the db is new for every full sync, so load it as fast as possible
+            with sf_db.bulk_load():
+                for i, (object_type, csv_paths) in enumerate(
+                    object_type_to_csv_paths.items(), 1
+                ):
+                    logger.info(
+                        f"Processing object type {object_type} ({i}/{total_types})"
                     )
+                    # If path is None, it means it failed to fetch the csv
+                    if csv_paths is None:
+                        continue
+
+                    # Go through each csv path and use it to update the db
+                    for csv_path in csv_paths:
+                        num_records = 0
+                        with open(csv_path, "r", newline="", encoding="utf-8") as f:
+                            reader = csv.DictReader(f)
+                            for row in reader:
+                                num_records += 1
+
+                        logger.debug(
+                            f"Processing CSV: object_type={object_type} "
+                            f"csv={csv_path} "
+                            f"len={Path(csv_path).stat().st_size} "
+                            f"records={num_records}"
+                        )
 
-                    # yield an empty list to keep the connector alive
-                    yield docs_to_yield
+                        # yield an empty list to keep the connector alive
+                        yield docs_to_yield
 
-                    new_ids = sf_db.update_from_csv(
-                        object_type=object_type,
-                        csv_download_path=csv_path,
-                    )
-                    for new_id in new_ids:
-                        changed_ids_to_type[new_id] = object_type
+                        new_ids = sf_db.update_from_csv(
+                            object_type=object_type,
+                            csv_download_path=csv_path,
+                        )
+                        for new_id in new_ids:
+                            changed_ids_to_type[new_id] = object_type
 
-                    sf_db.flush()
+                        sf_db.flush()
 
-                    logger.debug(
-                        f"Added {len(new_ids)} new/updated records for {object_type}"
-                    )
+                        logger.debug(
+                            f"Added {len(new_ids)} new/updated records for {object_type}"
+                        )
 
-                    logger.info(
-                        f"Processed CSV: object_type={object_type} "
-                        f"csv={csv_path} "
-                        f"len={Path(csv_path).stat().st_size} "
-                        f"records={num_records} "
-                        f"db_len={sf_db.file_size}"
-                    )
+                        logger.info(
+                            f"Processed CSV: object_type={object_type} "
+                            f"csv={csv_path} "
+                            f"len={Path(csv_path).stat().st_size} "
+                            f"records={num_records} "
+                            f"db_len={sf_db.file_size}"
+                        )
 
-                    os.remove(csv_path)
-                    gc.collect()
+                        os.remove(csv_path)
+                        gc.collect()
 
             gc.collect()
 
@@ -531,73 +536,77 @@ class SalesforceConnector(LoadConnector, PollConnector, SlimConnectorWithPermSyn
 
             last_log_time = 0.0
 
-            for (
-                parent_type,
-                parent_id,
-                examined_ids,
-            ) in sf_db.get_changed_parent_ids_by_type(
-                changed_ids=list(changed_ids_to_type.keys()),
-                parent_types=ctx.parent_types,
+            for changed_parents in batch_generator(
+                sf_db.get_changed_parent_ids_by_type(
+                    changed_ids=list(changed_ids_to_type.keys()),
+                    parent_types=ctx.parent_types,
+                ),
+                self.batch_size,
             ):
-                now = time.monotonic()
-
-                processed = examined_ids - 1
-                if now - last_log_time > SalesforceConnector.LOG_INTERVAL:
-                    logger.info(
-                        f"Processing stats: {type_to_processed} "
-                        f"file_size={sf_db.file_size} "
-                        f"processed={processed} "
-                        f"remaining={len(changed_ids_to_type) - processed}"
-                    )
-                    last_log_time = now
-
-                type_to_processed[parent_type] = (
-                    type_to_processed.get(parent_type, 0) + 1
+                # fetch the records of the whole batch at once
+                parent_objects = sf_db.get_records(
+                    [parent_id for _, parent_id, _ in changed_parents]
                 )
+                for parent_type, parent_id, examined_ids in changed_parents:
+                    now = time.monotonic()
+
+                    processed = examined_ids - 1
+                    if now - last_log_time > SalesforceConnector.LOG_INTERVAL:
+                        logger.info(
+                            f"Processing stats: {type_to_processed} "
+                            f"file_size={sf_db.file_size} "
+                            f"processed={processed} "
+                            f"remaining={len(changed_ids_to_type) - processed}"
+                        )
+                        last_log_time = now
 
-                parent_object = sf_db.get_record(parent_id, parent_type)
-                if not parent_object:
-                    logger.warning(
-                        f"Failed to get parent object {parent_id} for {parent_type}"
+                    type_to_processed[parent_type] = (
+                        type_to_processed.get(parent_type, 0) + 1
                     )
-                    continue
-
-                # use the db to create a document we can yield
-                doc = convert_sf_object_to_doc(
-                    sf_db,
-                    sf_object=parent_object,
-                    sf_instance=self.sf_client.sf_instance,
-                )
-
-                doc.metadata["object_type"] = parent_type
-
-                # Add default attributes to the metadata
-                for (
-                    sf_attribute,
-                    canonical_attribute,
-                ) in _DEFAULT_ATTRIBUTES_TO_KEEP.get(parent_type, {}).items():
-                    if sf_attribute in parent_object.data:
-                        doc.metadata[canonical_attribute] = parent_object.data[
-                            sf_attribute
-                        ]
 
-                doc_sizeof = sys.getsizeof(doc)
-                docs_to_yield_bytes += doc_sizeof
-                docs_to_yield.append(doc)
-                parents_changed += 1
+                    parent_object = parent_objects.get(parent_id)
+                    if not parent_object:
+                        logger.warning(
+                            f"Failed to get parent object {parent_id} for {parent_type}"
+                        )
+                        continue
 
-                # memory usage is sensitive to the input length, so we're yielding immediately
-                # if the batch exceeds a certain byte length
-                if (
-                    len(docs_to_yield) >= self.batch_size
-                    or docs_to_yield_bytes > SalesforceConnector.MAX_BATCH_BYTES
-                ):
-                    yield docs_to_yield
-                    docs_to_yield = []
-                    docs_to_yield_bytes = 0
+                    # use the db to create a document we can yield
+                    doc = convert_sf_object_to_doc(
+                        sf_db,
+                        sf_object=parent_object,
+                        sf_instance=self.sf_client.sf_instance,
+                    )
 
-                    # observed a memory leak / size issue with the account table if we don't gc.collect here.
-                    gc.collect()
+                    doc.metadata["object_type"] = parent_type
+
+                    # Add default attributes to the metadata
+                    for (
+                        sf_attribute,
+                        canonical_attribute,
+                    ) in _DEFAULT_ATTRIBUTES_TO_KEEP.get(parent_type, {}).items():
+                        if sf_attribute in parent_object.data:
+                            doc.metadata[canonical_attribute] = parent_object.data[
+                                sf_attribute
+                            ]
+
+                    doc_sizeof = sys.getsizeof(doc)
+                    docs_to_yield_bytes += doc_sizeof
+                    docs_to_yield.append(doc)
+                    parents_changed += 1
+
+                    # memory usage is sensitive to the input length, so we're yielding immediately
+                    # if the batch exceeds a certain byte length
+                    if (
+                        len(docs_to_yield) >= self.batch_size
+                        or docs_to_yield_bytes > SalesforceConnector.MAX_BATCH_BYTES
+                    ):
+                        yield docs_to_yield
+                        docs_to_yield = []
+                        docs_to_yield_bytes = 0
+
+                        # observed a memory leak / size issue with the account table if we don't gc.collect here.
+                        gc.collect()
 
             yield docs_to_yield
         except Exception:
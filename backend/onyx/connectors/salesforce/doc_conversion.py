@@ -216,8 +216,10 @@ def convert_sf_object_to_doc(
     )
 
     sections = [_extract_section(sf_object.data, f"{base_url}/{sf_object.id}")]
-    for id in sf_db.get_child_ids(sf_object.id):
-        if not (child_object := sf_db.get_record(id, isChild=True)):
+    child_ids = list(sf_db.get_child_ids(sf_object.id))
+    child_objects = sf_db.get_records(child_ids, isChild=True)
+    for id in child_ids:
+        if not (child_object := child_objects.get(id)):
             continue
         sections.append(
             _extract_section(child_object.data, f"{base_url}/{child_object.id}")
@@ -3,7 +3,9 @@ import json
 import os
 import sqlite3
 import time
+from collections import defaultdict
 from collections.abc import Iterator
+from contextlib import contextmanager
 from pathlib import Path
 from typing import Any
 from typing import cast
@@ -21,6 +23,31 @@ from shared_configs.utils import batch_list
 
 logger = setup_logger()
 
+# SQLite typically has a limit of 999 variables
+_MAX_QUERY_VARIABLES = 500
+
+# Secondary indices, dropped during bulk loads and created again afterwards
+_INDEX_DEFINITIONS: dict[str, str] = {
+    "idx_object_type": """
+        CREATE INDEX idx_object_type
+        ON salesforce_objects(object_type, id)
+        WHERE object_type IS NOT NULL
+        """,
+    "idx_parent_id": """
+        CREATE INDEX idx_parent_id
+        ON relationships(parent_id, child_id)
+        """,
+    "idx_child_parent": """
+        CREATE INDEX idx_child_parent
+        ON relationships(child_id)
+        WHERE child_id IS NOT NULL
+        """,
+    "idx_relationship_types_lookup": """
+        CREATE INDEX idx_relationship_types_lookup
+        ON relationship_types(parent_type, child_id, parent_id)
+        """,
+}
+
 
 class OnyxSalesforceSQLite:
     """Notes on context management using 'with self.conn':
@@ -33,6 +60,10 @@ class OnyxSalesforceSQLite:
     # might be appropriate here.
     NULL_ID_STRING = "N/A"
 
+    # CSV rows are written with executemany in batches of this size. Each batch is
+    # committed, or else memory will balloon.
+    CSV_LOAD_BATCH_SIZE = 1024
+
     def __init__(self, filename: str, isolation_level: str | None = None):
         self.filename = filename
         self.isolation_level = isolation_level
@@ -169,49 +200,7 @@ class OnyxSalesforceSQLite:
             """
             )
 
-            # Create indexes if they don't exist (SQLite ignores IF NOT EXISTS for indexes)
-            def create_index_if_not_exists(
-                index_name: str, create_statement: str
-            ) -> None:
-                cursor.execute(
-                    f"SELECT name FROM sqlite_master WHERE type='index' AND name='{index_name}'"
-                )
-                if not cursor.fetchone():
-                    cursor.execute(create_statement)
-
-            create_index_if_not_exists(
-                "idx_object_type",
-                """
-                CREATE INDEX idx_object_type
-                ON salesforce_objects(object_type, id)
-                WHERE object_type IS NOT NULL
-                """,
-            )
-
-            create_index_if_not_exists(
-                "idx_parent_id",
-                """
-                CREATE INDEX idx_parent_id
-                ON relationships(parent_id, child_id)
-                """,
-            )
-
-            create_index_if_not_exists(
-                "idx_child_parent",
-                """
-                CREATE INDEX idx_child_parent
-                ON relationships(child_id)
-                WHERE child_id IS NOT NULL
-                """,
-            )
-
-            create_index_if_not_exists(
-                "idx_relationship_types_lookup",
-                """
-                CREATE INDEX idx_relationship_types_lookup
-                ON relationship_types(parent_type, child_id, parent_id)
-                """,
-            )
+            OnyxSalesforceSQLite._create_indices(cursor)
 
             elapsed = time.monotonic() - start
             logger.info(f"init_db - create tables and indices: elapsed={elapsed:.2f}")
@@ -239,6 +228,47 @@ class OnyxSalesforceSQLite:
             elapsed = time.monotonic() - start
             logger.info(f"init_db - update_user_email_map: elapsed={elapsed:.2f}")
 
+    @staticmethod
+    def _create_indices(cursor: sqlite3.Cursor) -> None:
+        # Create indexes if they don't exist (SQLite ignores IF NOT EXISTS for indexes)
+        for index_name, create_statement in _INDEX_DEFINITIONS.items():
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type='index' AND name=?",
+                (index_name,),
+            )
+            if not cursor.fetchone():
+                cursor.execute(create_statement)
+
+    @contextmanager
+    def bulk_load(self) -> Iterator[None]:
+        """Speeds up loading a large number of rows, e.g. all CSVs of a full sync.
+
+        Secondary indices are dropped for the duration of the load and created again
+        in one pass at the end, and fsyncs are skipped. Only meant for databases that
+        can be rebuilt from scratch if the process crashes mid-load. Nothing but
+        update_from_csv should be called inside this context.
+        """
+        if self._conn is None:
+            raise RuntimeError("Database connection is closed")
+
+        start = time.monotonic()
+        with self._conn:
+            cursor = self._conn.cursor()
+            cursor.execute("PRAGMA synchronous=OFF")
+            for index_name in _INDEX_DEFINITIONS:
+                cursor.execute(f"DROP INDEX IF EXISTS {index_name}")
+
+        try:
+            yield
+        finally:
+            with self._conn:
+                cursor = self._conn.cursor()
+                OnyxSalesforceSQLite._create_indices(cursor)
+                cursor.execute("PRAGMA synchronous=NORMAL")
+
+            elapsed = time.monotonic() - start
+            logger.info(f"bulk_load - finished: elapsed={elapsed:.2f}")
+
     def get_user_id_by_email(self, email: str) -> str | None:
         """Get the Salesforce User ID for a given email address.
 
@@ -535,7 +565,7 @@ class OnyxSalesforceSQLite:
 
             with open(csv_download_path, "r", newline="", encoding="utf-8") as f:
                 reader = csv.DictReader(f)
-                uncommitted_rows = 0
+                batch: list[tuple[str, str, set[str]]] = []
                 for row in reader:
                     if ID_FIELD not in row:
                         logger.warning(
@@ -548,29 +578,18 @@ class OnyxSalesforceSQLite:
                     normalized_record, parent_ids = (
                         OnyxSalesforceSQLite.normalize_record(row, remove_ids)
                     )
-                    normalized_record_json_str = json.dumps(normalized_record)
-
-                    # Update main object data
-                    # NOTE(rkuo): looks like we take a list and dump it as json into the db
-                    cursor.execute(
-                        """
-                        INSERT OR REPLACE INTO salesforce_objects (id, object_type, data)
-                        VALUES (?, ?, ?)
-                        """,
-                        (row_id, object_type, normalized_record_json_str),
-                    )
-
-                    # Update relationships using the same connection
-                    OnyxSalesforceSQLite._update_relationship_tables(
-                        cursor, row_id, parent_ids
-                    )
+                    batch.append((row_id, json.dumps(normalized_record), parent_ids))
                     updated_ids.append(row_id)
 
-                    # periodically commit or else memory will balloon
-                    uncommitted_rows += 1
-                    if uncommitted_rows >= 1024:
+                    if len(batch) >= self.CSV_LOAD_BATCH_SIZE:
+                        OnyxSalesforceSQLite._write_csv_batch(
+                            cursor, object_type, batch
+                        )
                         self._conn.commit()
-                        uncommitted_rows = 0
+                        batch = []
+
+                if batch:
+                    OnyxSalesforceSQLite._write_csv_batch(cursor, object_type, batch)
 
             # If we're updating User objects, update the email map
             if object_type == USER_OBJECT_TYPE:
@@ -578,6 +597,29 @@ class OnyxSalesforceSQLite:
 
         return updated_ids
 
+    @staticmethod
+    def _write_csv_batch(
+        cursor: sqlite3.Cursor,
+        object_type: str,
+        batch: list[tuple[str, str, set[str]]],
+    ) -> None:
+        """Writes a batch of (id, json data, parent ids) rows from a CSV."""
+        # Update main object data
+        # NOTE(rkuo): looks like we take a list and dump it as json into the db
+        cursor.executemany(
+            """
+            INSERT OR REPLACE INTO salesforce_objects (id, object_type, data)
+            VALUES (?, ?, ?)
+            """,
+            [(row_id, object_type, data) for row_id, data, _ in batch],
+        )
+
+        # if an id appears more than once, the last row wins like it would when
+        # applying the rows one by one
+        OnyxSalesforceSQLite._update_relationship_tables(
+            cursor, {row_id: parent_ids for row_id, _, parent_ids in batch}
+        )
+
     def get_child_ids(self, parent_id: str) -> set[str]:
         """Get all child IDs for a given parent ID."""
         if self._conn is None:
@@ -664,6 +706,60 @@ class OnyxSalesforceSQLite:
 
             return SalesforceObject(id=object_id, type=object_type, data=data)
 
+    def get_records(
+        self, object_ids: list[str], isChild: bool = False
+    ) -> dict[str, SalesforceObject]:
+        """Batch version of `get_record` with the type of each object looked up from the
+        db. Fetches the objects and the names of their accounts with a few set based
+        queries. Returns a dict of object id to record, missing objects are left out."""
+        if self._conn is None:
+            raise RuntimeError("Database connection is closed")
+
+        records: dict[str, SalesforceObject] = {}
+        with self._conn:
+            cursor = self._conn.cursor()
+            for batch_ids in batch_list(
+                list(dict.fromkeys(object_ids)), _MAX_QUERY_VARIABLES
+            ):
+                id_placeholders = ",".join(["?" for _ in batch_ids])
+                cursor.execute(
+                    f"SELECT id, object_type, data FROM salesforce_objects WHERE id IN ({id_placeholders})",
+                    batch_ids,
+                )
+                for object_id, object_type, data in cursor.fetchall():
+                    records[object_id] = SalesforceObject(
+                        id=object_id, type=object_type, data=json.loads(data)
+                    )
+
+                if isChild:
+                    continue
+
+                # convert any account ids of the relationships back into data fields, with name
+                cursor.execute(
+                    f"""
+                    SELECT r.child_id, r.parent_id, json_extract(a.data, ?)
+                    FROM relationships r
+                    JOIN salesforce_objects a ON a.id = r.parent_id
+                    WHERE r.child_id IN ({id_placeholders})
+                    AND a.object_type = ?
+                    """,
+                    [f"$.{NAME_FIELD}"] + batch_ids + [ACCOUNT_OBJECT_TYPE],
+                )
+                for child_id, account_id, account_name in cursor.fetchall():
+                    record = records.get(child_id)
+                    # the following skips Account objects.
+                    if record is None or record.type == ACCOUNT_OBJECT_TYPE:
+                        continue
+                    record.data["AccountId"] = account_id
+                    record.data[ACCOUNT_OBJECT_TYPE] = (
+                        "" if account_name is None else account_name
+                    )
+
+        for object_id in object_ids:
+            if object_id not in records:
+                logger.warning(f"Object ID {object_id} not found")
+        return records
+
     def find_ids_by_type(self, object_type: str) -> list[str]:
         """Find all object IDs for rows of the specified type."""
         if self._conn is None:
@@ -677,70 +773,97 @@ class OnyxSalesforceSQLite:
             )
             return [row[0] for row in cursor.fetchall()]
 
+    @staticmethod
+    def _get_object_types(
+        cursor: sqlite3.Cursor, object_ids: set[str]
+    ) -> dict[str, str]:
+        object_types: dict[str, str] = {}
+        for batch_ids in batch_list(list(object_ids), _MAX_QUERY_VARIABLES):
+            id_placeholders = ",".join(["?" for _ in batch_ids])
+            cursor.execute(
+                f"SELECT id, object_type FROM salesforce_objects WHERE id IN ({id_placeholders})",
+                batch_ids,
+            )
+            object_types.update(cursor.fetchall())
+        return object_types
+
     @staticmethod
     def _update_relationship_tables(
-        cursor: sqlite3.Cursor, child_id: str, parent_ids: set[str]
+        cursor: sqlite3.Cursor, child_to_parent_ids: dict[str, set[str]]
     ) -> None:
-        """Given a child id and a set of parent id's, updates the
-        relationships of the child to the parents in the db and removes old relationships.
+        """Given child ids and their sets of parent id's, updates the
+        relationships of the children to the parents in the db and removes old relationships.
 
         Args:
             conn: The database connection to use (must be in a transaction)
-            child_id: The ID of the child record
-            parent_ids: Set of parent IDs to link to
+            child_to_parent_ids: Set of parent IDs to link to for each child ID
         """
 
         try:
             # Get existing parent IDs
-            cursor.execute(
-                "SELECT parent_id FROM relationships WHERE child_id = ?", (child_id,)
-            )
-            old_parent_ids = {row[0] for row in cursor.fetchall()}
+            old_parent_ids: dict[str, set[str]] = defaultdict(set)
+            for batch_ids in batch_list(
+                list(child_to_parent_ids.keys()), _MAX_QUERY_VARIABLES
+            ):
+                id_placeholders = ",".join(["?" for _ in batch_ids])
+                cursor.execute(
+                    f"SELECT child_id, parent_id FROM relationships WHERE child_id IN ({id_placeholders})",
+                    batch_ids,
+                )
+                for child_id, parent_id in cursor.fetchall():
+                    old_parent_ids[child_id].add(parent_id)
 
             # Calculate differences
-            parent_ids_to_remove = old_parent_ids - parent_ids
-            parent_ids_to_add = parent_ids - old_parent_ids
+            relationships_to_remove = [
+                (child_id, parent_id)
+                for child_id, parent_ids in child_to_parent_ids.items()
+                for parent_id in old_parent_ids[child_id] - parent_ids
+            ]
+            relationships_to_add = [
+                (child_id, parent_id)
+                for child_id, parent_ids in child_to_parent_ids.items()
+                for parent_id in parent_ids - old_parent_ids[child_id]
+            ]
 
             # Remove old relationships
-            if parent_ids_to_remove:
+            if relationships_to_remove:
                 cursor.executemany(
                     "DELETE FROM relationships WHERE child_id = ? AND parent_id = ?",
-                    [(child_id, parent_id) for parent_id in parent_ids_to_remove],
+                    relationships_to_remove,
                 )
                 # Also remove from relationship_types
                 cursor.executemany(
                     "DELETE FROM relationship_types WHERE child_id = ? AND parent_id = ?",
-                    [(child_id, parent_id) for parent_id in parent_ids_to_remove],
+                    relationships_to_remove,
                 )
 
             # Add new relationships
-            if parent_ids_to_add:
+            if relationships_to_add:
                 # First add to relationships table
                 cursor.executemany(
                     "INSERT INTO relationships (child_id, parent_id) VALUES (?, ?)",
-                    [(child_id, parent_id) for parent_id in parent_ids_to_add],
+                    relationships_to_add,
                 )
 
                 # Then get the types of the parent objects and add to relationship_types
-                for parent_id in parent_ids_to_add:
-                    cursor.execute(
-                        "SELECT object_type FROM salesforce_objects WHERE id = ?",
-                        (parent_id,),
-                    )
-                    result = cursor.fetchone()
-                    if result:
-                        parent_type = result[0]
-                        cursor.execute(
-                            """
-                            INSERT INTO relationship_types (child_id, parent_id, parent_type)
-                            VALUES (?, ?, ?)
-                            """,
-                            (child_id, parent_id, parent_type),
-                        )
+                parent_types = OnyxSalesforceSQLite._get_object_types(
+                    cursor, {parent_id for _, parent_id in relationships_to_add}
+                )
+                cursor.executemany(
+                    """
+                    INSERT INTO relationship_types (child_id, parent_id, parent_type)
+                    VALUES (?, ?, ?)
+                    """,
+                    [
+                        (child_id, parent_id, parent_types[parent_id])
+                        for child_id, parent_id in relationships_to_add
+                        if parent_id in parent_types
+                    ],
+                )
 
         except Exception:
             logger.exception(
-                f"Error updating relationship tables: child_id={child_id} parent_ids={parent_ids}"
+                f"Error updating relationship tables: num_children={len(child_to_parent_ids)}"
             )
             raise
 
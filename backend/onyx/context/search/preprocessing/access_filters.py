@@ -1,12 +1,12 @@
 from sqlalchemy.orm import Session
 
-from onyx.access.access import get_acl_for_user
+from onyx.access.acl_cache import get_cached_acl_for_user
 from onyx.context.search.models import IndexFilters
 from onyx.db.models import User
 
 
 def build_access_filters_for_user(user: User | None, session: Session) -> list[str]:
-    user_acl = get_acl_for_user(user, session)
+    user_acl = get_cached_acl_for_user(user, session)
     return list(user_acl)
 
 
@@ -0,0 +1,153 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import cast
+
+import numpy as np
+
+from onyx.configs.app_configs import DISABLE_QUERY_EMBEDDING_CACHE
+from onyx.configs.app_configs import QUERY_EMBEDDING_CACHE_LOCAL_MAX_ENTRIES
+from onyx.configs.app_configs import QUERY_EMBEDDING_CACHE_TTL_SECONDS
+from onyx.indexing.embedding_cache import build_embedding_cache_key
+from onyx.natural_language_processing.search_nlp_models import EmbeddingModel
+from onyx.redis.redis_pool import get_redis_client
+from onyx.utils.logger import setup_logger
+from shared_configs.contextvars import get_current_tenant_id
+from shared_configs.enums import EmbedTextType
+from shared_configs.model_server_models import Embedding
+
+logger = setup_logger()
+
+QUERY_EMBEDDING_REDIS_PREFIX = "query_embedding"
+
+
+class _LocalQueryEmbeddingCache:
+    """Bounded LRU of query embeddings with a per entry expiry. Keys already contain
+    the tenant and search settings, so a single instance is shared by the process."""
+
+    def __init__(self, max_entries: int, ttl_seconds: int) -> None:
+        self._max_entries = max_entries
+        self._ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, tuple[float, Embedding]] = OrderedDict()
+
+    def get(self, key: str) -> Embedding | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, embedding = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return embedding
+
+    def put(self, key: str, embedding: Embedding) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self._ttl_seconds, embedding)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_local_cache = _LocalQueryEmbeddingCache(
+    max_entries=QUERY_EMBEDDING_CACHE_LOCAL_MAX_ENTRIES,
+    ttl_seconds=QUERY_EMBEDDING_CACHE_TTL_SECONDS,
+)
+
+
+def _redis_key(search_settings_id: int, cache_key: str) -> str:
+    return f"{QUERY_EMBEDDING_REDIS_PREFIX}:{search_settings_id}:{cache_key}"
+
+
+def encode_queries_with_cache(
+    embedding_model: EmbeddingModel,
+    search_settings_id: int,
+    queries: list[str],
+) -> list[Embedding]:
+    """Embeds the queries, serving repeated ones from the in-process LRU or Redis.
+    Only the misses are sent to the model server. Redis is strictly best effort,
+    any failure there just falls through to the embedding model."""
+    if DISABLE_QUERY_EMBEDDING_CACHE or not queries:
+        return embedding_model.encode(queries, text_type=EmbedTextType.QUERY)
+
+    tenant_id = get_current_tenant_id()
+    redis_keys = [
+        _redis_key(
+            search_settings_id,
+            build_embedding_cache_key(
+                embedding_model=embedding_model,
+                text=query,
+                text_type=EmbedTextType.QUERY,
+                large_chunks_present=False,
+            ),
+        )
+        for query in queries
+    ]
+    # the redis client is tenant prefixed already, the local cache is not
+    local_keys = [f"{tenant_id}:{key}" for key in redis_keys]
+
+    embeddings: list[Embedding | None] = [_local_cache.get(key) for key in local_keys]
+
+    redis_client = None
+    if any(embedding is None for embedding in embeddings):
+        try:
+            redis_client = get_redis_client()
+            for i, key in enumerate(redis_keys):
+                if embeddings[i] is not None:
+                    continue
+                raw = redis_client.get(key)
+                if raw is None:
+                    continue
+                embedding = np.frombuffer(raw, dtype="<f4").tolist()  # type: ignore
+                embeddings[i] = embedding
+                _local_cache.put(local_keys[i], embedding)
+        except Exception:
+            logger.exception("Failed to read query embeddings from Redis")
+            redis_client = None
+
+    miss_indices = [i for i, embedding in enumerate(embeddings) if embedding is None]
+    if miss_indices:
+        # identical queries within the same call are only embedded once
+        unique_misses = list(dict.fromkeys(queries[i] for i in miss_indices))
+        new_embeddings = dict(
+            zip(
+                unique_misses,
+                embedding_model.encode(unique_misses, text_type=EmbedTextType.QUERY),
+            )
+        )
+        for i in miss_indices:
+            embeddings[i] = new_embeddings[queries[i]]
+            _local_cache.put(local_keys[i], new_embeddings[queries[i]])
+
+        if redis_client is not None:
+            try:
+                for i in miss_indices:
+                    redis_client.set(
+                        redis_keys[i],
+                        np.asarray(embeddings[i], dtype="<f4").tobytes(),
+                        ex=QUERY_EMBEDDING_CACHE_TTL_SECONDS,
+                    )
+            except Exception:
+                logger.exception("Failed to write query embeddings to Redis")
+
+    return cast(list[Embedding], embeddings)
+
+
+def invalidate_query_embedding_cache() -> None:
+    """Drops all cached query embeddings of the current tenant. Entries are also
+    namespaced by the search settings id, so this mostly frees the memory held by
+    the entries of the settings that were just swapped out."""
+    _local_cache.clear()
+
+    try:
+        redis_client = get_redis_client()
+        for key in redis_client.scan_iter(match=f"{QUERY_EMBEDDING_REDIS_PREFIX}:*"):
+            redis_client.delete(key)
+    except Exception:
+        logger.exception("Failed to invalidate query embeddings in Redis")
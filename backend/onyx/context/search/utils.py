@@ -10,6 +10,7 @@ from onyx.context.search.models import InferenceSection
 from onyx.context.search.models import SavedSearchDoc
 from onyx.context.search.models import SavedSearchDocWithContent
 from onyx.context.search.models import SearchDoc
+from onyx.context.search.query_embedding_cache import encode_queries_with_cache
 from onyx.db.models import SearchDoc as DBSearchDoc
 from onyx.db.search_settings import get_current_search_settings
 from onyx.natural_language_processing.search_nlp_models import EmbeddingModel
@@ -17,7 +18,6 @@ from onyx.utils.logger import setup_logger
 from onyx.utils.timing import log_function_time
 from shared_configs.configs import MODEL_SERVER_HOST
 from shared_configs.configs import MODEL_SERVER_PORT
-from shared_configs.enums import EmbedTextType
 from shared_configs.model_server_models import Embedding
 
 logger = setup_logger()
@@ -158,8 +158,11 @@ def get_query_embeddings(queries: list[str], db_session: Session) -> list[Embedd
         server_port=MODEL_SERVER_PORT,
     )
 
-    query_embedding = model.encode(queries, text_type=EmbedTextType.QUERY)
-    return query_embedding
+    return encode_queries_with_cache(
+        embedding_model=model,
+        search_settings_id=search_settings.id,
+        queries=queries,
+    )
 
 
 @log_function_time(print_only=True, debug_only=True)
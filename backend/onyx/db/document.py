@@ -22,6 +22,7 @@ from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import Session
 from sqlalchemy.sql.expression import null
 
+from onyx.configs.app_configs import DB_YIELD_PER_DEFAULT
 from onyx.configs.constants import DEFAULT_BOOST
 from onyx.configs.constants import DocumentSource
 from onyx.configs.kg_configs import KG_SIMPLE_ANSWER_MAX_DISPLAYED_SOURCES
@@ -216,6 +217,20 @@ def get_documents_for_connector_credential_pair(
     return db_session.scalars(stmt).all()
 
 
+def stream_document_ids_for_connector_credential_pair(
+    db_session: Session,
+    connector_id: int,
+    credential_id: int,
+    yield_per: int = DB_YIELD_PER_DEFAULT,
+) -> Generator[str, None, None]:
+    """Streams the ids of all documents of a cc pair without loading the rows."""
+    stmt = construct_document_id_select_for_connector_credential_pair(
+        connector_id, credential_id
+    )
+    for doc_id in db_session.scalars(stmt).yield_per(yield_per):
+        yield doc_id
+
+
 def get_documents_by_ids(
     db_session: Session,
     document_ids: list[str],
@@ -568,6 +583,23 @@ def mark_document_as_modified(
     db_session.commit()
 
 
+def mark_documents_as_modified(
+    document_ids: list[str],
+    db_session: Session,
+) -> None:
+    """Bulk version of `mark_document_as_modified`. Missing documents are ignored."""
+    if not document_ids:
+        return
+
+    stmt = (
+        update(DbDocument)
+        .where(DbDocument.id.in_(document_ids))
+        .values(last_modified=datetime.now(timezone.utc))
+    )
+    db_session.execute(stmt)
+    db_session.commit()
+
+
 def mark_document_as_synced(document_id: str, db_session: Session) -> None:
     stmt = select(DbDocument).where(DbDocument.id == document_id)
     doc = db_session.scalar(stmt)
@@ -579,6 +611,20 @@ def mark_document_as_synced(document_id: str, db_session: Session) -> None:
     db_session.commit()
 
 
+def mark_documents_as_synced(document_ids: list[str], db_session: Session) -> None:
+    """Bulk version of `mark_document_as_synced`. Missing documents are ignored."""
+    if not document_ids:
+        return
+
+    stmt = (
+        update(DbDocument)
+        .where(DbDocument.id.in_(document_ids))
+        .values(last_synced=datetime.now(timezone.utc))
+    )
+    db_session.execute(stmt)
+    db_session.commit()
+
+
 def delete_document_by_connector_credential_pair__no_commit(
     db_session: Session,
     document_id: str,
@@ -1013,6 +1059,24 @@ def update_document_kg_info(
     db_session.execute(stmt)
 
 
+def update_documents_kg_info(
+    db_session: Session, document_ids: list[str], kg_stage: KGStage
+) -> None:
+    """Same as `update_document_kg_info`, for many documents with a single statement."""
+    if not document_ids:
+        return
+
+    stmt = (
+        update(DbDocument)
+        .where(DbDocument.id.in_(document_ids))
+        .values(
+            kg_stage=kg_stage,
+            kg_processing_time=datetime.now(timezone.utc),
+        )
+    )
+    db_session.execute(stmt)
+
+
 def update_document_kg_stage(
     db_session: Session,
     document_id: str,
@@ -0,0 +1,80 @@
+from datetime import datetime
+from datetime import timezone
+
+from sqlalchemy import delete
+from sqlalchemy import func
+from sqlalchemy import select
+from sqlalchemy import update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from onyx.db.models import EmbeddingCacheEntry
+
+
+def fetch_embedding_cache_entries(
+    db_session: Session, cache_keys: list[str]
+) -> dict[str, bytes]:
+    """Returns the raw embedding bytes for every key that is present in the cache
+    and bumps their last accessed time (used for eviction)."""
+    if not cache_keys:
+        return {}
+
+    rows = db_session.execute(
+        select(EmbeddingCacheEntry.cache_key, EmbeddingCacheEntry.embedding).where(
+            EmbeddingCacheEntry.cache_key.in_(cache_keys)
+        )
+    ).all()
+    found = {row.cache_key: row.embedding for row in rows}
+
+    if found:
+        db_session.execute(
+            update(EmbeddingCacheEntry)
+            .where(EmbeddingCacheEntry.cache_key.in_(list(found.keys())))
+            .values(last_accessed_at=datetime.now(timezone.utc))
+        )
+        db_session.commit()
+
+    return found
+
+
+def upsert_embedding_cache_entries(
+    db_session: Session, entries: dict[str, bytes]
+) -> None:
+    """NOTE: this function is Postgres specific. Not all DBs support the ON CONFLICT clause."""
+    if not entries:
+        return
+
+    now = datetime.now(timezone.utc)
+    insert_stmt = insert(EmbeddingCacheEntry).values(
+        [
+            {"cache_key": key, "embedding": embedding, "last_accessed_at": now}
+            for key, embedding in entries.items()
+        ]
+    )
+    db_session.execute(
+        insert_stmt.on_conflict_do_update(
+            index_elements=["cache_key"],
+            set_={"last_accessed_at": insert_stmt.excluded.last_accessed_at},
+        )
+    )
+    db_session.commit()
+
+
+def evict_embedding_cache_entries(db_session: Session, max_entries: int) -> int:
+    """Deletes the least recently accessed entries so that at most `max_entries`
+    remain. Returns the number of deleted entries."""
+    total = db_session.scalar(select(func.count()).select_from(EmbeddingCacheEntry))
+    if not total or total <= max_entries:
+        return 0
+
+    stale_keys = (
+        select(EmbeddingCacheEntry.cache_key)
+        .order_by(EmbeddingCacheEntry.last_accessed_at.asc())
+        .limit(total - max_entries)
+        .scalar_subquery()
+    )
+    result = db_session.execute(
+        delete(EmbeddingCacheEntry).where(EmbeddingCacheEntry.cache_key.in_(stale_keys))
+    )
+    db_session.commit()
+    return result.rowcount or 0  # type: ignore
@@ -232,6 +232,195 @@ def merge_entities(
     return result
 
 
+def transfer_entities(
+    db_session: Session,
+    entities: list[KGEntityExtractionStaging],
+) -> dict[str, KGEntity]:
+    """Batch version of `transfer_entity`, transfers all entities with a single upsert.
+
+    Args:
+        db_session: SQLAlchemy session
+        entities: Entities to transfer
+
+    Returns:
+        dict[str, KGEntity]: The transferred entity for each staging entity id_name
+    """
+    if not entities:
+        return {}
+
+    # a single statement can't upsert the same row twice, so entities that would
+    # conflict with each other are combined the same way the conflict is resolved
+    rows_by_key: dict[tuple[str, str, str], dict] = {}
+    rows: list[dict] = []
+    staging_id_to_row: dict[str, dict] = {}
+    for entity in entities:
+        name = entity.name.casefold()
+        conflict_key = (
+            (name, entity.entity_type_id_name, entity.document_id)
+            if entity.document_id is not None
+            else None
+        )
+        row = rows_by_key.get(conflict_key) if conflict_key else None
+        if row is None:
+            row = dict(
+                id_name=make_entity_id(
+                    entity.entity_type_id_name, uuid.uuid4().hex[:20]
+                ),
+                name=name,
+                entity_key=entity.entity_key,
+                parent_key=entity.parent_key,
+                alternative_names=entity.alternative_names or [],
+                entity_type_id_name=entity.entity_type_id_name,
+                document_id=entity.document_id,
+                occurrences=entity.occurrences,
+                attributes=entity.attributes,
+                event_time=entity.event_time,
+            )
+            rows.append(row)
+            if conflict_key:
+                rows_by_key[conflict_key] = row
+        else:
+            row["occurrences"] += entity.occurrences
+            row["attributes"] = row["attributes"] | entity.attributes
+            if row["entity_key"] is None:
+                row["entity_key"] = entity.entity_key
+            if row["parent_key"] is None:
+                row["parent_key"] = entity.parent_key
+            row["event_time"] = entity.event_time
+        staging_id_to_row[entity.id_name] = row
+
+    insert_stmt = pg_insert(KGEntity).values(rows)
+    stmt = insert_stmt.on_conflict_do_update(
+        index_elements=["name", "entity_type_id_name", "document_id"],
+        set_=dict(
+            occurrences=KGEntity.occurrences + insert_stmt.excluded.occurrences,
+            attributes=KGEntity.attributes.op("||")(insert_stmt.excluded.attributes),
+            entity_key=func.coalesce(
+                KGEntity.entity_key, insert_stmt.excluded.entity_key
+            ),
+            parent_key=func.coalesce(
+                KGEntity.parent_key, insert_stmt.excluded.parent_key
+            ),
+            event_time=insert_stmt.excluded.event_time,
+            time_updated=datetime.now(),
+        ),
+    ).returning(KGEntity)
+    new_entities = db_session.execute(stmt).scalars().all()
+
+    # rows that hit a conflict keep the id_name of the existing entity
+    entities_by_id = {entity.id_name: entity for entity in new_entities}
+    entities_by_key = {
+        (entity.name, entity.entity_type_id_name, entity.document_id): entity
+        for entity in new_entities
+        if entity.document_id is not None
+    }
+    transferred: dict[str, KGEntity] = {}
+    for staging_id_name, row in staging_id_to_row.items():
+        new_entity = entities_by_id.get(row["id_name"]) or entities_by_key.get(
+            (row["name"], row["entity_type_id_name"], row["document_id"])
+        )
+        if new_entity is None:
+            raise RuntimeError(
+                f"Failed to transfer entity with id_name: {staging_id_name}"
+            )
+        transferred[staging_id_name] = new_entity
+
+    # Update the documents' kg_stage
+    dbdocument.update_documents_kg_info(
+        db_session,
+        document_ids=list(
+            {entity.document_id for entity in entities if entity.document_id}
+        ),
+        kg_stage=KGStage.NORMALIZED,
+    )
+
+    # Update transferred
+    db_session.execute(
+        update(KGEntityExtractionStaging),
+        [
+            {"id_name": staging_id_name, "transferred_id_name": new_entity.id_name}
+            for staging_id_name, new_entity in transferred.items()
+        ],
+    )
+    db_session.flush()
+
+    return transferred
+
+
+def merge_entities_batch(
+    db_session: Session,
+    merges: list[tuple[KGEntity, list[KGEntityExtractionStaging]]],
+) -> None:
+    """Batch version of `merge_entities`. Each parent is updated once with all of its
+    children folded in, in order.
+
+    Args:
+        db_session: SQLAlchemy session
+        merges: Parent entities with the staging entities to merge into them
+    """
+    parent_updates: list[dict] = []
+    staging_updates: list[dict] = []
+    normalized_document_ids: list[str] = []
+    for parent, children in merges:
+        document_id = parent.document_id
+        alternative_names = set(parent.alternative_names or [])
+        occurrences = parent.occurrences
+        attributes = parent.attributes
+        entity_key = parent.entity_key
+        parent_key = parent.parent_key
+
+        for child in children:
+            # check we're not merging two entities with different document_ids
+            if (
+                document_id is not None
+                and child.document_id is not None
+                and document_id != child.document_id
+            ):
+                raise ValueError(
+                    "Overwriting the document_id of an entity with a document_id already is not allowed"
+                )
+            if document_id is None and child.document_id is not None:
+                document_id = child.document_id
+                normalized_document_ids.append(child.document_id)
+
+            alternative_names.update(child.alternative_names or [])
+            alternative_names.add(child.name.lower())
+            occurrences += child.occurrences
+            attributes = attributes | child.attributes
+            entity_key = entity_key or child.entity_key
+            parent_key = parent_key or child.parent_key
+            staging_updates.append(
+                {"id_name": child.id_name, "transferred_id_name": parent.id_name}
+            )
+        alternative_names.discard(parent.name)
+
+        parent_updates.append(
+            dict(
+                id_name=parent.id_name,
+                document_id=document_id,
+                alternative_names=list(alternative_names),
+                occurrences=occurrences,
+                attributes=attributes,
+                entity_key=entity_key,
+                parent_key=parent_key,
+            )
+        )
+
+    if not parent_updates:
+        return
+
+    db_session.execute(update(KGEntity), parent_updates)
+
+    # Update the documents' kg_stage if document_id is set
+    dbdocument.update_documents_kg_info(
+        db_session, document_ids=normalized_document_ids, kg_stage=KGStage.NORMALIZED
+    )
+
+    # Update transferred
+    db_session.execute(update(KGEntityExtractionStaging), staging_updates)
+    db_session.flush()
+
+
 def get_kg_entity_by_document(db: Session, document_id: str) -> KGEntity | None:
     """
     Check if a document_id exists in the kg_entities table and return its id_name if found.
@@ -3032,6 +3032,21 @@ class KVStore(Base):
     encrypted_value: Mapped[JSON_ro] = mapped_column(EncryptedJson(), nullable=True)
 
 
+class EmbeddingCacheEntry(Base):
+    """Content-addressed cache of passage embeddings. The key is a hash of the
+    embedding model settings + the exact text that was embedded, so identical
+    text re-emitted by a connector does not have to be re-embedded."""
+
+    __tablename__ = "embedding_cache"
+
+    cache_key: Mapped[str] = mapped_column(String, primary_key=True)
+    # little-endian float32 vector
+    embedding: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    last_accessed_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), index=True
+    )
+
+
 class FileRecord(Base):
     __tablename__ = "file_record"
 
@@ -4,6 +4,7 @@ from sqlalchemy.orm import Session
 
 from onyx.configs.app_configs import VESPA_NUM_ATTEMPTS_ON_STARTUP
 from onyx.configs.constants import KV_REINDEX_KEY
+from onyx.context.search.query_embedding_cache import invalidate_query_embedding_cache
 from onyx.db.connector_credential_pair import get_connector_credential_pairs
 from onyx.db.connector_credential_pair import resync_cc_pair
 from onyx.db.document import delete_all_documents_for_connector_credential_pair
@@ -79,6 +80,8 @@ def _perform_index_swap(
         new_status=IndexModelStatus.PRESENT,
         db_session=db_session,
     )
+    # cached query embeddings belong to the old model
+    invalidate_query_embedding_cache()
 
     # remove the old index from the vector db
     document_index = get_default_document_index(new_search_settings, None)
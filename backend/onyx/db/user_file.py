@@ -51,6 +51,41 @@ def calculate_user_files_token_count(file_ids: list[UUID], db_session: Session)
     return total_tokens
 
 
+def fetch_user_file_token_counts(
+    user_file_ids: list[UUID], db_session: Session
+) -> dict[UUID, int]:
+    """Return the token counts of the given user files, files without a token count
+    are left out."""
+    if not user_file_ids:
+        return {}
+
+    stmt = select(UserFile.id, UserFile.token_count).where(
+        UserFile.id.in_(user_file_ids), UserFile.token_count.is_not(None)
+    )
+    return {row.id: row.token_count for row in db_session.execute(stmt).all()}
+
+
+def set_missing_user_file_token_counts(
+    user_file_id_to_token_count: dict[UUID, int], db_session: Session
+) -> None:
+    """Stores token counts for user files that don't have one yet, so that they are
+    not tokenized again on later chat turns. Existing counts are left untouched."""
+    if not user_file_id_to_token_count:
+        return
+
+    user_files = (
+        db_session.query(UserFile)
+        .filter(
+            UserFile.id.in_(list(user_file_id_to_token_count.keys())),
+            UserFile.token_count.is_(None),
+        )
+        .all()
+    )
+    for user_file in user_files:
+        user_file.token_count = user_file_id_to_token_count[user_file.id]
+    db_session.commit()
+
+
 def fetch_user_project_ids_for_user_files(
     user_file_ids: list[str],
     db_session: Session,
@@ -1,9 +1,12 @@
 import httpx
 from sqlalchemy.orm import Session
 
+from onyx.configs.app_configs import DOCUMENT_INDEX_TYPE
+from onyx.configs.constants import DocumentIndexType
 from onyx.db.models import SearchSettings
 from onyx.db.search_settings import get_current_search_settings
 from onyx.document_index.interfaces import DocumentIndex
+from onyx.document_index.local.index import LocalIndex
 from onyx.document_index.vespa.index import VespaIndex
 from shared_configs.configs import MULTI_TENANT
 
@@ -23,7 +26,14 @@ def get_default_document_index(
         secondary_index_name = secondary_search_settings.index_name
         secondary_large_chunks_enabled = secondary_search_settings.large_chunks_enabled
 
-    # Currently only supporting Vespa
+    if DOCUMENT_INDEX_TYPE == DocumentIndexType.LOCAL.value:
+        return LocalIndex(
+            index_name=search_settings.index_name,
+            secondary_index_name=secondary_index_name,
+            large_chunks_enabled=search_settings.large_chunks_enabled,
+            secondary_large_chunks_enabled=secondary_large_chunks_enabled,
+        )
+
     return VespaIndex(
         index_name=search_settings.index_name,
         secondary_index_name=secondary_index_name,
@@ -0,0 +1,1106 @@
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from filelock import FileLock
+
+from onyx.configs.app_configs import LOCAL_DOCUMENT_INDEX_DIR
+from onyx.configs.app_configs import LOCAL_DOCUMENT_INDEX_VECTOR_DTYPE
+from onyx.configs.chat_configs import DOC_TIME_DECAY
+from onyx.configs.chat_configs import NUM_RETURNED_HITS
+from onyx.configs.chat_configs import TITLE_CONTENT_RATIO
+from onyx.configs.constants import DocumentSource
+from onyx.configs.constants import INDEX_SEPARATOR
+from onyx.connectors.cross_connector_utils.miscellaneous_utils import (
+    get_experts_stores_representations,
+)
+from onyx.context.search.models import IndexFilters
+from onyx.context.search.models import InferenceChunk
+from onyx.context.search.models import InferenceChunkUncleaned
+from onyx.context.search.models import QueryExpansionType
+from onyx.db.enums import EmbeddingPrecision
+from onyx.document_index.document_index_utils import get_uuid_from_chunk
+from onyx.document_index.interfaces import DocumentIndex
+from onyx.document_index.interfaces import DocumentInsertionRecord
+from onyx.document_index.interfaces import IndexBatchParams
+from onyx.document_index.interfaces import UpdateRequest
+from onyx.document_index.interfaces import VespaChunkRequest
+from onyx.document_index.interfaces import VespaDocumentFields
+from onyx.document_index.interfaces import VespaDocumentUserFields
+from onyx.document_index.local.vector_store import LocalVectorStore
+from onyx.document_index.vespa.chunk_retrieval import _process_dynamic_summary
+from onyx.document_index.vespa.index import cleanup_chunks
+from onyx.indexing.models import DocMetadataAwareIndexChunk
+from onyx.utils.logger import setup_logger
+from onyx.utils.timing import log_function_time
+from shared_configs.configs import MULTI_TENANT
+from shared_configs.model_server_models import Embedding
+
+logger = setup_logger()
+
+# Mirrors the Vespa schema: targetHits of the nearestNeighbor operators and the
+# rerank-count of the global phase
+_MIN_TARGET_HITS = 1000
+_RERANK_COUNT = 1000
+
+# Same defaults as the Vespa rank profile
+_MISSING_DOC_AGE_SECONDS = 7890000
+_SECONDS_PER_YEAR = 31536000
+_MIN_RECENCY_BIAS = 0.75
+_UNTIMED_DOC_CUTOFF = timedelta(days=92)
+
+# Stay well below SQLITE_MAX_VARIABLE_NUMBER
+_SQL_BATCH_SIZE = 500
+_MAX_QUERY_TERMS = 64
+
+# Rewrite the vector files once at least this many rows are no longer referenced
+# and they make up more than half of the file
+_COMPACTION_MIN_DEAD_ROWS = 50_000
+
+_ACL = "acl"
+_DOCUMENT_SET = "document_set"
+_METADATA_LIST = "metadata_list"
+_USER_PROJECT = "user_project"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS chunks (
+    rowid INTEGER PRIMARY KEY,
+    chunk_uuid TEXT NOT NULL UNIQUE,
+    document_id TEXT NOT NULL,
+    chunk_id INTEGER NOT NULL,
+    tenant_id TEXT,
+    source_type TEXT NOT NULL,
+    hidden INTEGER NOT NULL DEFAULT 0,
+    boost INTEGER NOT NULL DEFAULT 0,
+    aggregated_chunk_boost_factor REAL,
+    doc_updated_at INTEGER,
+    is_large_chunk INTEGER NOT NULL DEFAULT 0,
+    vector_start INTEGER NOT NULL,
+    vector_count INTEGER NOT NULL,
+    title_vector_row INTEGER,
+    blurb TEXT NOT NULL,
+    content TEXT NOT NULL,
+    title TEXT,
+    semantic_identifier TEXT NOT NULL,
+    source_links TEXT NOT NULL,
+    section_continuation INTEGER NOT NULL,
+    image_file_id TEXT,
+    primary_owners TEXT,
+    secondary_owners TEXT,
+    large_chunk_reference_ids TEXT NOT NULL,
+    metadata TEXT NOT NULL,
+    metadata_suffix TEXT,
+    doc_summary TEXT NOT NULL,
+    chunk_context TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_chunks_document ON chunks(document_id, chunk_id);
+CREATE TABLE IF NOT EXISTS chunk_attributes (
+    chunk_rowid INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    value TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_chunk_attributes_value
+    ON chunk_attributes(kind, value, chunk_rowid);
+CREATE INDEX IF NOT EXISTS idx_chunk_attributes_chunk
+    ON chunk_attributes(chunk_rowid, kind);
+CREATE VIRTUAL TABLE IF NOT EXISTS chunk_fts USING fts5(
+    title, content, content_summary,
+    tokenize = 'porter unicode61 remove_diacritics 2'
+);
+"""
+
+
+def _closeness(similarities: np.ndarray) -> np.ndarray:
+    """Vespa closeness for the angular distance metric"""
+    return 1.0 / (1.0 + np.arccos(similarities))
+
+
+def _normalize_linear(scores: np.ndarray) -> np.ndarray:
+    if scores.size == 0:
+        return scores
+    low = scores.min()
+    spread = scores.max() - low
+    if spread <= 0:
+        return np.where(scores > 0, 1.0, 0.0)
+    return (scores - low) / spread
+
+
+def _document_boost(boosts: np.ndarray) -> np.ndarray:
+    # 0.5 to 2x score: piecewise sigmoid function stretched out by factor of 3
+    sigmoid = 1 / (1 + np.exp(-boosts / 3))
+    return np.where(boosts < 0, 0.5 + sigmoid, 2 * sigmoid)
+
+
+def _recency_bias(
+    doc_updated_at: np.ndarray, decay_factor: float, now: float
+) -> np.ndarray:
+    age_seconds = np.where(
+        np.isnan(doc_updated_at), _MISSING_DOC_AGE_SECONDS, now - doc_updated_at
+    )
+    age_years = np.maximum(age_seconds / _SECONDS_PER_YEAR, 0)
+    return np.maximum(1 / (1 + decay_factor * age_years), _MIN_RECENCY_BIAS)
+
+
+def _build_match_expression(query: str, columns: list[str]) -> str | None:
+    """Any-term match (like Vespa's weakAnd) on the given FTS columns"""
+    terms: list[str] = []
+    for term in re.findall(r"\w+", query.lower()):
+        if term not in terms:
+            terms.append(term)
+    if not terms:
+        return None
+    or_clause = " OR ".join(f'"{term}"' for term in terms[:_MAX_QUERY_TERMS])
+    return f"{{{' '.join(columns)}}} : ({or_clause})"
+
+
+def _attribute_filter(kind: str, values: list[str]) -> tuple[str, list[Any]]:
+    placeholders = ",".join("?" for _ in values)
+    return (
+        "c.rowid IN (SELECT chunk_rowid FROM chunk_attributes "
+        f"WHERE kind = ? AND value IN ({placeholders}))",
+        [kind, *values],
+    )
+
+
+def build_local_filters(
+    filters: IndexFilters, *, include_hidden: bool = False
+) -> tuple[str, list[Any]]:
+    """SQL equivalent of `build_vespa_filters`, applied to the `chunks` table
+    aliased as `c`. Returns the WHERE clause and its parameters."""
+    clauses: list[str] = []
+    params: list[Any] = []
+
+    def _add(clause: str, clause_params: list[Any]) -> None:
+        clauses.append(clause)
+        params.extend(clause_params)
+
+    if not include_hidden:
+        _add("c.hidden = 0", [])
+
+    if filters.tenant_id and MULTI_TENANT:
+        _add("c.tenant_id = ?", [filters.tenant_id])
+
+    if filters.access_control_list is not None:
+        acl = [entry for entry in filters.access_control_list if entry]
+        if acl:
+            _add(*_attribute_filter(_ACL, acl))
+
+    if filters.source_type:
+        source_types = [source.value for source in filters.source_type]
+        placeholders = ",".join("?" for _ in source_types)
+        _add(f"c.source_type IN ({placeholders})", source_types)
+
+    if filters.tags:
+        # the tag_key|tag_value form of `Document.get_metadata_str_attributes`
+        tag_attributes = [
+            f"{tag.tag_key}{INDEX_SEPARATOR}{tag.tag_value}" for tag in filters.tags
+        ]
+        _add(*_attribute_filter(_METADATA_LIST, tag_attributes))
+
+    if filters.document_set:
+        document_sets = [doc_set for doc_set in filters.document_set if doc_set]
+        if document_sets:
+            _add(*_attribute_filter(_DOCUMENT_SET, document_sets))
+
+    if filters.user_file_ids:
+        user_file_ids = [str(user_file_id) for user_file_id in filters.user_file_ids]
+        placeholders = ",".join("?" for _ in user_file_ids)
+        _add(f"c.document_id IN ({placeholders})", user_file_ids)
+
+    if filters.project_id is not None:
+        _add(*_attribute_filter(_USER_PROJECT, [str(filters.project_id)]))
+
+    if filters.time_cutoff:
+        cutoff_secs = int(filters.time_cutoff.timestamp())
+        if datetime.now(timezone.utc) - _UNTIMED_DOC_CUTOFF > filters.time_cutoff:
+            _add("(c.doc_updated_at IS NULL OR c.doc_updated_at >= ?)", [cutoff_secs])
+        else:
+            _add("c.doc_updated_at >= ?", [cutoff_secs])
+
+    return " AND ".join(clauses) or "1", params
+
+
+class _LocalIndexStorage:
+    """All state of one index on disk: a SQLite database holding the chunk fields,
+    the filterable attributes and the FTS5 (BM25) inverted index, plus the memory
+    mapped vector file. Shared by all LocalIndex objects of the process pointing at
+    the same directory.
+
+    Writers serialize on a file lock so that the vector file appends and the SQLite
+    transaction referencing them happen atomically with respect to other processes
+    (e.g. the api server and the indexing workers)."""
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.db_path = self.directory / "index.sqlite3"
+        self.write_lock = FileLock(str(self.directory / "write.lock"))
+
+        self._thread_local = threading.local()
+        self._vector_store: LocalVectorStore | None = None
+        self._vector_store_lock = threading.Lock()
+
+        conn = self.connection()
+        conn.executescript(_SCHEMA)
+
+    def connection(self) -> sqlite3.Connection:
+        conn: sqlite3.Connection | None = getattr(self._thread_local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=60, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._thread_local.conn = conn
+        return conn
+
+    @contextmanager
+    def read_snapshot(self) -> Iterator[sqlite3.Connection]:
+        """All reads of the block see the same state of the index, which keeps the
+        vector row references consistent with the vector file generation."""
+        conn = self.connection()
+        conn.execute("BEGIN")
+        try:
+            yield conn
+        finally:
+            conn.execute("COMMIT")
+
+    @contextmanager
+    def write_transaction(self) -> Iterator[sqlite3.Connection]:
+        with self.write_lock:
+            conn = self.connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    @staticmethod
+    def get_meta(conn: sqlite3.Connection, key: str) -> str | None:
+        row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    @staticmethod
+    def set_meta(conn: sqlite3.Connection, key: str, value: str | int) -> None:
+        conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value))
+        )
+
+    def generation(self, conn: sqlite3.Connection) -> int:
+        return int(self.get_meta(conn, "generation") or 0)
+
+    def vector_store(
+        self, conn: sqlite3.Connection, dim: int | None = None
+    ) -> LocalVectorStore | None:
+        """The vector store, None if nothing defined the dimension yet. If `dim` is
+        passed in (must be in a write transaction), initializes the index with it."""
+        with self._vector_store_lock:
+            if self._vector_store is not None:
+                return self._vector_store
+
+            stored_dim = self.get_meta(conn, "embedding_dim")
+            if stored_dim is None:
+                if dim is None:
+                    return None
+                self.set_meta(conn, "embedding_dim", dim)
+                self.set_meta(conn, "vector_dtype", LOCAL_DOCUMENT_INDEX_VECTOR_DTYPE)
+                stored_dim = str(dim)
+
+            self._vector_store = LocalVectorStore(
+                directory=self.directory,
+                dim=int(stored_dim),
+                dtype=self.get_meta(conn, "vector_dtype")
+                or LOCAL_DOCUMENT_INDEX_VECTOR_DTYPE,
+            )
+            return self._vector_store
+
+
+_storages: dict[Path, _LocalIndexStorage] = {}
+_storages_lock = threading.Lock()
+
+
+def _get_storage(base_dir: str, index_name: str) -> _LocalIndexStorage:
+    directory = Path(base_dir).resolve() / index_name
+    with _storages_lock:
+        if directory not in _storages:
+            _storages[directory] = _LocalIndexStorage(directory)
+        return _storages[directory]
+
+
+def _chunk_attributes(chunk: DocMetadataAwareIndexChunk) -> list[tuple[str, str]]:
+    attributes = [(_ACL, acl_entry) for acl_entry in chunk.access.to_acl()]
+    attributes += [(_DOCUMENT_SET, doc_set) for doc_set in chunk.document_sets]
+    attributes += [
+        (_METADATA_LIST, item)
+        for item in chunk.source_document.get_metadata_str_attributes() or []
+    ]
+    attributes += [(_USER_PROJECT, str(project)) for project in chunk.user_project]
+    return attributes
+
+
+def _row_to_inference_chunk(
+    row: sqlite3.Row,
+    score: float | None,
+    recency_bias: float,
+    dynamic_summary: str | None,
+) -> InferenceChunkUncleaned:
+    return InferenceChunkUncleaned(
+        chunk_id=row["chunk_id"],
+        blurb=row["blurb"],
+        content=row["content"],
+        source_links={int(k): v for k, v in json.loads(row["source_links"]).items()}
+        or {0: ""},
+        section_continuation=bool(row["section_continuation"]),
+        document_id=row["document_id"],
+        source_type=DocumentSource(row["source_type"]),
+        image_file_id=row["image_file_id"],
+        title=row["title"],
+        semantic_identifier=row["semantic_identifier"],
+        boost=row["boost"],
+        recency_bias=recency_bias,
+        score=score,
+        hidden=bool(row["hidden"]),
+        primary_owners=json.loads(row["primary_owners"] or "null"),
+        secondary_owners=json.loads(row["secondary_owners"] or "null"),
+        large_chunk_reference_ids=json.loads(row["large_chunk_reference_ids"]),
+        metadata=json.loads(row["metadata"]),
+        metadata_suffix=row["metadata_suffix"],
+        doc_summary=row["doc_summary"],
+        chunk_context=row["chunk_context"],
+        match_highlights=_process_dynamic_summary(
+            dynamic_summary=(
+                dynamic_summary
+                if dynamic_summary is not None
+                else row["content_summary"]
+            )
+        ),
+        updated_at=(
+            datetime.fromtimestamp(row["doc_updated_at"], tz=timezone.utc)
+            if row["doc_updated_at"] is not None
+            else None
+        ),
+    )
+
+
+class LocalIndex(DocumentIndex):
+    """Document index living entirely inside the Onyx processes, meant for single node
+    and edge deployments where running Vespa is too expensive.
+
+    - Vectors are kept in memory mapped float32/int8 files and scored brute force
+      over the filtered candidates, so only the pages of matching rows are touched.
+    - Keyword search uses the SQLite FTS5 inverted index and its BM25 ranking.
+    - Hybrid scores follow the Vespa rank profiles (closeness, normalize_linear,
+      title/content ratio, boost, recency bias and aggregated chunk boost) so results
+      are comparable between the two backends."""
+
+    def __init__(
+        self,
+        index_name: str,
+        secondary_index_name: str | None,
+        large_chunks_enabled: bool = False,
+        secondary_large_chunks_enabled: bool | None = None,
+        base_dir: str = LOCAL_DOCUMENT_INDEX_DIR,
+    ) -> None:
+        self.index_name = index_name
+        self.secondary_index_name = secondary_index_name
+        self.large_chunks_enabled = large_chunks_enabled
+        self.secondary_large_chunks_enabled = secondary_large_chunks_enabled
+        self.base_dir = base_dir
+
+        self._storage = _get_storage(base_dir, index_name)
+
+    def _all_storages(self) -> list[_LocalIndexStorage]:
+        storages = [self._storage]
+        if self.secondary_index_name:
+            storages.append(_get_storage(self.base_dir, self.secondary_index_name))
+        return storages
+
+    def ensure_indices_exist(
+        self,
+        primary_embedding_dim: int,
+        primary_embedding_precision: EmbeddingPrecision,
+        secondary_index_embedding_dim: int | None,
+        secondary_index_embedding_precision: EmbeddingPrecision | None,
+    ) -> None:
+        # the vectors are always scored in float32, the stored precision is controlled
+        # by LOCAL_DOCUMENT_INDEX_VECTOR_DTYPE instead
+        index_dims = [(self.index_name, primary_embedding_dim)]
+        if self.secondary_index_name and secondary_index_embedding_dim:
+            index_dims.append(
+                (self.secondary_index_name, secondary_index_embedding_dim)
+            )
+
+        for index_name, dim in index_dims:
+            storage = _get_storage(self.base_dir, index_name)
+            with storage.write_transaction() as conn:
+                vector_store = storage.vector_store(conn, dim=dim)
+                if vector_store and vector_store.dim != dim:
+                    raise ValueError(
+                        f"Local index '{index_name}' has embedding dim {vector_store.dim}, "
+                        f"expected {dim}"
+                    )
+
+    @staticmethod
+    def register_multitenant_indices(
+        indices: list[str],
+        embedding_dims: list[int],
+        embedding_precisions: list[EmbeddingPrecision],
+    ) -> None:
+        # indices are created lazily and tenants are separated by the tenant_id column
+        return None
+
+    def _delete_document_chunks(
+        self,
+        storage: _LocalIndexStorage,
+        conn: sqlite3.Connection,
+        doc_id: str,
+        tenant_id: str | None,
+    ) -> int:
+        """Must be called inside of a write transaction"""
+        tenant_clause = " AND tenant_id = ?" if tenant_id and MULTI_TENANT else ""
+        tenant_params = [tenant_id] if tenant_id and MULTI_TENANT else []
+        rows = conn.execute(
+            "SELECT rowid, vector_count, title_vector_row FROM chunks "
+            f"WHERE document_id = ?{tenant_clause}",
+            [doc_id, *tenant_params],
+        ).fetchall()
+        if not rows:
+            return 0
+
+        rowids = [row[0] for row in rows]
+        for start in range(0, len(rowids), _SQL_BATCH_SIZE):
+            batch = rowids[start : start + _SQL_BATCH_SIZE]
+            placeholders = ",".join("?" for _ in batch)
+            conn.execute(f"DELETE FROM chunks WHERE rowid IN ({placeholders})", batch)
+            conn.execute(
+                f"DELETE FROM chunk_attributes WHERE chunk_rowid IN ({placeholders})",
+                batch,
+            )
+            conn.execute(
+                f"DELETE FROM chunk_fts WHERE rowid IN ({placeholders})", batch
+            )
+
+        dead_rows = sum(row[1] + (row[2] is not None) for row in rows)
+        storage.set_meta(
+            conn,
+            "dead_vector_rows",
+            int(storage.get_meta(conn, "dead_vector_rows") or 0) + dead_rows,
+        )
+        return len(rows)
+
+    def _insert_chunk(
+        self,
+        storage: _LocalIndexStorage,
+        conn: sqlite3.Connection,
+        chunk: DocMetadataAwareIndexChunk,
+        generation: int,
+    ) -> None:
+        document = chunk.source_document
+        vector_store = storage.vector_store(
+            conn, dim=len(chunk.embeddings.full_embedding)
+        )
+        assert vector_store is not None
+
+        vectors = [
+            chunk.embeddings.full_embedding,
+            *chunk.embeddings.mini_chunk_embeddings,
+        ]
+        title = document.get_title_for_document_index()
+        has_title_vector = bool(title) and chunk.title_embedding is not None
+        if has_title_vector:
+            vectors.append(chunk.title_embedding)  # type: ignore
+        vector_start = vector_store.append(generation, np.asarray(vectors))
+        vector_count = len(vectors) - int(has_title_vector)
+
+        if document.doc_updated_at and document.doc_updated_at.tzinfo != timezone.utc:
+            raise ValueError("Connectors must provide document update time in UTC")
+
+        # Same fields as the Vespa chunk, CONTENT holds the keyword representation
+        content = f"{chunk.title_prefix}{chunk.doc_summary}{chunk.content}{chunk.chunk_context}{chunk.metadata_suffix_keyword}"
+        cursor = conn.execute(
+            """
+            INSERT INTO chunks (
+                chunk_uuid, document_id, chunk_id, tenant_id, source_type, hidden,
+                boost, aggregated_chunk_boost_factor, doc_updated_at, is_large_chunk,
+                vector_start, vector_count, title_vector_row, blurb, content, title,
+                semantic_identifier, source_links, section_continuation, image_file_id,
+                primary_owners, secondary_owners, large_chunk_reference_ids, metadata,
+                metadata_suffix, doc_summary, chunk_context
+            ) VALUES (?, ?, ?, ?, ?, 0, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                str(get_uuid_from_chunk(chunk)),
+                document.id,
+                chunk.chunk_id,
+                chunk.tenant_id,
+                document.source.value,
+                chunk.boost,
+                chunk.aggregated_chunk_boost_factor,
+                (
+                    int(document.doc_updated_at.timestamp())
+                    if document.doc_updated_at
+                    else None
+                ),
+                int(bool(chunk.large_chunk_reference_ids)),
+                vector_start,
+                vector_count,
+                vector_start + vector_count if has_title_vector else None,
+                chunk.blurb,
+                content,
+                title or None,
+                document.semantic_identifier,
+                json.dumps(chunk.source_links or {}),
+                int(chunk.section_continuation),
+                chunk.image_file_id,
+                json.dumps(get_experts_stores_representations(document.primary_owners)),
+                json.dumps(
+                    get_experts_stores_representations(document.secondary_owners)
+                ),
+                json.dumps(chunk.large_chunk_reference_ids),
+                json.dumps(document.metadata),
+                chunk.metadata_suffix_keyword,
+                chunk.doc_summary,
+                chunk.chunk_context,
+            ),
+        )
+        rowid = cursor.lastrowid
+        conn.executemany(
+            "INSERT INTO chunk_attributes (chunk_rowid, kind, value) VALUES (?, ?, ?)",
+            [(rowid, kind, value) for kind, value in _chunk_attributes(chunk)],
+        )
+        conn.execute(
+            "INSERT INTO chunk_fts (rowid, title, content, content_summary) "
+            "VALUES (?, ?, ?, ?)",
+            (rowid, title or "", content, chunk.content),
+        )
+
+    def index(
+        self,
+        chunks: list[DocMetadataAwareIndexChunk],
+        index_batch_params: IndexBatchParams,
+    ) -> set[DocumentInsertionRecord]:
+        chunks_by_doc: dict[str, list[DocMetadataAwareIndexChunk]] = {}
+        for chunk in chunks:
+            chunks_by_doc.setdefault(chunk.source_document.id, []).append(chunk)
+
+        insertion_records: set[DocumentInsertionRecord] = set()
+        storage = self._storage
+        with storage.write_transaction() as conn:
+            generation = storage.generation(conn)
+            for doc_id, doc_chunks in chunks_by_doc.items():
+                # clear out the old chunks first, the doc may have gotten shorter
+                num_deleted = self._delete_document_chunks(
+                    storage, conn, doc_id, index_batch_params.tenant_id
+                )
+                for chunk in doc_chunks:
+                    self._insert_chunk(storage, conn, chunk, generation)
+
+                insertion_records.add(
+                    DocumentInsertionRecord(
+                        document_id=doc_id, already_existed=num_deleted > 0
+                    )
+                )
+
+        self._maybe_compact(storage)
+        return insertion_records
+
+    def _maybe_compact(self, storage: _LocalIndexStorage) -> None:
+        conn = storage.connection()
+        dead_rows = int(storage.get_meta(conn, "dead_vector_rows") or 0)
+        if dead_rows < _COMPACTION_MIN_DEAD_ROWS:
+            return
+
+        with storage.write_transaction() as conn:
+            vector_store = storage.vector_store(conn)
+            generation = storage.generation(conn)
+            dead_rows = int(storage.get_meta(conn, "dead_vector_rows") or 0)
+            if vector_store is None or dead_rows * 2 < vector_store.num_rows(
+                generation
+            ):
+                return
+
+            logger.info(
+                f"Compacting local index vectors: directory={storage.directory} "
+                f"dead_rows={dead_rows}"
+            )
+            new_generation = generation + 1
+            # leftovers from a compaction that did not commit
+            vector_store.remove_generation(new_generation)
+
+            rows = conn.execute(
+                "SELECT rowid, vector_start, vector_count, title_vector_row "
+                "FROM chunks ORDER BY vector_start"
+            ).fetchall()
+            next_row = 0
+            for start in range(0, len(rows), _SQL_BATCH_SIZE):
+                batch = rows[start : start + _SQL_BATCH_SIZE]
+                old_rows: list[int] = []
+                updates: list[tuple[int, int | None, int]] = []
+                for rowid, vector_start, vector_count, title_vector_row in batch:
+                    old_rows.extend(range(vector_start, vector_start + vector_count))
+                    new_title_row = None
+                    if title_vector_row is not None:
+                        old_rows.append(title_vector_row)
+                        new_title_row = next_row + vector_count
+                    updates.append((next_row, new_title_row, rowid))
+                    next_row += vector_count + (title_vector_row is not None)
+
+                vector_bytes, scale_bytes = vector_store.read_raw(
+                    generation, np.asarray(old_rows, dtype=np.int64)
+                )
+                vector_store.write_raw(new_generation, vector_bytes, scale_bytes)
+                conn.executemany(
+                    "UPDATE chunks SET vector_start = ?, title_vector_row = ? "
+                    "WHERE rowid = ?",
+                    updates,
+                )
+
+            storage.set_meta(conn, "generation", new_generation)
+            storage.set_meta(conn, "dead_vector_rows", 0)
+
+        # readers that started before the commit may still be on `generation`
+        vector_store.remove_generation(generation - 1)
+
+    def delete_single(
+        self,
+        doc_id: str,
+        *,
+        tenant_id: str,
+        chunk_count: int | None,
+    ) -> int:
+        total_chunks_deleted = 0
+        for storage in self._all_storages():
+            with storage.write_transaction() as conn:
+                total_chunks_deleted += self._delete_document_chunks(
+                    storage, conn, doc_id, tenant_id
+                )
+            self._maybe_compact(storage)
+
+        return total_chunks_deleted
+
+    @staticmethod
+    def _update_document_chunks(
+        conn: sqlite3.Connection,
+        doc_id: str,
+        tenant_id: str | None,
+        fields: VespaDocumentFields | None,
+        user_fields: VespaDocumentUserFields | None,
+    ) -> int:
+        """Must be called inside of a write transaction"""
+        tenant_clause = " AND tenant_id = ?" if tenant_id and MULTI_TENANT else ""
+        tenant_params = [tenant_id] if tenant_id and MULTI_TENANT else []
+        rowids = [
+            row[0]
+            for row in conn.execute(
+                f"SELECT rowid FROM chunks WHERE document_id = ?{tenant_clause}",
+                [doc_id, *tenant_params],
+            )
+        ]
+        if not rowids:
+            return 0
+
+        column_updates: dict[str, Any] = {}
+        attribute_updates: dict[str, list[str]] = {}
+        if fields is not None:
+            if fields.boost is not None:
+                column_updates["boost"] = fields.boost
+            if fields.hidden is not None:
+                column_updates["hidden"] = int(fields.hidden)
+            if fields.aggregated_chunk_boost_factor is not None:
+                column_updates["aggregated_chunk_boost_factor"] = (
+                    fields.aggregated_chunk_boost_factor
+                )
+            if fields.access is not None:
+                attribute_updates[_ACL] = list(fields.access.to_acl())
+            if fields.document_sets is not None:
+                attribute_updates[_DOCUMENT_SET] = list(fields.document_sets)
+        if user_fields is not None and user_fields.user_projects is not None:
+            attribute_updates[_USER_PROJECT] = [
+                str(project) for project in user_fields.user_projects
+            ]
+
+        for start in range(0, len(rowids), _SQL_BATCH_SIZE):
+            batch = rowids[start : start + _SQL_BATCH_SIZE]
+            placeholders = ",".join("?" for _ in batch)
+            if column_updates:
+                set_clause = ", ".join(f"{column} = ?" for column in column_updates)
+                conn.execute(
+                    f"UPDATE chunks SET {set_clause} WHERE rowid IN ({placeholders})",
+                    [*column_updates.values(), *batch],
+                )
+            for kind, values in attribute_updates.items():
+                conn.execute(
+                    "DELETE FROM chunk_attributes "
+                    f"WHERE kind = ? AND chunk_rowid IN ({placeholders})",
+                    [kind, *batch],
+                )
+                conn.executemany(
+                    "INSERT INTO chunk_attributes (chunk_rowid, kind, value) "
+                    "VALUES (?, ?, ?)",
+                    [(rowid, kind, value) for rowid in batch for value in values],
+                )
+
+        return len(rowids)
+
+    def update_single(
+        self,
+        doc_id: str,
+        *,
+        tenant_id: str,
+        chunk_count: int | None,
+        fields: VespaDocumentFields | None,
+        user_fields: VespaDocumentUserFields | None,
+    ) -> int:
+        if fields is None and user_fields is None:
+            logger.warning(
+                f"Tried to update document {doc_id} with no updated fields or user fields."
+            )
+            return 0
+
+        total_chunks_updated = 0
+        for storage in self._all_storages():
+            with storage.write_transaction() as conn:
+                total_chunks_updated += self._update_document_chunks(
+                    conn, doc_id, tenant_id, fields, user_fields
+                )
+
+        return total_chunks_updated
+
+    def update(self, update_requests: list[UpdateRequest], *, tenant_id: str) -> None:
+        logger.debug(f"Updating {len(update_requests)} documents in the local index")
+        for storage in self._all_storages():
+            with storage.write_transaction() as conn:
+                for update_request in update_requests:
+                    fields = VespaDocumentFields(
+                        access=update_request.access,
+                        document_sets=update_request.document_sets,
+                        boost=update_request.boost,
+                        hidden=update_request.hidden,
+                    )
+                    for doc_info in update_request.minimal_document_indexing_info:
+                        self._update_document_chunks(
+                            conn, doc_info.doc_id, tenant_id, fields, None
+                        )
+
+    def _fetch_rows(
+        self, conn: sqlite3.Connection, rowids: list[int]
+    ) -> dict[int, sqlite3.Row]:
+        conn.row_factory = sqlite3.Row
+        try:
+            rows: dict[int, sqlite3.Row] = {}
+            for start in range(0, len(rowids), _SQL_BATCH_SIZE):
+                batch = rowids[start : start + _SQL_BATCH_SIZE]
+                placeholders = ",".join("?" for _ in batch)
+                for row in conn.execute(
+                    "SELECT c.*, f.content_summary FROM chunks c "
+                    "JOIN chunk_fts f ON f.rowid = c.rowid "
+                    f"WHERE c.rowid IN ({placeholders})",
+                    batch,
+                ):
+                    rows[row["rowid"]] = row
+            return rows
+        finally:
+            conn.row_factory = None
+
+    @staticmethod
+    def _fetch_highlights(
+        conn: sqlite3.Connection, query: str, rowids: list[int]
+    ) -> dict[int, str]:
+        match_expression = _build_match_expression(query, ["content_summary"])
+        if not match_expression or not rowids:
+            return {}
+        placeholders = ",".join("?" for _ in rowids)
+        return dict(
+            conn.execute(
+                "SELECT rowid, highlight(chunk_fts, 2, '<hi>', '</hi>') FROM chunk_fts "
+                f"WHERE chunk_fts MATCH ? AND rowid IN ({placeholders})",
+                [match_expression, *rowids],
+            ).fetchall()
+        )
+
+    def id_based_retrieval(
+        self,
+        chunk_requests: list[VespaChunkRequest],
+        filters: IndexFilters,
+        batch_retrieval: bool = False,
+        get_large_chunks: bool = False,
+    ) -> list[InferenceChunk]:
+        if MULTI_TENANT and not filters.tenant_id:
+            raise ValueError("Tenant ID is required for multi-tenant")
+
+        where_clause, where_params = build_local_filters(filters, include_hidden=True)
+        if not get_large_chunks:
+            where_clause += " AND c.is_large_chunk = 0"
+
+        inference_chunks: list[InferenceChunkUncleaned] = []
+        with self._storage.read_snapshot() as conn:
+            for chunk_request in chunk_requests:
+                range_clause = ""
+                range_params: list[int] = []
+                if chunk_request.is_capped:
+                    range_clause = " AND c.chunk_id >= ? AND c.chunk_id <= ?"
+                    range_params = [
+                        chunk_request.min_chunk_ind or 0,
+                        chunk_request.max_chunk_ind,  # type: ignore
+                    ]
+
+                rowids = [
+                    row[0]
+                    for row in conn.execute(
+                        "SELECT c.rowid FROM chunks c WHERE c.document_id = ?"
+                        f"{range_clause} AND {where_clause} ORDER BY c.chunk_id",
+                        [chunk_request.document_id, *range_params, *where_params],
+                    )
+                ]
+                rows = self._fetch_rows(conn, rowids)
+                inference_chunks.extend(
+                    _row_to_inference_chunk(
+                        rows[rowid], score=None, recency_bias=1.0, dynamic_summary=None
+                    )
+                    for rowid in rowids
+                )
+
+        return cleanup_chunks(inference_chunks)
+
+    @log_function_time(print_only=True, debug_only=True)
+    def hybrid_retrieval(
+        self,
+        query: str,
+        query_embedding: Embedding,
+        final_keywords: list[str] | None,
+        filters: IndexFilters,
+        hybrid_alpha: float,
+        time_decay_multiplier: float,
+        num_to_retrieve: int,
+        ranking_profile_type: QueryExpansionType = QueryExpansionType.SEMANTIC,
+        offset: int = 0,
+        title_content_ratio: float | None = TITLE_CONTENT_RATIO,
+    ) -> list[InferenceChunk]:
+        title_ratio = (
+            title_content_ratio
+            if title_content_ratio is not None
+            else TITLE_CONTENT_RATIO
+        )
+        decay_factor = DOC_TIME_DECAY * time_decay_multiplier
+        target_hits = max(10 * num_to_retrieve, _MIN_TARGET_HITS)
+        final_query = " ".join(final_keywords) if final_keywords else query
+        where_clause, where_params = build_local_filters(filters)
+
+        with self._storage.read_snapshot() as conn:
+            candidates = conn.execute(
+                "SELECT c.rowid, c.vector_start, c.vector_count, c.title_vector_row, "
+                "c.boost, c.aggregated_chunk_boost_factor, c.doc_updated_at "
+                f"FROM chunks c WHERE {where_clause}",
+                where_params,
+            ).fetchall()
+            if not candidates:
+                return []
+
+            rowids = np.array([row[0] for row in candidates], dtype=np.int64)
+            vector_starts = np.array([row[1] for row in candidates], dtype=np.int64)
+            vector_counts = np.array([row[2] for row in candidates], dtype=np.int64)
+            title_rows = np.array(
+                [row[3] if row[3] is not None else -1 for row in candidates],
+                dtype=np.int64,
+            )
+            boosts = np.array([row[4] for row in candidates], dtype=np.float64)
+            aggregated_boosts = np.array(
+                [row[5] if row[5] is not None else np.nan for row in candidates],
+                dtype=np.float64,
+            )
+            updated_at = np.array(
+                [row[6] if row[6] is not None else np.nan for row in candidates],
+                dtype=np.float64,
+            )
+
+            # Vector part, closeness of the best matching full/mini chunk embedding
+            content_closeness = np.zeros(len(candidates))
+            title_closeness = np.zeros(len(candidates))
+            generation = self._storage.generation(conn)
+            vector_store = self._storage.vector_store(conn)
+            if vector_store is not None:
+                query_vector = np.asarray(query_embedding, dtype=np.float32)
+                group_offsets = np.concatenate(([0], np.cumsum(vector_counts)[:-1]))
+                content_rows = np.repeat(vector_starts - group_offsets, vector_counts)
+                content_rows += np.arange(content_rows.size)
+                content_closeness = np.maximum.reduceat(
+                    _closeness(
+                        vector_store.similarities(
+                            generation, content_rows, query_vector
+                        )
+                    ),
+                    group_offsets,
+                )
+
+                has_title = title_rows >= 0
+                title_closeness[has_title] = _closeness(
+                    vector_store.similarities(
+                        generation, title_rows[has_title], query_vector
+                    )
+                )
+
+            # Keyword part, BM25 over the title and content fields
+            title_bm25 = np.zeros(len(candidates))
+            content_bm25 = np.zeros(len(candidates))
+            keyword_matched = np.zeros(len(candidates), dtype=bool)
+            match_expression = _build_match_expression(
+                final_query, ["title", "content"]
+            )
+            if match_expression:
+                position_by_rowid = {
+                    int(rowid): position for position, rowid in enumerate(rowids)
+                }
+                # FTS5 bm25() is negated so that better matches sort first
+                for rowid, title_score, content_score in conn.execute(
+                    "SELECT c.rowid, -bm25(chunk_fts, 1.0, 0.0, 0.0), "
+                    "-bm25(chunk_fts, 0.0, 1.0, 0.0) FROM chunk_fts "
+                    "JOIN chunks c ON c.rowid = chunk_fts.rowid "
+                    f"WHERE chunk_fts MATCH ? AND {where_clause}",
+                    [match_expression, *where_params],
+                ):
+                    position = position_by_rowid.get(rowid)
+                    if position is None:
+                        continue
+                    title_bm25[position] = max(title_score, 0.0)
+                    content_bm25[position] = max(content_score, 0.0)
+                    keyword_matched[position] = True
+
+            # Candidates are what the Vespa query would match: the nearest neighbors
+            # of the content and title embeddings plus anything matching the keywords
+            matched = keyword_matched.copy()
+            for closeness in (content_closeness, title_closeness):
+                num_hits = min(target_hits, closeness.size)
+                matched[np.argpartition(-closeness, num_hits - 1)[:num_hits]] = True
+            matched_positions = np.flatnonzero(matched)
+
+            title_vector_score = np.maximum(content_closeness, title_closeness)
+            if ranking_profile_type == QueryExpansionType.KEYWORD:
+                first_phase = (
+                    title_ratio * title_bm25 + (1 - title_ratio) * content_bm25
+                )
+            else:
+                first_phase = (
+                    title_ratio * title_closeness
+                    + (1 - title_ratio) * content_closeness
+                )
+            if matched_positions.size > _RERANK_COUNT:
+                top = np.argpartition(
+                    -first_phase[matched_positions], _RERANK_COUNT - 1
+                )[:_RERANK_COUNT]
+                matched_positions = matched_positions[top]
+
+            # Global phase over the rerank set, same expression as the rank profile
+            vector_score = title_ratio * _normalize_linear(
+                title_vector_score[matched_positions]
+            ) + (1 - title_ratio) * _normalize_linear(
+                content_closeness[matched_positions]
+            )
+            keyword_score = title_ratio * _normalize_linear(
+                title_bm25[matched_positions]
+            ) + (1 - title_ratio) * _normalize_linear(content_bm25[matched_positions])
+            recency_bias = _recency_bias(
+                updated_at[matched_positions], decay_factor, time.time()
+            )
+            aggregated_boost = aggregated_boosts[matched_positions]
+            scores = (
+                (hybrid_alpha * vector_score + (1 - hybrid_alpha) * keyword_score)
+                * _document_boost(boosts[matched_positions])
+                * recency_bias
+                * np.where(np.isnan(aggregated_boost), 1.0, aggregated_boost)
+            )
+
+            ranked = np.argsort(-scores, kind="stable")[
+                offset : offset + num_to_retrieve
+            ]
+            result_rowids = [int(rowids[matched_positions[i]]) for i in ranked]
+            rows = self._fetch_rows(conn, result_rowids)
+            highlights = self._fetch_highlights(conn, final_query, result_rowids)
+
+        return cleanup_chunks(
+            [
+                _row_to_inference_chunk(
+                    rows[rowid],
+                    score=float(scores[i]),
+                    recency_bias=float(recency_bias[i]),
+                    dynamic_summary=highlights.get(rowid),
+                )
+                for i, rowid in zip(ranked, result_rowids)
+            ]
+        )
+
+    def admin_retrieval(
+        self,
+        query: str,
+        filters: IndexFilters,
+        num_to_retrieve: int = NUM_RETURNED_HITS,
+        offset: int = 0,
+    ) -> list[InferenceChunk]:
+        match_expression = _build_match_expression(query, ["title", "content"])
+        if not match_expression:
+            return []
+
+        where_clause, where_params = build_local_filters(filters, include_hidden=True)
+        with self._storage.read_snapshot() as conn:
+            # Keyword only, 5x weight on the title as in the admin_search rank profile
+            results = conn.execute(
+                "SELECT c.rowid, -bm25(chunk_fts, 5.0, 1.0, 0.0) AS score "
+                "FROM chunk_fts JOIN chunks c ON c.rowid = chunk_fts.rowid "
+                f"WHERE chunk_fts MATCH ? AND {where_clause} "
+                "ORDER BY score DESC LIMIT ? OFFSET ?",
+                [match_expression, *where_params, num_to_retrieve, offset],
+            ).fetchall()
+            result_rowids = [rowid for rowid, _ in results]
+            rows = self._fetch_rows(conn, result_rowids)
+            highlights = self._fetch_highlights(conn, query, result_rowids)
+
+        return cleanup_chunks(
+            [
+                _row_to_inference_chunk(
+                    rows[rowid],
+                    score=score,
+                    recency_bias=1.0,
+                    dynamic_summary=highlights.get(rowid),
+                )
+                for rowid, score in results
+            ]
+        )
+
+    def random_retrieval(
+        self,
+        filters: IndexFilters,
+        num_to_retrieve: int = 10,
+    ) -> list[InferenceChunk]:
+        where_clause, where_params = build_local_filters(filters)
+        with self._storage.read_snapshot() as conn:
+            result_rowids = [
+                row[0]
+                for row in conn.execute(
+                    f"SELECT c.rowid FROM chunks c WHERE {where_clause} "
+                    "ORDER BY RANDOM() LIMIT ?",
+                    [*where_params, num_to_retrieve],
+                )
+            ]
+            rows = self._fetch_rows(conn, result_rowids)
+
+        return cleanup_chunks(
+            [
+                _row_to_inference_chunk(
+                    rows[rowid], score=None, recency_bias=1.0, dynamic_summary=None
+                )
+                for rowid in result_rowids
+            ]
+        )
@@ -0,0 +1,187 @@
+import os
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from onyx.utils.logger import setup_logger
+
+logger = setup_logger()
+
+FLOAT32 = "float32"
+INT8 = "int8"
+
+
+def _vector_file_name(generation: int) -> str:
+    return f"vectors_{generation}.bin"
+
+
+def _scale_file_name(generation: int) -> str:
+    return f"scales_{generation}.bin"
+
+
+class LocalVectorStore:
+    """Append-only matrix of L2 normalized vectors kept in a flat file that is memory
+    mapped for reads. Rows are never modified in place, deleted rows are simply no
+    longer referenced and get dropped when the index is compacted into the next
+    `generation` of files.
+
+    int8 rows are quantized per row (symmetric, scale = max(|v|) / 127) with the
+    scales kept in a separate float32 file.
+
+    NOTE: all writes must be done while holding the index level write lock, this
+    class does not do any cross process synchronization by itself."""
+
+    def __init__(self, directory: Path, dim: int, dtype: str) -> None:
+        if dtype not in (FLOAT32, INT8):
+            raise ValueError(f"Unsupported vector dtype: {dtype}")
+
+        self.directory = directory
+        self.dim = dim
+        self.dtype = dtype
+        self._np_dtype = np.dtype("<f4") if dtype == FLOAT32 else np.dtype("i1")
+        self._row_bytes = self._np_dtype.itemsize * dim
+
+        self._lock = threading.Lock()
+        self._mapped_generation: int | None = None
+        self._vectors: np.memmap | None = None
+        self._scales: np.memmap | None = None
+
+    def _vector_path(self, generation: int) -> Path:
+        return self.directory / _vector_file_name(generation)
+
+    def _scale_path(self, generation: int) -> Path:
+        return self.directory / _scale_file_name(generation)
+
+    def num_rows(self, generation: int) -> int:
+        path = self._vector_path(generation)
+        if not path.exists():
+            return 0
+        return path.stat().st_size // self._row_bytes
+
+    def _encode(self, vectors: np.ndarray) -> tuple[bytes, bytes | None]:
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms == 0, 1.0, norms)
+
+        if self.dtype == FLOAT32:
+            return vectors.astype("<f4").tobytes(), None
+
+        scales = np.abs(vectors).max(axis=1) / 127.0
+        scales = np.where(scales == 0, 1.0, scales).astype("<f4")
+        quantized = np.clip(np.rint(vectors / scales[:, None]), -127, 127)
+        return quantized.astype("i1").tobytes(), scales.tobytes()
+
+    def append(self, generation: int, vectors: np.ndarray) -> int:
+        """Appends the vectors and returns the row index of the first one."""
+        vector_bytes, scale_bytes = self._encode(vectors)
+
+        start_row = self.num_rows(generation)
+        with open(self._vector_path(generation), "ab") as f:
+            # a previous writer may have crashed mid row, never build on a torn row
+            f.truncate(start_row * self._row_bytes)
+            f.write(vector_bytes)
+            f.flush()
+            os.fsync(f.fileno())
+
+        if scale_bytes is not None:
+            with open(self._scale_path(generation), "ab") as f:
+                f.truncate(start_row * 4)
+                f.write(scale_bytes)
+                f.flush()
+                os.fsync(f.fileno())
+
+        return start_row
+
+    def _get_mapped(
+        self, generation: int, max_row: int
+    ) -> tuple[np.memmap, np.memmap | None]:
+        with self._lock:
+            if (
+                self._vectors is None
+                or self._mapped_generation != generation
+                or self._vectors.shape[0] <= max_row
+            ):
+                num_rows = self.num_rows(generation)
+                if num_rows <= max_row:
+                    raise RuntimeError(
+                        f"Vector row {max_row} is missing from {self._vector_path(generation)}"
+                    )
+                self._vectors = np.memmap(
+                    self._vector_path(generation),
+                    dtype=self._np_dtype,
+                    mode="r",
+                    shape=(num_rows, self.dim),
+                )
+                self._scales = (
+                    np.memmap(
+                        self._scale_path(generation),
+                        dtype="<f4",
+                        mode="r",
+                        shape=(num_rows,),
+                    )
+                    if self.dtype == INT8
+                    else None
+                )
+                self._mapped_generation = generation
+
+            return self._vectors, self._scales
+
+    def similarities(
+        self, generation: int, rows: np.ndarray, query: np.ndarray
+    ) -> np.ndarray:
+        """Cosine similarity between the normalized query and the given rows. Only
+        the requested rows are paged in."""
+        if rows.size == 0:
+            return np.zeros(0, dtype=np.float32)
+
+        query = np.asarray(query, dtype=np.float32)
+        query_norm = np.linalg.norm(query)
+        if query_norm == 0:
+            return np.zeros(rows.size, dtype=np.float32)
+        query = query / query_norm
+
+        vectors, scales = self._get_mapped(generation, int(rows.max()))
+        # sorted access keeps the page cache reads mostly sequential
+        order = np.argsort(rows, kind="stable")
+        sorted_rows = rows[order]
+
+        sims_sorted = vectors[sorted_rows].astype(np.float32) @ query
+        if scales is not None:
+            sims_sorted *= scales[sorted_rows]
+
+        sims = np.empty_like(sims_sorted)
+        sims[order] = sims_sorted
+        return np.clip(sims, -1.0, 1.0)
+
+    def read_raw(self, generation: int, rows: np.ndarray) -> tuple[bytes, bytes | None]:
+        """Used for compaction, returns the stored representation of the rows."""
+        vectors, scales = self._get_mapped(generation, int(rows.max()))
+        return (
+            np.ascontiguousarray(vectors[rows]).tobytes(),
+            (
+                np.ascontiguousarray(scales[rows]).tobytes()
+                if scales is not None
+                else None
+            ),
+        )
+
+    def write_raw(
+        self, generation: int, vector_bytes: bytes, scale_bytes: bytes | None
+    ) -> None:
+        with open(self._vector_path(generation), "ab") as f:
+            f.write(vector_bytes)
+            f.flush()
+            os.fsync(f.fileno())
+        if scale_bytes is not None:
+            with open(self._scale_path(generation), "ab") as f:
+                f.write(scale_bytes)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def remove_generation(self, generation: int) -> None:
+        for path in (self._vector_path(generation), self._scale_path(generation)):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
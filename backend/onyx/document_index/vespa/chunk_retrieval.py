@@ -12,9 +12,11 @@ from retry import retry
 
 from onyx.configs.app_configs import LOG_VESPA_TIMING_INFORMATION
 from onyx.configs.app_configs import VESPA_LANGUAGE_OVERRIDE
+from onyx.configs.app_configs import VESPA_VISIT_MAX_CONCURRENCY
 from onyx.context.search.models import IndexFilters
 from onyx.context.search.models import InferenceChunkUncleaned
 from onyx.document_index.interfaces import VespaChunkRequest
+from onyx.document_index.vespa.shared_utils.utils import get_shared_vespa_http_client
 from onyx.document_index.vespa.shared_utils.utils import get_vespa_http_client
 from onyx.document_index.vespa.shared_utils.vespa_request_builders import (
     build_vespa_filters,
@@ -157,6 +159,33 @@ def _vespa_hit_to_inference_chunk(
     )
 
 
+# The fields of a chunk that _vespa_hit_to_inference_chunk reads. By default the Visit
+# API returns all document fields, including the embedding tensors which make up most
+# of the response and are never used for retrieved chunks.
+INFERENCE_CHUNK_FIELDS = [
+    DOCUMENT_ID,
+    CHUNK_ID,
+    BLURB,
+    CONTENT,
+    SOURCE_TYPE,
+    SOURCE_LINKS,
+    SEMANTIC_IDENTIFIER,
+    TITLE,
+    SECTION_CONTINUATION,
+    IMAGE_FILE_NAME,
+    BOOST,
+    HIDDEN,
+    DOC_UPDATED_AT,
+    PRIMARY_OWNERS,
+    SECONDARY_OWNERS,
+    LARGE_CHUNK_REFERENCE_IDS,
+    METADATA,
+    METADATA_SUFFIX,
+    DOC_SUMMARY,
+    CHUNK_CONTEXT,
+]
+
+
 def get_chunks_via_visit_api(
     chunk_request: VespaChunkRequest,
     index_name: str,
@@ -220,9 +249,8 @@ def get_chunks_via_visit_api(
     while True:
         try:
             filtered_params = {k: v for k, v in params.items() if v is not None}
-            with get_vespa_http_client() as http_client:
-                response = http_client.get(url, params=filtered_params)
-                response.raise_for_status()
+            response = get_shared_vespa_http_client().get(url, params=filtered_params)
+            response.raise_for_status()
         except httpx.HTTPError as e:
             error_base = "Failed to query Vespa"
             logger.error(
@@ -293,17 +321,23 @@ def parallel_visit_api_retrieval(
     chunk_requests: list[VespaChunkRequest],
     filters: IndexFilters,
     get_large_chunks: bool = False,
+    field_names: list[str] | None = INFERENCE_CHUNK_FIELDS,
 ) -> list[InferenceChunkUncleaned]:
+    """Runs the Visit API requests with at most VESPA_VISIT_MAX_CONCURRENCY in flight,
+    all of them sharing one HTTP/2 client. Only `field_names` are fetched, pass None to
+    fetch all document fields."""
     functions_with_args: list[tuple[Callable, tuple]] = [
         (
             get_chunks_via_visit_api,
-            (chunk_request, index_name, filters, get_large_chunks),
+            (chunk_request, index_name, filters, field_names, get_large_chunks),
         )
         for chunk_request in chunk_requests
     ]
 
     parallel_results = run_functions_tuples_in_parallel(
-        functions_with_args, allow_failures=True
+        functions_with_args,
+        allow_failures=True,
+        max_workers=VESPA_VISIT_MAX_CONCURRENCY,
     )
 
     # Any failures to retrieve would give a None, drop the Nones and empty lists
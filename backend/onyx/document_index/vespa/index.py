@@ -54,6 +54,7 @@ from onyx.document_index.vespa.indexing_utils import BaseHTTPXClientContext
 from onyx.document_index.vespa.indexing_utils import batch_index_vespa_chunks
 from onyx.document_index.vespa.indexing_utils import check_for_final_chunk_existence
 from onyx.document_index.vespa.indexing_utils import clean_chunk_id_copy
+from onyx.document_index.vespa.indexing_utils import get_final_chunk_indices
 from onyx.document_index.vespa.indexing_utils import GlobalHTTPXClientContext
 from onyx.document_index.vespa.indexing_utils import TemporaryHTTPXClientContext
 from onyx.document_index.vespa.shared_utils.utils import get_vespa_http_client
@@ -71,6 +72,7 @@ from onyx.document_index.vespa_constants import DOCUMENT_ID
 from onyx.document_index.vespa_constants import DOCUMENT_ID_ENDPOINT
 from onyx.document_index.vespa_constants import DOCUMENT_SETS
 from onyx.document_index.vespa_constants import HIDDEN
+from onyx.document_index.vespa_constants import MAX_OR_CONDITIONS
 from onyx.document_index.vespa_constants import NUM_THREADS
 from onyx.document_index.vespa_constants import USER_PROJECT
 from onyx.document_index.vespa_constants import VESPA_APPLICATION_ENDPOINT
@@ -510,16 +512,18 @@ class VespaIndex(DocumentIndex):
             # documents that have `chunk_count` in the database, but not for
             # `old_version` documents.
 
-            enriched_doc_infos: list[EnrichedDocumentIndexingInfo] = [
-                VespaIndex.enrich_basic_chunk_info(
-                    index_name=self.index_name,
-                    http_client=http_client,
-                    document_id=doc_id,
-                    previous_chunk_count=doc_id_to_previous_chunk_cnt.get(doc_id, 0),
-                    new_chunk_count=doc_id_to_new_chunk_cnt.get(doc_id, 0),
-                )
-                for doc_id in doc_id_to_new_chunk_cnt.keys()
-            ]
+            enriched_doc_infos = VespaIndex.enrich_basic_chunk_info_batch(
+                index_name=self.index_name,
+                http_client=http_client,
+                doc_id_to_previous_chunk_cnt={
+                    doc_id: doc_id_to_previous_chunk_cnt.get(doc_id, 0)
+                    for doc_id in doc_id_to_new_chunk_cnt.keys()
+                },
+                doc_id_to_new_chunk_cnt=doc_id_to_new_chunk_cnt,
+                executor=executor,
+                # tenant ids are only stored on the chunks of multitenant indices
+                tenant_id=tenant_id if self.multitenant else None,
+            )
 
             for cleaned_doc_info in enriched_doc_infos:
                 # If the document has previously indexed chunks, we know it previously existed
@@ -586,16 +590,15 @@ class VespaIndex(DocumentIndex):
         # NOTE: using `httpx` here since `requests` doesn't support HTTP2. This is beneficient for
         # indexing / updates / deletes since we have to make a large volume of requests.
 
-        with (
-            concurrent.futures.ThreadPoolExecutor(max_workers=NUM_THREADS) as executor,
-            httpx_client as http_client,
-        ):
+        # the client is owned by the caller (it may be the worker wide pooled client),
+        # so it must not be entered here, exiting it would close it
+        with concurrent.futures.ThreadPoolExecutor(max_workers=NUM_THREADS) as executor:
             for update_batch in batch_generator(updates, batch_size):
                 future_to_document_id = {
                     executor.submit(
                         _update_chunk,
                         update,
-                        http_client,
+                        httpx_client,
                     ): update.document_id
                     for update in update_batch
                 }
@@ -662,18 +665,18 @@ class VespaIndex(DocumentIndex):
         update_start = time.monotonic()
 
         processed_updates_requests: list[_VespaUpdateRequest] = []
-        all_doc_chunk_ids: dict[str, list[UUID]] = {}
+        # (index_name, doc_id) -> chunk ids of the document in that index
+        all_doc_chunk_ids: dict[tuple[str, str], list[UUID]] = {}
 
         # Fetch all chunks for each document ahead of time
-        index_names = [self.index_name]
-        if self.secondary_index_name:
-            index_names.append(self.secondary_index_name)
-
         chunk_id_start_time = time.monotonic()
         with self.httpx_client_context as http_client:
             for update_request in update_requests:
                 for doc_info in update_request.minimal_document_indexing_info:
-                    for index_name in index_names:
+                    for (
+                        index_name,
+                        large_chunks_enabled,
+                    ) in self.index_to_large_chunks_enabled.items():
                         doc_chunk_info = VespaIndex.enrich_basic_chunk_info(
                             index_name=index_name,
                             http_client=http_client,
@@ -681,12 +684,13 @@ class VespaIndex(DocumentIndex):
                             previous_chunk_count=doc_info.chunk_start_index,
                             new_chunk_count=0,
                         )
-                        doc_chunk_ids = get_document_chunk_ids(
-                            enriched_document_info_list=[doc_chunk_info],
-                            tenant_id=tenant_id,
-                            large_chunks_enabled=False,
+                        all_doc_chunk_ids[(index_name, doc_info.doc_id)] = (
+                            get_document_chunk_ids(
+                                enriched_document_info_list=[doc_chunk_info],
+                                tenant_id=tenant_id,
+                                large_chunks_enabled=large_chunks_enabled,
+                            )
                         )
-                        all_doc_chunk_ids[doc_info.doc_id] = doc_chunk_ids
 
         logger.debug(
             f"Took {time.monotonic() - chunk_id_start_time:.2f} seconds to fetch all Vespa chunk IDs"
@@ -717,14 +721,17 @@ class VespaIndex(DocumentIndex):
                 continue
 
             for doc_info in update_request.minimal_document_indexing_info:
-                for doc_chunk_id in all_doc_chunk_ids[doc_info.doc_id]:
-                    processed_updates_requests.append(
-                        _VespaUpdateRequest(
-                            document_id=doc_info.doc_id,
-                            url=f"{DOCUMENT_ID_ENDPOINT.format(index_name=self.index_name)}/{doc_chunk_id}",
-                            update_request=update_dict,
+                for index_name in self.index_to_large_chunks_enabled:
+                    for doc_chunk_id in all_doc_chunk_ids[
+                        (index_name, doc_info.doc_id)
+                    ]:
+                        processed_updates_requests.append(
+                            _VespaUpdateRequest(
+                                document_id=doc_info.doc_id,
+                                url=f"{DOCUMENT_ID_ENDPOINT.format(index_name=index_name)}/{doc_chunk_id}",
+                                update_request=update_dict,
+                            )
                         )
-                    )
 
         with self.httpx_client_context as httpx_client:
             self._apply_updates_batched(processed_updates_requests, httpx_client)
@@ -1110,6 +1117,115 @@ class VespaIndex(DocumentIndex):
         )
         return enriched_doc_info
 
+    @classmethod
+    def enrich_basic_chunk_info_batch(
+        cls,
+        index_name: str,
+        http_client: httpx.Client,
+        doc_id_to_previous_chunk_cnt: dict[str, int | None],
+        doc_id_to_new_chunk_cnt: dict[str, int],
+        executor: concurrent.futures.ThreadPoolExecutor,
+        tenant_id: str | None = None,
+    ) -> list[EnrichedDocumentIndexingInfo]:
+        """Same as `enrich_basic_chunk_info`, but for a whole batch of documents.
+
+        Documents with a `chunk_count` in the database need no Vespa lookups. For
+        `old_version` documents, the previous chunk range is resolved with one grouping
+        query per MAX_OR_CONDITIONS documents rather than probing chunk ids one at a
+        time. If a grouping query fails or is incomplete, the affected documents fall
+        back to the per chunk probes, which are run concurrently on the executor.
+
+        `tenant_id` scopes the grouping queries and must be given for multitenant
+        indices."""
+        final_chunk_indices: dict[str, int] = {}
+        old_version_doc_ids = [
+            doc_id
+            for doc_id, previous_chunk_count in doc_id_to_previous_chunk_cnt.items()
+            if previous_chunk_count is None
+        ]
+
+        def _resolve_final_chunk_indices(doc_ids: list[str]) -> dict[str, int] | None:
+            # chunks are stored under the cleaned document id
+            cleaned_doc_id_to_doc_id = {
+                replace_invalid_doc_id_characters(doc_id): doc_id for doc_id in doc_ids
+            }
+            try:
+                cleaned_final_chunk_indices = get_final_chunk_indices(
+                    document_ids=list(cleaned_doc_id_to_doc_id.keys()),
+                    index_name=index_name,
+                    http_client=http_client,
+                    tenant_id=tenant_id,
+                )
+            except Exception:
+                logger.exception(
+                    "Failed to resolve chunk ranges in bulk, falling back to probing"
+                )
+                return None
+
+            if cleaned_final_chunk_indices is None:
+                return None
+
+            final_indices: dict[str, int] = {}
+            for doc_id in doc_ids:
+                start_index = doc_id_to_new_chunk_cnt.get(doc_id, 0)
+                # nothing indexed past the new chunks -> nothing to delete, which
+                # matches what `check_for_final_chunk_existence` returns
+                final_indices[doc_id] = max(
+                    start_index,
+                    cleaned_final_chunk_indices.get(
+                        replace_invalid_doc_id_characters(doc_id), start_index
+                    ),
+                )
+            return final_indices
+
+        def _probe_final_chunk_index(doc_id: str) -> tuple[str, int]:
+            start_index = doc_id_to_new_chunk_cnt.get(doc_id, 0)
+            return doc_id, check_for_final_chunk_existence(
+                minimal_doc_info=MinimalDocumentIndexingInfo(
+                    doc_id=doc_id, chunk_start_index=start_index
+                ),
+                start_index=start_index,
+                index_name=index_name,
+                http_client=http_client,
+            )
+
+        unresolved_doc_ids: list[str] = []
+        bulk_futures = {
+            executor.submit(_resolve_final_chunk_indices, doc_id_batch): doc_id_batch
+            for doc_id_batch in batch_generator(old_version_doc_ids, MAX_OR_CONDITIONS)
+        }
+        for future in concurrent.futures.as_completed(bulk_futures):
+            resolved = future.result()
+            if resolved is None:
+                unresolved_doc_ids.extend(bulk_futures[future])
+            else:
+                final_chunk_indices.update(resolved)
+
+        probe_futures = [
+            executor.submit(_probe_final_chunk_index, doc_id)
+            for doc_id in unresolved_doc_ids
+        ]
+        for probe_future in concurrent.futures.as_completed(probe_futures):
+            doc_id, final_chunk_index = probe_future.result()
+            final_chunk_indices[doc_id] = final_chunk_index
+
+        enriched_doc_infos: list[EnrichedDocumentIndexingInfo] = []
+        for doc_id, previous_chunk_count in doc_id_to_previous_chunk_cnt.items():
+            is_old_version = previous_chunk_count is None
+            enriched_doc_infos.append(
+                EnrichedDocumentIndexingInfo(
+                    doc_id=doc_id,
+                    chunk_start_index=doc_id_to_new_chunk_cnt.get(doc_id, 0),
+                    chunk_end_index=(
+                        final_chunk_indices[doc_id]
+                        if is_old_version
+                        else cast(int, previous_chunk_count)
+                    ),
+                    old_version=is_old_version,
+                )
+            )
+        return enriched_doc_infos
+
     @classmethod
     def delete_entries_by_tenant_id(
         cls,
@@ -42,6 +42,7 @@ from onyx.document_index.vespa_constants import METADATA_LIST
 from onyx.document_index.vespa_constants import METADATA_SUFFIX
 from onyx.document_index.vespa_constants import NUM_THREADS
 from onyx.document_index.vespa_constants import PRIMARY_OWNERS
+from onyx.document_index.vespa_constants import SEARCH_ENDPOINT
 from onyx.document_index.vespa_constants import SECONDARY_OWNERS
 from onyx.document_index.vespa_constants import SECTION_CONTINUATION
 from onyx.document_index.vespa_constants import SEMANTIC_IDENTIFIER
@@ -52,6 +53,7 @@ from onyx.document_index.vespa_constants import TENANT_ID
 from onyx.document_index.vespa_constants import TITLE
 from onyx.document_index.vespa_constants import TITLE_EMBEDDING
 from onyx.document_index.vespa_constants import USER_PROJECT
+from onyx.document_index.vespa_constants import VESPA_TIMEOUT
 from onyx.indexing.models import DocMetadataAwareIndexChunk
 from onyx.utils.logger import setup_logger
 
@@ -299,6 +301,66 @@ def check_for_final_chunk_existence(
         index += 1
 
 
+def _escape_yql_string(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+def get_final_chunk_indices(
+    document_ids: list[str],
+    index_name: str,
+    http_client: httpx.Client,
+    tenant_id: str | None = None,
+) -> dict[str, int] | None:
+    """Resolves, with a single grouping query, one past the highest chunk id indexed for
+    each of the given documents. Documents without any chunks in the index are omitted.
+    In multitenant indices, `tenant_id` must be given so that chunks of other tenants'
+    documents with the same ids are not counted.
+
+    Returns None if Vespa did not give a complete answer (e.g. degraded coverage), in which
+    case callers should fall back to `check_for_final_chunk_existence`."""
+    if not document_ids:
+        return {}
+
+    id_conditions = " or ".join(
+        f'{DOCUMENT_ID} contains "{_escape_yql_string(document_id)}"'
+        for document_id in document_ids
+    )
+    where_clause = f"({id_conditions})"
+    if tenant_id is not None:
+        where_clause += f' and ({TENANT_ID} contains "{_escape_yql_string(tenant_id)}")'
+    yql = (
+        f"select {DOCUMENT_ID} from {index_name} where {where_clause} limit 0 | "
+        f"all(group({DOCUMENT_ID}) max({len(document_ids)}) "
+        f"each(output(max({CHUNK_ID}))))"
+    )
+
+    response = http_client.post(
+        SEARCH_ENDPOINT,
+        json={"yql": yql, "hits": 0, "timeout": VESPA_TIMEOUT},
+    )
+    response.raise_for_status()
+    root = response.json().get("root", {})
+
+    # a partial answer would make us skip deleting stale chunks, so don't trust it
+    if root.get("errors") or not root.get("coverage", {}).get("full", False):
+        logger.warning(
+            f"Incomplete grouping result when resolving chunk ranges for "
+            f"{len(document_ids)} documents in {index_name}"
+        )
+        return None
+
+    final_chunk_indices: dict[str, int] = {}
+    for group_root in root.get("children", []):
+        for group_list in group_root.get("children", []):
+            for group in group_list.get("children", []):
+                max_chunk_id = group.get("fields", {}).get(f"max({CHUNK_ID})")
+                if max_chunk_id is None:
+                    continue
+                final_chunk_indices[str(group["value"])] = int(max_chunk_id) + 1
+
+    return final_chunk_indices
+
+
 class BaseHTTPXClientContext(ABC):
     """Abstract base class for an HTTPX client context manager."""
 
@@ -8,7 +8,9 @@ from onyx.configs.app_configs import MANAGED_VESPA
 from onyx.configs.app_configs import VESPA_CLOUD_CERT_PATH
 from onyx.configs.app_configs import VESPA_CLOUD_KEY_PATH
 from onyx.configs.app_configs import VESPA_REQUEST_TIMEOUT
+from onyx.configs.app_configs import VESPA_VISIT_MAX_CONCURRENCY
 from onyx.document_index.vespa_constants import VESPA_APP_CONTAINER_URL
+from onyx.httpx.httpx_pool import HttpxPool
 from onyx.utils.logger import setup_logger
 
 logger = setup_logger()
@@ -80,6 +82,30 @@ def get_vespa_http_client(no_timeout: bool = False, http2: bool = True) -> httpx
     )
 
 
+def get_shared_vespa_http_client() -> httpx.Client:
+    """
+    Return the process wide HTTP/2 client for retrieval requests to Vespa. Concurrent
+    requests are multiplexed over a bounded set of connections instead of each
+    request setting up its own client (and TLS session for managed Vespa).
+    """
+    HttpxPool.init_client(
+        name="vespa_retrieval",
+        cert=(
+            cast(tuple[str, str], (VESPA_CLOUD_CERT_PATH, VESPA_CLOUD_KEY_PATH))
+            if MANAGED_VESPA
+            else None
+        ),
+        verify=False if not MANAGED_VESPA else True,
+        timeout=VESPA_REQUEST_TIMEOUT,
+        http2=True,
+        limits=httpx.Limits(
+            max_connections=VESPA_VISIT_MAX_CONCURRENCY,
+            max_keepalive_connections=VESPA_VISIT_MAX_CONCURRENCY,
+        ),
+    )
+    return HttpxPool.get("vespa_retrieval")
+
+
 def wait_for_vespa_with_timeout(wait_interval: int = 5, wait_limit: int = 60) -> bool:
     """Waits for Vespa to become ready subject to a timeout.
     Returns True if Vespa is ready, False otherwise."""
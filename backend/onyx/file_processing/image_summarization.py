@@ -1,4 +1,6 @@
 import base64
+import threading
+import time
 from io import BytesIO
 
 from langchain_core.messages import BaseMessage
@@ -6,6 +8,7 @@ from langchain_core.messages import HumanMessage
 from langchain_core.messages import SystemMessage
 from PIL import Image
 
+from onyx.configs.app_configs import IMAGE_SUMMARIZATION_MAX_REQUESTS_PER_MINUTE
 from onyx.configs.app_configs import IMAGE_SUMMARIZATION_SYSTEM_PROMPT
 from onyx.configs.app_configs import IMAGE_SUMMARIZATION_USER_PROMPT
 from onyx.llm.interfaces import LLM
@@ -20,6 +23,45 @@ class UnsupportedImageFormatError(ValueError):
     """Raised when an image uses a MIME type unsupported by the summarization flow."""
 
 
+class _RequestRateLimiter:
+    """Spaces out requests so that at most `max_requests_per_minute` are started per
+    minute. Thread safe, callers block until it is their turn."""
+
+    def __init__(self, max_requests_per_minute: int) -> None:
+        self._interval = 60 / max_requests_per_minute
+        self._lock = threading.Lock()
+        self._next_request_at = 0.0
+
+    def wait(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            request_at = max(now, self._next_request_at)
+            self._next_request_at = request_at + self._interval
+        if request_at > now:
+            time.sleep(request_at - now)
+
+
+_rate_limiters: dict[str, _RequestRateLimiter] = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def _wait_for_rate_limit(llm: LLM) -> None:
+    """Image summarization requests are rate limited per LLM provider, see
+    IMAGE_SUMMARIZATION_MAX_REQUESTS_PER_MINUTE."""
+    if IMAGE_SUMMARIZATION_MAX_REQUESTS_PER_MINUTE <= 0:
+        return
+
+    provider = llm.config.model_provider
+    with _rate_limiters_lock:
+        rate_limiter = _rate_limiters.get(provider)
+        if rate_limiter is None:
+            rate_limiter = _RequestRateLimiter(
+                IMAGE_SUMMARIZATION_MAX_REQUESTS_PER_MINUTE
+            )
+            _rate_limiters[provider] = rate_limiter
+    rate_limiter.wait()
+
+
 def prepare_image_bytes(image_data: bytes) -> str:
     """Prepare image bytes for summarization.
     Resizes image if it's larger than 20MB. Encodes image as a base64 string."""
@@ -80,6 +122,7 @@ def summarize_image_with_error_handling(
         f"The image has the file name '{context_name}'.\n{user_prompt_template}"
     )
     try:
+        _wait_for_rate_limit(llm)
         return summarize_image_pipeline(llm, image_data, user_prompt, system_prompt)
     except UnsupportedImageFormatError:
         logger.info(
@@ -0,0 +1,84 @@
+import hashlib
+from typing import cast
+
+from onyx.configs.app_configs import DISABLE_IMAGE_SUMMARY_CACHE
+from onyx.configs.app_configs import IMAGE_SUMMARIZATION_SYSTEM_PROMPT
+from onyx.configs.app_configs import IMAGE_SUMMARIZATION_USER_PROMPT
+from onyx.configs.app_configs import IMAGE_SUMMARY_CACHE_TTL_SECONDS
+from onyx.llm.interfaces import LLM
+from onyx.redis.redis_pool import get_redis_client
+from onyx.utils.logger import setup_logger
+
+logger = setup_logger()
+
+IMAGE_SUMMARY_REDIS_PREFIX = "image_summary"
+
+
+def get_image_content_hash(image_data: bytes) -> str:
+    return hashlib.sha256(image_data).hexdigest()
+
+
+def _summarizer_fingerprint(llm: LLM) -> str:
+    """Summaries depend on the model and the prompts, changing any of them starts
+    a new cache."""
+    return hashlib.sha256(
+        "\n".join(
+            [
+                llm.config.model_provider,
+                llm.config.model_name,
+                IMAGE_SUMMARIZATION_SYSTEM_PROMPT,
+                IMAGE_SUMMARIZATION_USER_PROMPT,
+            ]
+        ).encode()
+    ).hexdigest()[:16]
+
+
+def _redis_key(fingerprint: str, content_hash: str) -> str:
+    return f"{IMAGE_SUMMARY_REDIS_PREFIX}:{fingerprint}:{content_hash}"
+
+
+def get_cached_image_summaries(llm: LLM, content_hashes: list[str]) -> dict[str, str]:
+    """Returns the cached summaries of the given images by content hash. Redis is
+    strictly best effort, any failure there is treated as a miss."""
+    if DISABLE_IMAGE_SUMMARY_CACHE or not content_hashes:
+        return {}
+
+    fingerprint = _summarizer_fingerprint(llm)
+    try:
+        raw_summaries = cast(
+            list[bytes | None],
+            get_redis_client().mget(
+                [
+                    _redis_key(fingerprint, content_hash)
+                    for content_hash in content_hashes
+                ]
+            ),
+        )
+    except Exception:
+        logger.exception("Failed to read image summaries from Redis")
+        return {}
+
+    return {
+        content_hash: raw_summary.decode("utf-8")
+        for content_hash, raw_summary in zip(content_hashes, raw_summaries)
+        if raw_summary is not None
+    }
+
+
+def cache_image_summaries(llm: LLM, summaries: dict[str, str]) -> None:
+    """Stores image summaries by content hash."""
+    if DISABLE_IMAGE_SUMMARY_CACHE or not summaries:
+        return
+
+    fingerprint = _summarizer_fingerprint(llm)
+    try:
+        pipe = get_redis_client().pipeline(transaction=False)
+        for content_hash, summary in summaries.items():
+            pipe.set(
+                _redis_key(fingerprint, content_hash),
+                summary,
+                ex=IMAGE_SUMMARY_CACHE_TTL_SECONDS,
+            )
+        pipe.execute()
+    except Exception:
+        logger.exception("Failed to write image summaries to Redis")
@@ -1,12 +1,16 @@
 import json
 from abc import ABC
 from abc import abstractmethod
+from collections.abc import Iterator
 from enum import Enum
-from io import StringIO
+from io import BytesIO
+from typing import IO
 from typing import List
 from typing import Optional
 from typing import TypeAlias
 
+import msgpack  # type: ignore
+import zstandard
 from pydantic import BaseModel
 
 from onyx.configs.constants import FileOrigin
@@ -19,6 +23,15 @@ from onyx.utils.logger import setup_logger
 
 logger = setup_logger()
 
+# Batches are a header followed by a zstd compressed stream of msgpack encoded
+# documents. Batches written before the binary format are a JSON array.
+BATCH_FORMAT_MAGIC = b"ONYXDOCB"
+BATCH_FORMAT_VERSION = 1
+BATCH_FILE_TYPE = "application/x-onyx-document-batch"
+LEGACY_BATCH_FILE_TYPE = "application/json"
+_ZSTD_LEVEL = 3
+_READ_SIZE = 1024 * 1024
+
 
 class DocumentBatchStorageStateType(str, Enum):
     EXTRACTION = "extraction"
@@ -55,6 +68,10 @@ class DocumentBatchStorage(ABC):
     def get_batch(self, batch_num: int) -> Optional[List[Document]]:
         """Retrieve a batch of documents."""
 
+    @abstractmethod
+    def stream_batch(self, batch_num: int) -> Iterator[Document] | None:
+        """Retrieve a batch of documents one at a time, None if it does not exist."""
+
     @abstractmethod
     def delete_batch_by_name(self, batch_file_name: str) -> None:
         """Delete a specific batch."""
@@ -83,15 +100,45 @@ class DocumentBatchStorage(ABC):
     def extract_path_info(self, path: str) -> BatchStoragePathInfo | None:
         """Extract path info from a path."""
 
-    def _serialize_documents(self, documents: list[Document]) -> str:
-        """Serialize documents to JSON string."""
-        # Use mode='json' to properly serialize datetime and other complex types
-        return json.dumps([doc.model_dump(mode="json") for doc in documents], indent=2)
-
-    def _deserialize_documents(self, data: str) -> list[Document]:
-        """Deserialize documents from JSON string."""
-        doc_dicts = json.loads(data)
-        return [Document.model_validate(doc_dict) for doc_dict in doc_dicts]
+    def _serialize_documents(self, documents: list[Document]) -> bytes:
+        """Serialize documents to the versioned binary batch format."""
+        buffer = BytesIO()
+        buffer.write(BATCH_FORMAT_MAGIC)
+        buffer.write(bytes([BATCH_FORMAT_VERSION]))
+
+        packer = msgpack.Packer()
+        compressor = zstandard.ZstdCompressor(level=_ZSTD_LEVEL)
+        with compressor.stream_writer(buffer, closefd=False) as writer:
+            for doc in documents:
+                # Use mode='json' to properly serialize datetime and other complex types
+                writer.write(packer.pack(doc.model_dump(mode="json")))
+
+        return buffer.getvalue()
+
+    def _iter_deserialize_documents(self, stream: IO[bytes]) -> Iterator[Document]:
+        """Deserialize documents one at a time from a binary or legacy JSON batch."""
+        header = stream.read(len(BATCH_FORMAT_MAGIC) + 1)
+        if not header.startswith(BATCH_FORMAT_MAGIC):
+            # legacy JSON batch, these can't be streamed
+            doc_dicts = json.loads(header + stream.read())
+            for doc_dict in doc_dicts:
+                yield Document.model_validate(doc_dict)
+            return
+
+        version = header[len(BATCH_FORMAT_MAGIC)]
+        if version != BATCH_FORMAT_VERSION:
+            raise ValueError(f"Unsupported document batch format version: {version}")
+
+        decompressor = zstandard.ZstdDecompressor()
+        with decompressor.stream_reader(stream, closefd=False) as reader:
+            for doc_dict in msgpack.Unpacker(reader, raw=False, read_size=_READ_SIZE):
+                yield Document.model_validate(doc_dict)
+
+    def _deserialize_documents(self, data: bytes | str) -> list[Document]:
+        """Deserialize documents from a binary or legacy JSON batch."""
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        return list(self._iter_deserialize_documents(BytesIO(data)))
 
     def _per_cc_pair_base_path(self) -> str:
         """Get the base path for the cc pair."""
@@ -107,29 +154,43 @@ class FileStoreDocumentBatchStorage(DocumentBatchStorage):
 
     def _get_batch_file_name(self, batch_num: int) -> str:
         """Generate file name for a document batch."""
+        # NOTE: binary batches keep the .json extension so that batch names stay
+        # the same across versions, the format is detected from the content
         return f"{self.base_path}/{batch_num}.json"
 
+    def _batch_exists(self, file_name: str) -> bool:
+        return any(
+            self.file_store.has_file(
+                file_id=file_name,
+                file_origin=FileOrigin.OTHER,
+                file_type=file_type,
+            )
+            for file_type in (BATCH_FILE_TYPE, LEGACY_BATCH_FILE_TYPE)
+        )
+
     def store_batch(self, batch_num: int, documents: list[Document]) -> None:
         """Store a batch of documents using FileStore."""
         file_name = self._get_batch_file_name(batch_num)
         try:
             data = self._serialize_documents(documents)
-            content = StringIO(data)
+            content = BytesIO(data)
 
             self.file_store.save_file(
                 file_id=file_name,
                 content=content,
                 display_name=f"Document Batch {batch_num}",
                 file_origin=FileOrigin.OTHER,
-                file_type="application/json",
+                file_type=BATCH_FILE_TYPE,
                 file_metadata={
                     "batch_num": batch_num,
                     "document_count": str(len(documents)),
+                    "format_version": BATCH_FORMAT_VERSION,
                 },
             )
 
             logger.debug(
-                f"Stored batch {batch_num} with {len(documents)} documents to FileStore as {file_name}"
+                f"Stored batch {batch_num} with {len(documents)} documents "
+                f"({len(data)} bytes) to FileStore as {file_name}"
             )
         except Exception as e:
             logger.error(f"Failed to store batch {batch_num}: {e}")
@@ -137,23 +198,12 @@ class FileStoreDocumentBatchStorage(DocumentBatchStorage):
 
     def get_batch(self, batch_num: int) -> list[Document] | None:
         """Retrieve a batch of documents from FileStore."""
-        file_name = self._get_batch_file_name(batch_num)
         try:
-            # Check if file exists
-            if not self.file_store.has_file(
-                file_id=file_name,
-                file_origin=FileOrigin.OTHER,
-                file_type="application/json",
-            ):
-                logger.warning(
-                    f"Batch {batch_num} not found in FileStore with name {file_name}"
-                )
+            document_stream = self.stream_batch(batch_num)
+            if document_stream is None:
                 return None
 
-            content_io = self.file_store.read_file(file_name)
-            data = content_io.read().decode("utf-8")
-
-            documents = self._deserialize_documents(data)
+            documents = list(document_stream)
             logger.debug(
                 f"Retrieved batch {batch_num} with {len(documents)} documents from FileStore"
             )
@@ -162,6 +212,26 @@ class FileStoreDocumentBatchStorage(DocumentBatchStorage):
             logger.error(f"Failed to retrieve batch {batch_num}: {e}")
             raise
 
+    def stream_batch(self, batch_num: int) -> Iterator[Document] | None:
+        """Retrieve a batch of documents from FileStore one at a time. The file is
+        spooled to a temporary file instead of being held in memory."""
+        file_name = self._get_batch_file_name(batch_num)
+        # Check if file exists
+        if not self._batch_exists(file_name):
+            logger.warning(
+                f"Batch {batch_num} not found in FileStore with name {file_name}"
+            )
+            return None
+
+        def _stream() -> Iterator[Document]:
+            content_io = self.file_store.read_file(file_name, use_tempfile=True)
+            try:
+                yield from self._iter_deserialize_documents(content_io)
+            finally:
+                content_io.close()
+
+        return _stream()
+
     def delete_batch_by_name(self, batch_file_name: str) -> None:
         """Delete a specific batch from FileStore."""
         self.file_store.delete_file(batch_file_name)
@@ -21,6 +21,7 @@ from onyx.indexing.indexing_heartbeat import IndexingHeartbeatInterface
 from onyx.indexing.models import DocAwareChunk
 from onyx.llm.utils import MAX_CONTEXT_TOKENS
 from onyx.natural_language_processing.utils import BaseTokenizer
+from onyx.natural_language_processing.utils import TokenCountCache
 from onyx.utils.logger import setup_logger
 from onyx.utils.text_processing import clean_text
 from onyx.utils.text_processing import shared_precompare_cleanup
@@ -157,9 +158,11 @@ class Chunker:
         self.max_context = 0
         self.prompt_tokens = 0
 
-        # Create a token counter function that returns the count instead of the tokens
-        def token_counter(text: str) -> int:
-            return len(tokenizer.encode(text))
+        # Memoized token counter shared by the splitters, the same sentences are counted
+        # again for the blurb and the mini-chunks after the chunk is formed
+        self.token_counter = TokenCountCache(tokenizer)
+        token_counter = self.token_counter
+        self.section_separator_tokens = token_counter(SECTION_SEPARATOR)
 
         self.blurb_splitter = SentenceChunker(
             tokenizer_or_token_counter=token_counter,
@@ -186,12 +189,13 @@ class Chunker:
             else None
         )
 
-    def _split_oversized_chunk(self, text: str, content_token_limit: int) -> list[str]:
+    def _split_oversized_chunk(
+        self, tokens: list[str], content_token_limit: int
+    ) -> list[str]:
         """
-        Splits the text into smaller chunks based on token count to ensure
-        no chunk exceeds the content_token_limit.
+        Splits the (already tokenized) text into smaller chunks based on token count
+        to ensure no chunk exceeds the content_token_limit.
         """
-        tokens = self.tokenizer.tokenize(text)
         chunks = []
         start = 0
         total_tokens = len(tokens)
@@ -273,6 +277,9 @@ class Chunker:
         chunks: list[DocAwareChunk] = []
         link_offsets: dict[int, str] = {}
         chunk_text = ""
+        # token count of chunk_text, tracked incrementally so that the growing chunk
+        # is not re-tokenized every time a section is appended
+        current_token_count = 0
 
         for section_idx, section in enumerate(sections):
             # Get section text and other attributes
@@ -303,6 +310,7 @@ class Chunker:
                         metadata_suffix_keyword=metadata_suffix_keyword,
                     )
                     chunk_text = ""
+                    current_token_count = 0
                     link_offsets = {}
 
                 # Create a chunk specifically for this image section
@@ -321,7 +329,7 @@ class Chunker:
                 continue
 
             # CASE 2: Normal text section
-            section_token_count = len(self.tokenizer.encode(section_text))
+            section_token_count = self.token_counter(section_text)
 
             # If the section is large on its own, split it separately
             if section_token_count > content_token_limit:
@@ -337,18 +345,22 @@ class Chunker:
                         metadata_suffix_keyword,
                     )
                     chunk_text = ""
+                    current_token_count = 0
                     link_offsets = {}
 
                 # chunker is in `text` mode
                 split_texts = cast(list[str], self.chunk_splitter.chunk(section_text))
                 for i, split_text in enumerate(split_texts):
+                    # tokenize once, the tokens are reused for the split below
+                    split_tokens = (
+                        self.tokenizer.tokenize(split_text)
+                        if STRICT_CHUNK_TOKEN_LIMIT
+                        else []
+                    )
                     # If even the split_text is bigger than strict limit, further split
-                    if (
-                        STRICT_CHUNK_TOKEN_LIMIT
-                        and len(self.tokenizer.encode(split_text)) > content_token_limit
-                    ):
+                    if len(split_tokens) > content_token_limit:
                         smaller_chunks = self._split_oversized_chunk(
-                            split_text, content_token_limit
+                            split_tokens, content_token_limit
                         )
                         for j, small_chunk in enumerate(smaller_chunks):
                             self._create_chunk(
@@ -375,16 +387,15 @@ class Chunker:
                 continue
 
             # If we can still fit this section into the current chunk, do so
-            current_token_count = len(self.tokenizer.encode(chunk_text))
             current_offset = len(shared_precompare_cleanup(chunk_text))
-            next_section_tokens = (
-                len(self.tokenizer.encode(SECTION_SEPARATOR)) + section_token_count
-            )
+            next_section_tokens = self.section_separator_tokens + section_token_count
 
             if next_section_tokens + current_token_count <= content_token_limit:
                 if chunk_text:
                     chunk_text += SECTION_SEPARATOR
+                    current_token_count += self.section_separator_tokens
                 chunk_text += section_text
+                current_token_count += section_token_count
                 link_offsets[current_offset] = section_link_text
             else:
                 # finalize the existing chunk
@@ -401,6 +412,7 @@ class Chunker:
                 # start a new chunk
                 link_offsets = {0: section_link_text}
                 chunk_text = section_text
+                current_token_count = section_token_count
 
         # finalize any leftover text chunk
         if chunk_text.strip() or not chunks:
@@ -426,7 +438,7 @@ class Chunker:
         # Title prep
         title = self._extract_blurb(document.get_title_for_document_index() or "")
         title_prefix = title + RETURN_SEPARATOR if title else ""
-        title_tokens = len(self.tokenizer.encode(title_prefix))
+        title_tokens = self.token_counter(title_prefix)
 
         # Metadata prep
         metadata_suffix_semantic = ""
@@ -439,7 +451,7 @@ class Chunker:
             ) = _get_metadata_suffix_for_document_index(
                 document.metadata, include_separator=True
             )
-            metadata_tokens = len(self.tokenizer.encode(metadata_suffix_semantic))
+            metadata_tokens = self.token_counter(metadata_suffix_semantic)
 
         # If metadata is too large, skip it in the semantic content
         if metadata_tokens >= self.chunk_token_limit * MAX_METADATA_PERCENTAGE:
@@ -518,6 +530,18 @@ class Chunker:
 
         Works with both standard Document objects and IndexingDocument objects with processed_sections.
         """
+        # count the tokens of all text sections in one batch up front, sections are
+        # then looked up from the cache instead of being tokenized one at a time
+        self.token_counter.count_batch(
+            [
+                section_text
+                for document in documents
+                for section in document.processed_sections
+                if not section.image_file_id
+                and (section_text := clean_text(str(section.text or "")))
+            ]
+        )
+
         final_chunks: list[DocAwareChunk] = []
         for document in documents:
             if self.callback and self.callback.should_stop():
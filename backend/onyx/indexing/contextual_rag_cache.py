@@ -0,0 +1,102 @@
+import hashlib
+from typing import cast
+
+from onyx.configs.app_configs import CONTEXTUAL_RAG_CACHE_TTL_SECONDS
+from onyx.configs.app_configs import DISABLE_CONTEXTUAL_RAG_CACHE
+from onyx.configs.app_configs import MAX_TOKENS_FOR_FULL_INCLUSION
+from onyx.llm.interfaces import LLM
+from onyx.llm.utils import MAX_CONTEXT_TOKENS
+from onyx.prompts.contextual_retrieval import CONTEXTUAL_RAG_PROMPT1
+from onyx.prompts.contextual_retrieval import CONTEXTUAL_RAG_PROMPT2
+from onyx.prompts.contextual_retrieval import DOCUMENT_SUMMARY_PROMPT
+from onyx.redis.redis_pool import get_redis_client
+from onyx.utils.logger import setup_logger
+
+logger = setup_logger()
+
+CONTEXTUAL_RAG_REDIS_PREFIX = "contextual_rag"
+
+
+def get_text_content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def document_summary_cache_key(doc_content_hash: str, trunc_doc_tokens: int) -> str:
+    """The token budget decides how much of a long document the LLM gets to see, so
+    it is part of the key."""
+    return f"doc:{trunc_doc_tokens}:{doc_content_hash}"
+
+
+def chunk_context_cache_key(
+    doc_content_hash: str, trunc_doc_tokens: int, chunk_content: str
+) -> str:
+    return (
+        f"chunk:{trunc_doc_tokens}:{doc_content_hash}:"
+        f"{get_text_content_hash(chunk_content)}"
+    )
+
+
+def _contextual_rag_fingerprint(llm: LLM) -> str:
+    """Summaries depend on the model, the prompts and the limits used to build them,
+    changing any of them starts a new cache."""
+    return hashlib.sha256(
+        "\n".join(
+            [
+                llm.config.model_provider,
+                llm.config.model_name,
+                DOCUMENT_SUMMARY_PROMPT,
+                CONTEXTUAL_RAG_PROMPT1,
+                CONTEXTUAL_RAG_PROMPT2,
+                str(MAX_CONTEXT_TOKENS),
+                str(MAX_TOKENS_FOR_FULL_INCLUSION),
+            ]
+        ).encode()
+    ).hexdigest()[:16]
+
+
+def _redis_key(fingerprint: str, cache_key: str) -> str:
+    return f"{CONTEXTUAL_RAG_REDIS_PREFIX}:{fingerprint}:{cache_key}"
+
+
+def get_cached_contextual_summaries(llm: LLM, cache_keys: list[str]) -> dict[str, str]:
+    """Returns the cached document summaries and chunk contexts for the given cache
+    keys. Redis is strictly best effort, any failure there is treated as a miss."""
+    if DISABLE_CONTEXTUAL_RAG_CACHE or not cache_keys:
+        return {}
+
+    fingerprint = _contextual_rag_fingerprint(llm)
+    try:
+        raw_summaries = cast(
+            list[bytes | None],
+            get_redis_client().mget(
+                [_redis_key(fingerprint, cache_key) for cache_key in cache_keys]
+            ),
+        )
+    except Exception:
+        logger.exception("Failed to read contextual RAG summaries from Redis")
+        return {}
+
+    return {
+        cache_key: raw_summary.decode("utf-8")
+        for cache_key, raw_summary in zip(cache_keys, raw_summaries)
+        if raw_summary is not None
+    }
+
+
+def cache_contextual_summaries(llm: LLM, summaries: dict[str, str]) -> None:
+    """Stores document summaries and chunk contexts by cache key."""
+    if DISABLE_CONTEXTUAL_RAG_CACHE or not summaries:
+        return
+
+    fingerprint = _contextual_rag_fingerprint(llm)
+    try:
+        pipe = get_redis_client().pipeline(transaction=False)
+        for cache_key, summary in summaries.items():
+            pipe.set(
+                _redis_key(fingerprint, cache_key),
+                summary,
+                ex=CONTEXTUAL_RAG_CACHE_TTL_SECONDS,
+            )
+        pipe.execute()
+    except Exception:
+        logger.exception("Failed to write contextual RAG summaries to Redis")
@@ -7,6 +7,9 @@ from onyx.connectors.models import ConnectorFailure
 from onyx.connectors.models import ConnectorStopSignal
 from onyx.connectors.models import DocumentFailure
 from onyx.db.models import SearchSettings
+from onyx.indexing.embedding_cache import EmbeddingCacheStore
+from onyx.indexing.embedding_cache import encode_with_cache
+from onyx.indexing.embedding_cache import get_default_embedding_cache_store
 from onyx.indexing.indexing_heartbeat import IndexingHeartbeatInterface
 from onyx.indexing.models import ChunkEmbedding
 from onyx.indexing.models import DocAwareChunk
@@ -94,6 +97,7 @@ class DefaultIndexingEmbedder(IndexingEmbedder):
         deployment_name: str | None = None,
         reduced_dimension: int | None = None,
         callback: IndexingHeartbeatInterface | None = None,
+        embedding_cache_store: EmbeddingCacheStore | None = None,
     ):
         super().__init__(
             model_name,
@@ -108,6 +112,8 @@ class DefaultIndexingEmbedder(IndexingEmbedder):
             reduced_dimension,
             callback,
         )
+        # if set, only texts that are not already in the cache are sent to the model
+        self.embedding_cache_store = embedding_cache_store
 
     @log_function_time()
     def embed_chunks(
@@ -144,13 +150,24 @@ class DefaultIndexingEmbedder(IndexingEmbedder):
                     raise RuntimeError("Large chunk contains mini chunks")
                 flat_chunk_texts.extend(chunk.mini_chunk_texts)
 
-        embeddings = self.embedding_model.encode(
-            texts=flat_chunk_texts,
-            text_type=EmbedTextType.PASSAGE,
-            large_chunks_present=large_chunks_present,
-            tenant_id=tenant_id,
-            request_id=request_id,
-        )
+        if self.embedding_cache_store:
+            embeddings = encode_with_cache(
+                embedding_model=self.embedding_model,
+                cache_store=self.embedding_cache_store,
+                texts=flat_chunk_texts,
+                text_type=EmbedTextType.PASSAGE,
+                large_chunks_present=large_chunks_present,
+                tenant_id=tenant_id,
+                request_id=request_id,
+            )
+        else:
+            embeddings = self.embedding_model.encode(
+                texts=flat_chunk_texts,
+                text_type=EmbedTextType.PASSAGE,
+                large_chunks_present=large_chunks_present,
+                tenant_id=tenant_id,
+                request_id=request_id,
+            )
 
         chunk_titles = {
             chunk.source_document.get_title_for_document_index() for chunk in chunks
@@ -164,12 +181,22 @@ class DefaultIndexingEmbedder(IndexingEmbedder):
         # Cache the Title embeddings to only have to do it once
         title_embed_dict: dict[str, Embedding] = {}
         if chunk_titles_list:
-            title_embeddings = self.embedding_model.encode(
-                chunk_titles_list,
-                text_type=EmbedTextType.PASSAGE,
-                tenant_id=tenant_id,
-                request_id=request_id,
-            )
+            if self.embedding_cache_store:
+                title_embeddings = encode_with_cache(
+                    embedding_model=self.embedding_model,
+                    cache_store=self.embedding_cache_store,
+                    texts=chunk_titles_list,
+                    text_type=EmbedTextType.PASSAGE,
+                    tenant_id=tenant_id,
+                    request_id=request_id,
+                )
+            else:
+                title_embeddings = self.embedding_model.encode(
+                    chunk_titles_list,
+                    text_type=EmbedTextType.PASSAGE,
+                    tenant_id=tenant_id,
+                    request_id=request_id,
+                )
             title_embed_dict.update(
                 {
                     title: vector
@@ -238,6 +265,7 @@ class DefaultIndexingEmbedder(IndexingEmbedder):
             deployment_name=search_settings.deployment_name,
             reduced_dimension=search_settings.reduced_dimension,
             callback=callback,
+            embedding_cache_store=get_default_embedding_cache_store(),
         )
 
 
@@ -0,0 +1,297 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from abc import ABC
+from abc import abstractmethod
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+
+from onyx.configs.app_configs import EMBEDDING_CACHE_MAX_ENTRIES
+from onyx.configs.app_configs import EMBEDDING_CACHE_SQLITE_PATH
+from onyx.configs.app_configs import EMBEDDING_CACHE_TYPE
+from onyx.db.embedding_cache import evict_embedding_cache_entries
+from onyx.db.embedding_cache import fetch_embedding_cache_entries
+from onyx.db.embedding_cache import upsert_embedding_cache_entries
+from onyx.db.engine.sql_engine import get_session_with_tenant
+from onyx.natural_language_processing.search_nlp_models import EmbeddingModel
+from onyx.utils.logger import setup_logger
+from shared_configs.contextvars import get_current_tenant_id
+from shared_configs.enums import EmbedTextType
+from shared_configs.model_server_models import Embedding
+
+logger = setup_logger()
+
+# Only run the (relatively expensive) size check after this many seconds have passed
+_EVICTION_INTERVAL_SECONDS = 60
+
+
+def _serialize_embedding(embedding: Embedding) -> bytes:
+    return np.asarray(embedding, dtype="<f4").tobytes()
+
+
+def _deserialize_embedding(raw: bytes) -> Embedding:
+    return np.frombuffer(raw, dtype="<f4").tolist()
+
+
+def build_embedding_cache_key(
+    embedding_model: EmbeddingModel,
+    text: str,
+    text_type: EmbedTextType,
+    large_chunks_present: bool,
+) -> str:
+    """The key covers everything that influences the resulting vector: the model,
+    its settings, the prefix applied by the model server and the exact text.
+    Large chunks are trimmed to a different length before embedding, so they get
+    their own namespace."""
+    prefix = (
+        embedding_model.passage_prefix
+        if text_type == EmbedTextType.PASSAGE
+        else embedding_model.query_prefix
+    )
+    hasher = hashlib.sha256()
+    for part in (
+        embedding_model.provider_type.value if embedding_model.provider_type else "",
+        embedding_model.model_name or "",
+        embedding_model.deployment_name or "",
+        str(embedding_model.normalize),
+        str(embedding_model.reduced_dimension),
+        text_type.value,
+        prefix or "",
+        str(large_chunks_present),
+    ):
+        hasher.update(part.encode("utf-8"))
+        hasher.update(b"\x00")
+    hasher.update(text.encode("utf-8"))
+    return hasher.hexdigest()
+
+
+class EmbeddingCacheStore(ABC):
+    """Storage backend for the content-addressed embedding cache."""
+
+    @abstractmethod
+    def get_many(
+        self, cache_keys: list[str], tenant_id: str | None = None
+    ) -> dict[str, Embedding]:
+        """Returns the embeddings for the keys that are present in the store."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def put_many(
+        self, embeddings: dict[str, Embedding], tenant_id: str | None = None
+    ) -> None:
+        raise NotImplementedError
+
+
+class SQLiteEmbeddingCacheStore(EmbeddingCacheStore):
+    """Local disk cache, shared by all tenants of the process. Embeddings are a pure
+    function of the text so sharing them does not leak any data across tenants."""
+
+    def __init__(self, db_path: str, max_entries: int) -> None:
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embedding_cache (
+                cache_key TEXT PRIMARY KEY,
+                embedding BLOB NOT NULL,
+                last_accessed REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_embedding_cache_last_accessed "
+            "ON embedding_cache(last_accessed)"
+        )
+        self._conn.commit()
+
+    def get_many(
+        self, cache_keys: list[str], tenant_id: str | None = None
+    ) -> dict[str, Embedding]:
+        if not cache_keys:
+            return {}
+
+        found: dict[str, Embedding] = {}
+        now = time.time()
+        with self._lock:
+            # stay well below SQLITE_MAX_VARIABLE_NUMBER
+            for start in range(0, len(cache_keys), 500):
+                key_batch = cache_keys[start : start + 500]
+                placeholders = ",".join("?" for _ in key_batch)
+                rows = self._conn.execute(
+                    f"SELECT cache_key, embedding FROM embedding_cache "
+                    f"WHERE cache_key IN ({placeholders})",
+                    key_batch,
+                ).fetchall()
+                for cache_key, raw in rows:
+                    found[cache_key] = _deserialize_embedding(raw)
+
+            if found:
+                self._conn.executemany(
+                    "UPDATE embedding_cache SET last_accessed = ? WHERE cache_key = ?",
+                    [(now, cache_key) for cache_key in found],
+                )
+                self._conn.commit()
+
+        return found
+
+    def put_many(
+        self, embeddings: dict[str, Embedding], tenant_id: str | None = None
+    ) -> None:
+        if not embeddings:
+            return
+
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embedding_cache "
+                "(cache_key, embedding, last_accessed) VALUES (?, ?, ?)",
+                [
+                    (cache_key, _serialize_embedding(embedding), now)
+                    for cache_key, embedding in embeddings.items()
+                ],
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        (total,) = self._conn.execute("SELECT COUNT(*) FROM embedding_cache").fetchone()
+        if total <= self.max_entries:
+            return
+
+        self._conn.execute(
+            """
+            DELETE FROM embedding_cache WHERE cache_key IN (
+                SELECT cache_key FROM embedding_cache
+                ORDER BY last_accessed ASC LIMIT ?
+            )
+            """,
+            (total - self.max_entries,),
+        )
+
+
+class PostgresEmbeddingCacheStore(EmbeddingCacheStore):
+    """Cache stored in the tenant's `embedding_cache` table so it is shared by all
+    docprocessing workers of the deployment."""
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._last_eviction_check: dict[str, float] = {}
+
+    def get_many(
+        self, cache_keys: list[str], tenant_id: str | None = None
+    ) -> dict[str, Embedding]:
+        with get_session_with_tenant(
+            tenant_id=tenant_id or get_current_tenant_id()
+        ) as db_session:
+            raw_entries = fetch_embedding_cache_entries(db_session, cache_keys)
+
+        return {
+            cache_key: _deserialize_embedding(raw)
+            for cache_key, raw in raw_entries.items()
+        }
+
+    def put_many(
+        self, embeddings: dict[str, Embedding], tenant_id: str | None = None
+    ) -> None:
+        tenant_id = tenant_id or get_current_tenant_id()
+        with get_session_with_tenant(tenant_id=tenant_id) as db_session:
+            upsert_embedding_cache_entries(
+                db_session,
+                {
+                    cache_key: _serialize_embedding(embedding)
+                    for cache_key, embedding in embeddings.items()
+                },
+            )
+
+            now = time.monotonic()
+            last_check = self._last_eviction_check.get(tenant_id)
+            if last_check is None or now - last_check > _EVICTION_INTERVAL_SECONDS:
+                self._last_eviction_check[tenant_id] = now
+                num_evicted = evict_embedding_cache_entries(
+                    db_session, self.max_entries
+                )
+                if num_evicted:
+                    logger.info(f"Evicted {num_evicted} entries from embedding cache")
+
+
+@lru_cache(maxsize=1)
+def get_default_embedding_cache_store() -> EmbeddingCacheStore | None:
+    """Builds the store configured via EMBEDDING_CACHE_TYPE, None if disabled."""
+    if EMBEDDING_CACHE_TYPE == "sqlite":
+        return SQLiteEmbeddingCacheStore(
+            db_path=EMBEDDING_CACHE_SQLITE_PATH,
+            max_entries=EMBEDDING_CACHE_MAX_ENTRIES,
+        )
+    if EMBEDDING_CACHE_TYPE == "postgres":
+        return PostgresEmbeddingCacheStore(max_entries=EMBEDDING_CACHE_MAX_ENTRIES)
+    if EMBEDDING_CACHE_TYPE:
+        logger.warning(
+            f"Unknown EMBEDDING_CACHE_TYPE '{EMBEDDING_CACHE_TYPE}', embedding cache disabled"
+        )
+    return None
+
+
+def encode_with_cache(
+    embedding_model: EmbeddingModel,
+    cache_store: EmbeddingCacheStore,
+    texts: list[str],
+    text_type: EmbedTextType,
+    large_chunks_present: bool = False,
+    tenant_id: str | None = None,
+    request_id: str | None = None,
+) -> list[Embedding]:
+    """Drop-in replacement for `EmbeddingModel.encode` that only sends cache misses
+    (deduplicated) to the model server / API provider."""
+    if not texts or not all(texts):
+        raise ValueError(f"Empty or missing text for embedding: {texts}")
+
+    cache_keys = [
+        build_embedding_cache_key(
+            embedding_model=embedding_model,
+            text=text,
+            text_type=text_type,
+            large_chunks_present=large_chunks_present,
+        )
+        for text in texts
+    ]
+
+    try:
+        cached = cache_store.get_many(list(set(cache_keys)), tenant_id=tenant_id)
+    except Exception:
+        logger.exception("Failed to read from embedding cache, embedding all texts")
+        cached = {}
+
+    missing_texts: dict[str, str] = {}
+    for cache_key, text in zip(cache_keys, texts):
+        if cache_key not in cached and cache_key not in missing_texts:
+            missing_texts[cache_key] = text
+
+    logger.debug(
+        f"Embedding cache: {len(texts) - len(missing_texts)}/{len(texts)} hits"
+    )
+
+    if missing_texts:
+        new_embeddings = embedding_model.encode(
+            texts=list(missing_texts.values()),
+            text_type=text_type,
+            large_chunks_present=large_chunks_present,
+            tenant_id=tenant_id,
+            request_id=request_id,
+        )
+        embedded = dict(zip(missing_texts.keys(), new_embeddings))
+        try:
+            cache_store.put_many(embedded, tenant_id=tenant_id)
+        except Exception:
+            logger.exception("Failed to write to embedding cache")
+        cached.update(embedded)
+
+    return [cached[cache_key] for cache_key in cache_keys]
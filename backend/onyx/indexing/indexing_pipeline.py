@@ -1,3 +1,5 @@
+import threading
+import time
 from collections import defaultdict
 from collections.abc import Callable
 from typing import Protocol
@@ -6,11 +8,16 @@ from pydantic import BaseModel
 from pydantic import ConfigDict
 from sqlalchemy.orm import Session
 
+from onyx.configs.app_configs import CONTEXTUAL_RAG_MAX_CONCURRENCY
 from onyx.configs.app_configs import DEFAULT_CONTEXTUAL_RAG_LLM_NAME
 from onyx.configs.app_configs import DEFAULT_CONTEXTUAL_RAG_LLM_PROVIDER
 from onyx.configs.app_configs import ENABLE_CONTEXTUAL_RAG
+from onyx.configs.app_configs import ENABLE_PIPELINED_INDEXING
+from onyx.configs.app_configs import IMAGE_SUMMARIZATION_MAX_WORKERS
 from onyx.configs.app_configs import MAX_DOCUMENT_CHARS
 from onyx.configs.app_configs import MAX_TOKENS_FOR_FULL_INCLUSION
+from onyx.configs.app_configs import PIPELINED_INDEXING_QUEUE_SIZE
+from onyx.configs.app_configs import PIPELINED_INDEXING_SUB_BATCH_SIZE
 from onyx.configs.app_configs import USE_CHUNK_SUMMARY
 from onyx.configs.app_configs import USE_DOCUMENT_SUMMARY
 from onyx.configs.llm_configs import get_image_extraction_and_analysis_enabled
@@ -38,17 +45,30 @@ from onyx.document_index.document_index_utils import (
     get_multipass_config,
 )
 from onyx.document_index.interfaces import DocumentIndex
+from onyx.document_index.interfaces import DocumentInsertionRecord
 from onyx.document_index.interfaces import DocumentMetadata
 from onyx.document_index.interfaces import IndexBatchParams
 from onyx.file_processing.image_summarization import summarize_image_with_error_handling
+from onyx.file_processing.image_summary_cache import cache_image_summaries
+from onyx.file_processing.image_summary_cache import get_cached_image_summaries
+from onyx.file_processing.image_summary_cache import get_image_content_hash
 from onyx.file_store.file_store import get_default_file_store
 from onyx.indexing.chunker import Chunker
+from onyx.indexing.contextual_rag_cache import cache_contextual_summaries
+from onyx.indexing.contextual_rag_cache import chunk_context_cache_key
+from onyx.indexing.contextual_rag_cache import document_summary_cache_key
+from onyx.indexing.contextual_rag_cache import get_cached_contextual_summaries
+from onyx.indexing.contextual_rag_cache import get_text_content_hash
 from onyx.indexing.embedder import embed_chunks_with_failure_handling
 from onyx.indexing.embedder import IndexingEmbedder
+from onyx.indexing.models import BuildMetadataAwareChunksResult
 from onyx.indexing.models import DocAwareChunk
 from onyx.indexing.models import IndexChunk
 from onyx.indexing.models import IndexingBatchAdapter
 from onyx.indexing.models import UpdatableChunkData
+from onyx.indexing.staged_pipeline import PipelineStage
+from onyx.indexing.staged_pipeline import run_staged_pipeline
+from onyx.indexing.staged_pipeline import StageMetrics
 from onyx.indexing.vector_db_insertion import write_chunks_to_vector_db_with_backoff
 from onyx.llm.chat_llm import LLMRateLimitError
 from onyx.llm.factory import get_default_llm_with_vision
@@ -95,6 +115,9 @@ class IndexingPipelineResult(BaseModel):
 
     failures: list[ConnectorFailure]
 
+    # per-stage throughput, only populated when the batch was indexed in pipelined mode
+    stage_metrics: list[StageMetrics] = []
+
 
 class IndexingPipelineProtocol(Protocol):
     def __call__(
@@ -453,55 +476,29 @@ def process_image_sections(documents: list[Document]) -> list[IndexingDocument]:
             for document in documents
         ]
 
+    image_sections = [
+        section
+        for document in documents
+        for section in document.sections
+        if isinstance(section, ImageSection)
+    ]
+    image_texts = iter(_summarize_image_sections(llm, image_sections))
+
     indexed_documents: list[IndexingDocument] = []
 
     for document in documents:
         processed_sections: list[Section] = []
 
         for section in document.sections:
-            # For ImageSection, process and create base Section with both text and image_file_id
+            # For ImageSection, create base Section with both the summary and image_file_id
             if isinstance(section, ImageSection):
-                # Default section with image path preserved - ensure text is always a string
-                processed_section = Section(
-                    link=section.link,
-                    image_file_id=section.image_file_id,
-                    text="",  # Initialize with empty string
-                )
-
-                # Try to get image summary
-                try:
-                    file_store = get_default_file_store()
-
-                    file_record = file_store.read_file_record(
-                        file_id=section.image_file_id
+                processed_sections.append(
+                    Section(
+                        link=section.link,
+                        image_file_id=section.image_file_id,
+                        text=next(image_texts),
                     )
-                    if not file_record:
-                        logger.warning(
-                            f"Image file {section.image_file_id} not found in FileStore"
-                        )
-
-                        processed_section.text = "[Image could not be processed]"
-                    else:
-                        # Get the image data
-                        image_data_io = file_store.read_file(
-                            file_id=section.image_file_id
-                        )
-                        image_data = image_data_io.read()
-                        summary = summarize_image_with_error_handling(
-                            llm=llm,
-                            image_data=image_data,
-                            context_name=file_record.display_name or "Image",
-                        )
-
-                        if summary:
-                            processed_section.text = summary
-                        else:
-                            processed_section.text = "[Image could not be summarized]"
-                except Exception as e:
-                    logger.error(f"Error processing image section: {e}")
-                    processed_section.text = "[Error processing image]"
-
-                processed_sections.append(processed_section)
+                )
 
             # For TextSection, create a base Section with text and link
             elif isinstance(section, TextSection):
@@ -521,98 +518,282 @@ def process_image_sections(documents: list[Document]) -> list[IndexingDocument]:
     return indexed_documents
 
 
+def _hash_image_file(image_file_id: str) -> tuple[str, str] | str:
+    """Returns the content hash and display name of an image, or the text to index in
+    place of a summary if the image can't be read. The image itself is not kept."""
+    try:
+        file_store = get_default_file_store()
+        file_record = file_store.read_file_record(file_id=image_file_id)
+        if not file_record:
+            logger.warning(f"Image file {image_file_id} not found in FileStore")
+            return "[Image could not be processed]"
+
+        image_data = file_store.read_file(file_id=image_file_id).read()
+        return get_image_content_hash(image_data), file_record.display_name or "Image"
+    except Exception as e:
+        logger.error(f"Error processing image section: {e}")
+        return "[Error processing image]"
+
+
+def _summarize_image_file(
+    llm: LLM, image_file_id: str, context_name: str
+) -> str | None:
+    image_data = get_default_file_store().read_file(file_id=image_file_id).read()
+    return summarize_image_with_error_handling(
+        llm=llm,
+        image_data=image_data,
+        context_name=context_name,
+    )
+
+
+def _summarize_image_sections(
+    llm: LLM, image_sections: list[ImageSection]
+) -> list[str]:
+    """
+    Returns the text to index for each image section. Images are identified by a hash
+    of their content, so an image that appears many times (e.g. a logo on every page)
+    is summarized once per batch, and summaries are cached across batches. Reading and
+    summarizing runs with at most IMAGE_SUMMARIZATION_MAX_WORKERS images in flight.
+    """
+    if not image_sections:
+        return []
+
+    image_infos: list[tuple[str, str] | str] = run_functions_tuples_in_parallel(
+        [(_hash_image_file, (section.image_file_id,)) for section in image_sections],
+        max_workers=IMAGE_SUMMARIZATION_MAX_WORKERS,
+    )
+
+    # the first section of each distinct image is the one that gets summarized
+    content_hash_to_image: dict[str, tuple[str, str]] = {}
+    for section, image_info in zip(image_sections, image_infos):
+        if isinstance(image_info, tuple):
+            content_hash, context_name = image_info
+            content_hash_to_image.setdefault(
+                content_hash, (section.image_file_id, context_name)
+            )
+
+    summaries = get_cached_image_summaries(llm, list(content_hash_to_image.keys()))
+    missing_content_hashes = [
+        content_hash
+        for content_hash in content_hash_to_image
+        if content_hash not in summaries
+    ]
+    if missing_content_hashes:
+        logger.info(
+            f"Summarizing {len(missing_content_hashes)} distinct images "
+            f"({len(image_sections)} image sections, "
+            f"{len(content_hash_to_image) - len(missing_content_hashes)} cached)"
+        )
+        # failures are logged and come back as None
+        new_summaries = run_functions_tuples_in_parallel(
+            [
+                (_summarize_image_file, (llm, *content_hash_to_image[content_hash]))
+                for content_hash in missing_content_hashes
+            ],
+            allow_failures=True,
+            max_workers=IMAGE_SUMMARIZATION_MAX_WORKERS,
+        )
+        summarized = {
+            content_hash: summary
+            for content_hash, summary in zip(missing_content_hashes, new_summaries)
+            if summary
+        }
+        cache_image_summaries(llm, summarized)
+        summaries.update(summarized)
+
+    return [
+        (
+            summaries.get(image_info[0]) or "[Image could not be summarized]"
+            if isinstance(image_info, tuple)
+            else image_info
+        )
+        for image_info in image_infos
+    ]
+
+
+# Bounds the contextual RAG LLM calls in flight across all documents and indexing
+# batches of the process
+_contextual_rag_llm_slots = threading.BoundedSemaphore(CONTEXTUAL_RAG_MAX_CONCURRENCY)
+
+
+def _invoke_contextual_rag_llm(llm: LLM, prompt: str) -> str:
+    with _contextual_rag_llm_slots:
+        return message_to_string(
+            llm.invoke_langchain(prompt, max_tokens=MAX_CONTEXT_TOKENS)
+        )
+
+
+class _ContextualRagDocument:
+    """The chunks of a single document along with its text. The document is only
+    tokenized once, and only if something has to be computed for it."""
+
+    def __init__(self, chunks: list[DocAwareChunk], tokenizer: BaseTokenizer) -> None:
+        self.chunks = chunks
+        self.text = chunks[0].source_document.get_text_content()
+        self.content_hash = get_text_content_hash(self.text)
+        self._tokenizer = tokenizer
+        self._tokens: list[int] | None = None
+        self._tokens_lock = threading.Lock()
+
+    @property
+    def tokens(self) -> list[int]:
+        with self._tokens_lock:
+            if self._tokens is None:
+                self._tokens = self._tokenizer.encode(self.text)
+            return self._tokens
+
+    def trimmed_content(self, trunc_doc_tokens: int) -> str:
+        return tokenizer_trim_middle(self.tokens, trunc_doc_tokens, self._tokenizer)
+
+
+def _summarize_document(
+    doc: _ContextualRagDocument,
+    llm: LLM,
+    trunc_doc_tokens: int,
+    summaries: dict[str, str],
+) -> str:
+    cache_key = document_summary_cache_key(doc.content_hash, trunc_doc_tokens)
+    doc_summary = summaries.get(cache_key)
+    if doc_summary is None:
+        doc_summary = _invoke_contextual_rag_llm(
+            llm,
+            DOCUMENT_SUMMARY_PROMPT.format(
+                document=doc.trimmed_content(trunc_doc_tokens)
+            ),
+        )
+        summaries[cache_key] = doc_summary
+    return doc_summary
+
+
 def add_document_summaries(
-    chunks_by_doc: list[DocAwareChunk],
+    doc: _ContextualRagDocument,
     llm: LLM,
-    tokenizer: BaseTokenizer,
     trunc_doc_tokens: int,
-) -> list[int] | None:
+    summaries: dict[str, str],
+) -> None:
     """
-    Adds a document summary to a list of chunks from the same document.
-    Returns the number of tokens in the document.
+    Adds a document summary to the chunks of a document. `summaries` holds the
+    summaries read from the cache, newly computed ones are added to it.
     """
+    doc_summary = _summarize_document(doc, llm, trunc_doc_tokens, summaries)
+    for chunk in doc.chunks:
+        chunk.doc_summary = doc_summary
 
-    doc_tokens = []
-    # this is value is the same for each chunk in the document; 0 indicates
-    # There is not enough space for contextual RAG (the chunk content
-    # and possibly metadata took up too much space)
-    if chunks_by_doc[0].contextual_rag_reserved_tokens == 0:
-        return None
 
-    doc_tokens = tokenizer.encode(chunks_by_doc[0].source_document.get_text_content())
-    doc_content = tokenizer_trim_middle(doc_tokens, trunc_doc_tokens, tokenizer)
-    summary_prompt = DOCUMENT_SUMMARY_PROMPT.format(document=doc_content)
-    doc_summary = message_to_string(
-        llm.invoke_langchain(summary_prompt, max_tokens=MAX_CONTEXT_TOKENS)
-    )
+def _build_chunk_context_prefix(
+    doc: _ContextualRagDocument,
+    llm: LLM,
+    trunc_doc_chunk_tokens: int,
+    summaries: dict[str, str],
+) -> str:
+    """The document part of the chunk context prompt. It is the same for every chunk
+    of the document and comes first, so providers with prompt caching can reuse it."""
+    if len(doc.tokens) <= MAX_TOKENS_FOR_FULL_INCLUSION:
+        doc_info = doc.trimmed_content(trunc_doc_chunk_tokens)
+    else:
+        doc_info = doc.chunks[0].doc_summary
+    if not doc_info:
+        # This happens if the document is too long AND document summaries are turned off
+        # In this case we compute a doc summary using the LLM
+        doc_info = _summarize_document(doc, llm, trunc_doc_chunk_tokens, summaries)
+
+    return CONTEXTUAL_RAG_PROMPT1.format(document=doc_info)
 
-    for chunk in chunks_by_doc:
-        chunk.doc_summary = doc_summary
 
-    return doc_tokens
+def _add_chunk_context(
+    chunk: DocAwareChunk,
+    llm: LLM,
+    context_prompt1: str,
+    cache_key: str,
+    summaries: dict[str, str],
+) -> None:
+    context_prompt2 = CONTEXTUAL_RAG_PROMPT2.format(chunk=chunk.content)
+    try:
+        chunk.chunk_context = _invoke_contextual_rag_llm(
+            llm, context_prompt1 + context_prompt2
+        )
+        summaries[cache_key] = chunk.chunk_context
+    except LLMRateLimitError as e:
+        # Erroring during chunker is undesirable, so we log the error and continue
+        # TODO: for v2, add robust retry logic
+        logger.exception(f"Rate limit adding chunk summary: {e}", exc_info=e)
+        chunk.chunk_context = ""
+    except Exception as e:
+        logger.exception(f"Error adding chunk summary: {e}", exc_info=e)
+        chunk.chunk_context = ""
 
 
 def add_chunk_summaries(
-    chunks_by_doc: list[DocAwareChunk],
+    docs: list[_ContextualRagDocument],
     llm: LLM,
-    tokenizer: BaseTokenizer,
     trunc_doc_chunk_tokens: int,
-    doc_tokens: list[int] | None,
+    summaries: dict[str, str],
 ) -> None:
     """
-    Adds chunk summaries to the chunks grouped by document id.
+    Adds chunk summaries to the chunks of the given documents.
     Chunk summaries look at the chunk as well as the entire document (or a summary,
     if the document is too long) and describe how the chunk relates to the document.
+    Cached chunk summaries are taken from `summaries`, newly computed ones are added to it.
     """
-    # all chunks within a document have the same contextual_rag_reserved_tokens
-    if chunks_by_doc[0].contextual_rag_reserved_tokens == 0:
+    # documents along with their chunks that are not in the cache
+    missing: list[tuple[_ContextualRagDocument, list[DocAwareChunk]]] = []
+    for doc in docs:
+        missing_chunks = []
+        for chunk in doc.chunks:
+            cached_context = summaries.get(
+                chunk_context_cache_key(
+                    doc.content_hash, trunc_doc_chunk_tokens, chunk.content
+                )
+            )
+            if cached_context is None:
+                missing_chunks.append(chunk)
+            else:
+                chunk.chunk_context = cached_context
+        if missing_chunks:
+            missing.append((doc, missing_chunks))
+
+    if not missing:
         return
 
-    # use values computed in above doc summary section if available
-    doc_tokens = doc_tokens or tokenizer.encode(
-        chunks_by_doc[0].source_document.get_text_content()
+    context_prompt1s = run_functions_tuples_in_parallel(
+        [
+            (
+                _build_chunk_context_prefix,
+                (doc, llm, trunc_doc_chunk_tokens, summaries),
+            )
+            for doc, _ in missing
+        ],
+        max_workers=CONTEXTUAL_RAG_MAX_CONCURRENCY,
     )
-    doc_content = tokenizer_trim_middle(doc_tokens, trunc_doc_chunk_tokens, tokenizer)
 
-    # only compute doc summary if needed
-    doc_info = (
-        doc_content
-        if len(doc_tokens) <= MAX_TOKENS_FOR_FULL_INCLUSION
-        else chunks_by_doc[0].doc_summary
-    )
-    if not doc_info:
-        # This happens if the document is too long AND document summaries are turned off
-        # In this case we compute a doc summary using the LLM
-        doc_info = message_to_string(
-            llm.invoke_langchain(
-                DOCUMENT_SUMMARY_PROMPT.format(document=doc_content),
-                max_tokens=MAX_CONTEXT_TOKENS,
+    # The first chunk of every document goes ahead of its siblings, so that the
+    # document prefix is already in the provider's prompt cache for the rest of them
+    first_calls: list[tuple[Callable, tuple]] = []
+    remaining_calls: list[tuple[Callable, tuple]] = []
+    for (doc, missing_chunks), context_prompt1 in zip(missing, context_prompt1s):
+        calls = [
+            (
+                _add_chunk_context,
+                (
+                    chunk,
+                    llm,
+                    context_prompt1,
+                    chunk_context_cache_key(
+                        doc.content_hash, trunc_doc_chunk_tokens, chunk.content
+                    ),
+                    summaries,
+                ),
             )
-        )
-
-    context_prompt1 = CONTEXTUAL_RAG_PROMPT1.format(document=doc_info)
+            for chunk in missing_chunks
+        ]
+        first_calls.append(calls[0])
+        remaining_calls.extend(calls[1:])
 
-    def assign_context(chunk: DocAwareChunk) -> None:
-        context_prompt2 = CONTEXTUAL_RAG_PROMPT2.format(chunk=chunk.content)
-        try:
-            chunk.chunk_context = message_to_string(
-                llm.invoke_langchain(
-                    context_prompt1 + context_prompt2,
-                    max_tokens=MAX_CONTEXT_TOKENS,
-                )
+    for calls in (first_calls, remaining_calls):
+        if calls:
+            run_functions_tuples_in_parallel(
+                calls, max_workers=CONTEXTUAL_RAG_MAX_CONCURRENCY
             )
-        except LLMRateLimitError as e:
-            # Erroring during chunker is undesirable, so we log the error and continue
-            # TODO: for v2, add robust retry logic
-            logger.exception(f"Rate limit adding chunk summary: {e}", exc_info=e)
-            chunk.chunk_context = ""
-        except Exception as e:
-            logger.exception(f"Error adding chunk summary: {e}", exc_info=e)
-            chunk.chunk_context = ""
-
-    run_functions_tuples_in_parallel(
-        [(assign_context, (chunk,)) for chunk in chunks_by_doc]
-    )
 
 
 def add_contextual_summaries(
@@ -623,7 +804,9 @@ def add_contextual_summaries(
 ) -> list[DocAwareChunk]:
     """
     Adds Document summary and chunk-within-document context to the chunks
-    based on which environment variables are set.
+    based on which environment variables are set. Summaries are cached by the
+    content of the document and chunk, and computed concurrently across documents
+    with at most CONTEXTUAL_RAG_MAX_CONCURRENCY LLM calls in flight.
     """
     doc2chunks = defaultdict(list)
     for chunk in chunks:
@@ -642,21 +825,369 @@ def add_contextual_summaries(
     trunc_doc_chunk_tokens = (
         llm.config.max_input_tokens - prompt_tokens - chunk_token_limit
     )
-    for chunks_by_doc in doc2chunks.values():
-        doc_tokens = None
+
+    docs = [
+        _ContextualRagDocument(chunks_by_doc, tokenizer)
+        for chunks_by_doc in doc2chunks.values()
+        # this is value is the same for each chunk in the document; 0 indicates
+        # There is not enough space for contextual RAG (the chunk content
+        # and possibly metadata took up too much space)
+        if chunks_by_doc[0].contextual_rag_reserved_tokens != 0
+    ]
+
+    cache_keys: list[str] = []
+    for doc in docs:
         if USE_DOCUMENT_SUMMARY:
-            doc_tokens = add_document_summaries(
-                chunks_by_doc, llm, tokenizer, trunc_doc_summary_tokens
+            cache_keys.append(
+                document_summary_cache_key(doc.content_hash, trunc_doc_summary_tokens)
             )
-
         if USE_CHUNK_SUMMARY:
-            add_chunk_summaries(
-                chunks_by_doc, llm, tokenizer, trunc_doc_chunk_tokens, doc_tokens
+            cache_keys.extend(
+                chunk_context_cache_key(
+                    doc.content_hash, trunc_doc_chunk_tokens, chunk.content
+                )
+                for chunk in doc.chunks
             )
+    cached_summaries = get_cached_contextual_summaries(llm, cache_keys)
+    summaries = dict(cached_summaries)
+
+    # chunk summaries of long documents build on the document summaries
+    if USE_DOCUMENT_SUMMARY:
+        run_functions_tuples_in_parallel(
+            [
+                (
+                    add_document_summaries,
+                    (doc, llm, trunc_doc_summary_tokens, summaries),
+                )
+                for doc in docs
+            ],
+            max_workers=CONTEXTUAL_RAG_MAX_CONCURRENCY,
+        )
+
+    if USE_CHUNK_SUMMARY:
+        add_chunk_summaries(docs, llm, trunc_doc_chunk_tokens, summaries)
+
+    cache_contextual_summaries(
+        llm,
+        {
+            cache_key: summary
+            for cache_key, summary in summaries.items()
+            if summary and cache_key not in cached_summaries
+        },
+    )
 
     return chunks
 
 
+def _chunk_documents(
+    documents: list[IndexingDocument],
+    chunker: Chunker,
+    enable_contextual_rag: bool,
+    llm: LLM | None,
+) -> list[DocAwareChunk]:
+    # NOTE: no special handling for failures here, since the chunker is not
+    # a common source of failure for the indexing pipeline
+    chunks: list[DocAwareChunk] = chunker.chunk(documents)
+
+    # contextual RAG
+    if enable_contextual_rag:
+        assert llm is not None, "must provide an LLM for contextual RAG"
+        llm_tokenizer = get_tokenizer(
+            model_name=llm.config.model_name,
+            provider_type=llm.config.model_provider,
+        )
+
+        # Because the chunker's tokens are different from the LLM's tokens,
+        # We add a fudge factor to ensure we truncate prompts to the LLM's token limit
+        chunks = add_contextual_summaries(
+            chunks=chunks,
+            llm=llm,
+            tokenizer=llm_tokenizer,
+            chunk_token_limit=chunker.chunk_token_limit * 2,
+        )
+
+    return chunks
+
+
+class _EmbeddedChunks(BaseModel):
+    chunks_with_embeddings: list[IndexChunk]
+    chunk_content_scores: list[float]
+    embedding_failures: list[ConnectorFailure]
+
+
+def _embed_and_score_chunks(
+    chunks: list[DocAwareChunk],
+    embedder: IndexingEmbedder,
+    information_content_classification_model: InformationContentClassificationModel,
+    tenant_id: str,
+    request_id: str | None,
+) -> _EmbeddedChunks:
+    chunks_with_embeddings, embedding_failures = (
+        embed_chunks_with_failure_handling(
+            chunks=chunks,
+            embedder=embedder,
+            tenant_id=tenant_id,
+            request_id=request_id,
+        )
+        if chunks
+        else ([], [])
+    )
+
+    chunk_content_scores = (
+        _get_aggregated_chunk_boost_factor(
+            chunks_with_embeddings, information_content_classification_model
+        )
+        if USE_INFORMATION_CONTENT_CLASSIFICATION
+        else [1.0] * len(chunks_with_embeddings)
+    )
+
+    return _EmbeddedChunks(
+        chunks_with_embeddings=chunks_with_embeddings,
+        chunk_content_scores=chunk_content_scores,
+        embedding_failures=embedding_failures,
+    )
+
+
+def _write_embedded_chunks(
+    embedded: _EmbeddedChunks,
+    context: DocumentBatchPrepareContext,
+    adapter: IndexingBatchAdapter,
+    document_index: DocumentIndex,
+    chunker: Chunker,
+    tenant_id: str,
+) -> tuple[
+    BuildMetadataAwareChunksResult,
+    list[DocumentInsertionRecord],
+    list[ConnectorFailure],
+]:
+    """Enriches the embedded chunks of the documents in `context` and writes them to
+    the vector DB. Must be called while holding the adapter's lock context."""
+    result = adapter.build_metadata_aware_chunks(
+        chunks_with_embeddings=embedded.chunks_with_embeddings,
+        chunk_content_scores=embedded.chunk_content_scores,
+        tenant_id=tenant_id,
+        context=context,
+    )
+
+    short_descriptor_list = [chunk.to_short_descriptor() for chunk in result.chunks]
+    short_descriptor_log = str(short_descriptor_list)[:1024]
+    logger.debug(f"Indexing the following chunks: {short_descriptor_log}")
+
+    # A document will not be spread across different batches, so all the
+    # documents with chunks in this set, are fully represented by the chunks
+    # in this set
+    insertion_records, vector_db_write_failures = (
+        write_chunks_to_vector_db_with_backoff(
+            document_index=document_index,
+            chunks=result.chunks,
+            index_batch_params=IndexBatchParams(
+                doc_id_to_previous_chunk_cnt=result.doc_id_to_previous_chunk_cnt,
+                doc_id_to_new_chunk_cnt=result.doc_id_to_new_chunk_cnt,
+                tenant_id=tenant_id,
+                large_chunks_enabled=chunker.enable_large_chunks,
+            ),
+        )
+    )
+    return result, insertion_records, vector_db_write_failures
+
+
+def _verify_all_docs_returned(
+    updatable_ids: list[str],
+    insertion_records: list[DocumentInsertionRecord],
+    failures: list[ConnectorFailure],
+) -> None:
+    all_returned_doc_ids = {record.document_id for record in insertion_records}.union(
+        {
+            record.failed_document.document_id
+            for record in failures
+            if record.failed_document
+        }
+    )
+    if all_returned_doc_ids != set(updatable_ids):
+        raise RuntimeError(
+            f"Some documents were not successfully indexed. "
+            f"Updatable IDs: {updatable_ids}, "
+            f"Returned IDs: {all_returned_doc_ids}. "
+            "This should never happen."
+        )
+
+
+def _build_updatable_chunk_data(
+    embedded: _EmbeddedChunks,
+) -> list[UpdatableChunkData]:
+    return [
+        UpdatableChunkData(
+            chunk_id=chunk.chunk_id,
+            document_id=chunk.source_document.id,
+            boost_score=score,
+        )
+        for chunk, score in zip(
+            embedded.chunks_with_embeddings, embedded.chunk_content_scores
+        )
+    ]
+
+
+def _index_doc_batch_pipelined(
+    *,
+    context: DocumentBatchPrepareContext,
+    filtered_documents: list[Document],
+    chunker: Chunker,
+    embedder: IndexingEmbedder,
+    information_content_classification_model: InformationContentClassificationModel,
+    document_index: DocumentIndex,
+    request_id: str | None,
+    tenant_id: str,
+    adapter: IndexingBatchAdapter,
+    enable_contextual_rag: bool,
+    llm: LLM | None,
+    sub_batch_size: int,
+    max_queue_size: int,
+) -> IndexingPipelineResult:
+    """Indexes the prepared documents in sub-batches, with chunking and embedding
+    running in background threads so that embedding of sub-batch N+1 overlaps with
+    the vector DB write of sub-batch N.
+
+    All DB work (enrichment, locking, post index updates) stays on the calling thread
+    and happens in the same order as in the sequential path."""
+    # indexable_docs are built 1:1 from updatable_docs, keep them paired so each
+    # sub-batch carries a self contained context
+    sub_batches = [
+        (
+            context.updatable_docs[i : i + sub_batch_size],
+            context.indexable_docs[i : i + sub_batch_size],
+        )
+        for i in range(0, len(context.updatable_docs), sub_batch_size)
+    ]
+
+    def _chunk_stage(
+        sub_batch: tuple[list[Document], list[IndexingDocument]],
+    ) -> tuple[list[Document], list[DocAwareChunk]]:
+        updatable_docs, indexable_docs = sub_batch
+        return updatable_docs, _chunk_documents(
+            documents=indexable_docs,
+            chunker=chunker,
+            enable_contextual_rag=enable_contextual_rag,
+            llm=llm,
+        )
+
+    def _embed_stage(
+        chunked: tuple[list[Document], list[DocAwareChunk]],
+    ) -> tuple[list[Document], _EmbeddedChunks]:
+        updatable_docs, chunks = chunked
+        return updatable_docs, _embed_and_score_chunks(
+            chunks=chunks,
+            embedder=embedder,
+            information_content_classification_model=information_content_classification_model,
+            tenant_id=tenant_id,
+            request_id=request_id,
+        )
+
+    chunk_stage = PipelineStage(
+        "chunk", _chunk_stage, count_units=lambda output: len(output[1])
+    )
+    embed_stage = PipelineStage(
+        "embed",
+        _embed_stage,
+        count_units=lambda output: len(output[1].chunks_with_embeddings),
+    )
+    write_metrics = StageMetrics(name="write")
+
+    insertion_records: list[DocumentInsertionRecord] = []
+    failures: list[ConnectorFailure] = []
+    updatable_chunk_data: list[UpdatableChunkData] = []
+    total_chunks = 0
+    # merged across sub-batches for post_index. The chunks themselves are dropped
+    # once written so that memory stays bounded by the queue size.
+    merged_result = BuildMetadataAwareChunksResult(
+        chunks=[],
+        doc_id_to_previous_chunk_cnt={},
+        doc_id_to_new_chunk_cnt={},
+        user_file_id_to_raw_text={},
+        user_file_id_to_token_count={},
+    )
+
+    embedded_sub_batches = run_staged_pipeline(
+        sub_batches, [chunk_stage, embed_stage], max_queue_size=max_queue_size
+    )
+    try:
+        # don't take the lock until the first sub-batch is ready to be written
+        first_sub_batch = next(embedded_sub_batches, None)
+
+        # Acquires a lock on the documents so that no other process can modify them
+        # NOTE: see index_doc_batch for why the lock is only needed around the writes
+        with adapter.lock_context(context.updatable_docs):
+            next_sub_batch = first_sub_batch
+            while next_sub_batch is not None:
+                updatable_docs, embedded = next_sub_batch
+
+                start = time.monotonic()
+                result, sub_batch_records, sub_batch_write_failures = (
+                    _write_embedded_chunks(
+                        embedded=embedded,
+                        context=DocumentBatchPrepareContext(
+                            updatable_docs=updatable_docs,
+                            id_to_boost_map=context.id_to_boost_map,
+                        ),
+                        adapter=adapter,
+                        document_index=document_index,
+                        chunker=chunker,
+                        tenant_id=tenant_id,
+                    )
+                )
+                write_metrics.busy_seconds += time.monotonic() - start
+                write_metrics.batches += 1
+                write_metrics.units += len(result.chunks)
+
+                insertion_records.extend(sub_batch_records)
+                failures.extend(sub_batch_write_failures + embedded.embedding_failures)
+                updatable_chunk_data.extend(_build_updatable_chunk_data(embedded))
+                total_chunks += len(embedded.chunks_with_embeddings)
+                merged_result.doc_id_to_previous_chunk_cnt.update(
+                    result.doc_id_to_previous_chunk_cnt
+                )
+                merged_result.doc_id_to_new_chunk_cnt.update(
+                    result.doc_id_to_new_chunk_cnt
+                )
+                merged_result.user_file_id_to_raw_text.update(
+                    result.user_file_id_to_raw_text
+                )
+                merged_result.user_file_id_to_token_count.update(
+                    result.user_file_id_to_token_count
+                )
+
+                next_sub_batch = next(embedded_sub_batches, None)
+
+            _verify_all_docs_returned(
+                updatable_ids=[doc.id for doc in context.updatable_docs],
+                insertion_records=insertion_records,
+                failures=failures,
+            )
+
+            adapter.post_index(
+                context=context,
+                updatable_chunk_data=updatable_chunk_data,
+                filtered_documents=filtered_documents,
+                result=merged_result,
+            )
+    finally:
+        # stops the background stages if anything above failed
+        embedded_sub_batches.close()
+
+    stage_metrics = [chunk_stage.metrics, embed_stage.metrics, write_metrics]
+    logger.info(
+        f"Pipelined indexing stage metrics for {len(context.updatable_docs)} docs: "
+        + "; ".join(metrics.describe() for metrics in stage_metrics)
+    )
+
+    return IndexingPipelineResult(
+        new_docs=len([r for r in insertion_records if not r.already_existed]),
+        total_docs=len(filtered_documents),
+        total_chunks=total_chunks,
+        failures=failures,
+        stage_metrics=stage_metrics,
+    )
+
+
 @log_function_time(debug_only=True)
 def index_doc_batch(
     *,
@@ -672,6 +1203,7 @@ def index_doc_batch(
     llm: LLM | None = None,
     ignore_time_skip: bool = False,
     filter_fnc: Callable[[list[Document]], list[Document]] = filter_documents,
+    enable_pipelining: bool = ENABLE_PIPELINED_INDEXING,
 ) -> IndexingPipelineResult:
     """End-to-end indexing for a pre-batched set of documents."""
     """Takes different pieces of the indexing pipeline and applies it to a batch of documents
@@ -704,58 +1236,45 @@ def index_doc_batch(
     ]
     logger.debug(f"Starting indexing process for documents: {doc_descriptors}")
 
-    logger.debug("Starting chunking")
-    # NOTE: no special handling for failures here, since the chunker is not
-    # a common source of failure for the indexing pipeline
-    chunks: list[DocAwareChunk] = chunker.chunk(context.indexable_docs)
-    llm_tokenizer: BaseTokenizer | None = None
-
-    # contextual RAG
-    if enable_contextual_rag:
-        assert llm is not None, "must provide an LLM for contextual RAG"
-        llm_tokenizer = get_tokenizer(
-            model_name=llm.config.model_name,
-            provider_type=llm.config.model_provider,
-        )
-
-        # Because the chunker's tokens are different from the LLM's tokens,
-        # We add a fudge factor to ensure we truncate prompts to the LLM's token limit
-        chunks = add_contextual_summaries(
-            chunks=chunks,
-            llm=llm,
-            tokenizer=llm_tokenizer,
-            chunk_token_limit=chunker.chunk_token_limit * 2,
-        )
-
-    logger.debug("Starting embedding")
-    chunks_with_embeddings, embedding_failures = (
-        embed_chunks_with_failure_handling(
-            chunks=chunks,
+    if (
+        enable_pipelining
+        and len(context.indexable_docs) > PIPELINED_INDEXING_SUB_BATCH_SIZE
+    ):
+        return _index_doc_batch_pipelined(
+            context=context,
+            filtered_documents=filtered_documents,
+            chunker=chunker,
             embedder=embedder,
-            tenant_id=tenant_id,
+            information_content_classification_model=information_content_classification_model,
+            document_index=document_index,
             request_id=request_id,
+            tenant_id=tenant_id,
+            adapter=adapter,
+            enable_contextual_rag=enable_contextual_rag,
+            llm=llm,
+            sub_batch_size=PIPELINED_INDEXING_SUB_BATCH_SIZE,
+            max_queue_size=PIPELINED_INDEXING_QUEUE_SIZE,
         )
-        if chunks
-        else ([], [])
+
+    logger.debug("Starting chunking")
+    chunks = _chunk_documents(
+        documents=context.indexable_docs,
+        chunker=chunker,
+        enable_contextual_rag=enable_contextual_rag,
+        llm=llm,
     )
 
-    chunk_content_scores = (
-        _get_aggregated_chunk_boost_factor(
-            chunks_with_embeddings, information_content_classification_model
-        )
-        if USE_INFORMATION_CONTENT_CLASSIFICATION
-        else [1.0] * len(chunks_with_embeddings)
+    logger.debug("Starting embedding")
+    embedded = _embed_and_score_chunks(
+        chunks=chunks,
+        embedder=embedder,
+        information_content_classification_model=information_content_classification_model,
+        tenant_id=tenant_id,
+        request_id=request_id,
     )
 
     updatable_ids = [doc.id for doc in context.updatable_docs]
-    updatable_chunk_data = [
-        UpdatableChunkData(
-            chunk_id=chunk.chunk_id,
-            document_id=chunk.source_document.id,
-            boost_score=score,
-        )
-        for chunk, score in zip(chunks_with_embeddings, chunk_content_scores)
-    ]
+    updatable_chunk_data = _build_updatable_chunk_data(embedded)
 
     # Acquires a lock on the documents so that no other process can modify them
     # NOTE: don't need to acquire till here, since this is when the actual race condition
@@ -766,58 +1285,20 @@ def index_doc_batch(
         # we still write data here for the immediate and most likely correct sync, but
         # to resolve this, an update of the last modified field at the end of this loop
         # always triggers a final metadata sync via the celery queue
-        result = adapter.build_metadata_aware_chunks(
-            chunks_with_embeddings=chunks_with_embeddings,
-            chunk_content_scores=chunk_content_scores,
-            tenant_id=tenant_id,
+        result, insertion_records, vector_db_write_failures = _write_embedded_chunks(
+            embedded=embedded,
             context=context,
-        )
-
-        short_descriptor_list = [chunk.to_short_descriptor() for chunk in result.chunks]
-        short_descriptor_log = str(short_descriptor_list)[:1024]
-        logger.debug(f"Indexing the following chunks: {short_descriptor_log}")
-
-        # A document will not be spread across different batches, so all the
-        # documents with chunks in this set, are fully represented by the chunks
-        # in this set
-        (
-            insertion_records,
-            vector_db_write_failures,
-        ) = write_chunks_to_vector_db_with_backoff(
+            adapter=adapter,
             document_index=document_index,
-            chunks=result.chunks,
-            index_batch_params=IndexBatchParams(
-                doc_id_to_previous_chunk_cnt=result.doc_id_to_previous_chunk_cnt,
-                doc_id_to_new_chunk_cnt=result.doc_id_to_new_chunk_cnt,
-                tenant_id=tenant_id,
-                large_chunks_enabled=chunker.enable_large_chunks,
-            ),
+            chunker=chunker,
+            tenant_id=tenant_id,
         )
 
-        all_returned_doc_ids = (
-            {record.document_id for record in insertion_records}
-            .union(
-                {
-                    record.failed_document.document_id
-                    for record in vector_db_write_failures
-                    if record.failed_document
-                }
-            )
-            .union(
-                {
-                    record.failed_document.document_id
-                    for record in embedding_failures
-                    if record.failed_document
-                }
-            )
+        _verify_all_docs_returned(
+            updatable_ids=updatable_ids,
+            insertion_records=insertion_records,
+            failures=vector_db_write_failures + embedded.embedding_failures,
         )
-        if all_returned_doc_ids != set(updatable_ids):
-            raise RuntimeError(
-                f"Some documents were not successfully indexed. "
-                f"Updatable IDs: {updatable_ids}, "
-                f"Returned IDs: {all_returned_doc_ids}. "
-                "This should never happen."
-            )
 
         adapter.post_index(
             context=context,
@@ -829,8 +1310,8 @@ def index_doc_batch(
     return IndexingPipelineResult(
         new_docs=len([r for r in insertion_records if not r.already_existed]),
         total_docs=len(filtered_documents),
-        total_chunks=len(chunks_with_embeddings),
-        failures=vector_db_write_failures + embedding_failures,
+        total_chunks=len(embedded.chunks_with_embeddings),
+        failures=vector_db_write_failures + embedded.embedding_failures,
     )
 
 
@@ -0,0 +1,188 @@
+import contextvars
+import queue
+import threading
+import time
+from collections.abc import Callable
+from collections.abc import Generator
+from collections.abc import Iterable
+from collections.abc import Sequence
+from typing import Any
+
+from pydantic import BaseModel
+
+# how often blocked queue operations wake up to check whether the pipeline was aborted
+_QUEUE_POLL_INTERVAL = 0.1
+
+
+class StageMetrics(BaseModel):
+    """Throughput counters for a single stage of a staged pipeline."""
+
+    name: str
+    # number of sub-batches processed by the stage
+    batches: int = 0
+    # stage defined unit of work (e.g. chunks), used for throughput
+    units: int = 0
+    # time spent doing work, excluding time blocked on the queues
+    busy_seconds: float = 0.0
+
+    @property
+    def units_per_second(self) -> float:
+        if self.busy_seconds <= 0:
+            return 0.0
+        return self.units / self.busy_seconds
+
+    def describe(self) -> str:
+        return (
+            f"{self.name}: {self.batches} batches, {self.units} units "
+            f"in {self.busy_seconds:.2f}s ({self.units_per_second:.1f} units/s)"
+        )
+
+
+class PipelineStage:
+    """A named step of a staged pipeline.
+
+    `func` maps one item to the next stage's input. `count_units` is used to
+    report throughput in a meaningful unit (e.g. number of chunks) rather than
+    just the number of sub-batches."""
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable[[Any], Any],
+        count_units: Callable[[Any], int] | None = None,
+    ) -> None:
+        self.name = name
+        self.func = func
+        self.count_units = count_units
+        self.metrics = StageMetrics(name=name)
+
+    def run(self, item: Any) -> Any:
+        start = time.monotonic()
+        output = self.func(item)
+        self.metrics.busy_seconds += time.monotonic() - start
+        self.metrics.batches += 1
+        self.metrics.units += self.count_units(output) if self.count_units else 1
+        return output
+
+
+class _EndOfStream:
+    pass
+
+
+class _StageError:
+    def __init__(self, exception: BaseException) -> None:
+        self.exception = exception
+
+
+_END_OF_STREAM = _EndOfStream()
+
+
+def _put(q: "queue.Queue[Any]", item: Any, abort: threading.Event) -> bool:
+    while not abort.is_set():
+        try:
+            q.put(item, timeout=_QUEUE_POLL_INTERVAL)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _get(q: "queue.Queue[Any]", abort: threading.Event) -> Any:
+    while not abort.is_set():
+        try:
+            return q.get(timeout=_QUEUE_POLL_INTERVAL)
+        except queue.Empty:
+            continue
+    return _END_OF_STREAM
+
+
+def _run_stage(
+    stage: PipelineStage,
+    inbound: "queue.Queue[Any]",
+    outbound: "queue.Queue[Any]",
+    abort: threading.Event,
+) -> None:
+    while True:
+        item = _get(inbound, abort)
+        if isinstance(item, (_EndOfStream, _StageError)):
+            _put(outbound, item, abort)
+            return
+
+        try:
+            output = stage.run(item)
+        except BaseException as e:
+            # forward the failure so that the consumer re-raises it, nothing
+            # after a failed sub-batch is processed
+            _put(outbound, _StageError(e), abort)
+            return
+
+        if not _put(outbound, output, abort):
+            return
+
+
+def _feed(
+    items: Iterable[Any], outbound: "queue.Queue[Any]", abort: threading.Event
+) -> None:
+    try:
+        for item in items:
+            if not _put(outbound, item, abort):
+                return
+    except BaseException as e:
+        _put(outbound, _StageError(e), abort)
+        return
+    _put(outbound, _END_OF_STREAM, abort)
+
+
+def run_staged_pipeline(
+    items: Iterable[Any],
+    stages: Sequence[PipelineStage],
+    max_queue_size: int = 2,
+) -> Generator[Any, None, None]:
+    """Runs each stage in its own thread, connected by bounded queues, and yields the
+    output of the last stage in input order. Close the generator to stop the
+    stages early.
+
+    This lets I/O bound stages (e.g. embedding and writing to the vector DB) overlap
+    across sub-batches while bounding how many sub-batches are held in memory.
+    The consumer of the returned iterator acts as the final stage and runs in the
+    calling thread, so it is safe for it to use thread bound resources such as a DB
+    session. If any stage raises, the exception is re-raised from the iterator and
+    all stage threads are stopped. contextvars (e.g. the tenant id) are propagated
+    to the stage threads."""
+    abort = threading.Event()
+    queues: list[queue.Queue[Any]] = [
+        queue.Queue(maxsize=max(1, max_queue_size)) for _ in range(len(stages) + 1)
+    ]
+
+    threads = [
+        threading.Thread(
+            target=contextvars.copy_context().run,
+            args=(_feed, items, queues[0], abort),
+            daemon=True,
+        )
+    ]
+    for ind, stage in enumerate(stages):
+        threads.append(
+            threading.Thread(
+                target=contextvars.copy_context().run,
+                args=(_run_stage, stage, queues[ind], queues[ind + 1], abort),
+                daemon=True,
+            )
+        )
+
+    for thread in threads:
+        thread.start()
+
+    try:
+        while True:
+            item = _get(queues[-1], abort)
+            if isinstance(item, _EndOfStream):
+                return
+            if isinstance(item, _StageError):
+                raise item.exception
+            yield item
+    finally:
+        # stops all stages if the consumer failed or stopped early, no-op otherwise
+        abort.set()
+        for thread in threads:
+            thread.join()
@@ -18,6 +18,18 @@ class KeyValueStore:
     def load(self, key: str, refresh_cache: bool = False) -> JSON_ro:
         raise NotImplementedError
 
+    def load_many(
+        self, keys: list[str], refresh_cache: bool = False
+    ) -> dict[str, JSON_ro]:
+        """Returns the values of the given keys, keys that don't exist are left out."""
+        values: dict[str, JSON_ro] = {}
+        for key in keys:
+            try:
+                values[key] = self.load(key, refresh_cache=refresh_cache)
+            except KvKeyNotFoundError:
+                continue
+        return values
+
     @abc.abstractmethod
     def delete(self, key: str) -> None:
         raise NotImplementedError
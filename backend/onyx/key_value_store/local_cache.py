@@ -0,0 +1,147 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from onyx.configs.app_configs import DISABLE_KV_STORE_LOCAL_CACHE
+from onyx.configs.app_configs import KV_STORE_LOCAL_CACHE_MAX_ENTRIES
+from onyx.configs.app_configs import KV_STORE_LOCAL_CACHE_TTL_SECONDS
+from onyx.redis.redis_pool import get_raw_redis_client
+from onyx.utils.logger import setup_logger
+
+logger = setup_logger()
+
+KV_STORE_INVALIDATION_CHANNEL = "onyx_kv_store_invalidation"
+_INVALIDATION_LISTENER_RETRY_SECONDS = 5.0
+
+
+class LocalKVCache:
+    """TTL/LRU cache of the raw JSON values of the key value store, keyed by tenant id
+    and key. Values are only served and stored while invalidations are being received,
+    otherwise writes from other processes could go unnoticed.
+
+    Every invalidation bumps the version of the cache. Readers take the version before
+    going to Redis/Postgres and pass it to `put`, which drops the value if anything was
+    invalidated in the meantime, since the value may have been read before the write."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float) -> None:
+        self._max_entries = max_entries
+        self._ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[tuple[str, str], tuple[float, str]] = OrderedDict()
+        self._version = 0
+        self._listening = False
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def set_listening(self, listening: bool) -> None:
+        with self._lock:
+            self._listening = listening
+            # invalidations may have been missed while not listening
+            self._entries.clear()
+            self._version += 1
+
+    def get(self, tenant_id: str, key: str) -> str | None:
+        cache_key = (tenant_id, key)
+        with self._lock:
+            if not self._listening:
+                return None
+            entry = self._entries.get(cache_key)
+            if entry is None:
+                return None
+            expires_at, raw_value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[cache_key]
+                return None
+            self._entries.move_to_end(cache_key)
+            return raw_value
+
+    def put(self, tenant_id: str, key: str, raw_value: str, version: int) -> None:
+        with self._lock:
+            if not self._listening or version != self._version:
+                return
+            self._entries[(tenant_id, key)] = (
+                time.monotonic() + self._ttl_seconds,
+                raw_value,
+            )
+            self._entries.move_to_end((tenant_id, key))
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, tenant_id: str, key: str) -> None:
+        with self._lock:
+            self._entries.pop((tenant_id, key), None)
+            self._version += 1
+
+
+_local_cache = LocalKVCache(
+    max_entries=KV_STORE_LOCAL_CACHE_MAX_ENTRIES,
+    ttl_seconds=KV_STORE_LOCAL_CACHE_TTL_SECONDS,
+)
+_listener_lock = threading.Lock()
+# the listener thread doesn't survive a fork, so it is tracked per process
+_listener_pid: int | None = None
+
+
+def build_invalidation_message(tenant_id: str, key: str) -> str:
+    return json.dumps({"tenant_id": tenant_id, "key": key})
+
+
+def _listen_for_invalidations() -> None:
+    while True:
+        pubsub = None
+        try:
+            pubsub = get_raw_redis_client().pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(KV_STORE_INVALIDATION_CHANNEL)
+            _local_cache.set_listening(True)
+            for message in pubsub.listen():
+                if message.get("type") != "message":
+                    continue
+                invalidation = json.loads(message["data"])
+                _local_cache.invalidate(invalidation["tenant_id"], invalidation["key"])
+        except Exception:
+            logger.exception("Key value store invalidation listener failed")
+        finally:
+            _local_cache.set_listening(False)
+            if pubsub is not None:
+                try:
+                    pubsub.close()
+                except Exception:
+                    pass
+
+        time.sleep(_INVALIDATION_LISTENER_RETRY_SECONDS)
+
+
+def start_invalidation_listener() -> None:
+    """Starts the thread that keeps the local cache in sync with writes from other
+    processes, unless it is already running in this process. The cache is bypassed
+    until the listener has subscribed."""
+    global _listener_pid
+
+    pid = os.getpid()
+    if _listener_pid == pid:
+        return
+
+    with _listener_lock:
+        if _listener_pid == pid:
+            return
+        # the cache may have been inherited from the parent process
+        _local_cache.set_listening(False)
+        threading.Thread(
+            target=_listen_for_invalidations,
+            name="kv-store-invalidation-listener",
+            daemon=True,
+        ).start()
+        _listener_pid = pid
+
+
+def get_local_kv_cache() -> LocalKVCache | None:
+    """Returns the process-local cache of the key value store, or None if it is
+    disabled. Nothing is served from it until `start_invalidation_listener` is called.
+    """
+    if DISABLE_KV_STORE_LOCAL_CACHE:
+        return None
+    return _local_cache
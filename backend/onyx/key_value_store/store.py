@@ -1,4 +1,5 @@
 import json
+from typing import Any
 from typing import cast
 
 from redis.client import Redis
@@ -7,9 +8,15 @@ from onyx.db.engine.sql_engine import get_session_with_current_tenant
 from onyx.db.models import KVStore
 from onyx.key_value_store.interface import KeyValueStore
 from onyx.key_value_store.interface import KvKeyNotFoundError
+from onyx.key_value_store.local_cache import build_invalidation_message
+from onyx.key_value_store.local_cache import get_local_kv_cache
+from onyx.key_value_store.local_cache import KV_STORE_INVALIDATION_CHANNEL
+from onyx.key_value_store.local_cache import start_invalidation_listener
 from onyx.redis.redis_pool import get_redis_client
+from onyx.redis.redis_pool import TenantRedis
 from onyx.utils.logger import setup_logger
 from onyx.utils.special_types import JSON_ro
+from shared_configs.contextvars import get_current_tenant_id
 
 
 logger = setup_logger()
@@ -27,12 +34,30 @@ class PgRedisKVStore(KeyValueStore):
         else:
             self.redis_client = get_redis_client()
 
+        # values are cached locally under the tenant their Redis keys belong to
+        self.tenant_id = (
+            self.redis_client.tenant_id
+            if isinstance(self.redis_client, TenantRedis)
+            else get_current_tenant_id()
+        )
+
+    def _invalidate(self, key: str) -> None:
+        local_cache = get_local_kv_cache()
+        if local_cache:
+            local_cache.invalidate(self.tenant_id, key)
+
     def store(self, key: str, val: JSON_ro, encrypt: bool = False) -> None:
         # Not encrypted in Redis, but encrypted in Postgres
         try:
-            self.redis_client.set(
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.set(
                 REDIS_KEY_PREFIX + key, json.dumps(val), ex=KV_REDIS_KEY_EXPIRATION
             )
+            pipe.publish(
+                KV_STORE_INVALIDATION_CHANNEL,
+                build_invalidation_message(self.tenant_id, key),
+            )
+            pipe.execute()
         except Exception as e:
             # Fallback gracefully to Postgres if Redis fails
             logger.error(f"Failed to set value in Redis for key '{key}': {str(e)}")
@@ -52,43 +77,115 @@ class PgRedisKVStore(KeyValueStore):
                 db_session.add(obj)
             db_session.commit()
 
-    def load(self, key: str, refresh_cache: bool = False) -> JSON_ro:
-        if not refresh_cache:
+        self._invalidate(key)
+
+    def _load_from_redis(self, keys: list[str]) -> dict[str, str]:
+        if not keys:
+            return {}
+
+        try:
+            redis_values = cast(
+                list[Any],
+                self.redis_client.mget([REDIS_KEY_PREFIX + key for key in keys]),
+            )
+        except Exception as e:
+            logger.error(f"Failed to get values from Redis for keys {keys}: {str(e)}")
+            return {}
+
+        raw_values: dict[str, str] = {}
+        for key, redis_value in zip(keys, redis_values):
+            if not redis_value:
+                continue
+            if not isinstance(redis_value, bytes):
+                logger.error(f"Redis value for key '{key}' is not a bytes object")
+                continue
+            raw_values[key] = redis_value.decode("utf-8")
+        return raw_values
+
+    def _load_from_postgres(self, keys: list[str]) -> dict[str, str]:
+        """Returns the JSON encoded values of the keys that exist and writes them back
+        to Redis."""
+        raw_values: dict[str, str] = {}
+        with get_session_with_current_tenant() as db_session:
+            objs = db_session.query(KVStore).filter(KVStore.key.in_(keys)).all()
+            for obj in objs:
+                if obj.value is not None:
+                    value = obj.value
+                elif obj.encrypted_value is not None:
+                    value = obj.encrypted_value
+                else:
+                    value = None
+                raw_values[obj.key] = json.dumps(value)
+
+        if raw_values:
             try:
-                redis_value = self.redis_client.get(REDIS_KEY_PREFIX + key)
-                if redis_value:
-                    if not isinstance(redis_value, bytes):
-                        raise ValueError(
-                            f"Redis value for key '{key}' is not a bytes object"
-                        )
-                    return json.loads(redis_value.decode("utf-8"))
+                pipe = self.redis_client.pipeline(transaction=False)
+                for key, raw_value in raw_values.items():
+                    pipe.set(REDIS_KEY_PREFIX + key, raw_value)
+                pipe.execute()
             except Exception as e:
                 logger.error(
-                    f"Failed to get value from Redis for key '{key}': {str(e)}"
+                    f"Failed to set values in Redis for keys {list(raw_values)}: {str(e)}"
                 )
 
-        with get_session_with_current_tenant() as db_session:
-            obj = db_session.query(KVStore).filter_by(key=key).first()
-            if not obj:
-                raise KvKeyNotFoundError
+        return raw_values
 
-            if obj.value is not None:
-                value = obj.value
-            elif obj.encrypted_value is not None:
-                value = obj.encrypted_value
-            else:
-                value = None
+    def load(self, key: str, refresh_cache: bool = False) -> JSON_ro:
+        values = self.load_many([key], refresh_cache=refresh_cache)
+        if key not in values:
+            raise KvKeyNotFoundError
+        return values[key]
+
+    def load_many(
+        self, keys: list[str], refresh_cache: bool = False
+    ) -> dict[str, JSON_ro]:
+        """Values are read from the process-local cache, then from Redis with a single
+        round trip and finally from Postgres with a single query."""
+        local_cache = get_local_kv_cache()
+        if local_cache:
+            # started on the first read, writes only need to invalidate
+            start_invalidation_listener()
+        # taken before reading, values invalidated while loading are not cached
+        cache_version = local_cache.version if local_cache else 0
+
+        locally_cached: dict[str, str] = {}
+        loaded: dict[str, str] = {}
+        if not refresh_cache:
+            if local_cache:
+                for key in keys:
+                    raw_value = local_cache.get(self.tenant_id, key)
+                    if raw_value is not None:
+                        locally_cached[key] = raw_value
+            loaded = self._load_from_redis(
+                [key for key in keys if key not in locally_cached]
+            )
 
-            try:
-                self.redis_client.set(REDIS_KEY_PREFIX + key, json.dumps(value))
-            except Exception as e:
-                logger.error(f"Failed to set value in Redis for key '{key}': {str(e)}")
+        missing_keys = [
+            key for key in keys if key not in locally_cached and key not in loaded
+        ]
+        if missing_keys:
+            loaded.update(self._load_from_postgres(missing_keys))
+
+        if local_cache:
+            for key, raw_value in loaded.items():
+                local_cache.put(self.tenant_id, key, raw_value, cache_version)
 
-            return cast(JSON_ro, value)
+        raw_values = {**locally_cached, **loaded}
+        return {
+            key: cast(JSON_ro, json.loads(raw_values[key]))
+            for key in keys
+            if key in raw_values
+        }
 
     def delete(self, key: str) -> None:
         try:
-            self.redis_client.delete(REDIS_KEY_PREFIX + key)
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.delete(REDIS_KEY_PREFIX + key)
+            pipe.publish(
+                KV_STORE_INVALIDATION_CHANNEL,
+                build_invalidation_message(self.tenant_id, key),
+            )
+            pipe.execute()
         except Exception as e:
             logger.error(f"Failed to delete value from Redis for key '{key}': {str(e)}")
 
@@ -97,3 +194,5 @@ class PgRedisKVStore(KeyValueStore):
             if result == 0:
                 raise KvKeyNotFoundError
             db_session.commit()
+
+        self._invalidate(key)
@@ -6,15 +6,20 @@ from rapidfuzz.fuzz import ratio
 from redis.lock import Lock as RedisLock
 from sqlalchemy import func
 from sqlalchemy import text
+from sqlalchemy.orm import Session
 
 from onyx.background.celery.tasks.kg_processing.utils import extend_lock
 from onyx.configs.constants import CELERY_GENERIC_BEAT_LOCK_TIMEOUT
+from onyx.configs.kg_configs import KG_CLUSTERING_BATCH_MODE
+from onyx.configs.kg_configs import KG_CLUSTERING_BATCH_SIZE
 from onyx.configs.kg_configs import KG_CLUSTERING_RETRIEVE_THRESHOLD
 from onyx.configs.kg_configs import KG_CLUSTERING_THRESHOLD
 from onyx.db.engine.sql_engine import get_session_with_current_tenant
 from onyx.db.entities import KGEntity
 from onyx.db.entities import KGEntityExtractionStaging
 from onyx.db.entities import merge_entities
+from onyx.db.entities import merge_entities_batch
+from onyx.db.entities import transfer_entities
 from onyx.db.entities import transfer_entity
 from onyx.db.kg_config import get_kg_config_settings
 from onyx.db.kg_config import validate_kg_settings
@@ -30,6 +35,7 @@ from onyx.document_index.vespa.kg_interactions import (
     get_kg_vespa_info_update_requests_for_document,
 )
 from onyx.document_index.vespa.kg_interactions import update_kg_chunks_vespa_info
+from onyx.kg.clustering.trigram_index import TrigramIndex
 from onyx.kg.models import KGGroundingType
 from onyx.kg.utils.formatting_utils import make_relationship_id
 from onyx.utils.logger import setup_logger
@@ -218,6 +224,148 @@ def _cluster_one_grounded_entity(
     return transferred_entity, update_vespa
 
 
+class _ClusterCandidate:
+    """An entity that staging entities can be merged into. Either an existing KGEntity,
+    or one that is transferred in the current batch (no id_name until it is inserted).
+    """
+
+    def __init__(
+        self, name: str, has_document: bool, id_name: str | None = None
+    ) -> None:
+        self.name = name
+        self.has_document = has_document
+        self.id_name = id_name
+
+
+class _EntityTypeClusterIndex:
+    """In-memory replacement for the per-entity similarity query of
+    `_cluster_one_grounded_entity`, for a single entity type."""
+
+    def __init__(self) -> None:
+        self.trigram_index = TrigramIndex(KG_CLUSTERING_RETRIEVE_THRESHOLD)
+        self.candidates: list[_ClusterCandidate] = []
+
+    def add(self, candidate: _ClusterCandidate) -> None:
+        # skip those with numbers so we don't cluster version1 and version2, etc.
+        if any(char.isdigit() for char in candidate.name):
+            return
+        self.trigram_index.add(candidate.name)
+        self.candidates.append(candidate)
+
+    def find_best_match(
+        self, entity_name: str, has_document: bool
+    ) -> _ClusterCandidate | None:
+        best_score = -1.0
+        best_candidate = None
+        for position in self.trigram_index.search(entity_name):
+            candidate = self.candidates[position]
+            # entities from a document can only be merged into ones without a document
+            if has_document and candidate.has_document:
+                continue
+            score = ratio(candidate.name, entity_name)
+            if score >= KG_CLUSTERING_THRESHOLD * 100 and score > best_score:
+                best_score = score
+                best_candidate = candidate
+        return best_candidate
+
+
+def _load_entity_type_cluster_index(
+    db_session: Session, entity_type_id_name: str
+) -> _EntityTypeClusterIndex:
+    cluster_index = _EntityTypeClusterIndex()
+    for id_name, name, document_id in (
+        db_session.query(KGEntity.id_name, KGEntity.name, KGEntity.document_id)
+        .filter(KGEntity.entity_type_id_name == entity_type_id_name)
+        .yield_per(10000)
+    ):
+        cluster_index.add(
+            _ClusterCandidate(
+                name=name, has_document=document_id is not None, id_name=id_name
+            )
+        )
+    return cluster_index
+
+
+def _cluster_grounded_entity_batch(
+    entities: list[KGEntityExtractionStaging],
+    cluster_indices: dict[str, _EntityTypeClusterIndex],
+) -> None:
+    """
+    Batch version of `_cluster_one_grounded_entity`. Entities are matched in order
+    against the in-memory indices (which also pick up the entities transferred earlier
+    in the batch), then all transfers and merges are applied in one transaction.
+    """
+    with get_session_with_current_tenant() as db_session:
+        document_ids = {
+            entity.document_id for entity in entities if entity.document_id is not None
+        }
+        document_names = {
+            document_id: semantic_id
+            for document_id, semantic_id in db_session.query(
+                Document.id, Document.semantic_id
+            ).filter(Document.id.in_(document_ids))
+        }
+
+        new_entities: list[KGEntityExtractionStaging] = []
+        new_candidates: list[_ClusterCandidate] = []
+        matches: list[tuple[_ClusterCandidate, KGEntityExtractionStaging]] = []
+        for entity in entities:
+            cluster_index = cluster_indices.get(entity.entity_type_id_name)
+            if cluster_index is None:
+                cluster_index = _load_entity_type_cluster_index(
+                    db_session, entity.entity_type_id_name
+                )
+                cluster_indices[entity.entity_type_id_name] = cluster_index
+
+            has_document = entity.document_id is not None
+            if entity.document_id is not None:
+                entity_name = document_names[entity.document_id].lower()
+            else:
+                entity_name = entity.name.lower()
+
+            # skip those with numbers so we don't cluster version1 and version2, etc.
+            best_candidate = None
+            if not any(char.isdigit() for char in entity_name):
+                best_candidate = cluster_index.find_best_match(
+                    entity_name, has_document
+                )
+
+            if best_candidate is not None:
+                logger.debug(f"Merged {entity.name} with {best_candidate.name}")
+                matches.append((best_candidate, entity))
+                best_candidate.has_document |= has_document
+            else:
+                new_candidate = _ClusterCandidate(
+                    name=entity.name.casefold(), has_document=has_document
+                )
+                cluster_index.add(new_candidate)
+                new_entities.append(entity)
+                new_candidates.append(new_candidate)
+
+        transferred_entities = transfer_entities(db_session, new_entities)
+        for entity, candidate in zip(new_entities, new_candidates):
+            candidate.id_name = transferred_entities[entity.id_name].id_name
+
+        children_by_parent: dict[str, list[KGEntityExtractionStaging]] = {}
+        for candidate, entity in matches:
+            children_by_parent.setdefault(cast(str, candidate.id_name), []).append(
+                entity
+            )
+        parents = (
+            db_session.query(KGEntity)
+            .filter(KGEntity.id_name.in_(children_by_parent.keys()))
+            .all()
+            if children_by_parent
+            else []
+        )
+        merge_entities_batch(
+            db_session,
+            [(parent, children_by_parent[parent.id_name]) for parent in parents],
+        )
+
+        db_session.commit()
+
+
 def _create_one_parent_child_relationship(entity: KGEntityExtractionStaging) -> None:
     """
     Creates a relationship between the entity and its parent, if it exists.
@@ -322,13 +470,23 @@ def kg_clustering(
     # Cluster and transfer grounded entities sequentially
     start_time = time.monotonic()
     i_batch = 0
+    cluster_indices: dict[str, _EntityTypeClusterIndex] = {}
     for i_batch, untransferred_grounded_entities in enumerate(
         _get_batch_untransferred_grounded_entities(
-            batch_size=processing_chunk_batch_size
+            batch_size=(
+                KG_CLUSTERING_BATCH_SIZE
+                if KG_CLUSTERING_BATCH_MODE
+                else processing_chunk_batch_size
+            )
         )
     ):
-        for entity in untransferred_grounded_entities:
-            _cluster_one_grounded_entity(entity)
+        if KG_CLUSTERING_BATCH_MODE:
+            _cluster_grounded_entity_batch(
+                untransferred_grounded_entities, cluster_indices
+            )
+        else:
+            for entity in untransferred_grounded_entities:
+                _cluster_one_grounded_entity(entity)
         last_lock_time = extend_lock(
             lock, CELERY_GENERIC_BEAT_LOCK_TIMEOUT, last_lock_time
         )
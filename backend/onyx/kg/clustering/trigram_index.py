@@ -0,0 +1,77 @@
+import math
+import re
+from collections import defaultdict
+
+# pg_trgm treats every run of alphanumeric characters as a word
+_WORD_PATTERN = re.compile(r"[^\W_]+")
+
+
+def get_trigrams(text: str) -> frozenset[str]:
+    """
+    Extracts trigrams the same way pg_trgm does: the text is lower-cased, split into
+    alphanumeric words, and each word is padded with two spaces in front and one behind.
+    """
+    trigrams: set[str] = set()
+    for word in _WORD_PATTERN.findall(text.lower()):
+        padded = f"  {word} "
+        trigrams.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return frozenset(trigrams)
+
+
+def trigram_similarity(a: frozenset[str], b: frozenset[str]) -> float:
+    """Same as pg_trgm's similarity(): shared trigrams over the union of trigrams."""
+    if not a or not b:
+        return 0.0
+    num_common = len(a & b)
+    return num_common / (len(a) + len(b) - num_common)
+
+
+class TrigramIndex:
+    """
+    In-memory equivalent of a pg_trgm GIN index with a similarity threshold.
+
+    Texts are referred to by the position they were added at. Lookups only look at
+    the postings of the query's rarest trigrams: a text with a similarity of at least
+    `threshold` must share at least ceil(threshold * |query trigrams|) trigrams with
+    the query, so it has to contain one of the (|query trigrams| - that + 1) rarest.
+    The candidates are then verified with the exact similarity.
+    """
+
+    def __init__(self, threshold: float) -> None:
+        self.threshold = threshold
+        self._trigrams: list[frozenset[str]] = []
+        self._postings: dict[str, list[int]] = defaultdict(list)
+
+    def __len__(self) -> int:
+        return len(self._trigrams)
+
+    def add(self, text: str) -> int:
+        position = len(self._trigrams)
+        trigrams = get_trigrams(text)
+        self._trigrams.append(trigrams)
+        for trigram in trigrams:
+            self._postings[trigram].append(position)
+        return position
+
+    def search(self, text: str) -> list[int]:
+        """Returns the positions of all texts similar to `text`, in insertion order."""
+        query_trigrams = get_trigrams(text)
+        if not query_trigrams:
+            return []
+
+        min_common = max(1, math.ceil(self.threshold * len(query_trigrams) - 1e-9))
+        num_probe = len(query_trigrams) - min_common + 1
+        rarest_trigrams = sorted(
+            query_trigrams, key=lambda trigram: len(self._postings.get(trigram, ()))
+        )[:num_probe]
+
+        candidates: set[int] = set()
+        for trigram in rarest_trigrams:
+            candidates.update(self._postings.get(trigram, ()))
+
+        return sorted(
+            position
+            for position in candidates
+            if trigram_similarity(query_trigrams, self._trigrams[position])
+            >= self.threshold
+        )
@@ -25,7 +25,9 @@ from onyx.llm.llm_provider_options import OPENROUTER_PROVIDER_NAME
 from onyx.llm.override_models import LLMOverride
 from onyx.llm.utils import get_max_input_tokens_from_llm_provider
 from onyx.llm.utils import model_supports_image_input
+from onyx.natural_language_processing.utils import get_shared_token_count_cache
 from onyx.natural_language_processing.utils import get_tokenizer
+from onyx.natural_language_processing.utils import TokenCountCache
 from onyx.server.manage.llm.models import LLMProviderView
 from onyx.utils.headers import build_llm_extra_headers
 from onyx.utils.logger import setup_logger
@@ -414,6 +416,13 @@ def get_llm_tokenizer_encode_func(llm: LLM) -> Callable[[str], list[int]]:
     return llm_tokenizer.encode
 
 
-def get_llm_token_counter(llm: LLM) -> Callable[[str], int]:
-    tokenizer_encode_func = get_llm_tokenizer_encode_func(llm)
-    return lambda text: len(tokenizer_encode_func(text))
+def get_llm_token_counter(llm: LLM) -> TokenCountCache:
+    """Get a memoizing token counter for an LLM. The counter is shared by everything
+    using the same tokenizer, so repeated texts (system prompts, chat history files)
+    are only tokenized once per process."""
+    return get_shared_token_count_cache(
+        get_tokenizer(
+            model_name=llm.config.model_name,
+            provider_type=llm.config.model_provider,
+        )
+    )
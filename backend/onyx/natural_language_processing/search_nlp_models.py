@@ -51,6 +51,7 @@ from shared_configs.configs import DOC_EMBEDDING_CONTEXT_SIZE
 from shared_configs.configs import INDEXING_MODEL_SERVER_HOST
 from shared_configs.configs import INDEXING_MODEL_SERVER_PORT
 from shared_configs.configs import INDEXING_ONLY
+from shared_configs.configs import MODEL_SERVER_EMBEDDING_TRANSPORT
 from shared_configs.configs import MODEL_SERVER_HOST
 from shared_configs.configs import MODEL_SERVER_PORT
 from shared_configs.configs import OPENAI_EMBEDDING_TIMEOUT
@@ -62,9 +63,12 @@ from shared_configs.enums import RerankerProvider
 from shared_configs.model_server_models import ConnectorClassificationRequest
 from shared_configs.model_server_models import ConnectorClassificationResponse
 from shared_configs.model_server_models import ContentClassificationPrediction
+from shared_configs.model_server_models import decode_embeddings
 from shared_configs.model_server_models import Embedding
+from shared_configs.model_server_models import EMBEDDINGS_MEDIA_TYPE_PREFIX
 from shared_configs.model_server_models import EmbedRequest
 from shared_configs.model_server_models import EmbedResponse
+from shared_configs.model_server_models import get_embeddings_media_type
 from shared_configs.model_server_models import InformationContentClassificationResponses
 from shared_configs.model_server_models import IntentRequest
 from shared_configs.model_server_models import IntentResponse
@@ -682,6 +686,13 @@ class EmbeddingModel:
             if request_id:
                 headers["X-Onyx-Request-ID"] = request_id
 
+            if MODEL_SERVER_EMBEDDING_TRANSPORT != "json":
+                # older model servers ignore this and keep responding with JSON
+                headers["Accept"] = (
+                    f"{get_embeddings_media_type(MODEL_SERVER_EMBEDDING_TRANSPORT)}, "
+                    "application/json;q=0.5"
+                )
+
             response = requests.post(
                 endpoint,
                 headers=headers,
@@ -713,6 +724,13 @@ class EmbeddingModel:
 
         try:
             response = final_make_request_func()
+            if response.headers.get("Content-Type", "").startswith(
+                EMBEDDINGS_MEDIA_TYPE_PREFIX
+            ):
+                # already validated by the model server, skip per-float validation
+                return EmbedResponse.model_construct(
+                    embeddings=decode_embeddings(response.content).tolist()
+                )
             return EmbedResponse(**response.json())
         except requests.HTTPError as e:
             if not response:
@@ -1,6 +1,10 @@
+import hashlib
 import os
+import threading
 from abc import ABC
 from abc import abstractmethod
+from collections import OrderedDict
+from collections.abc import Sequence
 from copy import copy
 
 from tokenizers import Encoding  # type: ignore
@@ -32,6 +36,9 @@ class BaseTokenizer(ABC):
     def decode(self, tokens: list[int]) -> str:
         pass
 
+    def encode_batch(self, strings: Sequence[str]) -> list[list[int]]:
+        return [self.encode(string) for string in strings]
+
 
 class TiktokenTokenizer(BaseTokenizer):
     _instances: dict[str, "TiktokenTokenizer"] = {}
@@ -51,6 +58,9 @@ class TiktokenTokenizer(BaseTokenizer):
         # this ignores special tokens that the model is trained on, see encode_ordinary for details
         return self.encoder.encode_ordinary(string)
 
+    def encode_batch(self, strings: Sequence[str]) -> list[list[int]]:
+        return self.encoder.encode_ordinary_batch(list(strings))
+
     def tokenize(self, string: str) -> list[str]:
         encoded = self.encode(string)
         decoded = [self.encoder.decode([token]) for token in encoded]
@@ -87,6 +97,18 @@ class HuggingFaceTokenizer(BaseTokenizer):
         # this returns no special tokens
         return self._safer_encode(string).ids
 
+    def encode_batch(self, strings: Sequence[str]) -> list[list[int]]:
+        # the fast tokenizer encodes the whole batch in parallel in native code
+        try:
+            return [
+                encoding.ids
+                for encoding in self.encoder.encode_batch(
+                    list(strings), add_special_tokens=False
+                )
+            ]
+        except Exception:
+            return [self.encode(string) for string in strings]
+
     def tokenize(self, string: str) -> list[str]:
         return self._safer_encode(string).tokens
 
@@ -94,6 +116,106 @@ class HuggingFaceTokenizer(BaseTokenizer):
         return self.encoder.decode(tokens)
 
 
+# texts at least this long are keyed by their digest so that the cache doesn't keep
+# large texts (pasted files, tool responses) alive
+_HASHED_KEY_MIN_CHARS = 1024
+
+
+def _token_count_key(text: str) -> str:
+    if len(text) < _HASHED_KEY_MIN_CHARS:
+        return text
+    digest = hashlib.sha256(text.encode("utf-8", "surrogatepass")).hexdigest()
+    # the NUL prefix keeps digests from colliding with short texts
+    return f"\0{digest}"
+
+
+class TokenCountCache:
+    """Memoizes token counts for a tokenizer.
+
+    Indexing counts tokens for the same text many times (a sentence is counted when
+    splitting chunks, again for the blurb and again for mini-chunks, and titles /
+    metadata repeat across documents), and chat counts the same prompts and files on
+    every turn. Long texts are keyed by a content hash. Least recently used entries are
+    evicted once the cached keys exceed `max_chars` characters in total. Thread safe."""
+
+    def __init__(self, tokenizer: BaseTokenizer, max_chars: int = 8_000_000):
+        self.tokenizer = tokenizer
+        self.max_chars = max_chars
+        self._counts: OrderedDict[str, int] = OrderedDict()
+        self._cached_chars = 0
+        self._lock = threading.Lock()
+
+    def _get(self, key: str) -> int | None:
+        with self._lock:
+            count = self._counts.get(key)
+            if count is not None:
+                self._counts.move_to_end(key)
+            return count
+
+    def _put(self, key: str, count: int) -> None:
+        if len(key) > self.max_chars:
+            return
+        with self._lock:
+            if key in self._counts:
+                return
+            self._counts[key] = count
+            self._cached_chars += len(key)
+            while self._cached_chars > self.max_chars:
+                evicted_key, _ = self._counts.popitem(last=False)
+                self._cached_chars -= len(evicted_key)
+
+    def count(self, text: str) -> int:
+        key = _token_count_key(text)
+        count = self._get(key)
+        if count is None:
+            count = len(self.tokenizer.encode(text))
+            self._put(key, count)
+        return count
+
+    def count_batch(self, texts: Sequence[str]) -> list[int]:
+        """Counts tokens for many texts, encoding all cache misses in one batch."""
+        keys = [_token_count_key(text) for text in texts]
+        counts: list[int | None] = [self._get(key) for key in keys]
+        missing_texts = {
+            key: text for key, text, count in zip(keys, texts, counts) if count is None
+        }
+        if missing_texts:
+            missing_counts = {
+                key: len(token_ids)
+                for key, token_ids in zip(
+                    missing_texts,
+                    self.tokenizer.encode_batch(list(missing_texts.values())),
+                )
+            }
+            for key, count in missing_counts.items():
+                self._put(key, count)
+            counts = [
+                missing_counts[key] if count is None else count
+                for key, count in zip(keys, counts)
+            ]
+        return [count for count in counts if count is not None]
+
+    def __call__(self, text: str) -> int:
+        return self.count(text)
+
+
+# tokenizers live for the whole process (see _check_tokenizer_cache), the caches hold
+# a reference to them so keying by id is safe
+_SHARED_TOKEN_COUNT_CACHES: dict[int, TokenCountCache] = {}
+_SHARED_TOKEN_COUNT_CACHES_LOCK = threading.Lock()
+
+
+def get_shared_token_count_cache(tokenizer: BaseTokenizer) -> TokenCountCache:
+    """Returns the process wide token count cache of a tokenizer, so that e.g. the
+    prompts and files of a chat session are only tokenized once across turns."""
+    with _SHARED_TOKEN_COUNT_CACHES_LOCK:
+        cache = _SHARED_TOKEN_COUNT_CACHES.get(id(tokenizer))
+        if cache is None:
+            cache = TokenCountCache(tokenizer)
+            _SHARED_TOKEN_COUNT_CACHES[id(tokenizer)] = cache
+        return cache
+
+
 _TOKENIZER_CACHE: dict[tuple[EmbeddingProvider | None, str | None], BaseTokenizer] = {}
 
 
@@ -17,6 +17,7 @@ from onyx.configs.constants import OnyxCeleryTask
 from onyx.configs.constants import OnyxRedisConstants
 from onyx.db.connector_credential_pair import get_connector_credential_pair_from_id
 from onyx.db.document import construct_document_id_select_for_connector_credential_pair
+from onyx.utils.batching import batch_generator
 
 
 class RedisConnectorDeletePayload(BaseModel):
@@ -74,12 +75,16 @@ class RedisConnectorDelete:
 
     def set_fence(self, payload: RedisConnectorDeletePayload | None) -> None:
         if not payload:
-            self.redis.srem(OnyxRedisConstants.ACTIVE_FENCES, self.fence_key)
-            self.redis.delete(self.fence_key)
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.srem(OnyxRedisConstants.ACTIVE_FENCES, self.fence_key)
+            pipe.delete(self.fence_key)
+            pipe.execute()
             return
 
-        self.redis.set(self.fence_key, payload.model_dump_json())
-        self.redis.sadd(OnyxRedisConstants.ACTIVE_FENCES, self.fence_key)
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.set(self.fence_key, payload.model_dump_json())
+        pipe.sadd(OnyxRedisConstants.ACTIVE_FENCES, self.fence_key)
+        pipe.execute()
 
     def set_active(self) -> None:
         """This sets a signal to keep the permissioning flow from getting cleaned up within
@@ -104,9 +109,12 @@ class RedisConnectorDelete:
         celery_app: Celery,
         db_session: Session,
         lock: RedisLock,
+        batch_size: int = 1,
     ) -> int | None:
         """Returns None if the cc_pair doesn't exist.
-        Otherwise, returns an int with the number of generated tasks."""
+        Otherwise, returns an int with the number of generated tasks.
+
+        If batch_size > 1, each task cleans up to batch_size documents."""
         last_lock_time = time.monotonic()
 
         cc_pair = get_connector_credential_pair_from_id(
@@ -121,8 +129,9 @@ class RedisConnectorDelete:
         stmt = construct_document_id_select_for_connector_credential_pair(
             cc_pair.connector_id, cc_pair.credential_id
         )
-        for doc_id in db_session.scalars(stmt).yield_per(DB_YIELD_PER_DEFAULT):
-            doc_id = cast(str, doc_id)
+        doc_ids = db_session.scalars(stmt).yield_per(DB_YIELD_PER_DEFAULT)
+        for doc_id_batch in batch_generator(doc_ids, max(batch_size, 1)):
+            doc_id_batch = cast(list[str], doc_id_batch)
             current_time = time.monotonic()
             if current_time - last_lock_time >= (
                 CELERY_VESPA_SYNC_BEAT_LOCK_TIMEOUT / 4
@@ -137,29 +146,44 @@ class RedisConnectorDelete:
             self.redis.sadd(self.taskset_key, custom_task_id)
 
             # Priority on sync's triggered by new indexing should be medium
-            celery_app.send_task(
-                OnyxCeleryTask.DOCUMENT_BY_CC_PAIR_CLEANUP_TASK,
-                kwargs=dict(
-                    document_id=doc_id,
-                    connector_id=cc_pair.connector_id,
-                    credential_id=cc_pair.credential_id,
-                    tenant_id=self.tenant_id,
-                ),
-                queue=OnyxCeleryQueues.CONNECTOR_DELETION,
-                task_id=custom_task_id,
-                priority=OnyxCeleryPriority.MEDIUM,
-                ignore_result=True,
-            )
+            if batch_size > 1:
+                celery_app.send_task(
+                    OnyxCeleryTask.DOCUMENT_BY_CC_PAIR_CLEANUP_BATCH_TASK,
+                    kwargs=dict(
+                        document_ids=doc_id_batch,
+                        connector_id=cc_pair.connector_id,
+                        credential_id=cc_pair.credential_id,
+                        tenant_id=self.tenant_id,
+                    ),
+                    queue=OnyxCeleryQueues.CONNECTOR_DELETION,
+                    task_id=custom_task_id,
+                    priority=OnyxCeleryPriority.MEDIUM,
+                    ignore_result=True,
+                )
+            else:
+                celery_app.send_task(
+                    OnyxCeleryTask.DOCUMENT_BY_CC_PAIR_CLEANUP_TASK,
+                    kwargs=dict(
+                        document_id=doc_id_batch[0],
+                        connector_id=cc_pair.connector_id,
+                        credential_id=cc_pair.credential_id,
+                        tenant_id=self.tenant_id,
+                    ),
+                    queue=OnyxCeleryQueues.CONNECTOR_DELETION,
+                    task_id=custom_task_id,
+                    priority=OnyxCeleryPriority.MEDIUM,
+                    ignore_result=True,
+                )
 
             num_tasks_sent += 1
 
         return num_tasks_sent
 
     def reset(self) -> None:
-        self.redis.srem(OnyxRedisConstants.ACTIVE_FENCES, self.fence_key)
-        self.redis.delete(self.active_key)
-        self.redis.delete(self.taskset_key)
-        self.redis.delete(self.fence_key)
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.srem(OnyxRedisConstants.ACTIVE_FENCES, self.fence_key)
+        pipe.delete(self.active_key, self.taskset_key, self.fence_key)
+        pipe.execute()
 
     @staticmethod
     def remove_from_taskset(id: int, task_id: str, r: redis.Redis) -> None:
@@ -81,8 +81,7 @@ class RedisConnectorPermissionSync:
         self.redis.delete(self.taskset_key)
 
     def generator_clear(self) -> None:
-        self.redis.delete(self.generator_progress_key)
-        self.redis.delete(self.generator_complete_key)
+        self.redis.delete(self.generator_progress_key, self.generator_complete_key)
 
     def get_remaining(self) -> int:
         remaining = cast(int, self.redis.scard(self.taskset_key))
@@ -122,12 +121,16 @@ class RedisConnectorPermissionSync:
         payload: RedisConnectorPermissionSyncPayload | None,
     ) -> None:
         if not payload:
-            self.redis.srem(OnyxRedisConstants.ACTIVE_FENCES, self.fence_key)
-            self.redis.delete(self.fence_key)
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.srem(OnyxRedisConstants.ACTIVE_FENCES, self.fence_key)
+            pipe.delete(self.fence_key)
+            pipe.execute()
             return
 
-        self.redis.set(self.fence_key, payload.model_dump_json())
-        self.redis.sadd(OnyxRedisConstants.ACTIVE_FENCES, self.fence_key)
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.set(self.fence_key, payload.model_dump_json())
+        pipe.sadd(OnyxRedisConstants.ACTIVE_FENCES, self.fence_key)
+        pipe.execute()
 
     def set_active(self) -> None:
         """This sets a signal to keep the permissioning flow from getting cleaned up within
@@ -173,22 +176,17 @@ class RedisConnectorPermissionSync:
         credential_id: int,
         task_logger: Logger | None = None,
     ) -> PermissionSyncResult:
-        """Update permissions for documents.
+        """Update permissions for documents. The documents are written in one batch,
+        if that fails they are retried one at a time so that a single bad document
+        doesn't fail the others.
 
         Returns:
             PermissionSyncResult containing counts of successful updates and errors
         """
         last_lock_time = time.monotonic()
 
-        document_update_permissions_fn = fetch_versioned_implementation(
-            "onyx.background.celery.tasks.doc_permission_syncing.tasks",
-            "document_update_permissions",
-        )
-
-        num_permissions = 0
-        num_errors = 0
-        # Create a task for each document permission sync
-        for permissions in new_permissions:
+        def maybe_reacquire_lock() -> None:
+            nonlocal last_lock_time
             current_time = time.monotonic()
             if lock and current_time - last_lock_time >= (
                 CELERY_GENERIC_BEAT_LOCK_TIMEOUT / 4
@@ -196,6 +194,17 @@ class RedisConnectorPermissionSync:
                 lock.reacquire()
                 last_lock_time = current_time
 
+        document_update_permissions_fn = fetch_versioned_implementation(
+            "onyx.background.celery.tasks.doc_permission_syncing.tasks",
+            "document_update_permissions",
+        )
+        document_update_permissions_batch_fn = fetch_versioned_implementation(
+            "onyx.background.celery.tasks.doc_permission_syncing.tasks",
+            "document_update_permissions_batch",
+        )
+
+        valid_permissions: list[DocExternalAccess] = []
+        for permissions in new_permissions:
             if (
                 permissions.external_access.num_entries
                 > permissions.external_access.MAX_NUM_ENTRIES
@@ -212,12 +221,39 @@ class RedisConnectorPermissionSync:
                         f"{permissions.external_access.MAX_NUM_ENTRIES=}"
                     )
                 continue
+            valid_permissions.append(permissions)
+
+        if not valid_permissions:
+            return PermissionSyncResult(num_updated=0, num_errors=0)
+
+        # NOTE(rkuo): this used to fire a task instead of directly writing to the DB,
+        # but the permissions can be excessively large if sent over the wire.
+        # On the other hand, the downside of doing db updates here is that we can
+        # block and fail if we can't make the calls to the DB ... but that's probably
+        # a rare enough case to be acceptable.
+        maybe_reacquire_lock()
+        try:
+            document_update_permissions_batch_fn(
+                self.tenant_id,
+                valid_permissions,
+                source_string,
+                connector_id,
+                credential_id,
+            )
+            return PermissionSyncResult(
+                num_updated=len(valid_permissions), num_errors=0
+            )
+        except Exception:
+            if task_logger:
+                task_logger.exception(
+                    f"Failed to update permissions for a batch of "
+                    f"{len(valid_permissions)} documents, retrying them one at a time"
+                )
 
-            # NOTE(rkuo): this used to fire a task instead of directly writing to the DB,
-            # but the permissions can be excessively large if sent over the wire.
-            # On the other hand, the downside of doing db updates here is that we can
-            # block and fail if we can't make the calls to the DB ... but that's probably
-            # a rare enough case to be acceptable.
+        num_permissions = 0
+        num_errors = 0
+        for permissions in valid_permissions:
+            maybe_reacquire_lock()
 
             # This can internally exception due to db issues but still continue
             # Catch exceptions per-document to avoid breaking the entire sync
@@ -241,12 +277,16 @@ class RedisConnectorPermissionSync:
         return PermissionSyncResult(num_updated=num_permissions, num_errors=num_errors)
 
     def reset(self) -> None:
-        self.redis.srem(OnyxRedisConstants.ACTIVE_FENCES, self.fence_key)
-        self.redis.delete(self.active_key)
-        self.redis.delete(self.generator_progress_key)
-        self.redis.delete(self.generator_complete_key)
-        self.redis.delete(self.taskset_key)
-        self.redis.delete(self.fence_key)
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.srem(OnyxRedisConstants.ACTIVE_FENCES, self.fence_key)
+        pipe.delete(
+            self.active_key,
+            self.generator_progress_key,
+            self.generator_complete_key,
+            self.taskset_key,
+            self.fence_key,
+        )
+        pipe.execute()
 
     @staticmethod
     def remove_from_taskset(id: int, task_id: str, r: redis.Redis) -> None:
@@ -17,6 +17,7 @@ from onyx.configs.constants import OnyxCeleryTask
 from onyx.configs.constants import OnyxRedisConstants
 from onyx.db.connector_credential_pair import get_connector_credential_pair_from_id
 from onyx.redis.redis_pool import SCAN_ITER_COUNT_DEFAULT
+from onyx.utils.batching import batch_generator
 
 
 class RedisConnectorPrunePayload(BaseModel):
@@ -71,8 +72,7 @@ class RedisConnectorPrune:
         self.redis.delete(self.taskset_key)
 
     def generator_clear(self) -> None:
-        self.redis.delete(self.generator_progress_key)
-        self.redis.delete(self.generator_complete_key)
+        self.redis.delete(self.generator_progress_key, self.generator_complete_key)
 
     def get_remaining(self) -> int:
         # todo: move into fence
@@ -111,12 +111,16 @@ class RedisConnectorPrune:
         payload: RedisConnectorPrunePayload | None,
     ) -> None:
         if not payload:
-            self.redis.srem(OnyxRedisConstants.ACTIVE_FENCES, self.fence_key)
-            self.redis.delete(self.fence_key)
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.srem(OnyxRedisConstants.ACTIVE_FENCES, self.fence_key)
+            pipe.delete(self.fence_key)
+            pipe.execute()
             return
 
-        self.redis.set(self.fence_key, payload.model_dump_json())
-        self.redis.sadd(OnyxRedisConstants.ACTIVE_FENCES, self.fence_key)
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.set(self.fence_key, payload.model_dump_json())
+        pipe.sadd(OnyxRedisConstants.ACTIVE_FENCES, self.fence_key)
+        pipe.execute()
 
     def set_active(self) -> None:
         """This sets a signal to keep the permissioning flow from getting cleaned up within
@@ -156,7 +160,12 @@ class RedisConnectorPrune:
         celery_app: Celery,
         db_session: Session,
         lock: RedisLock | None,
+        batch_size: int = 1,
     ) -> int | None:
+        """Returns None if the cc_pair doesn't exist.
+        Otherwise, returns an int with the number of generated tasks.
+
+        If batch_size > 1, each task cleans up to batch_size documents."""
         last_lock_time = time.monotonic()
 
         async_results = []
@@ -167,7 +176,7 @@ class RedisConnectorPrune:
         if not cc_pair:
             return None
 
-        for doc_id in documents_to_prune:
+        for doc_id_batch in batch_generator(documents_to_prune, max(batch_size, 1)):
             current_time = time.monotonic()
             if lock and current_time - last_lock_time >= (
                 CELERY_GENERIC_BEAT_LOCK_TIMEOUT / 4
@@ -185,31 +194,50 @@ class RedisConnectorPrune:
             self.redis.sadd(self.taskset_key, custom_task_id)
 
             # Priority on sync's triggered by new indexing should be medium
-            result = celery_app.send_task(
-                OnyxCeleryTask.DOCUMENT_BY_CC_PAIR_CLEANUP_TASK,
-                kwargs=dict(
-                    document_id=doc_id,
-                    connector_id=cc_pair.connector_id,
-                    credential_id=cc_pair.credential_id,
-                    tenant_id=self.tenant_id,
-                ),
-                queue=OnyxCeleryQueues.CONNECTOR_DELETION,
-                task_id=custom_task_id,
-                priority=OnyxCeleryPriority.MEDIUM,
-                ignore_result=True,
-            )
+            if batch_size > 1:
+                result = celery_app.send_task(
+                    OnyxCeleryTask.DOCUMENT_BY_CC_PAIR_CLEANUP_BATCH_TASK,
+                    kwargs=dict(
+                        document_ids=doc_id_batch,
+                        connector_id=cc_pair.connector_id,
+                        credential_id=cc_pair.credential_id,
+                        tenant_id=self.tenant_id,
+                    ),
+                    queue=OnyxCeleryQueues.CONNECTOR_DELETION,
+                    task_id=custom_task_id,
+                    priority=OnyxCeleryPriority.MEDIUM,
+                    ignore_result=True,
+                )
+            else:
+                result = celery_app.send_task(
+                    OnyxCeleryTask.DOCUMENT_BY_CC_PAIR_CLEANUP_TASK,
+                    kwargs=dict(
+                        document_id=doc_id_batch[0],
+                        connector_id=cc_pair.connector_id,
+                        credential_id=cc_pair.credential_id,
+                        tenant_id=self.tenant_id,
+                    ),
+                    queue=OnyxCeleryQueues.CONNECTOR_DELETION,
+                    task_id=custom_task_id,
+                    priority=OnyxCeleryPriority.MEDIUM,
+                    ignore_result=True,
+                )
 
             async_results.append(result)
 
         return len(async_results)
 
     def reset(self) -> None:
-        self.redis.srem(OnyxRedisConstants.ACTIVE_FENCES, self.fence_key)
-        self.redis.delete(self.active_key)
-        self.redis.delete(self.generator_progress_key)
-        self.redis.delete(self.generator_complete_key)
-        self.redis.delete(self.taskset_key)
-        self.redis.delete(self.fence_key)
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.srem(OnyxRedisConstants.ACTIVE_FENCES, self.fence_key)
+        pipe.delete(
+            self.active_key,
+            self.generator_progress_key,
+            self.generator_complete_key,
+            self.taskset_key,
+            self.fence_key,
+        )
+        pipe.execute()
 
     @staticmethod
     def remove_from_taskset(id: int, task_id: str, r: redis.Redis) -> None:
@@ -16,6 +16,7 @@ from onyx.configs.constants import OnyxCeleryTask
 from onyx.configs.constants import OnyxRedisConstants
 from onyx.db.document_set import construct_document_id_select_by_docset
 from onyx.redis.redis_object_helper import RedisObjectHelper
+from onyx.utils.batching import batch_generator
 
 
 class RedisDocumentSet(RedisObjectHelper):
@@ -32,12 +33,16 @@ class RedisDocumentSet(RedisObjectHelper):
 
     def set_fence(self, payload: int | None) -> None:
         if payload is None:
-            self.redis.srem(OnyxRedisConstants.ACTIVE_FENCES, self.fence_key)
-            self.redis.delete(self.fence_key)
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.srem(OnyxRedisConstants.ACTIVE_FENCES, self.fence_key)
+            pipe.delete(self.fence_key)
+            pipe.execute()
             return
 
-        self.redis.set(self.fence_key, payload)
-        self.redis.sadd(OnyxRedisConstants.ACTIVE_FENCES, self.fence_key)
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.set(self.fence_key, payload)
+        pipe.sadd(OnyxRedisConstants.ACTIVE_FENCES, self.fence_key)
+        pipe.execute()
 
     @property
     def payload(self) -> int | None:
@@ -56,17 +61,23 @@ class RedisDocumentSet(RedisObjectHelper):
         redis_client: Redis,
         lock: RedisLock,
         tenant_id: str,
+        batch_size: int = 1,
     ) -> tuple[int, int] | None:
         """Max tasks is ignored for now until we can build the logic to mark the
         document set up to date over multiple batches.
+
+        If batch_size > 1, each task syncs up to batch_size documents.
         """
         last_lock_time = time.monotonic()
 
         num_tasks_sent = 0
 
         stmt = construct_document_id_select_by_docset(int(self._id), current_only=False)
-        for doc_id in db_session.scalars(stmt).yield_per(DB_YIELD_PER_DEFAULT):
-            doc_id = cast(str, doc_id)
+        num_docs = 0
+
+        doc_ids = db_session.scalars(stmt).yield_per(DB_YIELD_PER_DEFAULT)
+        for doc_id_batch in batch_generator(doc_ids, max(batch_size, 1)):
+            doc_id_batch = cast(list[str], doc_id_batch)
             current_time = time.monotonic()
             if current_time - last_lock_time >= (
                 CELERY_VESPA_SYNC_BEAT_LOCK_TIMEOUT / 4
@@ -83,22 +94,33 @@ class RedisDocumentSet(RedisObjectHelper):
             # add to the set BEFORE creating the task.
             redis_client.sadd(self.taskset_key, custom_task_id)
 
-            celery_app.send_task(
-                OnyxCeleryTask.VESPA_METADATA_SYNC_TASK,
-                kwargs=dict(document_id=doc_id, tenant_id=tenant_id),
-                queue=OnyxCeleryQueues.VESPA_METADATA_SYNC,
-                task_id=custom_task_id,
-                priority=OnyxCeleryPriority.MEDIUM,
-            )
+            if batch_size > 1:
+                celery_app.send_task(
+                    OnyxCeleryTask.VESPA_METADATA_SYNC_BATCH_TASK,
+                    kwargs=dict(document_ids=doc_id_batch, tenant_id=tenant_id),
+                    queue=OnyxCeleryQueues.VESPA_METADATA_SYNC,
+                    task_id=custom_task_id,
+                    priority=OnyxCeleryPriority.MEDIUM,
+                )
+            else:
+                celery_app.send_task(
+                    OnyxCeleryTask.VESPA_METADATA_SYNC_TASK,
+                    kwargs=dict(document_id=doc_id_batch[0], tenant_id=tenant_id),
+                    queue=OnyxCeleryQueues.VESPA_METADATA_SYNC,
+                    task_id=custom_task_id,
+                    priority=OnyxCeleryPriority.MEDIUM,
+                )
 
             num_tasks_sent += 1
+            num_docs += len(doc_id_batch)
 
-        return num_tasks_sent, num_tasks_sent
+        return num_tasks_sent, num_docs
 
     def reset(self) -> None:
-        self.redis.srem(OnyxRedisConstants.ACTIVE_FENCES, self.fence_key)
-        self.redis.delete(self.taskset_key)
-        self.redis.delete(self.fence_key)
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.srem(OnyxRedisConstants.ACTIVE_FENCES, self.fence_key)
+        pipe.delete(self.taskset_key, self.fence_key)
+        pipe.execute()
 
     @staticmethod
     def reset_all(r: redis.Redis) -> None:
@@ -11,6 +11,7 @@ from typing import Optional
 import redis
 from fastapi import Request
 from redis import asyncio as aioredis
+from redis.client import Pipeline
 from redis.client import Redis
 from redis.lock import Lock as RedisLock
 
@@ -39,103 +40,267 @@ logger = setup_logger()
 SCAN_ITER_COUNT_DEFAULT = 4096
 
 
-class TenantRedis(redis.Redis):
-    def __init__(self, tenant_id: str, *args: Any, **kwargs: Any) -> None:
-        super().__init__(*args, **kwargs)
-        self.tenant_id: str = tenant_id
+# Commands whose first argument (or `name` keyword argument) is the only key
+_FIRST_KEY_COMMANDS = (
+    "append",
+    "decr",
+    "decrby",
+    "expire",
+    "expireat",
+    "get",
+    "getdel",
+    "getex",
+    "getset",
+    "hdel",
+    "hexists",
+    "hget",
+    "hgetall",
+    "hincrby",
+    "hkeys",
+    "hlen",
+    "hmget",
+    "hscan_iter",
+    "hset",
+    "hsetnx",
+    "hvals",
+    "incr",
+    "incrby",
+    "incrbyfloat",
+    "lindex",
+    "llen",
+    "lock",
+    "lpop",
+    "lpush",
+    "lrange",
+    "lrem",
+    "lset",
+    "ltrim",
+    "persist",
+    "pexpire",
+    "pexpireat",
+    "psetex",
+    "pttl",
+    "rpop",
+    "rpush",
+    "sadd",
+    "scard",
+    "set",
+    "setex",
+    "setnx",
+    "sismember",
+    "smembers",
+    "smismember",
+    "spop",
+    "srandmember",
+    "srem",
+    "strlen",
+    "ttl",
+    "type",
+    "zadd",
+    "zcard",
+    "zcount",
+    "zincrby",
+    "zrange",
+    "zrangebyscore",
+    "zrank",
+    "zrem",
+    "zremrangebyrank",
+    "zremrangebyscore",
+    "zrevrange",
+    "zrevrangebyscore",
+    "zscore",
+)
+
+# Commands where every positional argument is a key
+_ALL_KEYS_COMMANDS = ("delete", "exists", "touch", "unlink", "watch")
+
+# Commands where the first two positional arguments are keys
+_TWO_KEYS_COMMANDS = ("brpoplpush", "rename", "renamenx", "smove")
+
+# Blocking pops, which take a key or a list of keys as their first argument
+_KEYS_LIST_COMMANDS = ("blpop", "brpop")
+
+
+class _TenantKeyPrefixer:
+    """Prefixes keys with the tenant id. The prefix is computed once per client, the
+    prefixing wrappers of the commands are built once per class."""
+
+    tenant_id: str
+    _key_prefix: str
+    _key_prefix_bytes: bytes
+
+    def _set_tenant_id(self, tenant_id: str) -> None:
+        self.tenant_id = tenant_id
+        self._key_prefix = f"{tenant_id}:"
+        self._key_prefix_bytes = self._key_prefix.encode()
 
     def _prefixed(self, key: str | bytes | memoryview) -> str | bytes | memoryview:
-        prefix: str = f"{self.tenant_id}:"
         if isinstance(key, str):
-            if key.startswith(prefix):
+            if key.startswith(self._key_prefix):
                 return key
             else:
-                return prefix + key
+                return self._key_prefix + key
         elif isinstance(key, bytes):
-            prefix_bytes = prefix.encode()
-            if key.startswith(prefix_bytes):
+            if key.startswith(self._key_prefix_bytes):
                 return key
             else:
-                return prefix_bytes + key
+                return self._key_prefix_bytes + key
         elif isinstance(key, memoryview):
             key_bytes = key.tobytes()
-            prefix_bytes = prefix.encode()
-            if key_bytes.startswith(prefix_bytes):
+            if key_bytes.startswith(self._key_prefix_bytes):
                 return key
             else:
-                return memoryview(prefix_bytes + key_bytes)
+                return memoryview(self._key_prefix_bytes + key_bytes)
         else:
             raise TypeError(f"Unsupported key type: {type(key)}")
 
-    def _prefix_method(self, method: Callable) -> Callable:
-        @functools.wraps(method)
-        def wrapper(*args: Any, **kwargs: Any) -> Any:
-            if "name" in kwargs:
-                kwargs["name"] = self._prefixed(kwargs["name"])
-            elif len(args) > 0:
-                args = (self._prefixed(args[0]),) + args[1:]
-            return method(*args, **kwargs)
-
-        return wrapper
-
-    def _prefix_scan_iter(self, method: Callable) -> Callable:
-        @functools.wraps(method)
-        def wrapper(*args: Any, **kwargs: Any) -> Any:
-            # Prefix the match pattern if provided
-            if "match" in kwargs:
-                kwargs["match"] = self._prefixed(kwargs["match"])
-            elif len(args) > 0:
-                args = (self._prefixed(args[0]),) + args[1:]
-
-            # Get the iterator
-            iterator = method(*args, **kwargs)
-
-            # Remove prefix from returned keys
-            prefix = f"{self.tenant_id}:".encode()
-            prefix_len = len(prefix)
-
-            for key in iterator:
-                if isinstance(key, bytes) and key.startswith(prefix):
-                    yield key[prefix_len:]
-                else:
-                    yield key
-
-        return wrapper
-
-    def __getattribute__(self, item: str) -> Any:
-        original_attr = super().__getattribute__(item)
-        methods_to_wrap = [
-            "lock",
-            "unlock",
-            "get",
-            "set",
-            "delete",
-            "exists",
-            "incrby",
-            "hset",
-            "hget",
-            "getset",
-            "owned",
-            "reacquire",
-            "create_lock",
-            "startswith",
-            "smembers",
-            "sismember",
-            "sadd",
-            "srem",
-            "scard",
-            "hexists",
-            "hset",
-            "hdel",
-            "ttl",
-            "pttl",
-        ]  # Regular methods that need simple prefixing
-
-        if item == "scan_iter" or item == "sscan_iter":
-            return self._prefix_scan_iter(original_attr)
-        elif item in methods_to_wrap and callable(original_attr):
-            return self._prefix_method(original_attr)
-        return original_attr
+    def _unprefixed(self, key: Any) -> Any:
+        if isinstance(key, bytes) and key.startswith(self._key_prefix_bytes):
+            return key[len(self._key_prefix_bytes) :]
+        return key
+
+
+def _prefix_first_key(method: Callable) -> Callable:
+    @functools.wraps(method)
+    def wrapper(self: _TenantKeyPrefixer, *args: Any, **kwargs: Any) -> Any:
+        if "name" in kwargs:
+            kwargs["name"] = self._prefixed(kwargs["name"])
+        elif len(args) > 0:
+            args = (self._prefixed(args[0]),) + args[1:]
+        return method(self, *args, **kwargs)
+
+    return wrapper
+
+
+def _prefix_all_keys(method: Callable) -> Callable:
+    @functools.wraps(method)
+    def wrapper(self: _TenantKeyPrefixer, *names: Any) -> Any:
+        return method(self, *[self._prefixed(name) for name in names])
+
+    return wrapper
+
+
+def _prefix_two_keys(method: Callable) -> Callable:
+    @functools.wraps(method)
+    def wrapper(
+        self: _TenantKeyPrefixer, src: Any, dst: Any, *args: Any, **kwargs: Any
+    ) -> Any:
+        return method(self, self._prefixed(src), self._prefixed(dst), *args, **kwargs)
+
+    return wrapper
+
+
+def _prefix_keys_list(method: Callable) -> Callable:
+    @functools.wraps(method)
+    def wrapper(self: _TenantKeyPrefixer, keys: Any, *args: Any, **kwargs: Any) -> Any:
+        if isinstance(keys, (str, bytes, memoryview)):
+            keys = [keys]
+        result = method(self, [self._prefixed(key) for key in keys], *args, **kwargs)
+        # the popped (key, value) pair names the key the value came from
+        if isinstance(result, tuple) and len(result) == 2:
+            return (self._unprefixed(result[0]), result[1])
+        if isinstance(result, list) and len(result) == 2:
+            return [self._unprefixed(result[0]), result[1]]
+        return result
+
+    return wrapper
+
+
+def _prefix_mget(method: Callable) -> Callable:
+    @functools.wraps(method)
+    def wrapper(self: _TenantKeyPrefixer, keys: Any, *args: Any) -> Any:
+        if isinstance(keys, (str, bytes, memoryview)):
+            keys = [keys]
+        return method(self, [self._prefixed(key) for key in [*keys, *args]])
+
+    return wrapper
+
+
+def _prefix_mset(method: Callable) -> Callable:
+    @functools.wraps(method)
+    def wrapper(self: _TenantKeyPrefixer, mapping: dict[Any, Any]) -> Any:
+        return method(
+            self, {self._prefixed(key): value for key, value in mapping.items()}
+        )
+
+    return wrapper
+
+
+def _prefix_scan_iter(method: Callable) -> Callable:
+    @functools.wraps(method)
+    def wrapper(self: _TenantKeyPrefixer, *args: Any, **kwargs: Any) -> Any:
+        # Prefix the match pattern if provided
+        if "match" in kwargs:
+            kwargs["match"] = self._prefixed(kwargs["match"])
+        elif len(args) > 0:
+            args = (self._prefixed(args[0]),) + args[1:]
+
+        # Remove prefix from returned keys
+        for key in method(self, *args, **kwargs):
+            yield self._unprefixed(key)
+
+    return wrapper
+
+
+def _prefix_sscan_iter(method: Callable) -> Callable:
+    @functools.wraps(method)
+    def wrapper(self: _TenantKeyPrefixer, *args: Any, **kwargs: Any) -> Any:
+        # only the set is a key, the match pattern applies to its members
+        if "name" in kwargs:
+            kwargs["name"] = self._prefixed(kwargs["name"])
+        elif len(args) > 0:
+            args = (self._prefixed(args[0]),) + args[1:]
+
+        for member in method(self, *args, **kwargs):
+            yield self._unprefixed(member)
+
+    return wrapper
+
+
+def _add_prefixed_commands(cls: type, base: type) -> None:
+    for command in _FIRST_KEY_COMMANDS:
+        setattr(cls, command, _prefix_first_key(getattr(base, command)))
+    for command in _ALL_KEYS_COMMANDS:
+        setattr(cls, command, _prefix_all_keys(getattr(base, command)))
+    for command in _TWO_KEYS_COMMANDS:
+        setattr(cls, command, _prefix_two_keys(getattr(base, command)))
+    for command in _KEYS_LIST_COMMANDS:
+        setattr(cls, command, _prefix_keys_list(getattr(base, command)))
+    setattr(cls, "mget", _prefix_mget(getattr(base, "mget")))
+    setattr(cls, "mset", _prefix_mset(getattr(base, "mset")))
+    setattr(cls, "scan_iter", _prefix_scan_iter(getattr(base, "scan_iter")))
+    setattr(cls, "sscan_iter", _prefix_sscan_iter(getattr(base, "sscan_iter")))
+
+
+class TenantPipeline(_TenantKeyPrefixer, Pipeline):
+    """A pipeline that prefixes keys with the tenant id, see TenantRedis."""
+
+    def __init__(self, tenant_id: str, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._set_tenant_id(tenant_id)
+
+
+class TenantRedis(_TenantKeyPrefixer, redis.Redis):
+    def __init__(self, tenant_id: str, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._set_tenant_id(tenant_id)
+
+    def pipeline(
+        self, transaction: bool = True, shard_hint: str | None = None
+    ) -> TenantPipeline:
+        """Pipelines (and transactions, which are built on them) prefix keys the same
+        way as the client."""
+        return TenantPipeline(
+            self.tenant_id,
+            self.connection_pool,
+            self.response_callbacks,
+            transaction,
+            shard_hint,
+        )
+
+
+_add_prefixed_commands(TenantPipeline, Pipeline)
+_add_prefixed_commands(TenantRedis, redis.Redis)
 
 
 class RedisPool:
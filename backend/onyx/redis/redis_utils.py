@@ -1,3 +1,9 @@
+from typing import Any
+from typing import cast
+
+from redis import Redis
+
+from onyx.configs.constants import OnyxRedisConstants
 from onyx.redis.redis_connector_delete import RedisConnectorDelete
 from onyx.redis.redis_connector_doc_perm_sync import RedisConnectorPermissionSync
 from onyx.redis.redis_connector_prune import RedisConnectorPrune
@@ -19,3 +25,28 @@ def is_fence(key_bytes: bytes) -> bool:
         return True
 
     return False
+
+
+def get_active_fences(r: Redis, r_replica: Redis) -> list[bytes]:
+    """Returns the fences in the active fence lookup table that still exist.
+
+    The lookup table is read from the replica since it is an optimization and not the
+    source of truth. The fences are checked on the primary with a single pipelined
+    round trip, and stale entries are removed from the table in one call."""
+    keys = [
+        cast(bytes, key)
+        for key in cast(set[Any], r_replica.smembers(OnyxRedisConstants.ACTIVE_FENCES))
+    ]
+    if not keys:
+        return []
+
+    pipe = r.pipeline(transaction=False)
+    for key in keys:
+        pipe.exists(key)
+    exists_results = pipe.execute()
+
+    stale_keys = [key for key, exists in zip(keys, exists_results) if not exists]
+    if stale_keys:
+        r.srem(OnyxRedisConstants.ACTIVE_FENCES, *stale_keys)
+
+    return [key for key, exists in zip(keys, exists_results) if exists]
@@ -70,6 +70,9 @@ from onyx.server.query_and_chat.streaming_models import SearchToolStart
 from onyx.tools.models import SearchToolOverrideKwargs
 from onyx.tools.models import ToolResponse
 from onyx.tools.tool import Tool
+from onyx.tools.tool_implementations.search.constants import (
+    FULL_DOC_NUM_CHUNKS_AROUND,
+)
 from onyx.tools.tool_implementations.search.constants import (
     KEYWORD_QUERY_HYBRID_ALPHA,
 )
@@ -92,6 +95,9 @@ from onyx.tools.tool_implementations.search.search_utils import (
 from onyx.tools.tool_implementations.search.search_utils import (
     merge_overlapping_sections,
 )
+from onyx.tools.tool_implementations.search.search_utils import (
+    retrieve_adjacent_chunks_batch,
+)
 from onyx.tools.tool_implementations.search.search_utils import (
     weighted_reciprocal_rank_fusion,
 )
@@ -549,6 +555,15 @@ class SearchTool(Tool[SearchToolOverrideKwargs]):
                 )
             )
 
+            # Fetch the chunks around all selected sections in a single round trip,
+            # the widest expansion covers everything the classification needs
+            adjacent_chunks = retrieve_adjacent_chunks_batch(
+                sections=selected_sections,
+                document_index=self.document_index,
+                num_chunks_above=FULL_DOC_NUM_CHUNKS_AROUND,
+                num_chunks_below=FULL_DOC_NUM_CHUNKS_AROUND,
+            )
+
             # Create wrapper function to handle errors gracefully
             def expand_section_safe(
                 section: InferenceSection,
@@ -556,6 +571,9 @@ class SearchTool(Tool[SearchToolOverrideKwargs]):
                 llm: LLM,
                 document_index: DocumentIndex,
                 expand_override: bool,
+                section_adjacent_chunks: tuple[
+                    list[InferenceChunk], list[InferenceChunk]
+                ],
             ) -> InferenceSection:
                 """Wrapper that handles exceptions and returns original section on error."""
                 try:
@@ -565,6 +583,7 @@ class SearchTool(Tool[SearchToolOverrideKwargs]):
                         llm=llm,
                         document_index=document_index,
                         expand_override=expand_override,
+                        adjacent_chunks=section_adjacent_chunks,
                     )
                     # Return expanded section if not None, otherwise original
                     return expanded_section if expanded_section is not None else section
@@ -584,9 +603,12 @@ class SearchTool(Tool[SearchToolOverrideKwargs]):
                         self.llm,
                         self.document_index,
                         section.center_chunk.document_id in best_doc_ids_set,
+                        section_adjacent_chunks,
                     ),
                 )
-                for section in selected_sections
+                for section, section_adjacent_chunks in zip(
+                    selected_sections, adjacent_chunks
+                )
             ]
 
             # Run all expansions in parallel
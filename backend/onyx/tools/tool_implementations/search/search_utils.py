@@ -129,83 +129,185 @@ def section_to_dict(section: InferenceSection, section_num: int) -> dict:
     return doc_dict
 
 
-def _retrieve_adjacent_chunks(
+def _get_adjacent_chunk_ranges(
     section: InferenceSection,
+    num_chunks_above: int,
+    num_chunks_below: int,
+) -> tuple[tuple[int, int] | None, tuple[int, int] | None]:
+    """Returns the (min, max) chunk_id ranges above and below a section, or None if
+    there is nothing to retrieve on that side."""
+    chunk_ids = [chunk.chunk_id for chunk in section.chunks]
+    min_chunk_id = min(chunk_ids)
+    max_chunk_id = max(chunk_ids)
+
+    above_range: tuple[int, int] | None = None
+    if num_chunks_above > 0 and min_chunk_id > 0:
+        above_range = (max(0, min_chunk_id - num_chunks_above), min_chunk_id - 1)
+
+    below_range: tuple[int, int] | None = None
+    if num_chunks_below > 0:
+        below_range = (max_chunk_id + 1, max_chunk_id + num_chunks_below)
+
+    return above_range, below_range
+
+
+def _merge_chunk_ranges(ranges: list[tuple[int, int]]) -> list[tuple[int, int]]:
+    """Merges (min, max) chunk_id ranges that overlap or touch."""
+    merged_ranges: list[tuple[int, int]] = []
+    for min_chunk_id, max_chunk_id in sorted(ranges):
+        if merged_ranges and min_chunk_id <= merged_ranges[-1][1] + 1:
+            merged_ranges[-1] = (
+                merged_ranges[-1][0],
+                max(merged_ranges[-1][1], max_chunk_id),
+            )
+        else:
+            merged_ranges.append((min_chunk_id, max_chunk_id))
+    return merged_ranges
+
+
+def retrieve_adjacent_chunks_batch(
+    sections: list[InferenceSection],
     document_index: DocumentIndex,
     num_chunks_above: int,
     num_chunks_below: int,
-) -> tuple[list[InferenceChunk], list[InferenceChunk]]:
-    """Retrieve adjacent chunks above and below a section.
+) -> list[tuple[list[InferenceChunk], list[InferenceChunk]]]:
+    """Retrieve adjacent chunks above and below each of the sections with a single
+    id_based_retrieval call. Sections of the same document whose ranges overlap share
+    one chunk range.
 
     Args:
-        section: The InferenceSection to get adjacent chunks for
+        sections: The InferenceSections to get adjacent chunks for
         document_index: The document index to query
-        num_chunks_above: Number of chunks to retrieve above the section
-        num_chunks_below: Number of chunks to retrieve below the section
+        num_chunks_above: Number of chunks to retrieve above each section
+        num_chunks_below: Number of chunks to retrieve below each section
 
     Returns:
-        Tuple of (chunks_above, chunks_below)
+        A (chunks_above, chunks_below) tuple per section, in the order of `sections`
     """
-    # Get the document_id and chunk range from the section
-    document_id = section.center_chunk.document_id
-
-    # The document fetching already enforced permissions
-    # the expansion does not need to do this unless it's for performance reasons
-    filters = IndexFilters(access_control_list=None)
-
-    # Find the min and max chunk_id in the section
-    chunk_ids = [chunk.chunk_id for chunk in section.chunks]
-    min_chunk_id = min(chunk_ids)
-    max_chunk_id = max(chunk_ids)
-
-    chunks_above: list[InferenceChunk] = []
-    chunks_below: list[InferenceChunk] = []
-
-    # Retrieve chunks above (if any)
-    if num_chunks_above > 0 and min_chunk_id > 0:
-        above_min = max(0, min_chunk_id - num_chunks_above)
-        above_max = min_chunk_id - 1
+    section_ranges = [
+        _get_adjacent_chunk_ranges(section, num_chunks_above, num_chunks_below)
+        for section in sections
+    ]
+
+    # each section needs a single range, spanning its own chunks when it has chunks
+    # both above and below, as every range is an OR condition of the Vespa query
+    document_ranges: dict[str, list[tuple[int, int]]] = defaultdict(list)
+    for section, (above_range, below_range) in zip(sections, section_ranges):
+        ranges = [
+            chunk_range for chunk_range in (above_range, below_range) if chunk_range
+        ]
+        if ranges:
+            document_id = replace_invalid_doc_id_characters(
+                section.center_chunk.document_id
+            )
+            document_ranges[document_id].append((ranges[0][0], ranges[-1][1]))
 
-        above_request = VespaChunkRequest(
-            document_id=replace_invalid_doc_id_characters(document_id),
-            min_chunk_ind=above_min,
-            max_chunk_ind=above_max,
+    chunk_requests = [
+        VespaChunkRequest(
+            document_id=document_id,
+            min_chunk_ind=min_chunk_id,
+            max_chunk_ind=max_chunk_id,
         )
+        for document_id, chunk_ranges in document_ranges.items()
+        for min_chunk_id, max_chunk_id in _merge_chunk_ranges(chunk_ranges)
+    ]
+
+    # (cleaned document_id, chunk_id) -> chunk
+    retrieved_chunks: dict[tuple[str, int], InferenceChunk] = {}
+    if chunk_requests:
+        # The document fetching already enforced permissions
+        # the expansion does not need to do this unless it's for performance reasons
+        filters = IndexFilters(access_control_list=None)
 
         try:
-            chunks_above = document_index.id_based_retrieval(
-                chunk_requests=[above_request],
+            for chunk in document_index.id_based_retrieval(
+                chunk_requests=chunk_requests,
                 filters=filters,
                 batch_retrieval=True,
-            )
-            # Sort by chunk_id to ensure correct order
-            chunks_above.sort(key=lambda c: c.chunk_id)
+            ):
+                chunk_key = (
+                    replace_invalid_doc_id_characters(chunk.document_id),
+                    chunk.chunk_id,
+                )
+                retrieved_chunks[chunk_key] = chunk
         except Exception as e:
-            logger.warning(f"Failed to retrieve chunks above section: {e}")
+            logger.warning(f"Failed to retrieve chunks adjacent to sections: {e}")
+
+    def _chunks_in_range(
+        document_id: str, chunk_range: tuple[int, int] | None
+    ) -> list[InferenceChunk]:
+        if chunk_range is None:
+            return []
+        # ordered by chunk_id since the range is walked in order
+        return [
+            retrieved_chunks[(document_id, chunk_id)]
+            for chunk_id in range(chunk_range[0], chunk_range[1] + 1)
+            if (document_id, chunk_id) in retrieved_chunks
+        ]
+
+    results: list[tuple[list[InferenceChunk], list[InferenceChunk]]] = []
+    for section, (above_range, below_range) in zip(sections, section_ranges):
+        document_id = replace_invalid_doc_id_characters(
+            section.center_chunk.document_id
+        )
+        results.append(
+            (
+                _chunks_in_range(document_id, above_range),
+                _chunks_in_range(document_id, below_range),
+            )
+        )
 
-    # Retrieve chunks below (if any)
-    if num_chunks_below > 0:
-        below_min = max_chunk_id + 1
-        below_max = max_chunk_id + num_chunks_below
+    return results
 
-        below_request = VespaChunkRequest(
-            document_id=replace_invalid_doc_id_characters(document_id),
-            min_chunk_ind=below_min,
-            max_chunk_ind=below_max,
-        )
 
-        try:
-            chunks_below = document_index.id_based_retrieval(
-                chunk_requests=[below_request],
-                filters=filters,
-                batch_retrieval=True,
-            )
-            # Sort by chunk_id to ensure correct order
-            chunks_below.sort(key=lambda c: c.chunk_id)
-        except Exception as e:
-            logger.warning(f"Failed to retrieve chunks below section: {e}")
+def _retrieve_adjacent_chunks(
+    section: InferenceSection,
+    document_index: DocumentIndex,
+    num_chunks_above: int,
+    num_chunks_below: int,
+) -> tuple[list[InferenceChunk], list[InferenceChunk]]:
+    """Retrieve adjacent chunks above and below a section.
+
+    Args:
+        section: The InferenceSection to get adjacent chunks for
+        document_index: The document index to query
+        num_chunks_above: Number of chunks to retrieve above the section
+        num_chunks_below: Number of chunks to retrieve below the section
+
+    Returns:
+        Tuple of (chunks_above, chunks_below)
+    """
+    return retrieve_adjacent_chunks_batch(
+        sections=[section],
+        document_index=document_index,
+        num_chunks_above=num_chunks_above,
+        num_chunks_below=num_chunks_below,
+    )[0]
 
-    return chunks_above, chunks_below
+
+def _limit_adjacent_chunks(
+    section: InferenceSection,
+    chunks_above: list[InferenceChunk],
+    chunks_below: list[InferenceChunk],
+    num_chunks_above: int,
+    num_chunks_below: int,
+) -> tuple[list[InferenceChunk], list[InferenceChunk]]:
+    """Narrows already retrieved adjacent chunks down to the closest ones."""
+    above_range, below_range = _get_adjacent_chunk_ranges(
+        section, num_chunks_above, num_chunks_below
+    )
+    return (
+        (
+            [chunk for chunk in chunks_above if chunk.chunk_id >= above_range[0]]
+            if above_range
+            else []
+        ),
+        (
+            [chunk for chunk in chunks_below if chunk.chunk_id <= below_range[1]]
+            if below_range
+            else []
+        ),
+    )
 
 
 def merge_overlapping_sections(
@@ -357,6 +459,7 @@ def expand_section_with_context(
     llm: LLM,
     document_index: DocumentIndex,
     expand_override: bool = False,
+    adjacent_chunks: tuple[list[InferenceChunk], list[InferenceChunk]] | None = None,
 ) -> InferenceSection | None:
     """Use LLM to classify section relevance and return expanded section with appropriate context.
 
@@ -372,6 +475,9 @@ def expand_section_with_context(
         llm: LLM instance to use for classification
         document_index: Document index for retrieving adjacent chunks
         expand_override: If True, skip LLM classification and use FULL_DOCUMENT expansion
+        adjacent_chunks: Chunks above and below the section from
+            retrieve_adjacent_chunks_batch with FULL_DOC_NUM_CHUNKS_AROUND. If given,
+            no chunks are retrieved from the document index.
 
     Returns:
         Expanded InferenceSection with appropriate context, or None if NOT_RELEVANT
@@ -385,12 +491,23 @@ def expand_section_with_context(
         # These are not used, but need to be defined to avoid type errors
     else:
         # Retrieve 2 chunks above and below for the LLM classification prompt
-        chunks_above_for_prompt, chunks_below_for_prompt = _retrieve_adjacent_chunks(
-            section=section,
-            document_index=document_index,
-            num_chunks_above=2,
-            num_chunks_below=2,
-        )
+        if adjacent_chunks is not None:
+            chunks_above_for_prompt, chunks_below_for_prompt = _limit_adjacent_chunks(
+                section=section,
+                chunks_above=adjacent_chunks[0],
+                chunks_below=adjacent_chunks[1],
+                num_chunks_above=2,
+                num_chunks_below=2,
+            )
+        else:
+            chunks_above_for_prompt, chunks_below_for_prompt = (
+                _retrieve_adjacent_chunks(
+                    section=section,
+                    document_index=document_index,
+                    num_chunks_above=2,
+                    num_chunks_below=2,
+                )
+            )
 
         # Format the section content for the prompt
         section_above_text = (
@@ -458,12 +575,15 @@ def expand_section_with_context(
                 f"LLM classified section as FULL_DOCUMENT: {section.center_chunk.semantic_identifier}"
             )
 
-        chunks_above_full, chunks_below_full = _retrieve_adjacent_chunks(
-            section=section,
-            document_index=document_index,
-            num_chunks_above=FULL_DOC_NUM_CHUNKS_AROUND,
-            num_chunks_below=FULL_DOC_NUM_CHUNKS_AROUND,
-        )
+        if adjacent_chunks is not None:
+            chunks_above_full, chunks_below_full = adjacent_chunks
+        else:
+            chunks_above_full, chunks_below_full = _retrieve_adjacent_chunks(
+                section=section,
+                document_index=document_index,
+                num_chunks_above=FULL_DOC_NUM_CHUNKS_AROUND,
+                num_chunks_below=FULL_DOC_NUM_CHUNKS_AROUND,
+            )
 
         # Combine all chunks: 5 above + section + 5 below
         all_chunks = chunks_above_full + section.chunks + chunks_below_full
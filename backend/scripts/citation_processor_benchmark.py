@@ -0,0 +1,108 @@
+"""
+Micro-benchmark for DynamicCitationProcessor.process_token.
+
+Streams synthetic answers (prose with citations and code blocks) through the
+processor token by token and reports tokens/sec per answer length, so regressions
+in per-token cost on long (e.g. deep research) answers are easy to spot.
+
+Usage:
+    python -m scripts.citation_processor_benchmark --tokens 1000 10000 --runs 3
+"""
+
+import argparse
+import random
+import time
+
+from onyx.chat.citation_processor import DynamicCitationProcessor
+from onyx.configs.constants import DocumentSource
+from onyx.context.search.models import SearchDoc
+
+_PROSE_TOKENS = ["The", " answer", " is", " based", " on", " the", " docs", ".", "\n"]
+_CITATION_TOKENS = [" [", "1", "]", " [", "2", ", ", "3", "]", " [[", "4", "]]"]
+_CODE_BLOCK_TOKENS = [
+    "```",
+    "python",
+    "\n",
+    "x",
+    " = ",
+    "arr",
+    "[",
+    "0",
+    "]",
+    "\n",
+    "```",
+]
+
+
+def _build_citation_mapping(num_docs: int) -> dict[int, SearchDoc]:
+    return {
+        num: SearchDoc(
+            document_id=f"doc_{num}",
+            chunk_ind=0,
+            semantic_identifier=f"Document {num}",
+            link=f"https://example.com/{num}",
+            blurb="",
+            source_type=DocumentSource.WEB,
+            boost=0,
+            hidden=False,
+            metadata={},
+            score=0.0,
+            match_highlights=[],
+            updated_at=None,
+            primary_owners=None,
+            secondary_owners=None,
+            is_internet=False,
+        )
+        for num in range(1, num_docs + 1)
+    }
+
+
+def _generate_tokens(num_tokens: int, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+    tokens: list[str] = []
+    while len(tokens) < num_tokens:
+        roll = rng.random()
+        if roll < 0.05:
+            tokens.extend(_CODE_BLOCK_TOKENS)
+        elif roll < 0.25:
+            tokens.extend(_CITATION_TOKENS)
+        else:
+            tokens.extend(rng.choices(_PROSE_TOKENS, k=10))
+    return tokens[:num_tokens]
+
+
+def run_benchmark(num_tokens: int, runs: int) -> float:
+    """Returns the best tokens/sec over `runs` runs."""
+    tokens = _generate_tokens(num_tokens)
+    citation_mapping = _build_citation_mapping(4)
+
+    best = 0.0
+    for _ in range(runs):
+        processor = DynamicCitationProcessor()
+        processor.update_citation_mapping(citation_mapping)
+
+        start = time.perf_counter()
+        for token in tokens:
+            for _ in processor.process_token(token):
+                pass
+        for _ in processor.process_token(None):
+            pass
+        elapsed = time.perf_counter() - start
+
+        best = max(best, num_tokens / elapsed)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tokens", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    for num_tokens in args.tokens:
+        tokens_per_second = run_benchmark(num_tokens, args.runs)
+        print(f"{num_tokens:>8} tokens: {tokens_per_second:,.0f} tokens/sec")
+
+
+if __name__ == "__main__":
+    main()
@@ -68,6 +68,30 @@ MIN_THREADS_ML_MODELS = int(os.environ.get("MIN_THREADS_ML_MODELS") or 1)
 # or intent classification
 INDEXING_ONLY = os.environ.get("INDEXING_ONLY", "").lower() == "true"
 
+# Concurrent embed / rerank requests against the same local model are coalesced into
+# a single batch. A batch is formed once the oldest queued request has waited this
+# long or the size / token budget is reached. Set the wait to 0 to only batch requests
+# that queued up while the model was busy.
+MODEL_SERVER_BATCH_WAIT_MS = float(os.environ.get("MODEL_SERVER_BATCH_WAIT_MS") or 5)
+MODEL_SERVER_MAX_BATCH_SIZE = int(os.environ.get("MODEL_SERVER_MAX_BATCH_SIZE") or 128)
+# Tokens are estimated from the number of characters, see `estimate_num_tokens`
+MODEL_SERVER_MAX_BATCH_TOKENS = int(
+    os.environ.get("MODEL_SERVER_MAX_BATCH_TOKENS") or 32768
+)
+
+# Wire format for embeddings returned by the model server, negotiated via the Accept
+# header. "float32" (lossless) or "float16" send a raw little-endian buffer instead of a
+# JSON list of floats, "json" keeps the previous behavior.
+MODEL_SERVER_EMBEDDING_TRANSPORTS = ("float32", "float16", "json")
+MODEL_SERVER_EMBEDDING_TRANSPORT = (
+    os.environ.get("MODEL_SERVER_EMBEDDING_TRANSPORT") or "float32"
+).lower()
+if MODEL_SERVER_EMBEDDING_TRANSPORT not in MODEL_SERVER_EMBEDDING_TRANSPORTS:
+    raise ValueError(
+        f"Invalid MODEL_SERVER_EMBEDDING_TRANSPORT: '{MODEL_SERVER_EMBEDDING_TRANSPORT}', "
+        f"must be one of {', '.join(MODEL_SERVER_EMBEDDING_TRANSPORTS)}"
+    )
+
 # The process needs to have this for the log file to write to
 # otherwise, it will not create additional log files
 # This should just be the filename base without extension or path.
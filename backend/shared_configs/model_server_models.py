@@ -1,3 +1,6 @@
+import struct
+
+import numpy as np
 from pydantic import BaseModel
 
 from shared_configs.enums import EmbeddingProvider
@@ -45,6 +48,65 @@ class EmbedResponse(BaseModel):
     embeddings: list[Embedding]
 
 
+# Binary alternative to the JSON EmbedResponse, see `encode_embeddings`
+EMBEDDINGS_MEDIA_TYPE_PREFIX = "application/vnd.onyx.embeddings"
+_EMBEDDINGS_MAGIC = b"OXEM"
+# magic, dtype code, 3 padding bytes, number of embeddings, embedding dimension
+_EMBEDDINGS_HEADER = struct.Struct("<4sB3xII")
+_EMBEDDINGS_DTYPES: dict[str, tuple[int, str]] = {
+    "float32": (1, "<f4"),
+    "float16": (2, "<f2"),
+}
+_EMBEDDINGS_DTYPE_CODES = {code: dtype for code, dtype in _EMBEDDINGS_DTYPES.values()}
+
+
+def get_embeddings_media_type(dtype: str) -> str:
+    if dtype not in _EMBEDDINGS_DTYPES:
+        raise ValueError(f"Unsupported embedding dtype: {dtype}")
+    return f"{EMBEDDINGS_MEDIA_TYPE_PREFIX}+{dtype}"
+
+
+def select_embeddings_dtype(accept_header: str | None) -> str | None:
+    """Returns the first binary embedding dtype listed in the Accept header, or None if
+    the client only accepts JSON."""
+    for media_range in (accept_header or "").split(","):
+        media_type = media_range.split(";")[0].strip().lower()
+        if not media_type.startswith(f"{EMBEDDINGS_MEDIA_TYPE_PREFIX}+"):
+            continue
+        dtype = media_type.removeprefix(f"{EMBEDDINGS_MEDIA_TYPE_PREFIX}+")
+        if dtype in _EMBEDDINGS_DTYPES:
+            return dtype
+    return None
+
+
+def encode_embeddings(embeddings: np.ndarray, dtype: str) -> bytes:
+    """Packs a 2D array of embeddings into a little-endian buffer with a shape header."""
+    code, numpy_dtype = _EMBEDDINGS_DTYPES[dtype]
+    if embeddings.ndim != 2:
+        raise ValueError(f"Expected a 2D array of embeddings, got {embeddings.ndim}D")
+    num_embeddings, dim = embeddings.shape
+    return (
+        _EMBEDDINGS_HEADER.pack(_EMBEDDINGS_MAGIC, code, num_embeddings, dim)
+        + np.ascontiguousarray(embeddings, dtype=numpy_dtype).tobytes()
+    )
+
+
+def decode_embeddings(content: bytes) -> np.ndarray:
+    """Inverse of `encode_embeddings`. Returns a float32 array of shape
+    (num_embeddings, dim), which is a view over `content` for float32 payloads."""
+    magic, code, num_embeddings, dim = _EMBEDDINGS_HEADER.unpack_from(content)
+    if magic != _EMBEDDINGS_MAGIC or code not in _EMBEDDINGS_DTYPE_CODES:
+        raise ValueError("Invalid binary embeddings payload")
+
+    embeddings = np.frombuffer(
+        content,
+        dtype=_EMBEDDINGS_DTYPE_CODES[code],
+        count=num_embeddings * dim,
+        offset=_EMBEDDINGS_HEADER.size,
+    ).reshape(num_embeddings, dim)
+    return embeddings.astype(np.float32, copy=False)
+
+
 class RerankRequest(BaseModel):
     query: str
     documents: list[str]
@@ -0,0 +1,31 @@
+from unittest.mock import patch
+
+import redis
+
+from ee.onyx.server.tenants import product_gating
+from onyx.configs.constants import ONYX_CLOUD_TENANT_ID
+from onyx.redis.redis_pool import TenantPipeline
+from onyx.redis.redis_pool import TenantRedis
+
+
+def test_overwrite_full_gated_set_prefixes_the_gated_set_once() -> None:
+    # no connection is made until a command is executed
+    client = TenantRedis(ONYX_CLOUD_TENANT_ID, connection_pool=redis.ConnectionPool())
+    executed: list[tuple] = []
+
+    def mock_execute(self: TenantPipeline, raise_on_error: bool = True) -> list:
+        executed.extend(args for args, _ in self.command_stack)
+        return []
+
+    with (
+        patch.object(product_gating, "get_redis_client", return_value=client),
+        patch.object(TenantPipeline, "execute", mock_execute),
+    ):
+        product_gating.overwrite_full_gated_set(["tenant_a", "tenant_b"])
+
+    gated_set_key = f"{ONYX_CLOUD_TENANT_ID}:gated_tenants"
+    assert executed == [
+        ("DEL", gated_set_key),
+        ("SADD", gated_set_key, "tenant_a"),
+        ("SADD", gated_set_key, "tenant_b"),
+    ]
@@ -0,0 +1,72 @@
+import asyncio
+import threading
+
+import pytest
+
+from model_server.batching import MicroBatcher
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_are_batched() -> None:
+    batches: list[list[str]] = []
+
+    def process_batch(texts: list[str]) -> list[str]:
+        batches.append(texts)
+        return [text.upper() for text in texts]
+
+    batcher: MicroBatcher[str, str] = MicroBatcher(
+        name="test",
+        process_batch=process_batch,
+        max_wait_seconds=0.05,
+        max_batch_size=4,
+        max_batch_tokens=1000,
+    )
+
+    results = await asyncio.gather(
+        batcher.submit(["a", "b"], num_tokens=2),
+        batcher.submit(["c"], num_tokens=1),
+        batcher.submit(["d"], num_tokens=1),
+        # does not fit into the first batch anymore
+        batcher.submit(["e", "f"], num_tokens=2),
+    )
+
+    assert list(results) == [["A", "B"], ["C"], ["D"], ["E", "F"]]
+    assert batches == [["a", "b", "c", "d"], ["e", "f"]]
+
+
+@pytest.mark.asyncio
+async def test_batches_run_one_at_a_time_and_errors_propagate() -> None:
+    running = 0
+    max_running = 0
+    lock = threading.Lock()
+
+    def process_batch(numbers: list[int]) -> list[int]:
+        nonlocal running, max_running
+        with lock:
+            running += 1
+            max_running = max(max_running, running)
+        try:
+            if -1 in numbers:
+                raise ValueError("bad input")
+            return [number * 2 for number in numbers]
+        finally:
+            with lock:
+                running -= 1
+
+    batcher: MicroBatcher[int, int] = MicroBatcher(
+        name="test",
+        process_batch=process_batch,
+        max_wait_seconds=0,
+        max_batch_size=1,
+        max_batch_tokens=1000,
+    )
+
+    results = await asyncio.gather(
+        *(batcher.submit([i], num_tokens=1) for i in range(5)),
+        batcher.submit([-1], num_tokens=1),
+        return_exceptions=True,
+    )
+
+    assert results[:5] == [[0], [2], [4], [6], [8]]
+    assert isinstance(results[5], ValueError)
+    assert max_running == 1
@@ -5,13 +5,17 @@ from typing import List
 from unittest.mock import MagicMock
 from unittest.mock import patch
 
+import numpy as np
 import pytest
 
 from model_server.encoders import embed_text
 from model_server.encoders import local_rerank
 from model_server.encoders import process_embed_request
 from shared_configs.enums import EmbedTextType
+from shared_configs.model_server_models import decode_embeddings
 from shared_configs.model_server_models import EmbedRequest
+from shared_configs.model_server_models import encode_embeddings
+from shared_configs.model_server_models import select_embeddings_dtype
 
 
 @pytest.mark.asyncio
@@ -68,9 +72,9 @@ async def test_local_rerank() -> None:
 
 @pytest.mark.asyncio
 async def test_concurrent_embeddings() -> None:
-    def mock_encode(*args: Any, **kwargs: Any) -> List[List[float]]:
+    def mock_encode(texts: List[str], *args: Any, **kwargs: Any) -> List[List[float]]:
         time.sleep(5)
-        return [[0.1, 0.2, 0.3]]
+        return [[0.1, 0.2, 0.3] for _ in texts]
 
     test_req = EmbedRequest(
         texts=["test"],
@@ -103,3 +107,30 @@ async def test_concurrent_embeddings() -> None:
         # However, the developer may still introduce unnecessary blocking above the mock and this test will
         # still pass as long as it's less than (7 - 5) / 5 seconds
         assert end_time - start_time < 7
+
+
+def test_binary_embeddings_round_trip() -> None:
+    embeddings = np.random.rand(3, 8).astype(np.float32)
+
+    decoded = decode_embeddings(encode_embeddings(embeddings, "float32"))
+    assert decoded.dtype == np.float32
+    assert np.array_equal(decoded, embeddings)
+
+    decoded_half = decode_embeddings(encode_embeddings(embeddings, "float16"))
+    assert decoded_half.shape == (3, 8)
+    assert np.allclose(decoded_half, embeddings, atol=1e-3)
+
+    with pytest.raises(ValueError):
+        decode_embeddings(b"\x00" * 16)
+
+
+def test_select_embeddings_dtype() -> None:
+    assert select_embeddings_dtype(None) is None
+    assert select_embeddings_dtype("application/json") is None
+    assert (
+        select_embeddings_dtype(
+            "application/vnd.onyx.embeddings+float16, application/json;q=0.5"
+        )
+        == "float16"
+    )
+    assert select_embeddings_dtype("application/vnd.onyx.embeddings+int8") is None
@@ -0,0 +1,99 @@
+from collections.abc import Iterator
+from typing import Any
+from unittest.mock import MagicMock
+from unittest.mock import patch
+from uuid import uuid4
+
+import pytest
+
+from onyx.access import acl_cache
+from onyx.access.acl_cache import get_cached_acl_for_user
+from onyx.access.acl_cache import invalidate_user_acl_cache
+
+
+class _FakeRedis:
+    def __init__(self) -> None:
+        self.data: dict[str, Any] = {}
+
+    def get(self, key: str) -> Any:
+        return self.data.get(key)
+
+    def set(self, key: str, value: Any, ex: int | None = None) -> None:
+        self.data[key] = value.encode() if isinstance(value, str) else value
+
+    def incr(self, key: str) -> int:
+        self.data[key] = str(int(self.data.get(key) or 0) + 1).encode()
+        return int(self.data[key])
+
+
+@pytest.fixture
+def fake_redis() -> Iterator[_FakeRedis]:
+    redis_client = _FakeRedis()
+    acl_cache._local_cache.clear()
+    with patch.object(acl_cache, "get_redis_client", return_value=redis_client):
+        yield redis_client
+    acl_cache._local_cache.clear()
+
+
+@pytest.fixture
+def mock_get_acl_for_user() -> Iterator[MagicMock]:
+    with patch.object(acl_cache, "get_acl_for_user") as mock:
+        mock.side_effect = lambda user, db_session: {f"user_email:{user.email}"}
+        yield mock
+
+
+def _make_user(email: str) -> MagicMock:
+    user = MagicMock()
+    user.id = uuid4()
+    user.email = email
+    return user
+
+
+def test_acl_is_computed_once_per_user(
+    fake_redis: _FakeRedis, mock_get_acl_for_user: MagicMock
+) -> None:
+    user_a = _make_user("a@example.com")
+    user_b = _make_user("b@example.com")
+
+    for _ in range(3):
+        assert get_cached_acl_for_user(user_a, MagicMock()) == {
+            "user_email:a@example.com"
+        }
+    assert get_cached_acl_for_user(user_b, MagicMock()) == {"user_email:b@example.com"}
+    assert mock_get_acl_for_user.call_count == 2
+
+    # another process only has Redis to go on
+    acl_cache._local_cache.clear()
+    assert get_cached_acl_for_user(user_a, MagicMock()) == {"user_email:a@example.com"}
+    assert mock_get_acl_for_user.call_count == 2
+
+
+def test_invalidation_drops_local_and_redis_entries(
+    fake_redis: _FakeRedis, mock_get_acl_for_user: MagicMock
+) -> None:
+    user = _make_user("a@example.com")
+    get_cached_acl_for_user(user, MagicMock())
+
+    user.email = "renamed@example.com"
+    assert get_cached_acl_for_user(user, MagicMock()) == {"user_email:a@example.com"}
+
+    invalidate_user_acl_cache()
+
+    assert get_cached_acl_for_user(user, MagicMock()) == {
+        "user_email:renamed@example.com"
+    }
+    assert mock_get_acl_for_user.call_count == 2
+
+
+def test_redis_failure_falls_back_to_db(mock_get_acl_for_user: MagicMock) -> None:
+    acl_cache._local_cache.clear()
+    user = _make_user("a@example.com")
+    with patch.object(
+        acl_cache, "get_redis_client", side_effect=ConnectionError("redis is down")
+    ):
+        for _ in range(2):
+            assert get_cached_acl_for_user(user, MagicMock()) == {
+                "user_email:a@example.com"
+            }
+
+    assert mock_get_acl_for_user.call_count == 2
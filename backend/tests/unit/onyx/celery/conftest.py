@@ -0,0 +1,88 @@
+from collections.abc import Iterator
+from typing import Any
+from unittest.mock import MagicMock
+
+import httpx
+import pytest
+
+from onyx.access.models import DocumentAccess
+
+
+@pytest.fixture
+def vespa_requests() -> list[httpx.Request]:
+    return []
+
+
+@pytest.fixture
+def vespa_response_status() -> dict[str, int]:
+    """Status code Vespa answers with per HTTP method, 200 if not set. Chunk lookups
+    return 404, i.e. legacy documents have no chunks past their start index."""
+    return {"GET": 404}
+
+
+@pytest.fixture
+def vespa_unreachable_methods() -> set[str]:
+    """HTTP methods for which the connection to Vespa fails."""
+    return set()
+
+
+@pytest.fixture
+def shared_vespa_client(
+    vespa_requests: list[httpx.Request],
+    vespa_response_status: dict[str, int],
+    vespa_unreachable_methods: set[str],
+) -> Iterator[httpx.Client]:
+    """Stands in for the worker wide client from HttpxPool, which is shared by every
+    task that runs on the worker."""
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        vespa_requests.append(request)
+        if request.method in vespa_unreachable_methods:
+            raise httpx.ConnectError("Vespa is unreachable", request=request)
+        return httpx.Response(vespa_response_status.get(request.method, 200), json={})
+
+    client = httpx.Client(transport=httpx.MockTransport(handler))
+    yield client
+    client.close()
+
+
+@pytest.fixture
+def task_db_session() -> MagicMock:
+    return MagicMock()
+
+
+@pytest.fixture
+def document_index_task_patches(
+    task_db_session: MagicMock, shared_vespa_client: httpx.Client
+) -> dict[str, Any]:
+    """Attributes to patch on the module of a document index task, so that the task
+    runs against a real VespaIndex over the shared client and uses `task_db_session`.
+    Document lookups are left to the tests."""
+    session_context = MagicMock()
+    session_context.__enter__.return_value = task_db_session
+
+    search_settings = MagicMock()
+    search_settings.primary.index_name = "test_index"
+    search_settings.primary.large_chunks_enabled = False
+    search_settings.secondary = None
+
+    httpx_pool = MagicMock()
+    httpx_pool.get.return_value = shared_vespa_client
+
+    return {
+        "get_session_with_current_tenant": MagicMock(return_value=session_context),
+        "get_active_search_settings": MagicMock(return_value=search_settings),
+        "HttpxPool": httpx_pool,
+        "get_access_for_documents": MagicMock(
+            side_effect=lambda document_ids, db_session: {
+                doc_id: DocumentAccess.build(
+                    user_emails=["user@example.com"],
+                    user_groups=[],
+                    external_user_emails=[],
+                    external_user_group_ids=[],
+                    is_public=False,
+                )
+                for doc_id in document_ids
+            }
+        ),
+    }
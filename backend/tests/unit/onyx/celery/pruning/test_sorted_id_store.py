@@ -0,0 +1,45 @@
+import os
+import random
+from pathlib import Path
+
+from onyx.background.celery.tasks.pruning.sorted_id_store import sorted_difference
+from onyx.background.celery.tasks.pruning.sorted_id_store import SortedIdStore
+
+
+def test_sorted_id_store_dedupes_and_sorts(tmp_path: Path) -> None:
+    with SortedIdStore(directory=str(tmp_path)) as store:
+        store.add(["doc_c", "doc_a"])
+        store.add(iter(["doc_b", "doc_a", "dóc_ü", "Doc_Z"]))
+
+        assert len(store) == 5
+        assert list(store) == sorted(["doc_a", "doc_b", "doc_c", "dóc_ü", "Doc_Z"])
+
+    # the backing file is removed once the store is closed
+    assert os.listdir(tmp_path) == []
+
+
+def test_sorted_difference_matches_set_difference() -> None:
+    rng = random.Random(0)
+    for _ in range(100):
+        left = {f"doc_{rng.randint(0, 50)}" for _ in range(rng.randint(0, 30))}
+        right = {f"doc_{rng.randint(0, 50)}" for _ in range(rng.randint(0, 30))}
+
+        assert list(sorted_difference(sorted(left), sorted(right))) == sorted(
+            left - right
+        )
+
+
+def test_sorted_difference_between_stores(tmp_path: Path) -> None:
+    indexed_ids = [f"doc_{i}" for i in range(2500)]
+    source_ids = [f"doc_{i}" for i in range(2500) if i % 3 != 0] + ["new_doc"]
+
+    with (
+        SortedIdStore(directory=str(tmp_path)) as indexed_store,
+        SortedIdStore(directory=str(tmp_path)) as source_store,
+    ):
+        indexed_store.add(reversed(indexed_ids))
+        source_store.add(source_ids)
+
+        assert list(sorted_difference(indexed_store, source_store)) == sorted(
+            set(indexed_ids) - set(source_ids)
+        )
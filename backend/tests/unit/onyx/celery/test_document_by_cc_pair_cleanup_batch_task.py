@@ -0,0 +1,211 @@
+from collections.abc import Iterator
+from typing import Any
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+import httpx
+import pytest
+from celery.exceptions import Retry
+
+from onyx.background.celery.tasks.shared import tasks
+from onyx.background.celery.tasks.shared.tasks import (
+    document_by_cc_pair_cleanup_batch_task,
+)
+from onyx.db.models import Document
+from onyx.server.documents.models import ConnectorCredentialPairIdentifier
+
+CC_PAIR_IDENTIFIER = ConnectorCredentialPairIdentifier(connector_id=1, credential_id=2)
+
+
+@pytest.fixture
+def db_mocks(document_index_task_patches: dict[str, Any]) -> Iterator[dict[str, Any]]:
+    db_mocks: dict[str, Any] = {
+        "get_document_connector_counts": MagicMock(),
+        "get_documents_by_ids": MagicMock(),
+        "fetch_document_sets_for_documents": MagicMock(return_value=[]),
+        "delete_documents_complete__no_commit": MagicMock(),
+        "delete_documents_by_connector_credential_pair__no_commit": MagicMock(),
+        "mark_documents_as_synced": MagicMock(),
+        "mark_documents_as_modified": MagicMock(),
+    }
+    with patch.multiple(tasks, **document_index_task_patches, **db_mocks):
+        yield db_mocks
+
+
+def _run(document_ids: list[str]) -> bool:
+    return document_by_cc_pair_cleanup_batch_task.run(
+        document_ids=document_ids,
+        connector_id=1,
+        credential_id=2,
+        tenant_id="tenant",
+    )
+
+
+def _methods(vespa_requests: list[httpx.Request]) -> list[str]:
+    return sorted(request.method for request in vespa_requests)
+
+
+def test_documents_are_split_into_deletes_and_updates(
+    db_mocks: dict[str, Any],
+    task_db_session: MagicMock,
+    vespa_requests: list[httpx.Request],
+) -> None:
+    db_mocks["get_document_connector_counts"].return_value = [
+        ("only_here", 1),
+        ("shared", 2),
+        ("shared_missing_row", 3),
+    ]
+    db_mocks["get_documents_by_ids"].return_value = [
+        Document(id="only_here", chunk_count=2, boost=0, hidden=False),
+        Document(id="shared", chunk_count=3, boost=0, hidden=False),
+    ]
+
+    assert _run(["only_here", "shared", "shared_missing_row", "unreferenced"])
+
+    # the chunks of the deleted document are removed, the shared one is updated
+    assert _methods(vespa_requests) == ["DELETE"] * 2 + ["PUT"] * 3
+    db_mocks["delete_documents_complete__no_commit"].assert_called_once_with(
+        db_session=task_db_session, document_ids=["only_here"]
+    )
+    db_mocks[
+        "delete_documents_by_connector_credential_pair__no_commit"
+    ].assert_called_once_with(
+        db_session=task_db_session,
+        document_ids=["shared"],
+        connector_credential_pair_identifier=CC_PAIR_IDENTIFIER,
+    )
+    db_mocks["mark_documents_as_synced"].assert_called_once_with(
+        ["shared"], task_db_session
+    )
+    task_db_session.commit.assert_called_once()
+
+
+def test_legacy_documents_have_their_chunks_probed(
+    db_mocks: dict[str, Any],
+    task_db_session: MagicMock,
+    vespa_requests: list[httpx.Request],
+) -> None:
+    db_mocks["get_document_connector_counts"].return_value = [
+        ("legacy", 2),
+        ("current", 2),
+    ]
+    db_mocks["get_documents_by_ids"].return_value = [
+        Document(id="legacy", chunk_count=None, boost=0, hidden=False),
+        Document(id="current", chunk_count=4, boost=0, hidden=False),
+    ]
+
+    assert _run(["legacy", "current"])
+
+    # the legacy document has no chunk past the first one to probe
+    assert _methods(vespa_requests) == ["GET"] + ["PUT"] * 4
+    db_mocks["mark_documents_as_synced"].assert_called_once_with(
+        ["legacy", "current"], task_db_session
+    )
+
+
+def test_consecutive_batches_share_the_pooled_client(
+    db_mocks: dict[str, Any],
+    shared_vespa_client: httpx.Client,
+    vespa_requests: list[httpx.Request],
+) -> None:
+    db_mocks["get_document_connector_counts"].side_effect = [
+        [("doc_a", 2), ("doc_b", 1)],
+        [("doc_c", 2)],
+    ]
+    db_mocks["get_documents_by_ids"].side_effect = [
+        [
+            Document(id="doc_a", chunk_count=1, boost=0, hidden=False),
+            Document(id="doc_b", chunk_count=1, boost=0, hidden=False),
+        ],
+        [Document(id="doc_c", chunk_count=1, boost=0, hidden=False)],
+    ]
+
+    assert _run(["doc_a", "doc_b"])
+    assert _run(["doc_c"])
+
+    assert not shared_vespa_client.is_closed
+    assert _methods(vespa_requests) == ["DELETE", "PUT", "PUT"]
+
+
+def test_failure_is_retried_without_db_changes(
+    db_mocks: dict[str, Any],
+    task_db_session: MagicMock,
+    vespa_unreachable_methods: set[str],
+) -> None:
+    db_mocks["get_document_connector_counts"].return_value = [("doc", 2)]
+    db_mocks["get_documents_by_ids"].return_value = [
+        Document(id="doc", chunk_count=1, boost=0, hidden=False)
+    ]
+    vespa_unreachable_methods.add("PUT")
+
+    with (
+        patch.object(
+            document_by_cc_pair_cleanup_batch_task, "retry", side_effect=Retry()
+        ) as mock_retry,
+        pytest.raises(Retry),
+    ):
+        _run(["doc"])
+
+    assert mock_retry.call_args.kwargs["countdown"] == 16
+    db_mocks[
+        "delete_documents_by_connector_credential_pair__no_commit"
+    ].assert_not_called()
+    db_mocks["mark_documents_as_modified"].assert_not_called()
+    task_db_session.commit.assert_not_called()
+
+
+def test_vespa_errors_are_not_retried(
+    db_mocks: dict[str, Any],
+    task_db_session: MagicMock,
+    vespa_response_status: dict[str, int],
+) -> None:
+    db_mocks["get_document_connector_counts"].return_value = [("doc", 2)]
+    db_mocks["get_documents_by_ids"].return_value = [
+        Document(id="doc", chunk_count=1, boost=0, hidden=False)
+    ]
+    vespa_response_status["PUT"] = 500
+
+    with patch.object(document_by_cc_pair_cleanup_batch_task, "retry") as mock_retry:
+        assert not _run(["doc"])
+
+    mock_retry.assert_not_called()
+    db_mocks["mark_documents_as_modified"].assert_not_called()
+    task_db_session.commit.assert_not_called()
+
+
+def test_documents_are_marked_dirty_after_max_retries(
+    db_mocks: dict[str, Any],
+    task_db_session: MagicMock,
+    vespa_unreachable_methods: set[str],
+) -> None:
+    db_mocks["get_document_connector_counts"].return_value = [
+        ("doc_a", 2),
+        ("doc_b", 2),
+    ]
+    db_mocks["get_documents_by_ids"].return_value = [
+        Document(id="doc_a", chunk_count=1, boost=0, hidden=False),
+        Document(id="doc_b", chunk_count=1, boost=0, hidden=False),
+    ]
+    vespa_unreachable_methods.add("PUT")
+
+    task = document_by_cc_pair_cleanup_batch_task
+    task.push_request(retries=task.max_retries)  # type: ignore[call-arg]
+    try:
+        with patch.object(task, "retry") as mock_retry:
+            assert not _run(["doc_a", "doc_b"])
+    finally:
+        task.pop_request()
+
+    mock_retry.assert_not_called()
+    # the cc pair relationships are dropped and reconciliation cleans up Vespa
+    db_mocks[
+        "delete_documents_by_connector_credential_pair__no_commit"
+    ].assert_called_once_with(
+        db_session=task_db_session,
+        document_ids=["doc_a", "doc_b"],
+        connector_credential_pair_identifier=CC_PAIR_IDENTIFIER,
+    )
+    db_mocks["mark_documents_as_modified"].assert_called_once_with(
+        ["doc_a", "doc_b"], task_db_session
+    )
+    db_mocks["delete_documents_complete__no_commit"].assert_not_called()
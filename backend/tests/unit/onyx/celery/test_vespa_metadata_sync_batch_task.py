@@ -0,0 +1,172 @@
+import json
+from collections.abc import Iterator
+from typing import Any
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+import httpx
+import pytest
+from celery.exceptions import Retry
+
+from onyx.background.celery.tasks.vespa import tasks
+from onyx.background.celery.tasks.vespa.tasks import (
+    try_generate_document_set_sync_tasks,
+)
+from onyx.background.celery.tasks.vespa.tasks import vespa_metadata_sync_batch_task
+from onyx.db.models import Document
+from onyx.document_index.vespa_constants import DOCUMENT_SETS
+from onyx.redis import redis_document_set
+from onyx.redis import redis_object_helper
+from onyx.redis.redis_document_set import RedisDocumentSet
+
+
+@pytest.fixture
+def db_mocks(document_index_task_patches: dict[str, Any]) -> Iterator[dict[str, Any]]:
+    db_mocks: dict[str, Any] = {
+        "get_documents_by_ids": MagicMock(),
+        "fetch_document_sets_for_documents": MagicMock(
+            return_value=[("doc_a", ["set_1"])]
+        ),
+        "mark_documents_as_synced": MagicMock(),
+    }
+    with patch.multiple(tasks, **document_index_task_patches, **db_mocks):
+        yield db_mocks
+
+
+def _run(document_ids: list[str]) -> bool:
+    return vespa_metadata_sync_batch_task.run(
+        document_ids=document_ids, tenant_id="tenant"
+    )
+
+
+def _updated_document_sets(vespa_requests: list[httpx.Request]) -> list[set[str]]:
+    return [
+        set(json.loads(request.content)["fields"][DOCUMENT_SETS]["assign"])
+        for request in vespa_requests
+        if request.method == "PUT"
+    ]
+
+
+def test_batch_is_synced_with_a_single_update(
+    db_mocks: dict[str, Any],
+    task_db_session: MagicMock,
+    vespa_requests: list[httpx.Request],
+) -> None:
+    db_mocks["get_documents_by_ids"].return_value = [
+        Document(id="doc_a", chunk_count=3, boost=0, hidden=False),
+        Document(id="doc_b", chunk_count=2, boost=0, hidden=False),
+        Document(id="legacy", chunk_count=None, boost=0, hidden=False),
+    ]
+
+    assert _run(["doc_a", "doc_b", "legacy", "missing"])
+
+    # one chunk lookup for the legacy document, one update per chunk of the others
+    assert [request.method for request in vespa_requests].count("GET") == 1
+    assert sorted(_updated_document_sets(vespa_requests), key=len) == [
+        set(),
+        set(),
+        {"set_1"},
+        {"set_1"},
+        {"set_1"},
+    ]
+    db_mocks["mark_documents_as_synced"].assert_called_once_with(
+        ["doc_a", "doc_b", "legacy"], task_db_session
+    )
+
+
+def test_consecutive_batches_share_the_pooled_client(
+    db_mocks: dict[str, Any],
+    shared_vespa_client: httpx.Client,
+    vespa_requests: list[httpx.Request],
+) -> None:
+    db_mocks["get_documents_by_ids"].side_effect = [
+        [Document(id="doc_a", chunk_count=1, boost=0, hidden=False)],
+        [Document(id="doc_b", chunk_count=1, boost=0, hidden=False)],
+    ]
+
+    assert _run(["doc_a"])
+    assert _run(["doc_b"])
+
+    assert not shared_vespa_client.is_closed
+    assert len(_updated_document_sets(vespa_requests)) == 2
+
+
+def test_batch_without_documents_is_skipped(
+    db_mocks: dict[str, Any], vespa_requests: list[httpx.Request]
+) -> None:
+    db_mocks["get_documents_by_ids"].return_value = []
+
+    assert not _run(["missing"])
+
+    assert vespa_requests == []
+    db_mocks["mark_documents_as_synced"].assert_not_called()
+
+
+def test_failing_document_retries_the_whole_batch(
+    db_mocks: dict[str, Any], vespa_response_status: dict[str, int]
+) -> None:
+    db_mocks["get_documents_by_ids"].return_value = [
+        Document(id="doc_a", chunk_count=3, boost=0, hidden=False),
+    ]
+    vespa_response_status["PUT"] = 500
+
+    with (
+        patch.object(
+            vespa_metadata_sync_batch_task, "retry", side_effect=Retry()
+        ) as mock_retry,
+        pytest.raises(Retry),
+    ):
+        _run(["doc_a"])
+
+    assert mock_retry.call_args.kwargs["countdown"] == 16
+    # nothing is marked as synced, so no document of the batch is skipped next time
+    db_mocks["mark_documents_as_synced"].assert_not_called()
+
+
+def test_bad_request_is_not_retried(
+    db_mocks: dict[str, Any], vespa_response_status: dict[str, int]
+) -> None:
+    db_mocks["get_documents_by_ids"].return_value = [
+        Document(id="doc_a", chunk_count=3, boost=0, hidden=False),
+    ]
+    vespa_response_status["PUT"] = 400
+
+    with patch.object(vespa_metadata_sync_batch_task, "retry") as mock_retry:
+        assert not _run(["doc_a"])
+
+    mock_retry.assert_not_called()
+    db_mocks["mark_documents_as_synced"].assert_not_called()
+
+
+def test_fence_counts_batches() -> None:
+    r = MagicMock()
+    celery_app = MagicMock()
+    db_session = MagicMock()
+    db_session.scalars.return_value.yield_per.return_value = iter(
+        ["doc_1", "doc_2", "doc_3", "doc_4", "doc_5"]
+    )
+    document_set = MagicMock()
+    document_set.is_up_to_date = False
+
+    with (
+        patch.object(redis_object_helper, "get_redis_client") as mock_get_redis_client,
+        patch.object(redis_document_set, "construct_document_id_select_by_docset"),
+        patch.object(tasks, "get_document_set_by_id", return_value=document_set),
+        patch.object(tasks, "insert_sync_record"),
+        patch.object(tasks, "VESPA_SYNC_BATCH_SIZE", 2),
+    ):
+        mock_get_redis_client.return_value.exists.return_value = 0
+        tasks_generated = try_generate_document_set_sync_tasks(
+            celery_app, 3, db_session, r, MagicMock(), "tenant"
+        )
+        rds = RedisDocumentSet("tenant", 3)
+
+    assert tasks_generated == 3
+    # the taskset is rebuilt from scratch with one entry per batch
+    r.delete.assert_called_once_with(rds.taskset_key)
+    assert r.sadd.call_count == 3
+    assert celery_app.send_task.call_count == 3
+    # the fence is only set once all tasks have been sent
+    fence_pipe = mock_get_redis_client.return_value.pipeline.return_value
+    fence_pipe.set.assert_called_once_with(rds.fence_key, 3)
+    fence_pipe.execute.assert_called_once()
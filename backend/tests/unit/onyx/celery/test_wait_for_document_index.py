@@ -0,0 +1,50 @@
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from celery.exceptions import WorkerShutdown
+
+from onyx.background.celery.apps import app_base
+from onyx.configs.constants import DocumentIndexType
+
+
+def test_local_index_skips_vespa_probe(tmp_path: Path) -> None:
+    with (
+        patch.object(app_base, "DOCUMENT_INDEX_TYPE", DocumentIndexType.LOCAL.value),
+        patch.object(app_base, "LOCAL_DOCUMENT_INDEX_DIR", str(tmp_path / "index")),
+        patch.object(app_base, "wait_for_vespa_with_timeout") as mock_wait_for_vespa,
+    ):
+        app_base.wait_for_vespa_or_shutdown(None)
+
+    mock_wait_for_vespa.assert_not_called()
+    assert (tmp_path / "index").is_dir()
+
+
+def test_local_index_shuts_down_when_directory_is_unusable(tmp_path: Path) -> None:
+    not_a_directory = tmp_path / "file"
+    not_a_directory.write_text("")
+
+    with (
+        patch.object(app_base, "DOCUMENT_INDEX_TYPE", DocumentIndexType.LOCAL.value),
+        patch.object(
+            app_base, "LOCAL_DOCUMENT_INDEX_DIR", str(not_a_directory / "index")
+        ),
+        patch.object(app_base, "wait_for_vespa_with_timeout") as mock_wait_for_vespa,
+    ):
+        with pytest.raises(WorkerShutdown):
+            app_base.wait_for_vespa_or_shutdown(None)
+
+    mock_wait_for_vespa.assert_not_called()
+
+
+def test_vespa_probe_runs_for_other_index_types() -> None:
+    with (
+        patch.object(app_base, "DOCUMENT_INDEX_TYPE", DocumentIndexType.COMBINED.value),
+        patch.object(
+            app_base, "wait_for_vespa_with_timeout", return_value=False
+        ) as mock_wait_for_vespa,
+    ):
+        with pytest.raises(WorkerShutdown):
+            app_base.wait_for_vespa_or_shutdown(None)
+
+    mock_wait_for_vespa.assert_called_once()
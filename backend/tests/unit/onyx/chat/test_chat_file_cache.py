@@ -0,0 +1,105 @@
+from collections.abc import Iterator
+from io import BytesIO
+from unittest.mock import patch
+from uuid import uuid4
+
+import pytest
+
+from onyx.chat import chat_file_cache
+from onyx.chat.chat_file_cache import get_chat_file_text
+from onyx.file_store.models import ChatFileType
+from onyx.file_store.models import FileDescriptor
+from onyx.file_store.utils import user_file_id_to_plaintext_file_name
+from shared_configs.contextvars import CURRENT_TENANT_ID_CONTEXTVAR
+from shared_configs.contextvars import get_current_tenant_id
+
+
+class _FakeFileStore:
+    def __init__(self) -> None:
+        self.files: dict[str, bytes] = {}
+        self.reads: list[str] = []
+
+    def read_file(self, file_id: str, mode: str | None = None) -> BytesIO:
+        self.reads.append(file_id)
+        if file_id not in self.files:
+            raise RuntimeError(f"File {file_id} not found")
+        return BytesIO(self.files[file_id])
+
+
+@pytest.fixture
+def file_store() -> Iterator[_FakeFileStore]:
+    store = _FakeFileStore()
+    chat_file_cache._text_cache.clear()
+    with patch.object(chat_file_cache, "get_default_file_store", return_value=store):
+        yield store
+    chat_file_cache._text_cache.clear()
+
+
+def test_user_file_text_is_read_from_plaintext_once(
+    file_store: _FakeFileStore,
+) -> None:
+    user_file_id = uuid4()
+    plaintext_file_name = user_file_id_to_plaintext_file_name(user_file_id)
+    file_store.files["report.pdf"] = b"%PDF-1.7 \xff\xfe"
+    file_store.files[plaintext_file_name] = "extracted text".encode()
+    file_descriptor = FileDescriptor(
+        id="report.pdf", type=ChatFileType.DOC, user_file_id=str(user_file_id)
+    )
+
+    for _ in range(3):
+        assert get_chat_file_text(file_descriptor) == "extracted text"
+
+    assert file_store.reads == [plaintext_file_name]
+
+
+def test_original_file_is_not_cached_while_plaintext_is_missing(
+    file_store: _FakeFileStore,
+) -> None:
+    user_file_id = uuid4()
+    plaintext_file_name = user_file_id_to_plaintext_file_name(user_file_id)
+    file_store.files["notes.txt"] = b"raw notes"
+    file_descriptor = FileDescriptor(
+        id="notes.txt", type=ChatFileType.PLAIN_TEXT, user_file_id=str(user_file_id)
+    )
+
+    assert get_chat_file_text(file_descriptor) == "raw notes"
+
+    # processing finished in the meantime
+    file_store.files[plaintext_file_name] = b"normalized notes"
+    assert get_chat_file_text(file_descriptor) == "normalized notes"
+    assert get_chat_file_text(file_descriptor) == "normalized notes"
+
+    assert file_store.reads == [
+        plaintext_file_name,
+        "notes.txt",
+        plaintext_file_name,
+    ]
+
+
+def test_cached_text_is_never_shared_across_tenants() -> None:
+    tenant_file_stores = {"tenant_a": _FakeFileStore(), "tenant_b": _FakeFileStore()}
+    tenant_file_stores["tenant_a"].files["notes.txt"] = b"tenant a notes"
+    tenant_file_stores["tenant_b"].files["notes.txt"] = b"tenant b notes"
+    file_descriptor = FileDescriptor(id="notes.txt", type=ChatFileType.PLAIN_TEXT)
+
+    def read_as(tenant_id: str) -> str | None:
+        token = CURRENT_TENANT_ID_CONTEXTVAR.set(tenant_id)
+        try:
+            return get_chat_file_text(file_descriptor)
+        finally:
+            CURRENT_TENANT_ID_CONTEXTVAR.reset(token)
+
+    chat_file_cache._text_cache.clear()
+    with patch.object(
+        chat_file_cache,
+        "get_default_file_store",
+        side_effect=lambda: tenant_file_stores[get_current_tenant_id()],
+    ):
+        for _ in range(2):
+            assert read_as("tenant_a") == "tenant a notes"
+            assert read_as("tenant_b") == "tenant b notes"
+    chat_file_cache._text_cache.clear()
+
+    # each tenant read its own file once, later reads were cached
+    assert tenant_file_stores["tenant_a"].reads == ["notes.txt"]
+    assert tenant_file_stores["tenant_b"].reads == ["notes.txt"]
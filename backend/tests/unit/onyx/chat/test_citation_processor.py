@@ -17,7 +17,9 @@ from datetime import datetime
 
 import pytest
 
+from onyx.chat.citation_processor import CodeFenceTracker
 from onyx.chat.citation_processor import DynamicCitationProcessor
+from onyx.chat.citation_processor import in_code_block
 from onyx.configs.constants import DocumentSource
 from onyx.context.search.models import SearchDoc
 from onyx.server.query_and_chat.streaming_models import CitationInfo
@@ -848,6 +850,46 @@ def test_multiple_code_blocks(mock_search_docs: dict[int, SearchDoc]) -> None:
     assert len(citations) == 1
 
 
+@pytest.mark.parametrize(
+    "tokens",
+    [
+        ["```", "\ncode\n", "```"],
+        ["``", "`\ncode\n`", "``"],
+        ["`", "`", "`", "python\n"],
+        ["````", "text"],
+        ["x ``", "````", "`` y", "```"],
+        ["no fences here"],
+    ],
+)
+def test_code_fence_tracker_matches_in_code_block(tokens: list[str]) -> None:
+    """Test that fences split across tokens are counted like in the full text."""
+    tracker = CodeFenceTracker()
+    text = ""
+    for token in tokens:
+        tracker.feed(token)
+        text += token
+        assert tracker.in_code_block == in_code_block(text)
+
+
+def test_citations_after_long_code_heavy_stream(
+    mock_search_docs: dict[int, SearchDoc],
+) -> None:
+    """Test that code block state stays correct over many small tokens."""
+    processor = DynamicCitationProcessor()
+    processor.update_citation_mapping({1: mock_search_docs[1]})
+
+    tokens: list[str | None] = []
+    for _ in range(200):
+        tokens.extend(["``", "`\n", "x = arr[", "1", "]\n", "`", "``", "\nText "])
+    tokens.extend(["end [", "1", "]."])
+    output, citations = process_tokens(processor, tokens)
+
+    # only the citation after the last code block is processed
+    assert len(citations) == 1
+    assert output.count("[[1]](https://example.com/doc1)") == 1
+    assert processor.llm_out == "".join(token for token in tokens if token)
+
+
 # ============================================================================
 # Stop Token Tests
 # ============================================================================
@@ -813,6 +813,57 @@ def test_salesforce_sqlite() -> None:
         _clear_sf_db(directory)
 
 
+def test_salesforce_sqlite_bulk_load_and_get_records() -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "salesforce_db.sqlite")
+        sf_db = OnyxSalesforceSQLite(filename)
+        sf_db.connect()
+        sf_db.apply_schema()
+
+        # rows are written in several executemany batches
+        sf_db.CSV_LOAD_BATCH_SIZE = 2
+        with sf_db.bulk_load():
+            _create_csv_with_example_data(sf_db)
+            _create_csv_file_and_update_db(
+                sf_db,
+                "Case",
+                [
+                    {
+                        "Id": _VALID_SALESFORCE_IDS[13],
+                        "AccountId": _VALID_SALESFORCE_IDS[0],
+                        "Subject": "Test Case 1",
+                    },
+                    {
+                        "Id": _VALID_SALESFORCE_IDS[14],
+                        "AccountId": _VALID_SALESFORCE_IDS[0],
+                        "Subject": "Test Case 2",
+                    },
+                ],
+            )
+
+        # relationship lookups use the indices created again after the load
+        _test_relationships(sf_db)
+
+        all_ids = [
+            object_id
+            for object_type in (ACCOUNT_OBJECT_TYPE, "Contact", "Opportunity", "Case")
+            for object_id in sf_db.find_ids_by_type(object_type)
+        ]
+        records = sf_db.get_records(all_ids + ["001bR000000missing"])
+        assert set(records.keys()) == set(all_ids)
+        for object_id in all_ids:
+            assert records[object_id] == sf_db.get_record(object_id)
+        assert records[_VALID_SALESFORCE_IDS[13]].data[ACCOUNT_OBJECT_TYPE] == (
+            "Acme Inc."
+        )
+
+        child_records = sf_db.get_records(all_ids, isChild=True)
+        for object_id in all_ids:
+            assert child_records[object_id] == sf_db.get_record(object_id, isChild=True)
+
+        sf_db.close()
+
+
 @pytest.mark.skip(reason="Enable when credentials are available")
 def test_salesforce_bulk_retrieve() -> None:
 
@@ -0,0 +1,105 @@
+from collections.abc import Iterator
+from typing import Any
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+import pytest
+
+from onyx.context.search import query_embedding_cache
+from onyx.context.search.query_embedding_cache import encode_queries_with_cache
+from onyx.context.search.query_embedding_cache import invalidate_query_embedding_cache
+from shared_configs.enums import EmbedTextType
+
+
+class _FakeRedis:
+    def __init__(self) -> None:
+        self.data: dict[str, bytes] = {}
+
+    def get(self, key: str) -> bytes | None:
+        return self.data.get(key)
+
+    def set(self, key: str, value: bytes, ex: int | None = None) -> None:
+        self.data[key] = value
+
+    def delete(self, key: str) -> None:
+        self.data.pop(key, None)
+
+    def scan_iter(self, match: str) -> Iterator[str]:
+        prefix = match.rstrip("*")
+        return iter([key for key in list(self.data) if key.startswith(prefix)])
+
+
+@pytest.fixture
+def fake_redis() -> Iterator[_FakeRedis]:
+    redis_client = _FakeRedis()
+    query_embedding_cache._local_cache.clear()
+    with patch.object(
+        query_embedding_cache, "get_redis_client", return_value=redis_client
+    ):
+        yield redis_client
+    query_embedding_cache._local_cache.clear()
+
+
+def _make_model() -> MagicMock:
+    model = MagicMock()
+    model.provider_type = None
+    model.model_name = "test-model"
+    model.deployment_name = None
+    model.normalize = True
+    model.reduced_dimension = None
+    model.query_prefix = "query: "
+    model.passage_prefix = "passage: "
+
+    def _encode(texts: list[str], text_type: EmbedTextType, **_: Any) -> list:
+        assert text_type == EmbedTextType.QUERY
+        return [[float(len(text)), 0.5] for text in texts]
+
+    model.encode.side_effect = _encode
+    return model
+
+
+def test_query_embeddings_are_cached(fake_redis: _FakeRedis) -> None:
+    model = _make_model()
+
+    assert encode_queries_with_cache(model, 1, ["ab", "abc", "ab"]) == [
+        [2.0, 0.5],
+        [3.0, 0.5],
+        [2.0, 0.5],
+    ]
+    model.encode.assert_called_once_with(["ab", "abc"], text_type=EmbedTextType.QUERY)
+    assert len(fake_redis.data) == 2
+
+    # served from the in-process cache
+    assert encode_queries_with_cache(model, 1, ["abc"]) == [[3.0, 0.5]]
+    assert model.encode.call_count == 1
+
+    # another process only shares the redis cache
+    query_embedding_cache._local_cache.clear()
+    assert encode_queries_with_cache(model, 1, ["abc", "abcd"]) == [
+        [3.0, 0.5],
+        [4.0, 0.5],
+    ]
+    assert model.encode.call_args.args[0] == ["abcd"]
+
+    # different search settings never share entries
+    encode_queries_with_cache(model, 2, ["abc"])
+    assert model.encode.call_args.args[0] == ["abc"]
+
+
+def test_invalidate_and_redis_failure(fake_redis: _FakeRedis) -> None:
+    model = _make_model()
+    encode_queries_with_cache(model, 1, ["abc"])
+
+    invalidate_query_embedding_cache()
+    assert fake_redis.data == {}
+    encode_queries_with_cache(model, 1, ["abc"])
+    assert model.encode.call_count == 2
+
+    query_embedding_cache._local_cache.clear()
+    with patch.object(
+        query_embedding_cache,
+        "get_redis_client",
+        side_effect=ConnectionError("redis is down"),
+    ):
+        assert encode_queries_with_cache(model, 1, ["abc"]) == [[3.0, 0.5]]
+    assert model.encode.call_count == 3
@@ -0,0 +1,46 @@
+from unittest.mock import MagicMock
+
+from sqlalchemy.dialects import postgresql
+
+from onyx.db.document import get_document_connector_counts
+from onyx.db.document import mark_documents_as_modified
+
+
+def _compiled_sql(db_session: MagicMock) -> str:
+    stmt = db_session.execute.call_args.args[0]
+    return str(stmt.compile(dialect=postgresql.dialect()))
+
+
+def test_get_document_connector_counts_groups_by_document() -> None:
+    db_session = MagicMock()
+    db_session.execute.return_value.all.return_value = [("doc_a", 1), ("doc_b", 2)]
+
+    counts = get_document_connector_counts(db_session, ["doc_a", "doc_b", "doc_c"])
+
+    assert counts == [("doc_a", 1), ("doc_b", 2)]
+    db_session.execute.assert_called_once()
+    sql = _compiled_sql(db_session)
+    assert "count(*)" in sql
+    assert "GROUP BY document_by_connector_credential_pair.id" in sql
+    assert "document_by_connector_credential_pair.id IN" in sql
+
+
+def test_mark_documents_as_modified_updates_in_one_statement() -> None:
+    db_session = MagicMock()
+
+    mark_documents_as_modified(["doc_a", "doc_b"], db_session)
+
+    db_session.execute.assert_called_once()
+    sql = _compiled_sql(db_session)
+    assert sql.startswith("UPDATE document SET last_modified=")
+    assert "document.id IN" in sql
+    db_session.commit.assert_called_once()
+
+
+def test_mark_documents_as_modified_skips_empty_batches() -> None:
+    db_session = MagicMock()
+
+    mark_documents_as_modified([], db_session)
+
+    db_session.execute.assert_not_called()
+    db_session.commit.assert_not_called()
@@ -0,0 +1,169 @@
+from typing import Any
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+import onyx.db.document as dbdocument
+from onyx.db.entities import merge_entities_batch
+from onyx.db.entities import transfer_entities
+from onyx.db.models import KGEntity
+from onyx.db.models import KGEntityExtractionStaging
+
+_INSERTED_COLUMNS = ["id_name", "name", "document_id", "occurrences", "attributes"]
+
+
+def _staging_entity(
+    id_name: str,
+    name: str,
+    document_id: str | None,
+    occurrences: int = 1,
+    attributes: dict | None = None,
+) -> KGEntityExtractionStaging:
+    return KGEntityExtractionStaging(
+        id_name=id_name,
+        name=name,
+        entity_type_id_name="ACCOUNT",
+        document_id=document_id,
+        alternative_names=[],
+        occurrences=occurrences,
+        attributes=attributes or {},
+        entity_key=None,
+        parent_key=None,
+    )
+
+
+def _inserted_rows(stmt: Any) -> list[dict[str, Any]]:
+    params = stmt.compile(dialect=postgresql.dialect()).params
+    return [
+        {column: params[f"{column}_m{i}"] for column in _INSERTED_COLUMNS}
+        for i in range(sum(key.startswith("id_name_m") for key in params))
+    ]
+
+
+def test_transfer_entities_upserts_in_one_statement() -> None:
+    inserted_rows: list[dict[str, Any]] = []
+
+    def execute(stmt: Any, params: Any = None) -> MagicMock:
+        result = MagicMock()
+        if params is None:
+            inserted_rows.extend(_inserted_rows(stmt))
+            # the row with a document conflicts with an existing entity
+            result.scalars.return_value.all.return_value = [
+                KGEntity(
+                    id_name=(
+                        "ACCOUNT::existing" if row["document_id"] else row["id_name"]
+                    ),
+                    name=row["name"],
+                    entity_type_id_name="ACCOUNT",
+                    document_id=row["document_id"],
+                )
+                for row in inserted_rows
+            ]
+        return result
+
+    db_session = MagicMock()
+    db_session.execute.side_effect = execute
+    entities = [
+        _staging_entity("staging_a", "Acme", "doc_acme", 1, {"a": "1"}),
+        _staging_entity("staging_b", "acme", "doc_acme", 2, {"b": "2"}),
+        _staging_entity("staging_c", "Acme", None),
+        _staging_entity("staging_d", "Acme", None),
+    ]
+
+    with patch.object(dbdocument, "update_documents_kg_info") as mock_update_docs:
+        transferred = transfer_entities(db_session, entities)
+
+    # entities that would conflict with each other are combined into one row
+    assert [
+        (row["name"], row["document_id"], row["occurrences"], row["attributes"])
+        for row in inserted_rows
+    ] == [
+        ("acme", "doc_acme", 3, {"a": "1", "b": "2"}),
+        ("acme", None, 1, {}),
+        ("acme", None, 1, {}),
+    ]
+    # and the conflicting row resolves to the existing entity
+    assert transferred["staging_a"].id_name == "ACCOUNT::existing"
+    assert transferred["staging_b"].id_name == "ACCOUNT::existing"
+    assert transferred["staging_c"].id_name == inserted_rows[1]["id_name"]
+    assert transferred["staging_d"].id_name == inserted_rows[2]["id_name"]
+
+    mock_update_docs.assert_called_once()
+    assert mock_update_docs.call_args.kwargs["document_ids"] == ["doc_acme"]
+    assert db_session.execute.call_count == 2
+    assert db_session.execute.call_args.args[1] == [
+        {"id_name": staging_id_name, "transferred_id_name": entity.id_name}
+        for staging_id_name, entity in transferred.items()
+    ]
+
+
+def test_transfer_entities_skips_empty_batches() -> None:
+    db_session = MagicMock()
+
+    assert transfer_entities(db_session, []) == {}
+
+    db_session.execute.assert_not_called()
+
+
+def test_merge_entities_batch_folds_children_into_parents() -> None:
+    db_session = MagicMock()
+    parent = KGEntity(
+        id_name="ACCOUNT::acme",
+        name="acme corporation",
+        document_id=None,
+        alternative_names=["acme inc"],
+        occurrences=2,
+        attributes={"a": "1"},
+        entity_key=None,
+        parent_key=None,
+    )
+    children = [
+        _staging_entity("staging_a", "Acme Corp", "doc_acme", 1, {"b": "2"}),
+        _staging_entity("staging_b", "ACME Corporation", None, 3, {"a": "3"}),
+    ]
+
+    with patch.object(dbdocument, "update_documents_kg_info") as mock_update_docs:
+        merge_entities_batch(db_session, [(parent, children)])
+
+    (parent_update,) = db_session.execute.call_args_list[0].args[1]
+    assert {
+        **parent_update,
+        "alternative_names": sorted(parent_update["alternative_names"]),
+    } == {
+        "id_name": "ACCOUNT::acme",
+        "document_id": "doc_acme",
+        # the parent's own name is not an alternative name
+        "alternative_names": ["acme corp", "acme inc"],
+        "occurrences": 6,
+        "attributes": {"a": "3", "b": "2"},
+        "entity_key": None,
+        "parent_key": None,
+    }
+    assert mock_update_docs.call_args.kwargs["document_ids"] == ["doc_acme"]
+    assert db_session.execute.call_args_list[1].args[1] == [
+        {"id_name": "staging_a", "transferred_id_name": "ACCOUNT::acme"},
+        {"id_name": "staging_b", "transferred_id_name": "ACCOUNT::acme"},
+    ]
+
+
+def test_merge_entities_batch_rejects_a_second_document() -> None:
+    db_session = MagicMock()
+    parent = KGEntity(
+        id_name="ACCOUNT::acme",
+        name="acme corporation",
+        document_id=None,
+        alternative_names=[],
+        occurrences=1,
+        attributes={},
+    )
+    children = [
+        _staging_entity("staging_a", "Acme Corporation", "doc_acme"),
+        _staging_entity("staging_b", "Acme Corporation", "doc_acme_2"),
+    ]
+
+    with pytest.raises(ValueError):
+        merge_entities_batch(db_session, [(parent, children)])
+
+    db_session.execute.assert_not_called()
@@ -0,0 +1,199 @@
+from datetime import datetime
+from datetime import timezone
+from pathlib import Path
+
+import pytest
+
+from onyx.access.models import DocumentAccess
+from onyx.configs.constants import DocumentSource
+from onyx.connectors.models import Document
+from onyx.connectors.models import TextSection
+from onyx.context.search.models import IndexFilters
+from onyx.context.search.models import QueryExpansionType
+from onyx.db.enums import EmbeddingPrecision
+from onyx.document_index.interfaces import DocumentInsertionRecord
+from onyx.document_index.interfaces import IndexBatchParams
+from onyx.document_index.interfaces import VespaChunkRequest
+from onyx.document_index.interfaces import VespaDocumentFields
+from onyx.document_index.local.index import LocalIndex
+from onyx.indexing.models import ChunkEmbedding
+from onyx.indexing.models import DocMetadataAwareIndexChunk
+
+
+def _make_chunk(
+    doc_id: str,
+    chunk_id: int,
+    content: str,
+    embedding: list[float],
+    user_emails: list[str | None],
+    document_sets: set[str] | None = None,
+) -> DocMetadataAwareIndexChunk:
+    document = Document(
+        id=doc_id,
+        source=DocumentSource.WEB,
+        semantic_identifier=f"{doc_id} title",
+        metadata={},
+        doc_updated_at=datetime.now(timezone.utc),
+        sections=[TextSection(text=content, link=f"https://{doc_id}")],
+    )
+    return DocMetadataAwareIndexChunk(
+        chunk_id=chunk_id,
+        blurb=content,
+        content=content,
+        source_links={0: f"https://{doc_id}"},
+        image_file_id=None,
+        section_continuation=False,
+        source_document=document,
+        title_prefix="",
+        metadata_suffix_semantic="",
+        metadata_suffix_keyword="",
+        contextual_rag_reserved_tokens=0,
+        doc_summary="",
+        chunk_context="",
+        mini_chunk_texts=None,
+        large_chunk_id=None,
+        embeddings=ChunkEmbedding(full_embedding=embedding, mini_chunk_embeddings=[]),
+        title_embedding=[0.0, 0.0, 1.0],
+        tenant_id="public",
+        access=DocumentAccess.build(
+            user_emails=user_emails,
+            user_groups=[],
+            external_user_emails=[],
+            external_user_group_ids=[],
+            is_public=False,
+        ),
+        document_sets=document_sets or set(),
+        user_project=[],
+        boost=0,
+        aggregated_chunk_boost_factor=1.0,
+    )
+
+
+@pytest.fixture
+def local_index(tmp_path: Path) -> LocalIndex:
+    index = LocalIndex(
+        index_name="test_index",
+        secondary_index_name=None,
+        base_dir=str(tmp_path),
+    )
+    index.ensure_indices_exist(
+        primary_embedding_dim=3,
+        primary_embedding_precision=EmbeddingPrecision.FLOAT,
+        secondary_index_embedding_dim=None,
+        secondary_index_embedding_precision=None,
+    )
+    chunks = [
+        _make_chunk("doc_a", 0, "apples grow on trees", [1.0, 0.0, 0.0], ["a@x.com"]),
+        _make_chunk("doc_a", 1, "oranges are citrus", [0.9, 0.1, 0.0], ["a@x.com"]),
+        _make_chunk(
+            "doc_b", 0, "bananas are yellow", [0.0, 1.0, 0.0], ["b@x.com"], {"fruit"}
+        ),
+    ]
+    index.index(
+        chunks=chunks,
+        index_batch_params=IndexBatchParams(
+            doc_id_to_previous_chunk_cnt={},
+            doc_id_to_new_chunk_cnt={"doc_a": 2, "doc_b": 1},
+            tenant_id="public",
+            large_chunks_enabled=False,
+        ),
+    )
+    return index
+
+
+def _hybrid(
+    index: LocalIndex, query: str, embedding: list[float], filters: IndexFilters
+) -> list[str]:
+    chunks = index.hybrid_retrieval(
+        query=query,
+        query_embedding=embedding,
+        final_keywords=None,
+        filters=filters,
+        hybrid_alpha=0.5,
+        time_decay_multiplier=1.0,
+        num_to_retrieve=10,
+        ranking_profile_type=QueryExpansionType.SEMANTIC,
+    )
+    return [chunk.unique_id for chunk in chunks]
+
+
+def test_hybrid_retrieval_ranking_and_acl(local_index: LocalIndex) -> None:
+    all_access = IndexFilters(
+        access_control_list=["user_email:a@x.com", "user_email:b@x.com"]
+    )
+
+    assert _hybrid(local_index, "bananas", [0.0, 1.0, 0.0], all_access)[0] == "doc_b__0"
+    assert _hybrid(local_index, "apples", [1.0, 0.0, 0.0], all_access)[0] == "doc_a__0"
+
+    only_a = IndexFilters(access_control_list=["user_email:a@x.com"])
+    assert set(_hybrid(local_index, "bananas", [0.0, 1.0, 0.0], only_a)) == {
+        "doc_a__0",
+        "doc_a__1",
+    }
+
+    fruit_set = IndexFilters(access_control_list=None, document_set=["fruit"])
+    assert _hybrid(local_index, "apples", [1.0, 0.0, 0.0], fruit_set) == ["doc_b__0"]
+
+    chunk = local_index.hybrid_retrieval(
+        query="yellow bananas",
+        query_embedding=[0.0, 1.0, 0.0],
+        final_keywords=None,
+        filters=all_access,
+        hybrid_alpha=0.0,
+        time_decay_multiplier=1.0,
+        num_to_retrieve=1,
+        ranking_profile_type=QueryExpansionType.KEYWORD,
+    )[0]
+    assert chunk.content == "bananas are yellow"
+    assert chunk.match_highlights == ["<hi>bananas</hi> are <hi>yellow</hi>"]
+
+
+def test_update_delete_and_id_retrieval(local_index: LocalIndex) -> None:
+    no_filters = IndexFilters(access_control_list=None)
+
+    chunks = local_index.id_based_retrieval(
+        chunk_requests=[VespaChunkRequest(document_id="doc_a")], filters=no_filters
+    )
+    assert [chunk.chunk_id for chunk in chunks] == [0, 1]
+    chunks = local_index.id_based_retrieval(
+        chunk_requests=[
+            VespaChunkRequest(document_id="doc_a", min_chunk_ind=1, max_chunk_ind=1)
+        ],
+        filters=no_filters,
+    )
+    assert [chunk.chunk_id for chunk in chunks] == [1]
+
+    assert (
+        local_index.update_single(
+            "doc_a",
+            tenant_id="public",
+            chunk_count=2,
+            fields=VespaDocumentFields(hidden=True),
+            user_fields=None,
+        )
+        == 2
+    )
+    assert _hybrid(local_index, "apples", [1.0, 0.0, 0.0], no_filters) == ["doc_b__0"]
+
+    # reindexing a document replaces all of its chunks
+    records = local_index.index(
+        chunks=[
+            _make_chunk("doc_b", 0, "bananas are sweet", [0.0, 1.0, 0.0], ["b@x.com"])
+        ],
+        index_batch_params=IndexBatchParams(
+            doc_id_to_previous_chunk_cnt={"doc_b": 1},
+            doc_id_to_new_chunk_cnt={"doc_b": 1},
+            tenant_id="public",
+            large_chunks_enabled=False,
+        ),
+    )
+    assert records == {
+        DocumentInsertionRecord(document_id="doc_b", already_existed=True)
+    }
+    chunks = local_index.id_based_retrieval(
+        chunk_requests=[VespaChunkRequest(document_id="doc_b")], filters=no_filters
+    )
+    assert [chunk.content for chunk in chunks] == ["bananas are sweet"]
+
+    assert local_index.delete_single("doc_b", tenant_id="public", chunk_count=1) == 1
+    assert _hybrid(local_index, "bananas", [0.0, 1.0, 0.0], no_filters) == []
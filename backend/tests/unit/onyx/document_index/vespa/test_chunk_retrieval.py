@@ -0,0 +1,63 @@
+from typing import Any
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+from onyx.context.search.models import IndexFilters
+from onyx.document_index.interfaces import VespaChunkRequest
+from onyx.document_index.vespa import chunk_retrieval
+from onyx.document_index.vespa.chunk_retrieval import parallel_visit_api_retrieval
+
+
+def _make_visit_response(document_id: str, chunk_id: int) -> MagicMock:
+    response = MagicMock()
+    response.json.return_value = {
+        "documents": [
+            {
+                "id": f"id:danswer_chunk::{document_id}_{chunk_id}",
+                "fields": {
+                    "document_id": document_id,
+                    "chunk_id": chunk_id,
+                    "content": f"content {chunk_id}",
+                    "semantic_identifier": document_id,
+                    "section_continuation": False,
+                    "source_type": "web",
+                    "access_control_list": {"PUBLIC": 1},
+                },
+            }
+        ]
+    }
+    return response
+
+
+def test_parallel_visit_api_retrieval_projects_fields() -> None:
+    http_client = MagicMock()
+
+    def _get(url: str, params: dict[str, Any]) -> MagicMock:
+        document_id = params["selection"].split("'")[1]
+        return _make_visit_response(document_id, 0)
+
+    http_client.get.side_effect = _get
+
+    with patch.object(
+        chunk_retrieval, "get_shared_vespa_http_client", return_value=http_client
+    ):
+        chunks = parallel_visit_api_retrieval(
+            index_name="danswer_chunk",
+            chunk_requests=[
+                VespaChunkRequest(document_id="doc_a"),
+                VespaChunkRequest(document_id="doc_b"),
+            ],
+            filters=IndexFilters(access_control_list=["PUBLIC"]),
+            get_large_chunks=True,
+        )
+
+    assert sorted(chunk.document_id for chunk in chunks) == ["doc_a", "doc_b"]
+    assert http_client.get.call_count == 2
+    for call in http_client.get.call_args_list:
+        params = call.kwargs["params"]
+        field_set = params["fieldSet"].split(":", 1)[1].split(",")
+        assert "embeddings" not in field_set
+        assert "content" in field_set
+        assert "access_control_list" in field_set
+        # large chunks were requested, so they are not filtered out
+        assert "large_chunk_reference_ids == null" not in params["selection"]
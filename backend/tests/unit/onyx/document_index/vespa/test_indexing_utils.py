@@ -0,0 +1,144 @@
+import concurrent.futures
+from typing import Any
+from unittest.mock import Mock
+from unittest.mock import patch
+
+from onyx.document_index.vespa.index import VespaIndex
+from onyx.document_index.vespa.indexing_utils import get_final_chunk_indices
+
+
+def _grouping_response(
+    doc_id_to_max_chunk_id: dict[str, int], full_coverage: bool = True
+) -> Mock:
+    response = Mock()
+    response.json.return_value = {
+        "root": {
+            "coverage": {"full": full_coverage},
+            "children": [
+                {
+                    "id": "group:root:0",
+                    "children": [
+                        {
+                            "id": "grouplist:document_id",
+                            "children": [
+                                {
+                                    "id": f"group:string:{doc_id}",
+                                    "value": doc_id,
+                                    "fields": {"max(chunk_id)": max_chunk_id},
+                                }
+                                for doc_id, max_chunk_id in doc_id_to_max_chunk_id.items()
+                            ],
+                        }
+                    ],
+                }
+            ],
+        }
+    }
+    return response
+
+
+def test_get_final_chunk_indices() -> None:
+    http_client = Mock()
+    http_client.post.return_value = _grouping_response({"doc_a": 4, "doc_b": 0})
+
+    result = get_final_chunk_indices(
+        document_ids=["doc_a", "doc_b", 'doc_"c"'],
+        index_name="test_index",
+        http_client=http_client,
+    )
+
+    assert result == {"doc_a": 5, "doc_b": 1}
+    http_client.post.assert_called_once()
+    yql = http_client.post.call_args.kwargs["json"]["yql"]
+    assert 'document_id contains "doc_\\"c\\""' in yql
+    assert "max(3)" in yql
+    assert "tenant_id" not in yql
+
+
+def test_get_final_chunk_indices_filters_by_tenant() -> None:
+    http_client = Mock()
+    http_client.post.return_value = _grouping_response({"doc_a": 4})
+
+    result = get_final_chunk_indices(
+        document_ids=["doc_a"],
+        index_name="test_index",
+        http_client=http_client,
+        tenant_id="tenant_1",
+    )
+
+    assert result == {"doc_a": 5}
+    yql = http_client.post.call_args.kwargs["json"]["yql"]
+    assert '(document_id contains "doc_a") and (tenant_id contains "tenant_1")' in yql
+
+
+def test_get_final_chunk_indices_incomplete_coverage() -> None:
+    http_client = Mock()
+    http_client.post.return_value = _grouping_response({}, full_coverage=False)
+
+    assert (
+        get_final_chunk_indices(
+            document_ids=["doc_a"], index_name="test_index", http_client=http_client
+        )
+        is None
+    )
+
+
+@patch("onyx.document_index.vespa.index.check_for_final_chunk_existence")
+@patch("onyx.document_index.vespa.index.get_final_chunk_indices")
+def test_enrich_basic_chunk_info_batch(
+    mock_get_final_chunk_indices: Mock, mock_check_for_final_chunk_existence: Mock
+) -> None:
+    def _get_final_chunk_indices(document_ids: list[str], **kwargs: Any) -> Any:
+        if "legacy_fallback" in document_ids:
+            return None
+        return {"legacy_doc_1": 7}
+
+    mock_get_final_chunk_indices.side_effect = _get_final_chunk_indices
+    mock_check_for_final_chunk_existence.return_value = 3
+
+    with (
+        patch("onyx.document_index.vespa.index.MAX_OR_CONDITIONS", 2),
+        concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor,
+    ):
+        enriched_doc_infos = VespaIndex.enrich_basic_chunk_info_batch(
+            index_name="test_index",
+            http_client=Mock(),
+            doc_id_to_previous_chunk_cnt={
+                "known_doc": 10,
+                "legacy_doc'1": None,
+                "legacy_doc_2": None,
+                "legacy_fallback": None,
+            },
+            doc_id_to_new_chunk_cnt={
+                "known_doc": 2,
+                "legacy_doc'1": 2,
+                "legacy_doc_2": 5,
+                "legacy_fallback": 1,
+            },
+            executor=executor,
+        )
+
+    doc_infos = {doc_info.doc_id: doc_info for doc_info in enriched_doc_infos}
+    assert list(doc_infos.keys()) == [
+        "known_doc",
+        "legacy_doc'1",
+        "legacy_doc_2",
+        "legacy_fallback",
+    ]
+
+    # known chunk counts don't need Vespa
+    assert doc_infos["known_doc"].chunk_end_index == 10
+    assert not doc_infos["known_doc"].old_version
+
+    # resolved in bulk, looked up by the cleaned document id
+    assert doc_infos["legacy_doc'1"].chunk_start_index == 2
+    assert doc_infos["legacy_doc'1"].chunk_end_index == 7
+    assert doc_infos["legacy_doc'1"].old_version
+    # no chunks in the index -> nothing to delete
+    assert doc_infos["legacy_doc_2"].chunk_end_index == 5
+
+    # the incomplete bulk lookup falls back to probing only for its own batch
+    assert doc_infos["legacy_fallback"].chunk_end_index == 3
+    assert mock_get_final_chunk_indices.call_count == 2
+    assert mock_check_for_final_chunk_existence.call_count == 1
+    assert mock_check_for_final_chunk_existence.call_args.kwargs["start_index"] == 1
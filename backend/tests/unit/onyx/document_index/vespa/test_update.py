@@ -0,0 +1,40 @@
+import httpx
+
+from onyx.document_index.interfaces import MinimalDocumentIndexingInfo
+from onyx.document_index.interfaces import UpdateRequest
+from onyx.document_index.vespa.index import VespaIndex
+
+
+def _update_request(doc_id: str, chunk_count: int) -> UpdateRequest:
+    return UpdateRequest(
+        minimal_document_indexing_info=[
+            MinimalDocumentIndexingInfo(doc_id=doc_id, chunk_start_index=chunk_count)
+        ],
+        boost=2,
+    )
+
+
+def test_updates_do_not_close_a_shared_client() -> None:
+    requests: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(200, json={})
+
+    # like the worker wide client from HttpxPool, shared by every task
+    http_client = httpx.Client(transport=httpx.MockTransport(handler))
+    # a client that was already used can't be entered again
+    http_client.get("http://vespa/state/v1/health")
+    vespa_index = VespaIndex(
+        index_name="test_index",
+        secondary_index_name=None,
+        large_chunks_enabled=False,
+        secondary_large_chunks_enabled=None,
+        httpx_client=http_client,
+    )
+
+    vespa_index.update([_update_request("doc_a", 2)], tenant_id="tenant")
+    vespa_index.update([_update_request("doc_b", 3)], tenant_id="tenant")
+
+    assert not http_client.is_closed
+    assert [request.method for request in requests[1:]] == ["PUT"] * 5
@@ -0,0 +1,89 @@
+import json
+from datetime import datetime
+from datetime import timezone
+from io import BytesIO
+from unittest.mock import MagicMock
+
+import pytest
+
+from onyx.configs.constants import DocumentSource
+from onyx.connectors.models import Document
+from onyx.connectors.models import TextSection
+from onyx.file_store.document_batch_storage import BATCH_FILE_TYPE
+from onyx.file_store.document_batch_storage import BATCH_FORMAT_MAGIC
+from onyx.file_store.document_batch_storage import FileStoreDocumentBatchStorage
+from onyx.file_store.document_batch_storage import LEGACY_BATCH_FILE_TYPE
+
+
+def _make_documents(count: int) -> list[Document]:
+    return [
+        Document(
+            id=f"doc_{i}",
+            source=DocumentSource.FILE,
+            semantic_identifier=f"Document {i}",
+            metadata={"tags": ["a", "b"], "owner": "someone"},
+            doc_updated_at=datetime(2024, 1, 1, tzinfo=timezone.utc),
+            sections=[TextSection(text="some text " * 50, link=f"link_{i}")],
+        )
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def file_store() -> MagicMock:
+    """In memory stand-in for the FileStore, keyed by file id."""
+    files: dict[str, tuple[bytes, str]] = {}
+    store = MagicMock()
+
+    def _save_file(content: BytesIO, file_id: str, file_type: str, **_: object) -> str:
+        files[file_id] = (content.read(), file_type)
+        return file_id
+
+    store.save_file.side_effect = _save_file
+    store.has_file.side_effect = lambda file_id, file_origin, file_type: (
+        file_id in files and files[file_id][1] == file_type
+    )
+    store.read_file.side_effect = lambda file_id, **_: BytesIO(files[file_id][0])
+    store.files = files
+    return store
+
+
+def test_binary_batch_roundtrip(file_store: MagicMock) -> None:
+    storage = FileStoreDocumentBatchStorage(
+        cc_pair_id=1, index_attempt_id=2, file_store=file_store
+    )
+    documents = _make_documents(20)
+
+    storage.store_batch(3, documents)
+
+    data, file_type = file_store.files["iab/1/2/3.json"]
+    assert file_type == BATCH_FILE_TYPE
+    assert data.startswith(BATCH_FORMAT_MAGIC)
+    legacy_size = len(
+        json.dumps([doc.model_dump(mode="json") for doc in documents], indent=2)
+    )
+    assert len(data) < legacy_size / 5
+
+    assert storage.get_batch(3) == documents
+
+    document_stream = storage.stream_batch(3)
+    assert document_stream is not None
+    assert next(document_stream) == documents[0]
+    assert list(document_stream) == documents[1:]
+
+    assert storage.get_batch(4) is None
+
+
+def test_legacy_json_batch_is_readable(file_store: MagicMock) -> None:
+    storage = FileStoreDocumentBatchStorage(
+        cc_pair_id=1, index_attempt_id=2, file_store=file_store
+    )
+    documents = _make_documents(3)
+    file_store.files["iab/1/2/0.json"] = (
+        json.dumps([doc.model_dump(mode="json") for doc in documents], indent=2).encode(
+            "utf-8"
+        ),
+        LEGACY_BATCH_FILE_TYPE,
+    )
+
+    assert storage.get_batch(0) == documents
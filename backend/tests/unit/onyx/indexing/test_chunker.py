@@ -1,3 +1,4 @@
+from collections.abc import Sequence
 from typing import Any
 from unittest.mock import Mock
 
@@ -12,6 +13,7 @@ from onyx.indexing.chunker import Chunker
 from onyx.indexing.embedder import DefaultIndexingEmbedder
 from onyx.indexing.indexing_pipeline import process_image_sections
 from onyx.llm.utils import MAX_CONTEXT_TOKENS
+from onyx.natural_language_processing.utils import BaseTokenizer
 from tests.unit.onyx.indexing.conftest import MockHeartbeat
 
 
@@ -105,3 +107,63 @@ def test_chunker_heartbeat(
 
     assert mock_heartbeat.call_count == 1
     assert len(chunks) > 0
+
+
+class _WhitespaceTokenizer(BaseTokenizer):
+    def __init__(self) -> None:
+        self.encode_calls = 0
+        self.encode_batch_calls = 0
+
+    def encode(self, string: str) -> list[int]:
+        self.encode_calls += 1
+        return [len(token) for token in string.split()]
+
+    def tokenize(self, string: str) -> list[str]:
+        return string.split()
+
+    def decode(self, tokens: list[int]) -> str:
+        raise NotImplementedError
+
+    def encode_batch(self, strings: Sequence[str]) -> list[list[int]]:
+        self.encode_batch_calls += 1
+        return [[len(token) for token in string.split()] for string in strings]
+
+
+def test_chunker_reuses_section_token_counts() -> None:
+    sections = [f"Section number {i} has a few words." for i in range(50)]
+    documents = [
+        Document(
+            id=f"test_doc_{doc_num}",
+            source=DocumentSource.WEB,
+            semantic_identifier="Test Document",
+            metadata={"tags": ["tag1", "tag2"]},
+            doc_updated_at=None,
+            sections=[
+                TextSection(text=section, link=f"link{i}")
+                for i, section in enumerate(sections)
+            ],
+        )
+        for doc_num in range(2)
+    ]
+    indexing_documents = process_image_sections(documents)
+
+    tokenizer = _WhitespaceTokenizer()
+    chunker = Chunker(
+        tokenizer=tokenizer,
+        enable_multipass=False,
+        enable_contextual_rag=False,
+        chunk_token_limit=600,
+    )
+    chunks = chunker.chunk(indexing_documents)
+
+    # 7 tokens per section, so every document fits into a single chunk
+    assert len(chunks) == 2
+    for chunk in chunks:
+        assert all(section in chunk.content for section in sections)
+
+    # all sections were counted in a single batch, the identical sections of the
+    # second document and the repeated title / metadata hit the cache
+    assert tokenizer.encode_batch_calls == 1
+    encode_calls_for_first_doc = tokenizer.encode_calls
+    chunker.chunk(indexing_documents[:1])
+    assert tokenizer.encode_calls == encode_calls_for_first_doc
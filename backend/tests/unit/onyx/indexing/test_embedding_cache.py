@@ -0,0 +1,86 @@
+from pathlib import Path
+from unittest.mock import Mock
+
+import pytest
+
+from onyx.indexing.embedding_cache import build_embedding_cache_key
+from onyx.indexing.embedding_cache import encode_with_cache
+from onyx.indexing.embedding_cache import SQLiteEmbeddingCacheStore
+from shared_configs.enums import EmbedTextType
+
+
+@pytest.fixture
+def embedding_model() -> Mock:
+    model = Mock()
+    model.provider_type = None
+    model.model_name = "test-model"
+    model.deployment_name = None
+    model.normalize = True
+    model.reduced_dimension = None
+    model.query_prefix = "query: "
+    model.passage_prefix = "passage: "
+    model.encode.side_effect = lambda texts, **kwargs: [
+        [float(len(text)), 0.5] for text in texts
+    ]
+    return model
+
+
+def test_sqlite_store_roundtrip_and_eviction(tmp_path: Path) -> None:
+    store = SQLiteEmbeddingCacheStore(
+        db_path=str(tmp_path / "cache.sqlite3"), max_entries=2
+    )
+
+    store.put_many({"a": [1.0, 2.0]})
+    store.put_many({"b": [3.0, 4.0]})
+    assert store.get_many(["b", "missing"]) == {"b": [3.0, 4.0]}
+
+    # "a" is now the least recently used entry
+    store.put_many({"c": [5.0, 6.0]})
+
+    assert store.get_many(["a", "b", "c"]) == {"b": [3.0, 4.0], "c": [5.0, 6.0]}
+
+
+def test_encode_with_cache_only_embeds_misses(
+    tmp_path: Path, embedding_model: Mock
+) -> None:
+    store = SQLiteEmbeddingCacheStore(
+        db_path=str(tmp_path / "cache.sqlite3"), max_entries=100
+    )
+
+    first = encode_with_cache(
+        embedding_model=embedding_model,
+        cache_store=store,
+        texts=["hello", "world!", "hello"],
+        text_type=EmbedTextType.PASSAGE,
+    )
+    assert first == [[5.0, 0.5], [6.0, 0.5], [5.0, 0.5]]
+    # duplicate texts are only embedded once
+    embedding_model.encode.assert_called_once()
+    assert embedding_model.encode.call_args.kwargs["texts"] == ["hello", "world!"]
+
+    embedding_model.encode.reset_mock()
+    second = encode_with_cache(
+        embedding_model=embedding_model,
+        cache_store=store,
+        texts=["world!", "new text"],
+        text_type=EmbedTextType.PASSAGE,
+    )
+    assert second == [[6.0, 0.5], [8.0, 0.5]]
+    assert embedding_model.encode.call_args.kwargs["texts"] == ["new text"]
+
+
+def test_cache_key_depends_on_model_settings(embedding_model: Mock) -> None:
+    key = build_embedding_cache_key(
+        embedding_model, "text", EmbedTextType.PASSAGE, large_chunks_present=False
+    )
+    assert key != build_embedding_cache_key(
+        embedding_model, "text", EmbedTextType.QUERY, large_chunks_present=False
+    )
+    assert key != build_embedding_cache_key(
+        embedding_model, "text", EmbedTextType.PASSAGE, large_chunks_present=True
+    )
+
+    embedding_model.reduced_dimension = 256
+    assert key != build_embedding_cache_key(
+        embedding_model, "text", EmbedTextType.PASSAGE, large_chunks_present=False
+    )
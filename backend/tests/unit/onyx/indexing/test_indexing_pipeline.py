@@ -1,28 +1,39 @@
 from typing import Any
 from typing import cast
 from typing import List
+from unittest.mock import MagicMock
 from unittest.mock import Mock
 from unittest.mock import patch
 
 import pytest
 
 from onyx.configs.app_configs import MAX_DOCUMENT_CHARS
+from onyx.connectors.models import ConnectorFailure
 from onyx.connectors.models import Document
+from onyx.connectors.models import DocumentFailure
 from onyx.connectors.models import DocumentSource
 from onyx.connectors.models import ImageSection
+from onyx.connectors.models import IndexingDocument
 from onyx.connectors.models import TextSection
+from onyx.document_index.interfaces import DocumentInsertionRecord
+from onyx.document_index.interfaces import IndexBatchParams
 from onyx.indexing.chunker import Chunker
 from onyx.indexing.embedder import DefaultIndexingEmbedder
 from onyx.indexing.indexing_pipeline import _get_aggregated_chunk_boost_factor
 from onyx.indexing.indexing_pipeline import add_contextual_summaries
+from onyx.indexing.indexing_pipeline import DocumentBatchPrepareContext
 from onyx.indexing.indexing_pipeline import filter_documents
+from onyx.indexing.indexing_pipeline import index_doc_batch
 from onyx.indexing.indexing_pipeline import process_image_sections
+from onyx.indexing.models import BuildMetadataAwareChunksResult
 from onyx.indexing.models import ChunkEmbedding
+from onyx.indexing.models import DocAwareChunk
 from onyx.indexing.models import IndexChunk
 from onyx.llm.utils import get_max_input_tokens
 from onyx.natural_language_processing.search_nlp_models import (
     ContentClassificationPrediction,
 )
+from onyx.natural_language_processing.utils import BaseTokenizer
 from shared_configs.configs import (
     INDEXING_INFORMATION_CONTENT_CLASSIFICATION_CUTOFF_LENGTH,
 )
@@ -338,3 +349,304 @@ def test_contextual_rag(
             count += 1
         assert chunk.doc_summary == doc_summary
         assert chunk.chunk_context == chunk_context
+
+
+class _CharTokenizer(BaseTokenizer):
+    def encode(self, string: str) -> list[int]:
+        return [ord(char) for char in string]
+
+    def tokenize(self, string: str) -> list[str]:
+        return list(string)
+
+    def decode(self, tokens: list[int]) -> str:
+        return "".join(chr(token) for token in tokens)
+
+
+def _create_contextual_rag_chunk(document: Document, chunk_id: int) -> DocAwareChunk:
+    return DocAwareChunk(
+        chunk_id=chunk_id,
+        blurb="",
+        content=f"{document.id} chunk {chunk_id}",
+        source_links=None,
+        image_file_id=None,
+        section_continuation=False,
+        source_document=document,
+        title_prefix="",
+        metadata_suffix_semantic="",
+        metadata_suffix_keyword="",
+        contextual_rag_reserved_tokens=100,
+        doc_summary="",
+        chunk_context="",
+        mini_chunk_texts=None,
+        large_chunk_id=None,
+    )
+
+
+def test_contextual_summaries_are_cached_by_content() -> None:
+    cached_summaries: dict[str, str] = {}
+    prompts: list[str] = []
+
+    def mock_llm_invoke(prompt: str, **kwargs: Any) -> Mock:
+        prompts.append(prompt)
+        return Mock(content=f"Summary {len(prompts)}")
+
+    mock_llm = Mock()
+    mock_llm.config.max_input_tokens = 10_000
+    mock_llm.invoke_langchain = mock_llm_invoke
+
+    def create_chunks(doc_a_text: str) -> list[DocAwareChunk]:
+        doc_a = create_test_document(
+            doc_id="doc_a", sections=[TextSection(text=doc_a_text, link="link")]
+        )
+        doc_b = create_test_document(doc_id="doc_b")
+        return [
+            _create_contextual_rag_chunk(doc_a, 0),
+            _create_contextual_rag_chunk(doc_a, 1),
+            _create_contextual_rag_chunk(doc_b, 0),
+        ]
+
+    with (
+        patch(
+            "onyx.indexing.indexing_pipeline.get_cached_contextual_summaries",
+            side_effect=lambda llm, keys: {
+                key: cached_summaries[key] for key in keys if key in cached_summaries
+            },
+        ),
+        patch(
+            "onyx.indexing.indexing_pipeline.cache_contextual_summaries",
+            side_effect=lambda llm, summaries: cached_summaries.update(summaries),
+        ),
+    ):
+        chunks = add_contextual_summaries(
+            chunks=create_chunks("Original content"),
+            llm=mock_llm,
+            tokenizer=_CharTokenizer(),
+            chunk_token_limit=100,
+        )
+        # a document summary and a context per chunk
+        assert len(prompts) == 5
+        assert all(chunk.doc_summary and chunk.chunk_context for chunk in chunks)
+
+        # the chunk context prompts of a document share the document as prefix
+        chunk_prompts = [prompt for prompt in prompts if "<chunk>" in prompt]
+        doc_a_prefixes = {
+            prompt.split("<chunk>")[0]
+            for prompt in chunk_prompts
+            if "doc_a chunk" in prompt
+        }
+        assert len(doc_a_prefixes) == 1
+
+        # unchanged documents are served from the cache
+        cached_chunks = add_contextual_summaries(
+            chunks=create_chunks("Original content"),
+            llm=mock_llm,
+            tokenizer=_CharTokenizer(),
+            chunk_token_limit=100,
+        )
+        assert len(prompts) == 5
+        assert [
+            (chunk.doc_summary, chunk.chunk_context) for chunk in cached_chunks
+        ] == [(chunk.doc_summary, chunk.chunk_context) for chunk in chunks]
+
+        # only the changed document is summarized again
+        add_contextual_summaries(
+            chunks=create_chunks("Updated content"),
+            llm=mock_llm,
+            tokenizer=_CharTokenizer(),
+            chunk_token_limit=100,
+        )
+        assert len(prompts) == 8
+
+
+@patch("onyx.indexing.indexing_pipeline.USE_INFORMATION_CONTENT_CLASSIFICATION", False)
+@patch("onyx.indexing.indexing_pipeline.PIPELINED_INDEXING_SUB_BATCH_SIZE", 2)
+@patch("onyx.indexing.indexing_pipeline.process_image_sections")
+@patch("onyx.indexing.indexing_pipeline.embed_chunks_with_failure_handling")
+def test_index_doc_batch_pipelined(
+    mock_embed: Mock, mock_process_image_sections: Mock
+) -> None:
+    docs = [create_test_document(doc_id=f"doc_{i}") for i in range(5)]
+    mock_process_image_sections.side_effect = lambda documents: [
+        IndexingDocument(**doc.model_dump(), processed_sections=[]) for doc in documents
+    ]
+
+    def _embed(
+        chunks: list[DocAwareChunk], **kwargs: Any
+    ) -> tuple[list[IndexChunk], list[ConnectorFailure]]:
+        embedded = [
+            create_test_chunk("content", 0, chunk.source_document.id)
+            for chunk in chunks
+            if chunk.source_document.id != "doc_3"
+        ]
+        failures = [
+            ConnectorFailure(
+                failed_document=DocumentFailure(document_id="doc_3"),
+                failure_message="embedding failed",
+            )
+            for chunk in chunks
+            if chunk.source_document.id == "doc_3"
+        ]
+        return embedded, failures
+
+    mock_embed.side_effect = _embed
+
+    chunker = Mock()
+    chunker.enable_large_chunks = False
+    chunker.chunk.side_effect = lambda documents: [
+        create_test_chunk("content", 0, doc.id) for doc in documents
+    ]
+
+    adapter = MagicMock()
+    adapter.prepare.return_value = DocumentBatchPrepareContext(
+        updatable_docs=docs, id_to_boost_map={}
+    )
+
+    def _build_metadata_aware_chunks(
+        chunks_with_embeddings: list[IndexChunk],
+        context: DocumentBatchPrepareContext,
+        **kwargs: Any,
+    ) -> BuildMetadataAwareChunksResult:
+        return BuildMetadataAwareChunksResult(
+            chunks=[],
+            doc_id_to_previous_chunk_cnt={doc.id: 0 for doc in context.updatable_docs},
+            doc_id_to_new_chunk_cnt={
+                doc.id: len(
+                    [
+                        chunk
+                        for chunk in chunks_with_embeddings
+                        if chunk.source_document.id == doc.id
+                    ]
+                )
+                for doc in context.updatable_docs
+            },
+            user_file_id_to_raw_text={},
+            user_file_id_to_token_count={},
+        )
+
+    adapter.build_metadata_aware_chunks.side_effect = _build_metadata_aware_chunks
+
+    document_index = Mock()
+
+    def _index(
+        chunks: list[Any], index_batch_params: IndexBatchParams
+    ) -> set[DocumentInsertionRecord]:
+        return {
+            DocumentInsertionRecord(document_id=doc_id, already_existed=False)
+            for doc_id, chunk_cnt in index_batch_params.doc_id_to_new_chunk_cnt.items()
+            if chunk_cnt
+        }
+
+    document_index.index.side_effect = _index
+
+    result = index_doc_batch(
+        document_batch=docs,
+        chunker=chunker,
+        embedder=Mock(),
+        information_content_classification_model=Mock(),
+        document_index=document_index,
+        request_id=None,
+        tenant_id="test_tenant",
+        adapter=adapter,
+        enable_pipelining=True,
+    )
+
+    # 5 docs in sub-batches of 2
+    assert chunker.chunk.call_count == 3
+    assert document_index.index.call_count == 3
+    adapter.lock_context.assert_called_once()
+
+    assert result.new_docs == 4
+    assert result.total_docs == 5
+    assert result.total_chunks == 4
+    assert [
+        f.failed_document.document_id for f in result.failures if f.failed_document
+    ] == ["doc_3"]
+    assert [metrics.name for metrics in result.stage_metrics] == [
+        "chunk",
+        "embed",
+        "write",
+    ]
+    assert result.stage_metrics[1].units == 4
+
+    adapter.post_index.assert_called_once()
+    post_index_result = adapter.post_index.call_args.kwargs["result"]
+    assert post_index_result.doc_id_to_new_chunk_cnt == {
+        "doc_0": 1,
+        "doc_1": 1,
+        "doc_2": 1,
+        "doc_3": 0,
+        "doc_4": 1,
+    }
+
+
+def test_process_image_sections_summarizes_each_distinct_image_once() -> None:
+    images = {"logo_1": b"logo", "logo_2": b"logo", "diagram": b"diagram"}
+    file_store = Mock()
+    file_store.read_file_record.side_effect = lambda file_id: (
+        Mock(display_name=file_id) if file_id in images else None
+    )
+    file_store.read_file.side_effect = lambda file_id: Mock(
+        read=Mock(return_value=images[file_id])
+    )
+    cached_summaries: dict[str, str] = {}
+
+    def mock_summarize(llm: Any, image_data: bytes, context_name: str) -> str:
+        return f"summary of {image_data.decode()}"
+
+    document = Document(
+        id="test_doc",
+        source=DocumentSource.WEB,
+        semantic_identifier="Test Document",
+        metadata={},
+        sections=[
+            ImageSection(image_file_id="logo_1", link="link1"),
+            TextSection(text="text", link="link2"),
+            ImageSection(image_file_id="diagram", link="link3"),
+            ImageSection(image_file_id="logo_2", link="link4"),
+            ImageSection(image_file_id="missing", link="link5"),
+        ],
+    )
+
+    with (
+        patch(
+            "onyx.indexing.indexing_pipeline.get_image_extraction_and_analysis_enabled",
+            return_value=True,
+        ),
+        patch(
+            "onyx.indexing.indexing_pipeline.get_default_llm_with_vision",
+            return_value=Mock(),
+        ),
+        patch(
+            "onyx.indexing.indexing_pipeline.get_default_file_store",
+            return_value=file_store,
+        ),
+        patch(
+            "onyx.indexing.indexing_pipeline.summarize_image_with_error_handling",
+            side_effect=mock_summarize,
+        ) as mock_summarize_image,
+        patch(
+            "onyx.indexing.indexing_pipeline.get_cached_image_summaries",
+            side_effect=lambda llm, hashes: {
+                h: cached_summaries[h] for h in hashes if h in cached_summaries
+            },
+        ),
+        patch(
+            "onyx.indexing.indexing_pipeline.cache_image_summaries",
+            side_effect=lambda llm, summaries: cached_summaries.update(summaries),
+        ),
+    ):
+        indexing_documents = process_image_sections([document])
+        assert [
+            section.text for section in indexing_documents[0].processed_sections
+        ] == [
+            "summary of logo",
+            "text",
+            "summary of diagram",
+            "summary of logo",
+            "[Image could not be processed]",
+        ]
+        assert mock_summarize_image.call_count == 2
+
+        # the next batch is served from the cache
+        process_image_sections([document])
+        assert mock_summarize_image.call_count == 2
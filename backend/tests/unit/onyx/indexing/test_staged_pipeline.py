@@ -0,0 +1,71 @@
+import threading
+import time
+
+import pytest
+
+from onyx.indexing.staged_pipeline import PipelineStage
+from onyx.indexing.staged_pipeline import run_staged_pipeline
+
+
+def test_staged_pipeline_preserves_order() -> None:
+    stages = [
+        PipelineStage("double", lambda x: x * 2),
+        PipelineStage("increment", lambda x: x + 1),
+    ]
+
+    results = list(run_staged_pipeline(range(20), stages, max_queue_size=1))
+
+    assert results == [x * 2 + 1 for x in range(20)]
+
+
+def test_staged_pipeline_collects_metrics() -> None:
+    stage = PipelineStage("split", lambda x: [x] * x, count_units=len)
+
+    list(run_staged_pipeline([1, 2, 3], [stage]))
+
+    assert stage.metrics.batches == 3
+    assert stage.metrics.units == 6
+    assert stage.metrics.busy_seconds >= 0
+
+
+def test_staged_pipeline_overlaps_stages() -> None:
+    def _slow(x: int) -> int:
+        time.sleep(0.05)
+        return x
+
+    stages = [PipelineStage("first", _slow), PipelineStage("second", _slow)]
+
+    start = time.monotonic()
+    list(run_staged_pipeline(range(10), stages))
+    elapsed = time.monotonic() - start
+
+    # sequential would take 10 * 2 * 0.05 = 1s, overlapped is closer to 0.55s
+    assert elapsed < 0.9
+
+
+def test_staged_pipeline_propagates_stage_errors() -> None:
+    processed: list[int] = []
+
+    def _fail_on_three(x: int) -> int:
+        if x == 3:
+            raise ValueError("boom")
+        processed.append(x)
+        return x
+
+    with pytest.raises(ValueError, match="boom"):
+        list(run_staged_pipeline(range(10), [PipelineStage("fail", _fail_on_three)]))
+
+    assert processed == [0, 1, 2]
+
+
+def test_staged_pipeline_stops_stages_when_closed_early() -> None:
+    threads_before = threading.active_count()
+
+    results = run_staged_pipeline(
+        range(1000), [PipelineStage("identity", lambda x: x)], max_queue_size=1
+    )
+    assert next(results) == 0
+    assert next(results) == 1
+    results.close()
+
+    assert threading.active_count() == threads_before
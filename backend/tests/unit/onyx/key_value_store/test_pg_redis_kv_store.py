@@ -0,0 +1,120 @@
+import json
+from collections.abc import Iterator
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+import pytest
+
+from onyx.key_value_store import local_cache as local_cache_module
+from onyx.key_value_store import store
+from onyx.key_value_store.interface import KvKeyNotFoundError
+from onyx.key_value_store.local_cache import LocalKVCache
+from onyx.key_value_store.store import PgRedisKVStore
+from onyx.key_value_store.store import REDIS_KEY_PREFIX
+
+
+@pytest.fixture
+def mock_start_invalidation_listener() -> Iterator[MagicMock]:
+    # the real listener would subscribe to Redis from a background thread
+    with patch.object(store, "start_invalidation_listener") as mock_start:
+        yield mock_start
+
+
+@pytest.fixture
+def local_cache(mock_start_invalidation_listener: MagicMock) -> Iterator[LocalKVCache]:
+    cache = LocalKVCache(max_entries=100, ttl_seconds=60)
+    cache.set_listening(True)
+    with patch.object(store, "get_local_kv_cache", return_value=cache):
+        yield cache
+
+
+def _make_kv_store(redis_values: dict[str, str]) -> tuple[PgRedisKVStore, MagicMock]:
+    redis_client = MagicMock()
+    redis_client.mget.side_effect = lambda keys: [
+        (
+            redis_values[key.removeprefix(REDIS_KEY_PREFIX)].encode()
+            if key.removeprefix(REDIS_KEY_PREFIX) in redis_values
+            else None
+        )
+        for key in keys
+    ]
+    with patch.object(store, "get_current_tenant_id", return_value="tenant"):
+        kv_store = PgRedisKVStore(redis_client=redis_client)
+    return kv_store, redis_client
+
+
+def test_load_many_reads_each_tier_once(local_cache: LocalKVCache) -> None:
+    kv_store, redis_client = _make_kv_store({"in_redis": json.dumps({"a": 1})})
+    local_cache.put("tenant", "in_local", json.dumps("local"), local_cache.version)
+
+    with patch.object(
+        kv_store,
+        "_load_from_postgres",
+        return_value={"in_postgres": json.dumps([1, 2])},
+    ) as mock_load_from_postgres:
+        values = kv_store.load_many(["in_local", "in_redis", "in_postgres", "missing"])
+
+    assert values == {"in_local": "local", "in_redis": {"a": 1}, "in_postgres": [1, 2]}
+    redis_client.mget.assert_called_once_with(
+        [REDIS_KEY_PREFIX + key for key in ["in_redis", "in_postgres", "missing"]]
+    )
+    mock_load_from_postgres.assert_called_once_with(["in_postgres", "missing"])
+
+    # everything that was found is now served from the local cache
+    redis_client.mget.reset_mock()
+    assert kv_store.load("in_postgres") == [1, 2]
+    redis_client.mget.assert_not_called()
+
+
+def test_load_raises_for_missing_key(local_cache: LocalKVCache) -> None:
+    kv_store, _ = _make_kv_store({})
+    with patch.object(kv_store, "_load_from_postgres", return_value={}):
+        with pytest.raises(KvKeyNotFoundError):
+            kv_store.load("missing")
+
+
+def test_values_invalidated_while_loading_are_not_cached(
+    local_cache: LocalKVCache,
+) -> None:
+    kv_store, redis_client = _make_kv_store({"key": json.dumps("old")})
+
+    def mget_racing_with_a_write(keys: list[str]) -> list[bytes]:
+        local_cache.invalidate("tenant", "key")
+        return [json.dumps("old").encode()]
+
+    redis_client.mget.side_effect = mget_racing_with_a_write
+    assert kv_store.load("key") == "old"
+    assert local_cache.get("tenant", "key") is None
+
+
+def test_local_cache_is_bypassed_when_not_listening() -> None:
+    cache = LocalKVCache(max_entries=100, ttl_seconds=60)
+    cache.set_listening(True)
+    cache.put("tenant", "key", "1", cache.version)
+    assert cache.get("tenant", "key") == "1"
+
+    cache.set_listening(False)
+    cache.put("tenant", "key", "1", cache.version)
+    assert cache.get("tenant", "key") is None
+
+
+def test_invalidation_listener_is_started_on_first_read(
+    local_cache: LocalKVCache, mock_start_invalidation_listener: MagicMock
+) -> None:
+    kv_store, _ = _make_kv_store({"key": json.dumps("value")})
+    mock_start_invalidation_listener.assert_not_called()
+
+    assert kv_store.load("key") == "value"
+    mock_start_invalidation_listener.assert_called_once()
+
+
+def test_invalidation_listener_is_started_once_per_process() -> None:
+    with (
+        patch.object(local_cache_module, "_listener_pid", None),
+        patch.object(local_cache_module.threading, "Thread") as mock_thread,
+    ):
+        local_cache_module.start_invalidation_listener()
+        local_cache_module.start_invalidation_listener()
+
+    mock_thread.assert_called_once()
+    mock_thread.return_value.start.assert_called_once()
@@ -0,0 +1,325 @@
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextlib import nullcontext
+from typing import Any
+from typing import cast
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.functions import FunctionElement
+
+from onyx.configs.kg_configs import KG_CLUSTERING_RETRIEVE_THRESHOLD
+from onyx.db.models import Document
+from onyx.db.models import KGEntity
+from onyx.db.models import KGEntityExtractionStaging
+from onyx.kg.clustering import clustering
+from onyx.kg.clustering.clustering import _cluster_grounded_entity_batch
+from onyx.kg.clustering.clustering import _cluster_one_grounded_entity
+from onyx.kg.clustering.clustering import _ClusterCandidate
+from onyx.kg.clustering.clustering import _EntityTypeClusterIndex
+from onyx.kg.clustering.trigram_index import get_trigrams
+from onyx.kg.clustering.trigram_index import trigram_similarity
+
+DOCUMENT_NAMES = {
+    "doc_acme": "Acme Corporation",
+    "doc_acme_2": "ACME Corporation",
+    "doc_initech": "Initech Systems",
+    "doc_initech_2": "Initech Systems",
+    "doc_globex": "Globex Industries",
+    "doc_globex_2": "Globex Industries",
+}
+
+
+def _existing_entities() -> list[KGEntity]:
+    return [
+        KGEntity(
+            id_name="ACCOUNT::acme",
+            name="acme corporation",
+            entity_type_id_name="ACCOUNT",
+            document_id=None,
+            alternative_names=[],
+            occurrences=1,
+        ),
+        KGEntity(
+            id_name="ACCOUNT::initech",
+            name="initech systems",
+            entity_type_id_name="ACCOUNT",
+            document_id="doc_initech",
+            alternative_names=[],
+            occurrences=1,
+        ),
+        KGEntity(
+            id_name="ACCOUNT::version_1",
+            name="version 1 release",
+            entity_type_id_name="ACCOUNT",
+            document_id=None,
+            alternative_names=[],
+            occurrences=1,
+        ),
+    ]
+
+
+def _staging_entities() -> list[KGEntityExtractionStaging]:
+    return [
+        KGEntityExtractionStaging(
+            id_name=f"staging_{i:02d}",
+            name=name,
+            entity_type_id_name=entity_type,
+            document_id=document_id,
+            alternative_names=[],
+            occurrences=1,
+        )
+        for i, (name, entity_type, document_id) in enumerate(
+            [
+                # merged into the existing entity
+                ("Acme Corporation.", "ACCOUNT", None),
+                # gives the existing entity its document
+                ("Acme Corp", "ACCOUNT", "doc_acme"),
+                # which now can't take another document
+                ("acme", "ACCOUNT", "doc_acme_2"),
+                ("Initech", "ACCOUNT", "doc_initech_2"),
+                ("Initech Systems", "ACCOUNT", None),
+                # names with numbers are never merged
+                ("Version 2 Release", "ACCOUNT", None),
+                ("version 2 release", "ACCOUNT", None),
+                # merged into entities transferred before them
+                ("Globex Industries", "ACCOUNT", None),
+                ("Globex Industries.", "ACCOUNT", None),
+                ("Globex", "ACCOUNT", "doc_globex"),
+                ("globex industries", "ACCOUNT", "doc_globex_2"),
+                # other entity types are clustered separately
+                ("Acme Corporation", "EMPLOYEE", None),
+                # upserted into the entity of the same name and document
+                ("acme", "ACCOUNT", "doc_acme_2"),
+            ]
+        )
+    ]
+
+
+def _matches(row: Any, criterion: Any) -> bool:
+    if isinstance(criterion, FunctionElement):
+        # similarity_op(column, text) is pg_trgm's `%` operator
+        column, text = criterion.clauses.clauses
+        similarity = trigram_similarity(
+            get_trigrams(getattr(row, cast(str, column.key))), get_trigrams(text.value)
+        )
+        return similarity >= KG_CLUSTERING_RETRIEVE_THRESHOLD
+    value = getattr(row, criterion.left.key)
+    if criterion.operator is operators.is_:
+        return value is None
+    if criterion.operator is operators.in_op:
+        return value in criterion.right.value
+    if criterion.operator is operators.eq:
+        return value == criterion.right.value
+    raise NotImplementedError(criterion)
+
+
+class _FakeQuery:
+    def __init__(self, rows: list[Any], columns: tuple[Any, ...]) -> None:
+        self.rows = rows
+        self.columns = columns
+        self.criteria: list[Any] = []
+
+    def filter(self, *criteria: Any) -> "_FakeQuery":
+        self.criteria.extend(criteria)
+        return self
+
+    def all(self) -> list[Any]:
+        rows = [
+            row
+            for row in self.rows
+            if all(_matches(row, criterion) for criterion in self.criteria)
+        ]
+        if isinstance(self.columns[0], type):
+            return rows
+        return [
+            tuple(getattr(row, column.key) for column in self.columns) for row in rows
+        ]
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self.all())
+
+    def yield_per(self, count: int) -> Iterator[Any]:
+        return iter(self.all())
+
+    def scalar(self) -> Any:
+        results = self.all()
+        return results[0][0] if results else None
+
+
+class _FakeKG:
+    """In-memory stand-in for the documents and KG entity tables."""
+
+    def __init__(self) -> None:
+        self.documents = [
+            Document(id=document_id, semantic_id=semantic_id)
+            for document_id, semantic_id in DOCUMENT_NAMES.items()
+        ]
+        self.entities = _existing_entities()
+        self.transferred_id_names: dict[str, str] = {}
+
+    # session
+
+    def query(self, *columns: Any) -> _FakeQuery:
+        model = columns[0] if isinstance(columns[0], type) else columns[0].class_
+        return _FakeQuery(
+            self.entities if model is KGEntity else self.documents, columns
+        )
+
+    def execute(self, statement: Any) -> None:
+        pass
+
+    def commit(self) -> None:
+        pass
+
+    # onyx.db.entities
+
+    def transfer(self, entity: KGEntityExtractionStaging) -> KGEntity:
+        name = entity.name.casefold()
+        for existing in self.entities:
+            if entity.document_id is not None and (
+                existing.name,
+                existing.entity_type_id_name,
+                existing.document_id,
+            ) == (name, entity.entity_type_id_name, entity.document_id):
+                existing.occurrences += entity.occurrences
+                self.transferred_id_names[entity.id_name] = existing.id_name
+                return existing
+
+        new_entity = KGEntity(
+            id_name=f"{entity.entity_type_id_name}::{len(self.entities)}",
+            name=name,
+            entity_type_id_name=entity.entity_type_id_name,
+            document_id=entity.document_id,
+            alternative_names=[],
+            occurrences=entity.occurrences,
+        )
+        self.entities.append(new_entity)
+        self.transferred_id_names[entity.id_name] = new_entity.id_name
+        return new_entity
+
+    def merge(self, parent: KGEntity, child: KGEntityExtractionStaging) -> KGEntity:
+        if parent.document_id is None:
+            parent.document_id = child.document_id
+        parent.alternative_names = sorted(
+            {*parent.alternative_names, child.name.lower()} - {parent.name}
+        )
+        parent.occurrences += child.occurrences
+        self.transferred_id_names[child.id_name] = parent.id_name
+        return parent
+
+    def clusters(self) -> list[tuple[str, str, str | None, list[str]]]:
+        return sorted(
+            (
+                entity.entity_type_id_name,
+                entity.name,
+                entity.document_id,
+                sorted(
+                    staging_id_name
+                    for staging_id_name, id_name in self.transferred_id_names.items()
+                    if id_name == entity.id_name
+                ),
+            )
+            for entity in self.entities
+        )
+
+    def snapshot(self) -> list[tuple[Any, ...]]:
+        return sorted(
+            (
+                entity.id_name,
+                entity.name,
+                entity.document_id,
+                entity.alternative_names,
+                entity.occurrences,
+            )
+            for entity in self.entities
+        )
+
+
+@contextmanager
+def _clustering_against(kg: _FakeKG) -> Iterator[None]:
+    with patch.multiple(
+        clustering,
+        get_session_with_current_tenant=lambda: nullcontext(kg),
+        transfer_entity=lambda db_session, entity: kg.transfer(entity),
+        merge_entities=lambda db_session, parent, child: kg.merge(parent, child),
+        transfer_entities=lambda db_session, entities: {
+            entity.id_name: kg.transfer(entity) for entity in entities
+        },
+        merge_entities_batch=lambda db_session, merges: [
+            kg.merge(parent, child) for parent, children in merges for child in children
+        ],
+    ):
+        yield
+
+
+def _cluster_serially() -> _FakeKG:
+    kg = _FakeKG()
+    with _clustering_against(kg):
+        for entity in _staging_entities():
+            _cluster_one_grounded_entity(entity)
+    return kg
+
+
+def test_cluster_index_skips_names_with_digits() -> None:
+    cluster_index = _EntityTypeClusterIndex()
+    cluster_index.add(_ClusterCandidate(name="version 1 release", has_document=False))
+    cluster_index.add(_ClusterCandidate(name="acme corporation", has_document=False))
+
+    assert [candidate.name for candidate in cluster_index.candidates] == [
+        "acme corporation"
+    ]
+    assert cluster_index.find_best_match("version 1 release", False) is None
+
+
+def test_cluster_index_merges_documents_into_entities_without_one() -> None:
+    cluster_index = _EntityTypeClusterIndex()
+    with_document = _ClusterCandidate(name="acme corporation", has_document=True)
+    without_document = _ClusterCandidate(name="acme corporation.", has_document=False)
+    cluster_index.add(with_document)
+    cluster_index.add(without_document)
+
+    assert cluster_index.find_best_match("acme corporation", False) is with_document
+    assert cluster_index.find_best_match("acme corporation", True) is without_document
+    # too different to be merged, even if similar enough to be retrieved
+    assert cluster_index.find_best_match("acme corporations inc", False) is None
+
+
+def test_serial_clustering() -> None:
+    kg = _cluster_serially()
+
+    assert kg.clusters() == [
+        ("ACCOUNT", "acme", "doc_acme_2", ["staging_02", "staging_12"]),
+        ("ACCOUNT", "acme corporation", "doc_acme", ["staging_00", "staging_01"]),
+        (
+            "ACCOUNT",
+            "globex industries",
+            "doc_globex",
+            ["staging_07", "staging_08", "staging_09"],
+        ),
+        ("ACCOUNT", "globex industries", "doc_globex_2", ["staging_10"]),
+        ("ACCOUNT", "initech", "doc_initech_2", ["staging_03"]),
+        ("ACCOUNT", "initech systems", "doc_initech", ["staging_04"]),
+        ("ACCOUNT", "version 1 release", None, []),
+        ("ACCOUNT", "version 2 release", None, ["staging_05"]),
+        ("ACCOUNT", "version 2 release", None, ["staging_06"]),
+        ("EMPLOYEE", "acme corporation", None, ["staging_11"]),
+    ]
+
+
+@pytest.mark.parametrize("batch_size", [1, 5, 13])
+def test_batch_clustering_matches_serial(batch_size: int) -> None:
+    serial_kg = _cluster_serially()
+
+    kg = _FakeKG()
+    entities = _staging_entities()
+    cluster_indices: dict[str, _EntityTypeClusterIndex] = {}
+    with _clustering_against(kg):
+        for start in range(0, len(entities), batch_size):
+            _cluster_grounded_entity_batch(
+                entities[start : start + batch_size], cluster_indices
+            )
+
+    assert kg.snapshot() == serial_kg.snapshot()
+    assert kg.transferred_id_names == serial_kg.transferred_id_names
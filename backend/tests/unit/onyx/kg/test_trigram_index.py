@@ -0,0 +1,44 @@
+import random
+import string
+
+from onyx.kg.clustering.trigram_index import get_trigrams
+from onyx.kg.clustering.trigram_index import trigram_similarity
+from onyx.kg.clustering.trigram_index import TrigramIndex
+
+
+def test_get_trigrams_matches_pg_trgm() -> None:
+    # SELECT show_trgm('Cat-Food') -> {"  c","  f"," ca"," fo","at ",cat,foo,"od ",ood}
+    assert get_trigrams("Cat-Food") == {
+        "  c",
+        " ca",
+        "cat",
+        "at ",
+        "  f",
+        " fo",
+        "foo",
+        "ood",
+        "od ",
+    }
+    assert get_trigrams("--") == frozenset()
+
+
+def test_trigram_index_matches_brute_force() -> None:
+    rng = random.Random(0)
+    words = ["acme", "corp", "inc", "onyx", "data", "labs", "acne", "crop"]
+    texts = [" ".join(rng.choices(words, k=rng.randint(1, 3))) for _ in range(300)] + [
+        "".join(rng.choices(string.ascii_lowercase, k=6)) for _ in range(100)
+    ]
+
+    index = TrigramIndex(threshold=0.6)
+    for text in texts:
+        index.add(text)
+    assert len(index) == len(texts)
+
+    for query in texts[:50] + ["acme corporation", "onyx lab", "zzz"]:
+        query_trigrams = get_trigrams(query)
+        expected = [
+            position
+            for position, text in enumerate(texts)
+            if trigram_similarity(query_trigrams, get_trigrams(text)) >= 0.6
+        ]
+        assert index.search(query) == expected
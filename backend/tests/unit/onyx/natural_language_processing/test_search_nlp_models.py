@@ -5,6 +5,7 @@ from unittest.mock import AsyncMock
 from unittest.mock import MagicMock
 from unittest.mock import patch
 
+import numpy as np
 import pytest
 from httpx import AsyncClient
 from litellm.exceptions import RateLimitError
@@ -13,11 +14,15 @@ from onyx.natural_language_processing.search_nlp_models import CloudEmbedding
 from onyx.natural_language_processing.search_nlp_models import (
     ConnectorClassificationModel,
 )
+from onyx.natural_language_processing.search_nlp_models import EmbeddingModel
 from onyx.natural_language_processing.search_nlp_models import (
     InformationContentClassificationModel,
 )
+from shared_configs.configs import MODEL_SERVER_EMBEDDING_TRANSPORTS
 from shared_configs.enums import EmbeddingProvider
 from shared_configs.enums import EmbedTextType
+from shared_configs.model_server_models import encode_embeddings
+from shared_configs.model_server_models import get_embeddings_media_type
 
 
 @pytest.fixture
@@ -71,6 +76,36 @@ async def test_openai_embedding(
         mock_client.embeddings.create.assert_called_once()
 
 
+@patch("onyx.natural_language_processing.search_nlp_models.requests.post")
+def test_local_embedding_binary_transport(mock_post: MagicMock) -> None:
+    embeddings = np.array([[0.5, 0.25], [0.125, 1.0]], dtype=np.float32)
+    mock_response = MagicMock()
+    mock_response.status_code = 200
+    mock_response.headers = {"Content-Type": get_embeddings_media_type("float32")}
+    mock_response.content = encode_embeddings(embeddings, "float32")
+    mock_post.return_value = mock_response
+
+    with patch("onyx.natural_language_processing.search_nlp_models.get_tokenizer"):
+        model = EmbeddingModel(
+            server_host="localhost",
+            server_port=9000,
+            model_name="fake-local-model",
+            normalize=True,
+            query_prefix=None,
+            passage_prefix=None,
+            api_key=None,
+            api_url=None,
+            provider_type=None,
+        )
+    result = model.encode(["hello", "world"], text_type=EmbedTextType.QUERY)
+
+    assert result == [[0.5, 0.25], [0.125, 1.0]]
+    assert "application/vnd.onyx.embeddings+float32" in (
+        mock_post.call_args.kwargs["headers"]["Accept"]
+    )
+    mock_response.json.assert_not_called()
+
+
 @pytest.mark.asyncio
 async def test_rate_limit_handling() -> None:
     with patch(
@@ -180,3 +215,11 @@ class TestConnectorClassificationModel:
 
         assert results == ["github"]
         mock_post.assert_called_once()
+
+
+def test_embedding_transports_have_media_types() -> None:
+    # every transport accepted at config load must be encodable, so embed calls
+    # can't fail on it later
+    for transport in MODEL_SERVER_EMBEDDING_TRANSPORTS:
+        if transport != "json":
+            assert get_embeddings_media_type(transport)
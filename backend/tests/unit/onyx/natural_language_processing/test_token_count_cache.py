@@ -0,0 +1,88 @@
+from collections.abc import Sequence
+
+from onyx.natural_language_processing.utils import BaseTokenizer
+from onyx.natural_language_processing.utils import get_shared_token_count_cache
+from onyx.natural_language_processing.utils import TokenCountCache
+
+
+class _CountingTokenizer(BaseTokenizer):
+    def __init__(self) -> None:
+        self.encoded: list[str] = []
+
+    def encode(self, string: str) -> list[int]:
+        self.encoded.append(string)
+        return list(range(len(string.split())))
+
+    def tokenize(self, string: str) -> list[str]:
+        return string.split()
+
+    def decode(self, tokens: list[int]) -> str:
+        raise NotImplementedError
+
+    def encode_batch(self, strings: Sequence[str]) -> list[list[int]]:
+        self.encoded.extend(strings)
+        return [list(range(len(string.split()))) for string in strings]
+
+
+def test_token_count_cache_memoizes() -> None:
+    tokenizer = _CountingTokenizer()
+    cache = TokenCountCache(tokenizer)
+
+    assert cache("one two three") == 3
+    assert cache("one two three") == 3
+    assert cache.count("four") == 1
+
+    assert tokenizer.encoded == ["one two three", "four"]
+
+
+def test_token_count_cache_batch_only_encodes_misses() -> None:
+    tokenizer = _CountingTokenizer()
+    cache = TokenCountCache(tokenizer)
+    cache("a b")
+
+    counts = cache.count_batch(["a b", "c d e", "c d e", "f"])
+
+    assert counts == [2, 3, 3, 1]
+    assert tokenizer.encoded == ["a b", "c d e", "f"]
+
+
+def test_token_count_cache_evicts_least_recently_used() -> None:
+    tokenizer = _CountingTokenizer()
+    cache = TokenCountCache(tokenizer, max_chars=10)
+
+    cache("aaaa")
+    cache("bbbb")
+    # refresh "aaaa" so that "bbbb" is the least recently used
+    cache("aaaa")
+    cache("cccc")
+
+    tokenizer.encoded.clear()
+    cache("aaaa")
+    cache("cccc")
+    assert tokenizer.encoded == []
+
+    cache("bbbb")
+    assert tokenizer.encoded == ["bbbb"]
+
+
+def test_token_count_cache_keys_long_texts_by_hash() -> None:
+    tokenizer = _CountingTokenizer()
+    cache = TokenCountCache(tokenizer, max_chars=1000)
+    long_text = "word " * 10_000
+
+    assert cache(long_text) == 10_000
+    assert cache.count_batch([long_text, "a b"]) == [10_000, 2]
+
+    assert tokenizer.encoded == [long_text, "a b"]
+
+
+def test_shared_token_count_cache_is_per_tokenizer() -> None:
+    tokenizer = _CountingTokenizer()
+    other_tokenizer = _CountingTokenizer()
+
+    assert get_shared_token_count_cache(tokenizer) is get_shared_token_count_cache(
+        tokenizer
+    )
+    assert get_shared_token_count_cache(tokenizer) is not get_shared_token_count_cache(
+        other_tokenizer
+    )
@@ -0,0 +1,114 @@
+from collections.abc import Callable
+from collections.abc import Iterator
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+import pytest
+
+from onyx.configs.constants import OnyxCeleryTask
+from onyx.redis import redis_connector_delete
+from onyx.redis import redis_connector_prune
+from onyx.redis.redis_connector_delete import RedisConnectorDelete
+from onyx.redis.redis_connector_prune import RedisConnectorPrune
+
+DOC_IDS = ["doc_1", "doc_2", "doc_3", "doc_4", "doc_5"]
+
+_GenerateTasks = Callable[[int], tuple[int | None, MagicMock, MagicMock]]
+
+
+@pytest.fixture
+def cc_pair() -> Iterator[MagicMock]:
+    cc_pair = MagicMock()
+    cc_pair.connector_id = 1
+    cc_pair.credential_id = 2
+    with (
+        patch.object(
+            redis_connector_delete,
+            "get_connector_credential_pair_from_id",
+            return_value=cc_pair,
+        ),
+        patch.object(
+            redis_connector_prune,
+            "get_connector_credential_pair_from_id",
+            return_value=cc_pair,
+        ),
+        patch.object(
+            redis_connector_delete,
+            "construct_document_id_select_for_connector_credential_pair",
+        ),
+    ):
+        yield cc_pair
+
+
+def _generate_delete_tasks(batch_size: int) -> tuple[int | None, MagicMock, MagicMock]:
+    r = MagicMock()
+    celery_app = MagicMock()
+    db_session = MagicMock()
+    db_session.scalars.return_value.yield_per.return_value = iter(DOC_IDS)
+
+    num_tasks = RedisConnectorDelete("tenant", 7, r).generate_tasks(
+        celery_app, db_session, MagicMock(), batch_size=batch_size
+    )
+    return num_tasks, celery_app, r
+
+
+def _generate_prune_tasks(batch_size: int) -> tuple[int | None, MagicMock, MagicMock]:
+    r = MagicMock()
+    celery_app = MagicMock()
+
+    num_tasks = RedisConnectorPrune("tenant", 7, r).generate_tasks(
+        set(DOC_IDS), celery_app, MagicMock(), None, batch_size=batch_size
+    )
+    return num_tasks, celery_app, r
+
+
+@pytest.mark.parametrize(
+    "generate_tasks", [_generate_delete_tasks, _generate_prune_tasks]
+)
+def test_one_task_per_document_without_batching(
+    cc_pair: MagicMock, generate_tasks: _GenerateTasks
+) -> None:
+    num_tasks, celery_app, r = generate_tasks(1)
+
+    assert num_tasks == len(DOC_IDS)
+    assert {call.args[0] for call in celery_app.send_task.call_args_list} == {
+        OnyxCeleryTask.DOCUMENT_BY_CC_PAIR_CLEANUP_TASK
+    }
+    assert (
+        sorted(
+            call.kwargs["kwargs"]["document_id"]
+            for call in celery_app.send_task.call_args_list
+        )
+        == DOC_IDS
+    )
+    # every task is tracked in the taskset under its own id
+    task_ids = [call.kwargs["task_id"] for call in celery_app.send_task.call_args_list]
+    assert [call.args[1] for call in r.sadd.call_args_list] == task_ids
+
+
+@pytest.mark.parametrize(
+    "generate_tasks", [_generate_delete_tasks, _generate_prune_tasks]
+)
+def test_documents_are_batched(
+    cc_pair: MagicMock, generate_tasks: _GenerateTasks
+) -> None:
+    num_tasks, celery_app, r = generate_tasks(2)
+
+    assert num_tasks == 3
+    assert {call.args[0] for call in celery_app.send_task.call_args_list} == {
+        OnyxCeleryTask.DOCUMENT_BY_CC_PAIR_CLEANUP_BATCH_TASK
+    }
+    batches = [
+        call.kwargs["kwargs"]["document_ids"]
+        for call in celery_app.send_task.call_args_list
+    ]
+    assert sorted(len(batch) for batch in batches) == [1, 2, 2]
+    assert sorted(doc_id for batch in batches for doc_id in batch) == DOC_IDS
+    for call in celery_app.send_task.call_args_list:
+        assert call.kwargs["kwargs"]["connector_id"] == 1
+        assert call.kwargs["kwargs"]["credential_id"] == 2
+        assert call.kwargs["kwargs"]["tenant_id"] == "tenant"
+    # one taskset entry per batch, so fence progress counts batches
+    task_ids = [call.kwargs["task_id"] for call in celery_app.send_task.call_args_list]
+    assert [call.args[1] for call in r.sadd.call_args_list] == task_ids
+    assert len(set(task_ids)) == 3
@@ -0,0 +1,78 @@
+from collections.abc import Callable
+from typing import Any
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+from onyx.access.models import DocExternalAccess
+from onyx.access.models import ExternalAccess
+from onyx.redis import redis_connector_doc_perm_sync
+from onyx.redis.redis_connector_doc_perm_sync import RedisConnectorPermissionSync
+
+
+def _make_permissions(doc_id: str, num_emails: int = 1) -> DocExternalAccess:
+    return DocExternalAccess(
+        external_access=ExternalAccess(
+            external_user_emails={f"user_{i}@example.com" for i in range(num_emails)},
+            external_user_group_ids=set(),
+            is_public=False,
+        ),
+        doc_id=doc_id,
+    )
+
+
+def _update_db(
+    batch_fn: Callable[..., Any],
+    single_fn: Callable[..., Any],
+    new_permissions: list[DocExternalAccess],
+) -> tuple[int, int]:
+    implementations = {
+        "document_update_permissions": single_fn,
+        "document_update_permissions_batch": batch_fn,
+    }
+    with patch.object(
+        redis_connector_doc_perm_sync,
+        "fetch_versioned_implementation",
+        side_effect=lambda module, attribute: implementations[attribute],
+    ):
+        result = RedisConnectorPermissionSync(
+            tenant_id="tenant", id=1, redis=MagicMock()
+        ).update_db(
+            lock=None,
+            new_permissions=new_permissions,
+            source_string="google_drive",
+            connector_id=1,
+            credential_id=1,
+        )
+    return result.num_updated, result.num_errors
+
+
+def test_update_db_writes_documents_in_one_batch() -> None:
+    batch_fn = MagicMock()
+    single_fn = MagicMock()
+    too_large = _make_permissions(
+        "too_large", num_emails=ExternalAccess.MAX_NUM_ENTRIES + 1
+    )
+    new_permissions = [_make_permissions("doc_a"), too_large, _make_permissions("b")]
+
+    assert _update_db(batch_fn, single_fn, new_permissions) == (2, 0)
+
+    batch_fn.assert_called_once()
+    assert [p.doc_id for p in batch_fn.call_args.args[1]] == ["doc_a", "b"]
+    single_fn.assert_not_called()
+
+
+def test_update_db_falls_back_to_single_documents() -> None:
+    batch_fn = MagicMock(side_effect=RuntimeError("batch failed"))
+
+    def single_fn(tenant_id: str, permissions: DocExternalAccess, *args: Any) -> bool:
+        if permissions.doc_id == "bad_doc":
+            raise RuntimeError("bad document")
+        return True
+
+    new_permissions = [
+        _make_permissions("doc_a"),
+        _make_permissions("bad_doc"),
+        _make_permissions("doc_b"),
+    ]
+
+    assert _update_db(batch_fn, single_fn, new_permissions) == (2, 1)
@@ -0,0 +1,98 @@
+from collections.abc import Callable
+from collections.abc import Iterator
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+import pytest
+
+from onyx.configs.constants import OnyxCeleryTask
+from onyx.redis import redis_document_set
+from onyx.redis import redis_object_helper
+from onyx.redis import redis_usergroup
+from onyx.redis.redis_document_set import RedisDocumentSet
+from onyx.redis.redis_usergroup import RedisUserGroup
+
+DOC_IDS = ["doc_1", "doc_2", "doc_3", "doc_4", "doc_5"]
+
+_MakeHelper = Callable[[], RedisDocumentSet | RedisUserGroup]
+
+
+@pytest.fixture(autouse=True)
+def mock_db() -> Iterator[None]:
+    with (
+        patch.object(redis_object_helper, "get_redis_client"),
+        patch.object(redis_document_set, "construct_document_id_select_by_docset"),
+        patch.object(
+            redis_usergroup.global_version, "is_ee_version", return_value=True
+        ),
+        patch.object(redis_usergroup, "fetch_versioned_implementation"),
+    ):
+        yield
+
+
+def _generate_tasks(
+    helper: RedisDocumentSet | RedisUserGroup, batch_size: int
+) -> tuple[tuple[int, int] | None, MagicMock, MagicMock]:
+    celery_app = MagicMock()
+    redis_client = MagicMock()
+    db_session = MagicMock()
+    db_session.scalars.return_value.yield_per.return_value = iter(DOC_IDS)
+
+    result = helper.generate_tasks(
+        100, celery_app, db_session, redis_client, MagicMock(), "tenant", batch_size
+    )
+    return result, celery_app, redis_client
+
+
+@pytest.mark.parametrize(
+    "make_helper",
+    [lambda: RedisDocumentSet("tenant", 3), lambda: RedisUserGroup("tenant", 3)],
+)
+def test_one_task_per_document_without_batching(make_helper: _MakeHelper) -> None:
+    helper = make_helper()
+    result, celery_app, redis_client = _generate_tasks(helper, 1)
+
+    assert result == (len(DOC_IDS), len(DOC_IDS))
+    assert [
+        (call.args[0], call.kwargs["kwargs"])
+        for call in celery_app.send_task.call_args_list
+    ] == [
+        (
+            OnyxCeleryTask.VESPA_METADATA_SYNC_TASK,
+            {"document_id": doc_id, "tenant_id": "tenant"},
+        )
+        for doc_id in DOC_IDS
+    ]
+    task_ids = [call.kwargs["task_id"] for call in celery_app.send_task.call_args_list]
+    assert [call.args for call in redis_client.sadd.call_args_list] == [
+        (helper.taskset_key, task_id) for task_id in task_ids
+    ]
+
+
+@pytest.mark.parametrize(
+    "make_helper",
+    [lambda: RedisDocumentSet("tenant", 3), lambda: RedisUserGroup("tenant", 3)],
+)
+def test_documents_are_batched(make_helper: _MakeHelper) -> None:
+    helper = make_helper()
+    result, celery_app, redis_client = _generate_tasks(helper, 2)
+
+    # the task count is what the fence tracks, the document count is for logging
+    assert result == (3, len(DOC_IDS))
+    assert [
+        (call.args[0], call.kwargs["kwargs"])
+        for call in celery_app.send_task.call_args_list
+    ] == [
+        (
+            OnyxCeleryTask.VESPA_METADATA_SYNC_BATCH_TASK,
+            {"document_ids": batch, "tenant_id": "tenant"},
+        )
+        for batch in [["doc_1", "doc_2"], ["doc_3", "doc_4"], ["doc_5"]]
+    ]
+    # one taskset entry per batch, added before the task is sent
+    task_ids = [call.kwargs["task_id"] for call in celery_app.send_task.call_args_list]
+    assert len(set(task_ids)) == 3
+    assert all(task_id.startswith(helper.task_id_prefix) for task_id in task_ids)
+    assert [call.args for call in redis_client.sadd.call_args_list] == [
+        (helper.taskset_key, task_id) for task_id in task_ids
+    ]
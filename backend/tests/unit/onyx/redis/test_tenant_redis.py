@@ -0,0 +1,114 @@
+from typing import Any
+from typing import cast
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+import redis
+
+from onyx.configs.constants import OnyxRedisConstants
+from onyx.redis.redis_pool import TenantRedis
+from onyx.redis.redis_utils import get_active_fences
+
+
+def _make_client() -> TenantRedis:
+    # no connection is made until a command is executed
+    return TenantRedis("tenant", connection_pool=redis.ConnectionPool())
+
+
+def test_commands_are_prefixed() -> None:
+    client = _make_client()
+    executed: list[tuple[Any, ...]] = []
+
+    def mock_execute_command(self: redis.Redis, *args: Any, **options: Any) -> Any:
+        executed.append(args)
+        return None
+
+    with patch.object(redis.Redis, "execute_command", mock_execute_command):
+        client.set("key", 1, ex=10)
+        client.incr(b"counter")
+        client.mget(["a", "b"], "tenant:c")
+        client.delete("a", "b")
+        client.expire(name="key", time=5)
+        client.smove("src", "dst", "member")
+
+    assert executed == [
+        ("SET", "tenant:key", 1, "EX", 10),
+        ("INCRBY", b"tenant:counter", 1),
+        ("MGET", "tenant:a", "tenant:b", "tenant:c"),
+        ("DEL", "tenant:a", "tenant:b"),
+        ("EXPIRE", "tenant:key", 5),
+        ("SMOVE", "tenant:src", "tenant:dst", "member"),
+    ]
+
+
+def test_pipeline_commands_are_prefixed() -> None:
+    pipe = _make_client().pipeline(transaction=False)
+    pipe.set("key", 1)
+    pipe.sadd("set", "member")
+    pipe.exists("a", "b")
+    pipe.mset({"c": 1})
+
+    assert [args for args, _ in pipe.command_stack] == [
+        ("SET", "tenant:key", 1),
+        ("SADD", "tenant:set", "member"),
+        ("EXISTS", "tenant:a", "tenant:b"),
+        ("MSET", "tenant:c", 1),
+    ]
+
+
+def test_get_active_fences_checks_fences_in_one_round_trip() -> None:
+    r = MagicMock()
+    r.pipeline.return_value.execute.return_value = [1, 0, 1]
+    r_replica = MagicMock()
+    r_replica.smembers.return_value = [b"fence_a", b"fence_b", b"fence_c"]
+
+    active_fences = get_active_fences(r, r_replica)
+
+    assert active_fences == [b"fence_a", b"fence_c"]
+    assert r.pipeline.return_value.exists.call_count == 3
+    r.pipeline.return_value.execute.assert_called_once()
+    r.exists.assert_not_called()
+    r.srem.assert_called_once_with(OnyxRedisConstants.ACTIVE_FENCES, b"fence_b")
+
+
+def test_blocking_pop_sees_pushed_values() -> None:
+    client = _make_client()
+    lists: dict[Any, list[Any]] = {}
+    executed: list[tuple[Any, ...]] = []
+
+    def mock_execute_command(self: redis.Redis, *args: Any, **options: Any) -> Any:
+        executed.append(args)
+        command, *command_args = args
+        if command == "RPUSH":
+            key, *values = command_args
+            lists.setdefault(key, []).extend(values)
+            return len(lists[key])
+        if command == "BLPOP":
+            *keys, _timeout = command_args
+            for key in keys:
+                if lists.get(key):
+                    return (key.encode(), lists[key].pop(0))
+            return None
+        if command == "HSCAN":
+            return (0, {})
+        return None
+
+    with patch.object(redis.Redis, "execute_command", mock_execute_command):
+        client.rpush("k", "v")
+        client.expire("k", 60)
+        popped = cast(tuple[bytes, str], client.blpop(["k"], timeout=1))
+        assert popped == (b"k", "v")
+        assert client.blpop(["k"], timeout=1) is None
+        client.brpop(["a", "b"], timeout=1)
+        client.brpoplpush("src", "dst", timeout=1)
+        list(client.hscan_iter("hash", match="field*"))
+
+    assert executed[:4] == [
+        ("RPUSH", "tenant:k", "v"),
+        ("EXPIRE", "tenant:k", 60),
+        ("BLPOP", "tenant:k", 1),
+        ("BLPOP", "tenant:k", 1),
+    ]
+    assert executed[4] == ("BRPOP", "tenant:a", "tenant:b", 1)
+    assert executed[5] == ("BRPOPLPUSH", "tenant:src", "tenant:dst", 1)
+    assert executed[6][:2] == ("HSCAN", "tenant:hash")
@@ -1,10 +1,23 @@
 """Unit tests for search utility functions."""
 
+from typing import Any
 from typing import NamedTuple
+from unittest.mock import MagicMock
 
 import pytest
 
+from onyx.configs.constants import DocumentSource
+from onyx.context.search.models import InferenceChunk
+from onyx.context.search.models import InferenceSection
+from onyx.context.search.utils import inference_section_from_chunks
+from onyx.document_index.interfaces import VespaChunkRequest
 from onyx.tools.tool_implementations.search.search_tool import deduplicate_queries
+from onyx.tools.tool_implementations.search.search_utils import (
+    expand_section_with_context,
+)
+from onyx.tools.tool_implementations.search.search_utils import (
+    retrieve_adjacent_chunks_batch,
+)
 from onyx.tools.tool_implementations.search.search_utils import (
     weighted_reciprocal_rank_fusion,
 )
@@ -571,3 +584,174 @@ class TestDeduplicateQueries:
         assert len(result) == 1
         assert result[0][0] == "Café"
         assert result[0][1] == 4.5
+
+
+# =============================================================================
+# Tests for retrieve_adjacent_chunks_batch
+# =============================================================================
+
+
+def _make_chunk(document_id: str, chunk_id: int) -> InferenceChunk:
+    return InferenceChunk(
+        document_id=document_id,
+        chunk_id=chunk_id,
+        content=f"{document_id} chunk {chunk_id}",
+        source_type=DocumentSource.WEB,
+        semantic_identifier=document_id,
+        title=document_id,
+        boost=1,
+        recency_bias=1.0,
+        score=None,
+        hidden=False,
+        metadata={},
+        match_highlights=[],
+        doc_summary="",
+        chunk_context="",
+        updated_at=None,
+        image_file_id=None,
+        source_links={},
+        section_continuation=False,
+        blurb="",
+    )
+
+
+def _make_section(document_id: str, chunk_ids: list[int]) -> InferenceSection:
+    chunks = [_make_chunk(document_id, chunk_id) for chunk_id in chunk_ids]
+    section = inference_section_from_chunks(center_chunk=chunks[0], chunks=chunks)
+    assert section is not None
+    return section
+
+
+class FakeDocumentIndex:
+    """Serves id based retrievals from in-memory documents with num_chunks each."""
+
+    def __init__(self, doc_id_to_num_chunks: dict[str, int]) -> None:
+        self.doc_id_to_num_chunks = doc_id_to_num_chunks
+        self.calls: list[list[VespaChunkRequest]] = []
+
+    def id_based_retrieval(
+        self, chunk_requests: list[VespaChunkRequest], **kwargs: Any
+    ) -> list[InferenceChunk]:
+        self.calls.append(chunk_requests)
+        chunks = []
+        for request in chunk_requests:
+            num_chunks = self.doc_id_to_num_chunks.get(request.document_id, 0)
+            max_chunk_ind = (
+                request.max_chunk_ind
+                if request.max_chunk_ind is not None
+                else num_chunks - 1
+            )
+            for chunk_id in range(
+                request.min_chunk_ind or 0, min(max_chunk_ind, num_chunks - 1) + 1
+            ):
+                chunks.append(_make_chunk(request.document_id, chunk_id))
+        # the index makes no ordering guarantees
+        return list(reversed(chunks))
+
+
+class TestRetrieveAdjacentChunksBatch:
+    """Test suite for retrieve_adjacent_chunks_batch function."""
+
+    def test_single_round_trip(self) -> None:
+        """All sections are expanded with one retrieval and get their own chunks back."""
+        document_index = FakeDocumentIndex({"doc_a": 20, "doc_b": 3})
+        sections = [
+            _make_section("doc_a", [10, 11]),
+            _make_section("doc_b", [0]),
+            _make_section("doc_a", [2]),
+        ]
+
+        results = retrieve_adjacent_chunks_batch(
+            sections=sections,
+            document_index=document_index,  # type: ignore[arg-type]
+            num_chunks_above=3,
+            num_chunks_below=3,
+        )
+
+        assert len(document_index.calls) == 1
+        # one range per section, which spans the section's own chunks
+        assert [
+            (request.document_id, request.min_chunk_ind, request.max_chunk_ind)
+            for request in document_index.calls[0]
+        ] == [("doc_a", 0, 5), ("doc_a", 7, 14), ("doc_b", 1, 3)]
+
+        def _chunk_ids(chunks: list[InferenceChunk]) -> list[int]:
+            return [chunk.chunk_id for chunk in chunks]
+
+        assert [(_chunk_ids(above), _chunk_ids(below)) for above, below in results] == [
+            ([7, 8, 9], [12, 13, 14]),
+            ([], [1, 2]),
+            ([0, 1], [3, 4, 5]),
+        ]
+        assert all(
+            chunk.document_id == "doc_a" for chunk in results[0][0] + results[2][1]
+        )
+
+    def test_overlapping_sections_share_a_range(self) -> None:
+        """Sections of a document with overlapping or touching ranges are merged."""
+        document_index = FakeDocumentIndex({"doc_a": 40})
+        sections = [
+            _make_section("doc_a", [10]),
+            _make_section("doc_a", [14]),
+            _make_section("doc_a", [21]),
+            _make_section("doc_a", [30]),
+        ]
+
+        results = retrieve_adjacent_chunks_batch(
+            sections=sections,
+            document_index=document_index,  # type: ignore[arg-type]
+            num_chunks_above=3,
+            num_chunks_below=3,
+        )
+
+        assert [
+            (request.min_chunk_ind, request.max_chunk_ind)
+            for request in document_index.calls[0]
+        ] == [(7, 24), (27, 33)]
+        assert [
+            ([chunk.chunk_id for chunk in above], [chunk.chunk_id for chunk in below])
+            for above, below in results
+        ] == [
+            ([7, 8, 9], [11, 12, 13]),
+            ([11, 12, 13], [15, 16, 17]),
+            ([18, 19, 20], [22, 23, 24]),
+            ([27, 28, 29], [31, 32, 33]),
+        ]
+
+    def test_retrieval_failure_returns_no_chunks(self) -> None:
+        """A failing retrieval leaves the sections unexpanded instead of raising."""
+        document_index = MagicMock()
+        document_index.id_based_retrieval.side_effect = RuntimeError("boom")
+
+        results = retrieve_adjacent_chunks_batch(
+            sections=[_make_section("doc_a", [4])],
+            document_index=document_index,
+            num_chunks_above=2,
+            num_chunks_below=2,
+        )
+
+        assert results == [([], [])]
+
+    def test_expand_section_uses_prefetched_chunks(self) -> None:
+        """Expansion with prefetched chunks doesn't touch the document index."""
+        section = _make_section("doc_a", [5])
+        adjacent_chunks = (
+            [_make_chunk("doc_a", chunk_id) for chunk_id in range(0, 5)],
+            [_make_chunk("doc_a", chunk_id) for chunk_id in range(6, 11)],
+        )
+        document_index = MagicMock()
+
+        expanded_section = expand_section_with_context(
+            section=section,
+            user_query="query",
+            llm=MagicMock(),
+            document_index=document_index,
+            expand_override=True,
+            adjacent_chunks=adjacent_chunks,
+        )
+
+        document_index.id_based_retrieval.assert_not_called()
+        assert expanded_section is not None
+        assert [chunk.chunk_id for chunk in expanded_section.chunks] == list(
+            range(0, 11)
+        )